@@ -83,13 +83,18 @@ class CounterThread(Thread):
                 if self._running:
                     # synchronize with the application, to avoid concurrent
                     # edits on the label's value.
-                    number = self._renderLabel.getData()
-                    self._renderLabel.setValue(number)
-                    self._renderLabel.setData(number + 1)
+                    with self._renderLabel.getApplication().getLock():
+                        number = self._renderLabel.getData()
+                        self._renderLabel.setValue(number)
+                        self._renderLabel.setData(number + 1)
                 time.sleep(SLEEP_TIME_IN_MILLIS)
-            self._renderLabel.setValue('[ counter thread expired ]')
+            self.setLabelValue('[ counter thread expired ]')
         except KeyboardInterrupt:
-            self._renderLabel.setValue('[ counter thread interrupted ]')
+            self.setLabelValue('[ counter thread interrupted ]')
+
+    def setLabelValue(self, value):
+        with self._renderLabel.getApplication().getLock():
+            self._renderLabel.setValue(value)
 
     def startCounting(self):
         self._running = True
@@ -9,7 +9,8 @@ import logging
 
 from warnings import warn
 
-from muntjac.util import EventObject, IEventListener, defaultLocale
+from muntjac.util import \
+    EventObject, IEventListener, ReentrantLock, defaultLocale
 from muntjac.terminal.uri_handler import IUriHandler
 from muntjac.terminal.sys_error import SysError
 from muntjac.terminal.terminal import IErrorListener, ITerminal
@@ -55,6 +56,16 @@ class Application(IUriHandler, ITerminal, IErrorListener):
     execution of the application. Being finished means basically that no
     windows will be available from the application anymore.
 
+    B{Concurrency.} Requests to different applications are processed in
+    parallel, but requests to the same application are processed one at a
+    time while holding the lock returned by L{getLock}. Threads other than
+    request threads, e.g. background workers updating a progress indicator,
+    must hold the same lock while accessing the components of the
+    application::
+
+        with application.getLock():
+            label.setValue('Done')
+
     B{Theme selection.} The theme selection process allows a theme to be
     specified at three different levels. When a window's theme needs to be
     found out, the window itself is queried for a preferred theme. If the
@@ -134,6 +145,21 @@ class Application(IUriHandler, ITerminal, IErrorListener):
         #  is left unhandled.
         self._errorHandler = self
 
+        #: Lock held while processing requests to the application.
+        self._lock = ReentrantLock()
+
+
+    def __getstate__(self):
+        # locks can not be pickled
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = ReentrantLock()
+
 
     def getWindow(self, name):
         """Gets a window by name. Returns C{None} if the application is
@@ -853,6 +879,17 @@ class Application(IUriHandler, ITerminal, IErrorListener):
         return self._context
 
 
+    def getLock(self):
+        """Gets the re-entrant lock guarding the state of the application.
+        The terminal holds the lock while processing a request to the
+        application. Other threads must hold it while accessing the
+        application or its components.
+
+        @return: the L{ReentrantLock} of the application
+        """
+        return self._lock
+
+
     def getVersion(self):
         """Override this method to return correct version number of your
         Application. Version information is delivered for example to Testing
@@ -429,6 +429,46 @@ class IIndexed(IOrdered):
         raise NotImplementedError
 
 
+class IBulkIndexed(IIndexed):
+    """Interface for L{IIndexed} containers that can return the ids of a
+    range of items and the property values of several items with a single
+    call. Views rendering a range of items, such as L{Table}, use it
+    instead of looking up the items and properties one at a time, which
+    lets lazy containers fetch the range at once.
+    """
+
+    def getItemIdsInRange(self, startIndex, numberOfItems):
+        """Gets the IDs of the Items at the given range of indexes.
+
+        @param startIndex:
+                   index of the first requested id in (the filtered and
+                   sorted view of) the IContainer
+        @param numberOfItems:
+                   the number of ids requested
+        @return: list of the ids of the Items at indexes C{startIndex} to
+                 C{startIndex + numberOfItems - 1}, shorter if the end of
+                 the IContainer is reached
+        """
+        raise NotImplementedError
+
+
+    def getItemValues(self, itemIds, propertyIds):
+        """Gets the values of the given Properties of the given Items.
+
+        The string representation of a value must be the same as that of
+        the Property it is read from, or the empty string for C{None}.
+
+        @param itemIds:
+                   IDs of Items in the IContainer
+        @param propertyIds:
+                   IDs of the Properties
+        @return: list containing a list of values for each Item, in the
+                 order of C{propertyIds}. The value is C{None} if the
+                 Item does not have the Property.
+        """
+        raise NotImplementedError
+
+
 class IHierarchical(IContainer):
     """Interface for C{IContainer} classes whose Items can be arranged
     hierarchically. This means that the Items in the container belong in a
@@ -922,3 +962,88 @@ class IPropertySetChangeNotifier(object):
 
     def removeCallback(self, callback, eventType=None):
         raise NotImplementedError
+
+
+class IPropertyValueChangeEvent(object):
+    """An C{Event} object specifying the IContainer, the Item and the
+    Property whose value has changed.
+
+    A property value change is not an item set change, but it can cause
+    one if the container is sorted or filtered by the property.
+    """
+
+    def getContainer(self):
+        """Retrieves the IContainer whose contents have been modified.
+
+        @return: Source IContainer of the event.
+        """
+        raise NotImplementedError
+
+
+    def getItemId(self):
+        """Gets the ID of the Item whose property value has changed.
+
+        @return: ID of the changed Item
+        """
+        raise NotImplementedError
+
+
+    def getPropertyId(self):
+        """Gets the ID of the Property whose value has changed.
+
+        @return: ID of the changed Property
+        """
+        raise NotImplementedError
+
+
+class IPropertyValueChangeListener(object):
+    """The listener interface for receiving C{IPropertyValueChangeEvent}
+    objects.
+
+    Listening to the container receives the value changes of all the
+    properties of all the items, instead of adding a listener to each
+    property.
+    """
+
+    def containerPropertyValueChange(self, event):
+        """Notifies this listener that the value of a property of an Item in
+        the IContainer has changed.
+
+        @param event:
+                   Change event.
+        """
+        raise NotImplementedError
+
+
+class IPropertyValueChangeNotifier(object):
+    """The interface for adding and removing C{IPropertyValueChangeEvent}
+    listeners. By implementing this interface a class explicitly announces
+    that it will generate a C{IPropertyValueChangeEvent} whenever the value
+    of a property of one of its items is changed through the property.
+    """
+
+    def addListener(self, listener, iface=None):
+        """Registers a new Property value change listener for this
+        IContainer.
+
+        @param listener:
+                   The new Listener to be registered
+        """
+        raise NotImplementedError
+
+
+    def addCallback(self, callback, eventType=None, *args):
+        raise NotImplementedError
+
+
+    def removeListener(self, listener, iface=None):
+        """Removes a previously registered Property value change listener.
+
+        @param listener:
+                   Listener to be removed
+        """
+        raise NotImplementedError
+
+
+    def removeCallback(self, callback, eventType=None):
+        raise NotImplementedError
@@ -15,6 +15,8 @@ class IItem(object):
     @version: @VERSION@
     """
 
+    __slots__ = ()
+
     def getItemProperty(self, idd):
         """Gets the Property corresponding to the given Property ID stored in
         the IItem. If the IItem does not contain the Property, C{None} is
@@ -25,6 +25,8 @@ class IProperty(object):
     @version: @VERSION@
     """
 
+    __slots__ = ()
+
     def getValue(self):
         """Gets the value stored in the IProperty. The returned object is
         compatible with the class returned by getType().
@@ -244,6 +246,8 @@ class IValueChangeNotifier(object):
     @version: @VERSION@
     """
 
+    __slots__ = ()
+
     def addListener(self, listener, iface=None):
         """Registers a new value change listener for this IProperty.
 
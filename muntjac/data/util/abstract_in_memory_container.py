@@ -4,16 +4,22 @@
 """Abstract container class that handles common functionality for
 in-memory containers."""
 
-from muntjac.data.util.default_item_sorter import DefaultItemSorter
+from muntjac.data.util.list_set import ListSet
+from muntjac.data.util.key_sorter import KeySorter, searchSorted
+
+from muntjac.data.util.default_item_sorter import \
+    DefaultItemSorter, DefaultPropertyValueComparator
+
+from muntjac.data.util.filter_evaluator import FilterEvaluator
 
 from muntjac.data.container import \
-    IIndexed, IItemSetChangeNotifier, ISortable
+    IBulkIndexed, IItemSetChangeNotifier, ISortable
 
 from muntjac.data.util.abstract_container import AbstractContainer
 
 
 class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
-            IIndexed):  #IContainer,
+            IBulkIndexed):  #IContainer,
     """Abstract L{IContainer} class that handles common functionality for
     in-memory containers. Concrete in-memory container classes can either
     inherit this class, inherit L{AbstractContainer}, or implement the
@@ -32,7 +38,7 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
 
     Features:
       - L{IOrdered}
-      - L{IIndexed}
+      - L{IIndexed} and L{IBulkIndexed}
       - L{Filterable} and L{SimpleFilterable} (internal implementation,
         does not implement the interface directly)
       - L{ISortable} (internal implementation, does not implement the
@@ -91,9 +97,15 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
         #: The item sorter which is used for sorting the container.
         self._itemSorter = DefaultItemSorter()
 
+        #: True if the container has been sorted with L{sortContainer}.
+        self._sorted = False
+
+        #: Evaluates the filters and maintains the property indexes.
+        self._filterEvaluator = FilterEvaluator(self)
+
         #: IContainer interface methods with more specific return class
         #  default implementation, can be overridden
-        self.setAllItemIds(list())  # FIXME: use ListSet
+        self.setAllItemIds(ListSet())
 
 
     def getItem(self, itemId):
@@ -110,6 +122,31 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
         """
         pass
 
+
+    def getItemValue(self, itemId, propertyId):
+        """Returns the value of a property of an item even if filtered out.
+        Subclasses storing the values can override this to avoid creating
+        the item.
+
+        For internal use only.
+        """
+        item = self.getUnfilteredItem(itemId)
+        if item is None:
+            return None
+        p = item.getItemProperty(propertyId)
+        return None if p is None else p.getValue()
+
+
+    def getPropertyValues(self, itemIds, propertyId):
+        """Returns the values of a property of the given items, even if
+        filtered out. Subclasses storing the values by property can
+        override this to read them in bulk.
+
+        For internal use only.
+        """
+        getItemValue = self.getItemValue
+        return [getItemValue(itemId, propertyId) for itemId in itemIds]
+
     # cannot override getContainerPropertyIds() and getItemIds(): if subclass
     # uses Object as ITEMIDCLASS or PROPERTYIDCLASS, Collection<Object> cannot
     # be cast to Collection<MyInterface>
@@ -187,10 +224,20 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
 
 
     def indexOfId(self, itemId):
-        try:
-            return self.getVisibleItemIds().index(itemId)
-        except ValueError:
-            return -1
+        return self.getVisibleItemIds().indexOf(itemId)
+
+
+    def getItemIdsInRange(self, startIndex, numberOfItems):
+        return list(self.getVisibleItemIds()[startIndex:
+                startIndex + numberOfItems])
+
+
+    def getItemValues(self, itemIds, propertyIds):
+        if len(propertyIds) == 0:
+            return [list() for _ in itemIds]
+        columns = [self.getPropertyValues(itemIds, propertyId)
+                for propertyId in propertyIds]
+        return [list(values) for values in zip(*columns)]
 
 
     def addItemAt(self, index, newItemId=None):
@@ -262,6 +309,57 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
             self.fireItemSetChange()
 
 
+    def filterItem(self, itemId):
+        """Re-checks a single item against the filters after its property
+        values have changed and adds it to or removes it from the visible
+        items without filtering the other items again. Sends a notification
+        if the visibility of the item changed.
+
+        Subclasses whose filtered view depends on more than the item itself
+        should override this to call L{filterAll}.
+
+        @param itemId:
+                   An itemId that exists in the container.
+        """
+        if not self.isFiltered():
+            self.filterAll()
+            return
+
+        filteredItemIds = self.getFilteredItemIds()
+        passes = self.passesFilters(itemId)
+        if passes == (itemId in filteredItemIds):
+            return
+
+        if passes:
+            position = self.getFilteredPosition(itemId)
+            filteredItemIds.insert(position, itemId)
+            self.fireItemAdded(position, itemId,
+                    self.getUnfilteredItem(itemId))
+        else:
+            position = filteredItemIds.index(itemId)
+            del filteredItemIds[position]
+            self.fireItemRemoved(position, itemId)
+
+
+    def getFilteredPosition(self, itemId):
+        """Returns the position at which the given item belongs in the
+        filtered item identifiers, which keep the order of all the item
+        identifiers.
+        """
+        allItemIds = self.getAllItemIds()
+        filteredItemIds = self.getFilteredItemIds()
+        index = allItemIds.indexOf(itemId)
+
+        low, high = 0, len(filteredItemIds)
+        while low < high:
+            mid = (low + high) / 2
+            if allItemIds.indexOf(filteredItemIds[mid]) < index:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+
     def doFilterContainer(self, hasFilters):
         """Filters the data in the container and updates internal data
         structures. This method should reset any internal data structures
@@ -286,27 +384,31 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
             originalFilteredItemIds = list()
             wasUnfiltered = True
 
-        self.setFilteredItemIds(list())  # FIXME: use ListSet
-
         # Filter
-        equal = True
-        origIt = iter(originalFilteredItemIds)
-        for idd in self.getAllItemIds():
-            if self.passesFilters(idd):
-                # filtered list comes from the full list, can use ==
-                try:
-                    equal = equal and (origIt.next() == idd)
-                except StopIteration:
-                    equal = False
-
-                self.getFilteredItemIds().append(idd)
+        allItemIds = self.getAllItemIds()
+        candidates = self.getFilterCandidates()
+        if candidates is None:
+            filteredItemIds = [idd for idd in allItemIds
+                    if self.passesFilters(idd)]
+        else:
+            # only the items found in the property indexes need to be
+            # checked, they are put back in the order of all items
+            filteredItemIds = [idd for idd in candidates
+                    if self.passesFilters(idd)]
+            filteredItemIds.sort(key=allItemIds.indexOf)
 
-        try:
-            origIt.next()
-            return True
-        except StopIteration:
-            return (wasUnfiltered and (len(self.getAllItemIds()) > 0)
-                    or (not equal))
+        self.setFilteredItemIds(ListSet(filteredItemIds))
+
+        return ((wasUnfiltered and (len(allItemIds) > 0))
+                or (filteredItemIds != originalFilteredItemIds))
+
+
+    def getFilterCandidates(self):
+        """Returns the ids of the items that may pass the filters set for
+        the container according to the property indexes, or None if all
+        the items must be checked.
+        """
+        return self._filterEvaluator.intersection(self.getFilters())
 
 
     def passesFilters(self, itemId):
@@ -319,15 +421,51 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
         @return: true if the itemId passes all filters or no filters are set,
                 false otherwise.
         """
-        item = self.getUnfilteredItem(itemId)
-        if len(self.getFilters()) == 0:
+        filters = self.getFilters()
+        if len(filters) == 0:
             return True
 
-        for f in self.getFilters():
-            if not f.passesFilter(itemId, item):
-                return False
+        return self._filterEvaluator.passesAll(filters, itemId)
 
-        return True
+
+    def getFilterEvaluator(self):
+        """Returns the evaluator of the filters of this container.
+
+        For internal use only.
+        """
+        return self._filterEvaluator
+
+
+    def addPropertyIndex(self, propertyId):
+        """Maintains an index of the values of the given property. Filters
+        comparing the values of indexed properties (L{Compare}, L{Between},
+        L{In} and L{IsNull}, also within L{And} and L{Or}) are evaluated
+        with the index, so that filtering takes time proportional to the
+        number of items found instead of the number of items in the
+        container.
+
+        The values of an indexed property must be hashable.
+
+        @param propertyId:
+                   the id of the property to index
+        """
+        self._filterEvaluator.addIndex(propertyId)
+
+
+    def removePropertyIndex(self, propertyId):
+        """Stops maintaining the index of the values of the given property.
+
+        @see: L{addPropertyIndex}
+        """
+        self._filterEvaluator.removeIndex(propertyId)
+
+
+    def hasPropertyIndex(self, propertyId):
+        """Returns true if an index is maintained for the given property.
+
+        @see: L{addPropertyIndex}
+        """
+        return self._filterEvaluator.hasIndex(propertyId)
 
 
     def addFilter(self, fltr):
@@ -453,6 +591,7 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
 
         # Set up the item sorter for the sort operation
         self.getItemSorter().setSortProperties(self, propertyId, ascending)
+        self._sorted = True
 
         # Perform the actual sort
         self.doSort()
@@ -467,11 +606,110 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
     def doSort(self):
         """Perform the sorting of the data structures in the container. This
         is invoked when the C{itemSorter} has been prepared for the sort
-        operation. Typically this method calls L{sorted} on all arrays
+        operation. Typically this method calls L{sortItemIds} on all arrays
         (containing item ids) that need to be sorted.
         """
-        sortedIds = sorted(self.getAllItemIds(), cmp=self.getItemSorter())
-        self.setAllItemIds(sortedIds)
+        sortedIds = self.sortItemIds(self.getAllItemIds(),
+                self.getKeySorter())
+        self.setAllItemIds(ListSet(sortedIds))
+
+
+    def getKeySorter(self):
+        """Returns a L{KeySorter} sorting in the order of the item sorter,
+        or None if the item sorter is not a L{DefaultItemSorter} with the
+        default comparator and items must be compared with the item sorter.
+        """
+        sorter = self.getItemSorter()
+        if (type(sorter) != DefaultItemSorter
+                or type(sorter.getPropertyValueComparator())
+                        != DefaultPropertyValueComparator
+                or sorter.getSortPropertyIds() is None):
+            return None
+
+        return KeySorter(self, sorter.getSortPropertyIds(),
+                sorter.getSortDirections())
+
+
+    def sortItemIds(self, itemIds, keySorter=None):
+        """Returns the given item ids sorted with the key sorter if given,
+        otherwise by comparing the items with the item sorter.
+
+        @param itemIds:
+                   the item ids to sort
+        @param keySorter:
+                   the key sorter returned by L{getKeySorter}, can be
+                   shared between calls during one sort operation
+        """
+        if keySorter is None:
+            return sorted(itemIds, cmp=self.getItemSorter().compare)
+        else:
+            return keySorter.sort(itemIds)
+
+
+    def sortItem(self, itemId):
+        """Moves an item to its position in the current sort order after it
+        has been added or its property values have changed, finding the
+        position with a binary search instead of sorting all the items.
+        The other items are assumed to be in the sort order. Does nothing
+        if the container has not been sorted.
+
+        @param itemId:
+                   the id of an item in the container
+        @return: true if the position of the item changed
+        """
+        if not self._sorted:
+            return False
+
+        keySorter = self.getKeySorter()
+        if keySorter is None:
+            compare = self.getItemSorter().compare
+        else:
+            compare = keySorter.compare
+
+        allItemIds = self.getAllItemIds()
+        index = allItemIds.index(itemId)
+        if not self.isFiltered():
+            allItemIds.remove(itemId)
+            newIndex = searchSorted(allItemIds, itemId, compare)
+            allItemIds.insert(newIndex, itemId)
+        elif itemId in self.getFilteredItemIds():
+            # hidden items are sorted after the visible ones, so the item
+            # is placed next to its new neighbours among the visible items
+            filteredItemIds = self.getFilteredItemIds()
+            filteredItemIds.remove(itemId)
+            filteredIndex = searchSorted(filteredItemIds, itemId, compare)
+            filteredItemIds.insert(filteredIndex, itemId)
+
+            allItemIds.remove(itemId)
+            if filteredIndex > 0:
+                newIndex = allItemIds.index(
+                        filteredItemIds[filteredIndex - 1]) + 1
+            elif len(filteredItemIds) > 1:
+                newIndex = allItemIds.index(filteredItemIds[1])
+            else:
+                newIndex = index
+            allItemIds.insert(newIndex, itemId)
+        else:
+            # hidden items keep their positions
+            newIndex = index
+
+        moved = self.moveSortedItem(itemId, compare) or index != newIndex
+
+        if moved:
+            self.fireItemSetChange()
+        return moved
+
+
+    def moveSortedItem(self, itemId, compare):
+        """Moves an item in the other sorted data structures of the
+        container when it is sorted again by L{sortItem}. Subclasses with
+        such structures can override this.
+
+        @param compare:
+                   function comparing two item ids in the sort order
+        @return: true if the position of the item changed
+        """
+        return False
 
 
     def getSortablePropertyIds(self):
@@ -501,6 +739,8 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
         if self.isFiltered():
             del self.getFilteredItemIds()[:]
 
+        self._filterEvaluator.itemsRemoved()
+
 
     def internalRemoveItem(self, itemId):
         """Removes a single item from the internal data structures of this
@@ -523,6 +763,9 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
         except ValueError:
             result = False
 
+        if result:
+            self._filterEvaluator.itemRemoved(itemId)
+
         if result and self.isFiltered():
             try:
                 self.getFilteredItemIds().remove(itemId)
@@ -564,6 +807,7 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
         # by the caller after calling this method.
         self.getAllItemIds().insert(position, itemId)
         self.registerNewItem(position, itemId, item)
+        self._filterEvaluator.itemAdded(itemId)
 
         return item
 
@@ -731,7 +975,12 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
         """Internal helper method to set the internal list of filtered item
         identifiers. Should not be used outside this class except for
         implementing clone(), may disappear from future versions.
+
+        Plain lists are wrapped in a L{ListSet} to keep id lookups fast.
         """
+        if (filteredItemIds is not None
+                and not isinstance(filteredItemIds, ListSet)):
+            filteredItemIds = ListSet(filteredItemIds)
         self._filteredItemIds = filteredItemIds
 
 
@@ -750,7 +999,11 @@ class AbstractInMemoryContainer(AbstractContainer, IItemSetChangeNotifier,
         """Internal helper method to set the internal list of all item
         identifiers. Should not be used outside this class except for
         implementing clone(), may disappear from future versions.
+
+        Plain lists are wrapped in a L{ListSet} to keep id lookups fast.
         """
+        if allItemIds is not None and not isinstance(allItemIds, ListSet):
+            allItemIds = ListSet(allItemIds)
         self._allItemIds = allItemIds
 
 
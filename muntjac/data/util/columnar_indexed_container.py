@@ -0,0 +1,181 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""An IndexedContainer storing the property values by column."""
+
+from muntjac.data.util.indexed_container import IndexedContainer
+
+from muntjac.data.util.filter.simple_string_filter import \
+    SimpleStringFilter
+
+
+class ColumnarIndexedContainer(IndexedContainer):
+    """An L{IndexedContainer} that stores the values of each property in a
+    single list instead of keeping a dictionary of values for each item.
+
+    Every item is assigned a row, the value of a property for an item is
+    stored at the row position of the column of the property. Removing an
+    item moves the last row in its place, so the columns stay compact.
+    The items and properties returned by the container are views of the
+    columns, no per-item objects are kept.
+
+    Sorting with the default item sorter and filtering with
+    L{SimpleStringFilter} read the columns directly through
+    L{getItemValue}. Other item sorters and filters are used as in
+    L{IndexedContainer}.
+    The events sent are the same as for L{IndexedContainer}.
+    """
+
+    def __init__(self, itemIds=None):
+
+        #: Item ID to row mapping.
+        self._rows = dict()
+
+        #: Item IDs ordered by row.
+        self._rowIds = list()
+
+        #: IProperty ID to list of values ordered by row.
+        self._columns = dict()
+
+        super(ColumnarIndexedContainer, self).__init__(itemIds)
+
+        # the rows replace the items of IndexedContainer
+        self._items = self._rows
+
+
+    def getColumn(self, propertyId):
+        """Returns the list of values stored for the given property, in the
+        order of L{getRowIds}. For internal use only, the list must not be
+        modified.
+        """
+        return self._columns.get(propertyId)
+
+
+    def getRowIds(self):
+        """Returns the item ids in the order of the rows of the columns. For
+        internal use only, the list must not be modified.
+        """
+        return self._rowIds
+
+
+    def addContainerProperty(self, propertyId, typ, defaultValue):
+        if (propertyId is None or typ is None
+                or propertyId in self._propertyIds):
+            return False
+
+        self._columns[propertyId] = [None] * len(self._rowIds)
+
+        return super(ColumnarIndexedContainer, self).addContainerProperty(
+                propertyId, typ, defaultValue)
+
+
+    def removeAllItems(self):
+        origSize = len(self)
+
+        self.internalRemoveAllItems()
+
+        self._rows.clear()
+        del self._rowIds[:]
+        for column in self._columns.itervalues():
+            del column[:]
+
+        # fire event only if the visible view changed, regardless of whether
+        # filtered out items were removed or not
+        if origSize != 0:
+            # Sends a change event
+            self.fireItemSetChange()
+
+        return True
+
+
+    def removeItem(self, itemId):
+        if itemId is None or itemId not in self._rows:
+            return False
+
+        origSize = self.size()
+        position = self.indexOfId(itemId)
+        self.removeRow(itemId)
+        if self.internalRemoveItem(itemId):
+            # fire event only if the visible view changed, regardless of
+            # whether filtered out items were removed or not
+            if self.size() != origSize:
+                self.fireItemRemoved(position, itemId)
+
+            return True
+        else:
+            return False
+
+
+    def removeRow(self, itemId):
+        """Removes the row of the given item by moving the last row in its
+        place."""
+        row = self._rows.pop(itemId)
+        last = len(self._rowIds) - 1
+        if row != last:
+            lastId = self._rowIds[last]
+            self._rowIds[row] = lastId
+            self._rows[lastId] = row
+            for column in self._columns.itervalues():
+                column[row] = column[last]
+
+        self._rowIds.pop()
+        for column in self._columns.itervalues():
+            column.pop()
+
+
+    def registerNewItem(self, index, newItemId, item):
+        self._rows[newItemId] = len(self._rowIds)
+        self._rowIds.append(newItemId)
+        defaults = self._defaultPropertyValues
+        for propertyId, column in self._columns.iteritems():
+            column.append(defaults.get(propertyId) if defaults else None)
+
+
+    def getItemValue(self, itemId, propertyId):
+        column = self._columns.get(propertyId)
+        if column is None:
+            return None
+        return column[self._rows[itemId]]
+
+
+    def getPropertyValues(self, itemIds, propertyId):
+        column = self._columns.get(propertyId)
+        if column is None:
+            return [None] * len(itemIds)
+        rows = self._rows
+        return [column[rows[itemId]] for itemId in itemIds]
+
+
+    def setItemValue(self, itemId, propertyId, value):
+        self._columns[propertyId][self._rows[itemId]] = value
+
+
+    def removeItemValues(self, propertyId):
+        del self._columns[propertyId]
+
+
+    def passesFilters(self, itemId):
+        evaluator = self.getFilterEvaluator()
+        for f in self.getFilters():
+            if type(f) == SimpleStringFilter:
+                if not self.passesStringFilter(f, itemId):
+                    return False
+            else:
+                if not evaluator.passes(f, itemId):
+                    return False
+
+        return True
+
+
+    def passesStringFilter(self, fltr, itemId):
+        """Evaluates a L{SimpleStringFilter} on the column of its
+        property."""
+        value = self.getItemValue(itemId, fltr.propertyId)
+        value = '' if value is None else str(value)
+        if fltr.ignoreCase:
+            value = value.lower()
+
+        if fltr.onlyMatchPrefix:
+            return value.startswith(fltr.filterString)
+        else:
+            return fltr.filterString in value
@@ -128,6 +128,22 @@ class DefaultItemSorter(IItemSorter):
             self._sortDirections[i] = bool( orders[i] )
 
 
+    def getSortPropertyIds(self):
+        """Returns the ids of the sortable properties set using
+        L{setSortProperties}, most significant first."""
+        return self._sortPropertyIds
+
+
+    def getSortDirections(self):
+        """Returns the sort directions matching L{getSortPropertyIds},
+        C{True} for ascending."""
+        return self._sortDirections
+
+
+    def getPropertyValueComparator(self):
+        return self._propertyValueComparator
+
+
 class DefaultPropertyValueComparator(object):
     """Provides a default comparator used for comparing L{Property} values.
     The C{DefaultPropertyValueComparator} assumes all objects it compares
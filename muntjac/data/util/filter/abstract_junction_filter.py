@@ -0,0 +1,57 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Abstract base class for filters that are composed of multiple other
+filters."""
+
+from muntjac.data.container import IFilter
+
+
+class AbstractJunctionFilter(IFilter):
+    """Abstract base class for filters that are composed of multiple other
+    filters.
+
+    The L{appliesToProperty} method is provided to help implementing
+    L{IFilter} for in-memory filters.
+    """
+
+    def __init__(self, *filters):
+        self.filters = list(filters)
+
+
+    def getFilters(self):
+        """Returns an unmodifiable collection of the sub-filters of this
+        composite filter.
+        """
+        return tuple(self.filters)
+
+
+    def appliesToProperty(self, propertyId):
+        """Returns true if a change in the named property may affect the
+        filtering result. If some of the sub-filters are not in-memory
+        filters, true is returned.
+
+        By default, all sub-filters are iterated to check if any of them
+        applies. If there are no sub-filters, false is returned - override
+        in subclasses if necessary.
+        """
+        for f in self.getFilters():
+            if f.appliesToProperty(propertyId):
+                return True
+        return False
+
+
+    def __eq__(self, obj):
+        # Only objects of the same class can be equal
+        if obj is None or obj.__class__ != self.__class__:
+            return False
+
+        return self.getFilters() == obj.getFilters()
+
+
+    def __ne__(self, obj):
+        return not self.__eq__(obj)
+
+
+    def __hash__(self):
+        return hash(self.getFilters())
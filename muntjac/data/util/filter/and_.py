@@ -0,0 +1,32 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""A compound filter that accepts an item if all of its filters accept
+the item."""
+
+from muntjac.data.util.filter.abstract_junction_filter import \
+    AbstractJunctionFilter
+
+
+class And(AbstractJunctionFilter):
+    """A compound L{IFilter} that accepts an item if all of its filters
+    accept the item.
+
+    If no filters are given, the filter should accept all items.
+
+    This filter also directly supports in-memory filtering when all
+    sub-filters do so.
+    """
+
+    def __init__(self, *filters):
+        """@param filters:
+                   filters of which the And filter will be composed
+        """
+        super(And, self).__init__(*filters)
+
+
+    def passesFilter(self, itemId, item):
+        for f in self.getFilters():
+            if not f.passesFilter(itemId, item):
+                return False
+        return True
@@ -0,0 +1,73 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Filter accepting items whose property value is within a range."""
+
+from muntjac.data.container import IFilter
+
+
+class Between(IFilter):
+    """Container filter accepting items for which the identified property
+    value is between C{startValue} and C{endValue}, both inclusive. A
+    C{None} property value is never accepted.
+    """
+
+    def __init__(self, propertyId, startValue, endValue):
+        self._propertyId = propertyId
+        self._startValue = startValue
+        self._endValue = endValue
+
+
+    def passesFilter(self, itemId, item):
+        p = item.getItemProperty(self.getPropertyId())
+        if p is None:
+            return False
+        return self.passesValue(p.getValue())
+
+
+    def passesValue(self, value):
+        """Checks if a property value passes the filter.
+
+        @param value:
+                   the value of the filtered property of an item
+        @return: true if the value is accepted by this filter
+        """
+        if value is None:
+            return False
+        return self._startValue <= value <= self._endValue
+
+
+    def appliesToProperty(self, propertyId):
+        return self.getPropertyId() == propertyId
+
+
+    def __eq__(self, obj):
+        # Only objects of the same class can be equal
+        if not isinstance(obj, Between):
+            return False
+
+        return (self.getPropertyId() == obj.getPropertyId()
+                and self.getStartValue() == obj.getStartValue()
+                and self.getEndValue() == obj.getEndValue())
+
+
+    def __ne__(self, obj):
+        return not self.__eq__(obj)
+
+
+    def __hash__(self):
+        return hash(self.getPropertyId())
+
+
+    def getPropertyId(self):
+        return self._propertyId
+
+
+    def getStartValue(self):
+        """Returns the lower bound of the accepted values, inclusive."""
+        return self._startValue
+
+
+    def getEndValue(self):
+        """Returns the upper bound of the accepted values, inclusive."""
+        return self._endValue
@@ -0,0 +1,168 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Simple container filters comparing an item property value against a
+given constant value."""
+
+from muntjac.data.container import IFilter
+
+
+class Compare(IFilter):
+    """Simple container filter comparing an item property value against a
+    given constant value. Use the nested classes L{Equal}, L{Greater},
+    L{Less}, L{GreaterOrEqual} and L{LessOrEqual} instead of this class
+    directly.
+
+    This filter also directly supports in-memory filtering. A C{None}
+    property value only passes an L{Equal} filter with a C{None} value, it
+    never passes the ordering comparisons.
+    """
+
+    EQUAL = 'EQUAL'
+    GREATER = 'GREATER'
+    LESS = 'LESS'
+    GREATER_OR_EQUAL = 'GREATER_OR_EQUAL'
+    LESS_OR_EQUAL = 'LESS_OR_EQUAL'
+
+    def __init__(self, propertyId, value, operation):
+        """Constructor for a L{Compare} filter that compares the value of
+        an item property with the given constant value.
+
+        @param propertyId:
+                   the identifier of the property whose value to compare
+                   against value, not None
+        @param value:
+                   the value to compare against
+        @param operation:
+                   the comparison operation, one of the constants of this
+                   class
+        """
+        self._propertyId = propertyId
+        self._value = value
+        self._operation = operation
+
+
+    def passesFilter(self, itemId, item):
+        p = item.getItemProperty(self.getPropertyId())
+        if p is None:
+            return False
+        return self.passesValue(p.getValue())
+
+
+    def passesValue(self, value):
+        """Checks if a property value passes the filter.
+
+        @param value:
+                   the value of the filtered property of an item
+        @return: true if the value is accepted by this filter
+        """
+        operation = self._operation
+        if operation == self.EQUAL:
+            return value == self._value
+        if value is None or self._value is None:
+            return False
+        if operation == self.GREATER:
+            return value > self._value
+        elif operation == self.LESS:
+            return value < self._value
+        elif operation == self.GREATER_OR_EQUAL:
+            return value >= self._value
+        elif operation == self.LESS_OR_EQUAL:
+            return value <= self._value
+        return False
+
+
+    def appliesToProperty(self, propertyId):
+        return self.getPropertyId() == propertyId
+
+
+    def __eq__(self, obj):
+        # Only objects of the same class can be equal
+        if obj is None or obj.__class__ != self.__class__:
+            return False
+
+        return (self.getPropertyId() == obj.getPropertyId()
+                and self.getOperation() == obj.getOperation()
+                and self.getValue() == obj.getValue())
+
+
+    def __ne__(self, obj):
+        return not self.__eq__(obj)
+
+
+    def __hash__(self):
+        return hash((self.getPropertyId(), self.getOperation()))
+
+
+    def getPropertyId(self):
+        """Returns the property id of the property to compare against the
+        fixed value.
+
+        @return: property id (not None)
+        """
+        return self._propertyId
+
+
+    def getOperation(self):
+        """Returns the comparison operation.
+
+        @return: one of the operation constants of this class
+        """
+        return self._operation
+
+
+    def getValue(self):
+        """Returns the value to compare the property against.
+
+        @return: comparison reference value
+        """
+        return self._value
+
+
+class Equal(Compare):
+    """A L{Compare} filter that accepts items for which the identified
+    property value is equal to C{value}."""
+
+    def __init__(self, propertyId, value):
+        super(Equal, self).__init__(propertyId, value, Compare.EQUAL)
+
+
+class Greater(Compare):
+    """A L{Compare} filter that accepts items for which the identified
+    property value is greater than C{value}."""
+
+    def __init__(self, propertyId, value):
+        super(Greater, self).__init__(propertyId, value, Compare.GREATER)
+
+
+class Less(Compare):
+    """A L{Compare} filter that accepts items for which the identified
+    property value is less than C{value}."""
+
+    def __init__(self, propertyId, value):
+        super(Less, self).__init__(propertyId, value, Compare.LESS)
+
+
+class GreaterOrEqual(Compare):
+    """A L{Compare} filter that accepts items for which the identified
+    property value is greater than or equal to C{value}."""
+
+    def __init__(self, propertyId, value):
+        super(GreaterOrEqual, self).__init__(propertyId, value,
+                Compare.GREATER_OR_EQUAL)
+
+
+class LessOrEqual(Compare):
+    """A L{Compare} filter that accepts items for which the identified
+    property value is less than or equal to C{value}."""
+
+    def __init__(self, propertyId, value):
+        super(LessOrEqual, self).__init__(propertyId, value,
+                Compare.LESS_OR_EQUAL)
+
+
+Compare.Equal = Equal
+Compare.Greater = Greater
+Compare.Less = Less
+Compare.GreaterOrEqual = GreaterOrEqual
+Compare.LessOrEqual = LessOrEqual
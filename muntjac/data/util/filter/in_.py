@@ -0,0 +1,76 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Filter accepting items whose property value is one of given values."""
+
+from muntjac.data.container import IFilter
+
+
+class In(IFilter):
+    """Container filter accepting items for which the identified property
+    value is equal to one of the given values. The values must be
+    hashable.
+    """
+
+    def __init__(self, propertyId, values):
+        """@param propertyId:
+                   the identifier of the property whose value to check
+        @param values:
+                   iterable of the accepted values
+        """
+        self._propertyId = propertyId
+        self._values = frozenset(values)
+
+
+    def passesFilter(self, itemId, item):
+        p = item.getItemProperty(self.getPropertyId())
+        if p is None:
+            return False
+        return self.passesValue(p.getValue())
+
+
+    def passesValue(self, value):
+        """Checks if a property value passes the filter.
+
+        @param value:
+                   the value of the filtered property of an item
+        @return: true if the value is accepted by this filter
+        """
+        try:
+            return value in self._values
+        except TypeError:
+            # unhashable value
+            return False
+
+
+    def appliesToProperty(self, propertyId):
+        return self.getPropertyId() == propertyId
+
+
+    def __eq__(self, obj):
+        # Only objects of the same class can be equal
+        if not isinstance(obj, In):
+            return False
+
+        return (self.getPropertyId() == obj.getPropertyId()
+                and self.getValues() == obj.getValues())
+
+
+    def __ne__(self, obj):
+        return not self.__eq__(obj)
+
+
+    def __hash__(self):
+        return hash((self.getPropertyId(), self.getValues()))
+
+
+    def getPropertyId(self):
+        return self._propertyId
+
+
+    def getValues(self):
+        """Returns the accepted values.
+
+        @return: frozenset of values
+        """
+        return self._values
@@ -0,0 +1,73 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Filter accepting items whose property value is None."""
+
+from muntjac.data.container import IFilter
+
+
+class IsNull(IFilter):
+    """Simple container filter checking whether an item property value is
+    C{None}.
+
+    This filter also directly supports in-memory filtering.
+    """
+
+    def __init__(self, propertyId):
+        """Constructor for a filter that compares the value of an item
+        property with C{None}.
+
+        For in-memory filtering, a simple C{is None} check is performed.
+        For other containers, the comparison implementation is container
+        dependent but should correspond to the in-memory check.
+
+        @param propertyId:
+                   the identifier of the property whose value to check
+        """
+        self._propertyId = propertyId
+
+
+    def passesFilter(self, itemId, item):
+        p = item.getItemProperty(self.getPropertyId())
+        if p is None:
+            return False
+        return self.passesValue(p.getValue())
+
+
+    def passesValue(self, value):
+        """Checks if a property value passes the filter.
+
+        @param value:
+                   the value of the filtered property of an item
+        @return: true if the value is accepted by this filter
+        """
+        return value is None
+
+
+    def appliesToProperty(self, propertyId):
+        return self.getPropertyId() == propertyId
+
+
+    def __eq__(self, obj):
+        # Only objects of the same class can be equal
+        if not isinstance(obj, IsNull):
+            return False
+
+        return self.getPropertyId() == obj.getPropertyId()
+
+
+    def __ne__(self, obj):
+        return not self.__eq__(obj)
+
+
+    def __hash__(self):
+        return hash(self.getPropertyId())
+
+
+    def getPropertyId(self):
+        """Returns the property id of the property tested by the filter,
+        not None for valid filters.
+
+        @return: property id
+        """
+        return self._propertyId
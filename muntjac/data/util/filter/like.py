@@ -0,0 +1,89 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Filter matching property values against an SQL LIKE pattern."""
+
+import re
+
+from muntjac.data.container import IFilter
+
+
+class Like(IFilter):
+    """Container filter accepting items for which the string value of the
+    identified property matches an SQL LIKE pattern: C{%} matches any
+    sequence of characters and C{_} matches any single character. A
+    C{None} property value is never accepted.
+    """
+
+    def __init__(self, propertyId, value, caseSensitive=True):
+        """@param propertyId:
+                   the identifier of the property whose value to match
+        @param value:
+                   the pattern
+        @param caseSensitive:
+                   false to match ignoring case
+        """
+        self._propertyId = propertyId
+        self._value = value
+        self._caseSensitive = caseSensitive
+
+        pattern = ''.join(['.*' if c == '%' else '.' if c == '_'
+                else re.escape(c) for c in value])
+        flags = re.DOTALL if caseSensitive else re.DOTALL | re.IGNORECASE
+        self._pattern = re.compile(pattern + r'\Z', flags)
+
+
+    def passesFilter(self, itemId, item):
+        p = item.getItemProperty(self.getPropertyId())
+        if p is None:
+            return False
+        return self.passesValue(p.getValue())
+
+
+    def passesValue(self, value):
+        """Checks if a property value passes the filter.
+
+        @param value:
+                   the value of the filtered property of an item
+        @return: true if the value is accepted by this filter
+        """
+        if value is None:
+            return False
+        if not isinstance(value, basestring):
+            value = str(value)
+        return self._pattern.match(value) is not None
+
+
+    def appliesToProperty(self, propertyId):
+        return self.getPropertyId() == propertyId
+
+
+    def __eq__(self, obj):
+        # Only objects of the same class can be equal
+        if not isinstance(obj, Like):
+            return False
+
+        return (self.getPropertyId() == obj.getPropertyId()
+                and self.getValue() == obj.getValue()
+                and self.isCaseSensitive() == obj.isCaseSensitive())
+
+
+    def __ne__(self, obj):
+        return not self.__eq__(obj)
+
+
+    def __hash__(self):
+        return hash((self.getPropertyId(), self.getValue()))
+
+
+    def getPropertyId(self):
+        return self._propertyId
+
+
+    def getValue(self):
+        """Returns the LIKE pattern."""
+        return self._value
+
+
+    def isCaseSensitive(self):
+        return self._caseSensitive
@@ -0,0 +1,60 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Negating filter that accepts the items rejected by another filter."""
+
+from muntjac.data.container import IFilter
+
+
+class Not(IFilter):
+    """Negating filter that accepts the items rejected by another filter.
+
+    This filter directly supports in-memory filtering when the negated
+    filter does so.
+    """
+
+    def __init__(self, fltr):
+        """Constructs a filter that negates a filter.
+
+        @param fltr:
+                   filter to negate, not None
+        """
+        self._filter = fltr
+
+
+    def getFilter(self):
+        """Returns the negated filter.
+
+        @return: IFilter
+        """
+        return self._filter
+
+
+    def passesFilter(self, itemId, item):
+        return not self._filter.passesFilter(itemId, item)
+
+
+    def appliesToProperty(self, propertyId):
+        """Returns true if a change in the named property may affect the
+        filtering result. Return value is the same as L{appliesToProperty}
+        for the negated filter.
+
+        @return: boolean
+        """
+        return self._filter.appliesToProperty(propertyId)
+
+
+    def __eq__(self, obj):
+        # Only objects of the same class can be equal
+        if not isinstance(obj, Not):
+            return False
+
+        return self._filter == obj.getFilter()
+
+
+    def __ne__(self, obj):
+        return not self.__eq__(obj)
+
+
+    def __hash__(self):
+        return hash(self._filter)
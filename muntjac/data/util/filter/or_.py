@@ -0,0 +1,33 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""A compound filter that accepts an item if any of its filters accept
+the item."""
+
+from muntjac.data.util.filter.abstract_junction_filter import \
+    AbstractJunctionFilter
+
+
+class Or(AbstractJunctionFilter):
+    """A compound L{IFilter} that accepts an item if any of its filters
+    accept the item.
+
+    If no filters are given, the filter should reject all items.
+
+    This filter also directly supports in-memory filtering when all
+    sub-filters do so.
+    """
+
+    def __init__(self, *filters):
+        """@param filters:
+                   filters of which the Or filter will be composed
+        """
+        super(Or, self).__init__(*filters)
+
+
+    def passesFilter(self, itemId, item):
+        for f in self.getFilters():
+            if f.passesFilter(itemId, item):
+                return True
+        return False
+
@@ -0,0 +1,210 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Evaluates container filters on the items of an in-memory container."""
+
+from muntjac.data.util.property_index import PropertyIndex
+
+from muntjac.data.util.filter.compare import Compare
+from muntjac.data.util.filter.between import Between
+from muntjac.data.util.filter.in_ import In
+from muntjac.data.util.filter.is_null import IsNull
+from muntjac.data.util.filter.like import Like
+from muntjac.data.util.filter.and_ import And
+from muntjac.data.util.filter.or_ import Or
+from muntjac.data.util.filter.not_ import Not
+
+
+class FilterEvaluator(object):
+    """Evaluates container filters on the items of an in-memory container.
+
+    The filters of this package are evaluated on the property values read
+    with C{getItemValue} of the container, without creating item or
+    property objects. Other filters are evaluated through
+    L{IFilter.passesFilter} with the unfiltered item of the container.
+
+    Indexes can be maintained for selected properties. The filters on
+    indexed properties are answered with the index, so that the items
+    passing a selective filter are found without testing every item.
+
+    This class is subject to change and should not be used outside Muntjac
+    core.
+    """
+
+    #: Filters evaluated on the value of a single property.
+    _VALUE_FILTERS = (Compare, Between, In, IsNull, Like)
+
+    def __init__(self, container):
+        self._container = container
+
+        #: IProperty ID -> PropertyIndex.
+        self._indexes = dict()
+
+
+    def addIndex(self, propertyId):
+        """Starts maintaining an index of the values of the given property.
+        """
+        if propertyId in self._indexes:
+            return
+
+        index = PropertyIndex(propertyId)
+        container = self._container
+        for itemId in container.getAllItemIds():
+            index.add(itemId, container.getItemValue(itemId, propertyId))
+        self._indexes[propertyId] = index
+
+
+    def removeIndex(self, propertyId):
+        """Stops maintaining the index of the given property."""
+        if propertyId in self._indexes:
+            del self._indexes[propertyId]
+
+
+    def hasIndex(self, propertyId):
+        return propertyId in self._indexes
+
+
+    def itemAdded(self, itemId):
+        """Adds a new item to the indexes."""
+        container = self._container
+        for propertyId, index in self._indexes.iteritems():
+            index.add(itemId, container.getItemValue(itemId, propertyId))
+
+
+    def itemRemoved(self, itemId):
+        """Removes an item from the indexes."""
+        for index in self._indexes.itervalues():
+            index.remove(itemId)
+
+
+    def itemsRemoved(self):
+        """Removes all items from the indexes."""
+        for index in self._indexes.itervalues():
+            index.clear()
+
+
+    def valueChanged(self, itemId, propertyId):
+        """Updates the indexes after the value of a property of an item has
+        changed."""
+        index = self._indexes.get(propertyId)
+        if index is not None:
+            index.update(itemId,
+                    self._container.getItemValue(itemId, propertyId))
+
+
+    def passes(self, fltr, itemId):
+        """Checks if an item passes the given filter.
+
+        @param fltr:
+                   the filter
+        @param itemId:
+                   an item id that exists in the container
+        """
+        if isinstance(fltr, self._VALUE_FILTERS):
+            return fltr.passesValue(self._container.getItemValue(itemId,
+                    fltr.getPropertyId()))
+
+        elif isinstance(fltr, And):
+            for f in fltr.getFilters():
+                if not self.passes(f, itemId):
+                    return False
+            return True
+
+        elif isinstance(fltr, Or):
+            for f in fltr.getFilters():
+                if self.passes(f, itemId):
+                    return True
+            return False
+
+        elif isinstance(fltr, Not):
+            return not self.passes(fltr.getFilter(), itemId)
+
+        else:
+            return fltr.passesFilter(itemId,
+                    self._container.getUnfilteredItem(itemId))
+
+
+    def passesAll(self, filters, itemId):
+        """Checks if an item passes all the given filters."""
+        for f in filters:
+            if not self.passes(f, itemId):
+                return False
+        return True
+
+
+    def candidates(self, fltr):
+        """Returns the ids of the items that may pass the given filter
+        according to the indexes.
+
+        @return: a set containing at least the ids of the items passing the
+                 filter, or None if the indexes do not narrow down the items
+        """
+        if isinstance(fltr, self._VALUE_FILTERS):
+            index = self._indexes.get(fltr.getPropertyId())
+            if index is None:
+                return None
+
+            if isinstance(fltr, IsNull):
+                return index.equal(None)
+
+            elif isinstance(fltr, In):
+                itemIds = set()
+                for value in fltr.getValues():
+                    matches = index.equal(value)
+                    if matches is None:
+                        return None
+                    itemIds.update(matches)
+                return itemIds
+
+            elif isinstance(fltr, Between):
+                return index.within(fltr.getStartValue(),
+                        fltr.getEndValue())
+
+            elif isinstance(fltr, Compare):
+                value = fltr.getValue()
+                operation = fltr.getOperation()
+                if operation == Compare.EQUAL:
+                    return index.equal(value)
+                elif value is None:
+                    return set()
+                elif operation == Compare.GREATER:
+                    return index.within(value, None, False)
+                elif operation == Compare.GREATER_OR_EQUAL:
+                    return index.within(value, None)
+                elif operation == Compare.LESS:
+                    return index.within(None, value, True, False)
+                elif operation == Compare.LESS_OR_EQUAL:
+                    return index.within(None, value)
+
+            return None
+
+        elif isinstance(fltr, And):
+            return self.intersection(fltr.getFilters())
+
+        elif isinstance(fltr, Or):
+            itemIds = set()
+            for f in fltr.getFilters():
+                matches = self.candidates(f)
+                if matches is None:
+                    return None
+                itemIds.update(matches)
+            return itemIds
+
+        else:
+            return None
+
+
+    def intersection(self, filters):
+        """Returns the ids of the items that may pass all the given filters
+        according to the indexes, None if the indexes do not narrow down
+        the items."""
+        itemIds = None
+        for f in filters:
+            matches = self.candidates(f)
+            if matches is None:
+                continue
+            if itemIds is None or len(matches) < len(itemIds):
+                matches, itemIds = itemIds, matches
+            if matches is not None:
+                itemIds.intersection_update(matches)
+        return itemIds
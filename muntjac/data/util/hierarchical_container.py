@@ -7,7 +7,10 @@ tree-like structure."""
 from muntjac.util import OrderedSet
 
 from muntjac.data.container import IContainer, IHierarchical
-from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.indexed_container import \
+    IndexedContainer, IndexedContainerItem
+from muntjac.data.util.key_sorter import searchSorted
+from muntjac.data.util.list_set import ListSet
 
 
 class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
@@ -31,14 +34,15 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
         #  the filtered container.
         self._filteredParent = None
 
-        #: Mapping from Item ID to a list of child IDs.
+        #: Mapping from Item ID to an ordered set of child IDs.
         self._children = dict()
 
-        #: Mapping from Item ID to a list of child IDs when filtered
+        #: Mapping from Item ID to a list of child IDs when filtered. The
+        #  filtered lists are rebuilt whenever the container is filtered.
         self._filteredChildren = None
 
-        #: List that contains all root elements of the container.
-        self._roots = list()
+        #: Ordered set that contains all root elements of the container.
+        self._roots = OrderedSet()
 
         #: List that contains all filtered root elements of the container.
         self._filteredRoots = None
@@ -52,6 +56,12 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
 
         self._filterOverride = None
 
+        #: Number of batches started and not yet ended.
+        self._batchDepth = 0
+
+        #: True if the container must be filtered when the batch ends.
+        self._batchFilterPending = False
+
 
     def areChildrenAllowed(self, itemId):
         # Can the specified Item have any children?
@@ -156,8 +166,24 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
                    identified with itemId.
         @return: C{True} if the operation succeeded, C{False} if not
         """
+        return self.internalSetParent(itemId, newParentId, True)
+
+
+    def internalSetParent(self, itemId, newParentId, visibleOnly):
+        """Sets the parent of an Item like L{setParent}.
+
+        @param visibleOnly:
+                   C{True} if the items must be visible in the filtered
+                   container, C{False} to set the parents of items that
+                   are filtered out
+        """
+        if visibleOnly:
+            contains = self.containsId
+        else:
+            contains = self._items.__contains__
+
         # Checks that the item is in the container
-        if not self.containsId(itemId):
+        if not contains(itemId):
             return False
 
         # Gets the old parent
@@ -185,18 +211,12 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
                     del self._children[oldParentId]
 
             # Add to be a root
-            self._roots.append(itemId)
+            self._roots.add(itemId)
 
             # Updates parent
             del self._parent[itemId]
 
-            if self.hasFilters():
-                # Refilter the container if setParent is called when filters
-                # are applied. Changing parent can change what is included in
-                # the filtered version (if includeParentsWhenFiltering==true).
-                self.doFilterContainer(self.hasFilters())
-
-            self.fireItemSetChange()
+            self.fireHierarchyChange()
 
             return True
 
@@ -210,7 +230,7 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
 
         # Checks that the new parent exists in container and can have
         # children
-        if ((not self.containsId(newParentId))
+        if ((not contains(newParentId))
                 or (newParentId in self._noChildrenAllowed)):
             return False
 
@@ -226,11 +246,11 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
         self._parent[itemId] = newParentId
         pcl = self._children.get(newParentId)
         if pcl is None:
-            # Create an empty list for holding children if one were not
+            # Create an empty set for holding children if one were not
             # previously created
-            pcl = list()
+            pcl = OrderedSet()
             self._children[newParentId] = pcl
-        pcl.append(itemId)
+        pcl.add(itemId)
 
         # Removes from old parent or root
         if oldParentId is None:
@@ -242,21 +262,145 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
                 if len(l) == 0:
                     del self._children[oldParentId]
 
+        self.fireHierarchyChange()
+
+        return True
+
+
+    def fireHierarchyChange(self):
+        """Refilters the container if filters are applied and notifies the
+        listeners after the parent of an item has changed. Changing parent
+        can change what is included in the filtered version (if
+        includeParentsWhenFiltering==true). Both are deferred until the end
+        of a batch.
+        """
         if self.hasFilters():
-            # Refilter the container if setParent is called when filters
-            # are applied. Changing parent can change what is included in
-            # the filtered version (if includeParentsWhenFiltering==true).
-            self.doFilterContainer(self.hasFilters())
+            if self._batchDepth > 0:
+                self._batchFilterPending = True
+            else:
+                self.doFilterContainer(self.hasFilters())
 
         self.fireItemSetChange()
 
-        return True
-
 
     def hasFilters(self):
         return self._filteredRoots is not None
 
 
+    def addItemsWithParents(self, items):
+        """Adds items and sets their parents in one batch, filtering the
+        container and notifying the listeners once. The parent of an item
+        can be added after the item. The children of an item are in the
+        order they are given in.
+
+        @param items:
+                   an iterable of (itemId, parentId) pairs, the parent
+                   C{None} for root items
+        @return: C{True} if all the items were added and their parents
+                 set, C{False} if some were already in the container or
+                 their parent could not be set
+        """
+        # the parents are set only for the items added here
+        added = list()
+        success = True
+        with self.batch():
+            # the items are filtered once they all have their parents
+            for itemId, parentId in items:
+                if self.internalAddItemAtEnd(itemId,
+                        IndexedContainerItem(itemId, self), False) is None:
+                    success = False
+                else:
+                    self._roots.add(itemId)
+                    added.append((itemId, parentId))
+            self.filterAll()
+            self.fireItemSetChange()
+
+            for itemId, parentId in added:
+                if parentId is not None:
+                    if not self.internalSetParent(itemId, parentId, False):
+                        success = False
+        return success
+
+
+    def addItemTree(self, nodes, parentId=None):
+        """Adds a tree of items in one batch, like L{addItemsWithParents}.
+
+        @param nodes:
+                   a sequence of (itemId, children) pairs, where children is
+                   a sequence of the same form or C{None}. Mappings, such
+                   as an C{OrderedDict} of the same form, are accepted too.
+        @param parentId:
+                   the item under which the tree is added, C{None} to add
+                   the top level nodes as root items
+        @return: C{True} if all the items were added and their parents
+                 set, C{False} otherwise
+        """
+        items = list()
+        # iterators of the children of the nodes being added
+        stack = [(parentId, iter(self.treeNodes(nodes)))]
+        while len(stack) > 0:
+            nodeParentId, it = stack[-1]
+            try:
+                itemId, children = it.next()
+            except StopIteration:
+                stack.pop()
+                continue
+            items.append((itemId, nodeParentId))
+            if children:
+                stack.append((itemId, iter(self.treeNodes(children))))
+        return self.addItemsWithParents(items)
+
+
+    def treeNodes(self, nodes):
+        if hasattr(nodes, 'items'):
+            return nodes.items()
+        return nodes
+
+
+    def batch(self):
+        """Returns a context manager batching the changes made in a
+        C{with} statement. Filtering the container after the hierarchy
+        changes and the item set change events are deferred until the
+        batch ends, when the container is filtered once and one event is
+        sent if anything changed. The filtered view is not up to date
+        during the batch. Batches can be nested.
+
+        @see: L{startBatch}
+        """
+        return HierarchicalContainerBatch(self)
+
+
+    def startBatch(self):
+        """Starts a batch of changes, which must be ended with
+        L{endBatch}. Prefer L{batch} in a C{with} statement."""
+        self._batchDepth += 1
+
+
+    def endBatch(self):
+        """Ends a batch of changes started with L{startBatch}. The
+        container is filtered and the listeners are notified when the
+        outermost batch ends."""
+        if self._batchDepth == 0:
+            raise ValueError('no batch started')
+        self._batchDepth -= 1
+        if self._batchDepth > 0:
+            return
+
+        changed = False
+        if self._batchFilterPending:
+            self._batchFilterPending = False
+            changed = self.doFilterContainer(len(self.getFilters()) > 0)
+
+        if changed or self._contentsChangedEventPending:
+            self._contentsChangedEventPending = False
+            self.fireItemSetChange()
+
+
+    def isBatch(self):
+        """Returns C{True} if a batch of changes has been started."""
+        return self._batchDepth > 0
+
+
     def moveAfterSibling(self, itemId, siblingId):
         """Moves a node (an Item) in the container immediately after a sibling
         node. The two nodes must have the same parent in the container.
@@ -275,22 +419,14 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
 
         if siblingId is None:
             childrenList.remove(itemId)
-            childrenList.insert(0, itemId)
+            childrenList.addAfter(itemId)
 
+        elif (itemId in childrenList) and (siblingId in childrenList):
+            if siblingId != itemId:
+                childrenList.addAfter(itemId, siblingId)
         else:
-            oldIndex = childrenList.index(itemId)
-            indexOfSibling = childrenList.index(siblingId)
-            if (indexOfSibling != -1) and (oldIndex != -1):
-                if oldIndex > indexOfSibling:
-                    newIndex = indexOfSibling + 1
-                else:
-                    newIndex = indexOfSibling
-
-                del childrenList[oldIndex]
-                childrenList.insert(newIndex, itemId)
-            else:
-                raise ValueError('Given identifiers do not have the '
-                        'same parent.')
+            raise ValueError('Given identifiers do not have the '
+                    'same parent.')
 
         self.fireItemSetChange()
 
@@ -302,7 +438,7 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
             if itemId is None:
                 return None
             if itemId not in self._roots:
-                self._roots.append(itemId)
+                self._roots.add(itemId)
                 if self._filteredRoots is not None:
                     if self.passesFilters(itemId):
                         self._filteredRoots.append(itemId)
@@ -313,7 +449,7 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
             item = super(HierarchicalContainer, self).addItem(itemId)
             if item is None:
                 return None
-            self._roots.append(itemId)
+            self._roots.add(itemId)
             if self._filteredRoots is not None:
                 if self.passesFilters(itemId):
                     self._filteredRoots.append(itemId)
@@ -322,7 +458,9 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
 
 
     def fireItemSetChange(self, event=None):
-        if event is not None:
+        if self._batchDepth > 0:
+            self._contentsChangedEventPending = True
+        elif event is not None:
             if self.contentsChangeEventsOn():
                 super(HierarchicalContainer, self).fireItemSetChange(event)
             else:
@@ -331,6 +469,22 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
             super(HierarchicalContainer, self).fireItemSetChange()
 
 
+    def fireItemAdded(self, position, itemId, item):
+        if self._batchDepth > 0:
+            self._contentsChangedEventPending = True
+        else:
+            super(HierarchicalContainer, self).fireItemAdded(position,
+                    itemId, item)
+
+
+    def fireItemRemoved(self, position, itemId):
+        if self._batchDepth > 0:
+            self._contentsChangedEventPending = True
+        else:
+            super(HierarchicalContainer, self).fireItemRemoved(position,
+                    itemId)
+
+
     def contentsChangeEventsOn(self):
         return not self._contentChangedEventsDisabled
 
@@ -341,6 +495,9 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
 
     def enableAndFireContentsChangeEvents(self):
         self._contentChangedEventsDisabled = False
+        if self._batchDepth > 0:
+            # sent when the batch ends
+            return
         if self._contentsChangedEventPending:
             self.fireItemSetChange()
         self._contentsChangedEventPending = False
@@ -351,7 +508,7 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
         success = super(HierarchicalContainer, self).removeAllItems()
 
         if success:
-            del self._roots[:]
+            self._roots = OrderedSet()
             self._parent.clear()
             self._children.clear()
             self._noChildrenAllowed.clear()
@@ -467,10 +624,52 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
 
 
     def doSort(self):
-        super(HierarchicalContainer, self).doSort()
-        self._roots.sort(cmp=self.getItemSorter())
-        for childList in self._children.values():
-            childList.sort(cmp=self.getItemSorter())
+        # the keys of the items are shared between the sorts
+        keySorter = self.getKeySorter()
+        self.setAllItemIds(ListSet(self.sortItemIds(self.getAllItemIds(),
+                keySorter)))
+        self._roots = OrderedSet(self.sortItemIds(self._roots, keySorter))
+        for parentId, childList in self._children.items():
+            self._children[parentId] = OrderedSet(self.sortItemIds(childList,
+                    keySorter))
+
+
+    def moveSortedItem(self, itemId, compare):
+        moved = self.moveSibling(itemId, self._roots, self._children,
+                self._parent, compare)
+        if self._filteredRoots is not None:
+            moved = self.moveSibling(itemId, self._filteredRoots,
+                    self._filteredChildren, self._filteredParent,
+                    compare) or moved
+        return moved
+
+
+    def moveSibling(self, itemId, roots, children, parents, compare):
+        """Moves an item to its sorted position among its siblings."""
+        parentId = parents.get(itemId)
+        if parentId is None:
+            siblings = roots
+        else:
+            siblings = children.get(parentId)
+
+        if siblings is None or itemId not in siblings:
+            return False
+
+        if isinstance(siblings, OrderedSet):
+            ordered = list(siblings)
+        else:
+            # the filtered siblings are lists
+            ordered = siblings
+
+        index = ordered.index(itemId)
+        del ordered[index]
+        newIndex = searchSorted(ordered, itemId, compare)
+        if ordered is siblings:
+            siblings.insert(newIndex, itemId)
+        elif newIndex != index:
+            siblings.addAfter(itemId,
+                    ordered[newIndex - 1] if newIndex > 0 else None)
+        return index != newIndex
 
 
     def isIncludeParentsWhenFiltering(self):
@@ -501,6 +700,18 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
             self.doFilterContainer(True)
 
 
+    def filterItem(self, itemId):
+        # the filtered hierarchy depends on the parents and children
+        self.filterAll()
+
+
+    def filterAll(self):
+        if self._batchDepth > 0:
+            self._batchFilterPending = True
+        else:
+            super(HierarchicalContainer, self).filterAll()
+
+
     def doFilterContainer(self, hasFilters):
         if not hasFilters:
             # All filters removed
@@ -612,8 +823,34 @@ class HierarchicalContainer(IndexedContainer, IHierarchical, IContainer):
         return toBeIncluded
 
 
+    def getFilterCandidates(self):
+        if self._filterOverride is not None:
+            return self._filterOverride
+        else:
+            return super(HierarchicalContainer, self).getFilterCandidates()
+
+
     def passesFilters(self, itemId):
         if self._filterOverride is not None:
             return itemId in self._filterOverride
         else:
             return super(HierarchicalContainer, self).passesFilters(itemId)
+
+
+class HierarchicalContainerBatch(object):
+    """Context manager of a batch of changes to a L{HierarchicalContainer}.
+
+    @see: L{HierarchicalContainer.batch}
+    """
+
+    def __init__(self, container):
+        self._container = container
+
+
+    def __enter__(self):
+        self._container.startBatch()
+        return self._container
+
+
+    def __exit__(self, typ, value, tb):
+        self._container.endBatch()
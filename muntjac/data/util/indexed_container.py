@@ -27,6 +27,7 @@ from muntjac.util import fullname
 # not to show it in public API
 class IndexedContainer(AbstractInMemoryContainer,
             container.IPropertySetChangeNotifier,
+            container.IPropertyValueChangeNotifier,
             prop.IValueChangeNotifier, container.ISortable,
             container.IFilterable, container.ISimpleFilterable):
     """An implementation of the L{IContainer.Indexed} interface with all
@@ -67,6 +68,12 @@ class IndexedContainer(AbstractInMemoryContainer,
 
         self._propertyValueChangeCallbacks = dict()
 
+        #: List of all listeners receiving the item and property ids of
+        #  the changed values.
+        self._containerPropertyValueChangeListeners = list()
+
+        self._containerPropertyValueChangeCallbacks = dict()
+
         #: Data structure containing all listeners interested in changes to
         #  single Properties. The data structure is a hashtable mapping
         #  IProperty IDs to a hashtable that maps IItem IDs to a linked list
@@ -230,8 +237,8 @@ class IndexedContainer(AbstractInMemoryContainer,
                 del self._defaultPropertyValues[propertyId]
 
         # If remove the IProperty from all Items
-        for item in self.getAllItemIds():
-            self._items.get(item).remove(propertyId)
+        self.removeItemValues(propertyId)
+        self.removePropertyIndex(propertyId)
 
         # Sends a change event
         self.fireContainerPropertySetChange()
@@ -280,6 +287,41 @@ class IndexedContainer(AbstractInMemoryContainer,
         self.addDefaultValues(t)
 
 
+    def getItemValue(self, itemId, propertyId):
+        """Returns the value stored for the given property of an item.
+        For internal use only.
+        """
+        return self._items.get(itemId).get(propertyId)
+
+
+    def getPropertyValues(self, itemIds, propertyId):
+        """Returns the values stored for the given property of the given
+        items. For internal use only.
+        """
+        items = self._items
+        return [items[itemId].get(propertyId) for itemId in itemIds]
+
+
+    def removeItemValues(self, propertyId):
+        """Removes the values stored for the given property from all
+        items. For internal use only.
+        """
+        for item in self.getAllItemIds():
+            self._items.get(item).pop(propertyId, None)
+
+
+    def setItemValue(self, itemId, propertyId, value):
+        """Stores the value of the given property of an item without
+        sending any events. For internal use only.
+        """
+        propertySet = self._items.get(itemId)
+        if value is None:
+            if propertyId in propertySet:
+                del propertySet[propertyId]
+        else:
+            propertySet[propertyId] = value
+
+
     def addListener(self, listener, iface=None):
         if (isinstance(listener, container.IPropertySetChangeListener) and
                 (iface is None or
@@ -293,6 +335,12 @@ class IndexedContainer(AbstractInMemoryContainer,
 
             self._propertyValueChangeListeners.append(listener)
 
+        if (isinstance(listener, container.IPropertyValueChangeListener) and
+                (iface is None or issubclass(iface,
+                        container.IPropertyValueChangeListener))):
+
+            self._containerPropertyValueChangeListeners.append(listener)
+
         super(IndexedContainer, self).addListener(listener, iface)
 
 
@@ -307,6 +355,9 @@ class IndexedContainer(AbstractInMemoryContainer,
         elif issubclass(eventType, prop.ValueChangeEvent):
             self._propertyValueChangeCallbacks[callback] = args
 
+        elif issubclass(eventType, container.IPropertyValueChangeEvent):
+            self._containerPropertyValueChangeCallbacks[callback] = args
+
         else:
             super(IndexedContainer, self).addCallback(callback,
                     eventType, *args)
@@ -325,6 +376,12 @@ class IndexedContainer(AbstractInMemoryContainer,
             if listener in self._propertyValueChangeListeners:
                 self._propertyValueChangeListeners.remove(listener)
 
+        if (isinstance(listener, container.IPropertyValueChangeListener) and
+                (iface is None or issubclass(iface,
+                        container.IPropertyValueChangeListener))):
+            if listener in self._containerPropertyValueChangeListeners:
+                self._containerPropertyValueChangeListeners.remove(listener)
+
         super(IndexedContainer, self).removeListener(listener, iface)
 
 
@@ -339,6 +396,10 @@ class IndexedContainer(AbstractInMemoryContainer,
             if callback in self._propertyValueChangeCallbacks:
                 del self._propertyValueChangeCallbacks[callback]
 
+        elif issubclass(eventType, container.IPropertyValueChangeEvent):
+            if callback in self._containerPropertyValueChangeCallbacks:
+                del self._containerPropertyValueChangeCallbacks[callback]
+
         else:
             super(IndexedContainer, self).removeCallback(callback, eventType)
 
@@ -368,11 +429,26 @@ class IndexedContainer(AbstractInMemoryContainer,
                 for l in listenerList:
                     l.valueChange(event)
 
+        # Sends the ids of the changed value to container listeners
+        if (len(self._containerPropertyValueChangeListeners) > 0
+                or len(self._containerPropertyValueChangeCallbacks) > 0):
+            event = ContainerPropertyValueChangeEvent(self, source._itemId,
+                    source._propertyId)
+            for listener in self._containerPropertyValueChangeListeners:
+                listener.containerPropertyValueChange(event)
+
+            for callback, args in \
+                    self._containerPropertyValueChangeCallbacks.items():
+                callback(event, *args)
+
 
     def getListeners(self, eventType):
         if issubclass(eventType, prop.ValueChangeEvent):
             return list(self._propertyValueChangeListeners)
 
+        if issubclass(eventType, container.IPropertyValueChangeEvent):
+            return list(self._containerPropertyValueChangeListeners)
+
         return super(IndexedContainer, self).getListeners(eventType)
 
 
@@ -380,6 +456,9 @@ class IndexedContainer(AbstractInMemoryContainer,
         if issubclass(eventType, prop.ValueChangeEvent):
             return dict(self._propertyValueChangeCallbacks)
 
+        if issubclass(eventType, container.IPropertyValueChangeEvent):
+            return dict(self._containerPropertyValueChangeCallbacks)
+
         return super(IndexedContainer, self).getCallbacks(eventType)
 
 
@@ -582,6 +661,8 @@ class IndexedContainer(AbstractInMemoryContainer,
 
 class IndexedContainerItem(IItem):
 
+    __slots__ = ('_itemId', '_container')
+
     def __init__(self, itemId, container):  # FIXME: inner class
         """Constructs a new ListItem instance and connects it to a host
         container.
@@ -601,6 +682,14 @@ class IndexedContainerItem(IItem):
         return IndexedContainerProperty(self._itemId, idd, self._container)
 
 
+    def __getstate__(self):
+        return (self._itemId, self._container)
+
+
+    def __setstate__(self, state):
+        self._itemId, self._container = state
+
+
     def getItemPropertyIds(self):
         return list(self._container._propertyIds)
 
@@ -685,6 +774,8 @@ class IndexedContainerProperty(prop.IProperty, prop.IValueChangeNotifier):
     @version: @VERSION@
     """
 
+    __slots__ = ('_propertyId', '_itemId', '_container')
+
     def __init__(self, itemId, propertyId, container):
         """Constructs a new L{IndexedContainerProperty} object.
 
@@ -709,12 +800,30 @@ class IndexedContainerProperty(prop.IProperty, prop.IValueChangeNotifier):
         self._container = container
 
 
+    def __getstate__(self):
+        return (self._itemId, self._propertyId, self._container)
+
+
+    def __setstate__(self, state):
+        self._itemId, self._propertyId, self._container = state
+
+
+    def getItemId(self):
+        """Returns the id of the item this property belongs to."""
+        return self._itemId
+
+
+    def getPropertyId(self):
+        """Returns the id of this property."""
+        return self._propertyId
+
+
     def getType(self):
         return self._container._types.get(self._propertyId)
 
 
     def getValue(self):
-        return self._container._items.get(self._itemId).get(self._propertyId)
+        return self._container.getItemValue(self._itemId, self._propertyId)
 
 
     def isReadOnly(self):
@@ -729,30 +838,28 @@ class IndexedContainerProperty(prop.IProperty, prop.IValueChangeNotifier):
 
 
     def setValue(self, newValue):
-        # Gets the IProperty set
-        propertySet = self._container._items.get(self._itemId)
-
         # Support null values on all types
-        if newValue is None:
-            if self._propertyId in propertySet:
-                del propertySet[self._propertyId]
-        elif issubclass(newValue.__class__, self.getType()):
-            propertySet[self._propertyId] = newValue
+        if newValue is None or issubclass(newValue.__class__, self.getType()):
+            value = newValue
         else:
             try:
                 # Gets the string constructor
                 #constr = self.getType().getConstructor([str])
                 constr = self.getType().__init__  # FIXME: getConstructor
                 # Creates new object from the string
-                propertySet[self._propertyId] = constr(*[str(newValue)])
+                value = constr(*[str(newValue)])
             except Exception:
                 raise prop.ConversionException, ('Conversion for value \''
                         + newValue + '\' of class ' + fullname(newValue)
                         + ' to ' + self.getType().__name__ + ' failed')
 
+        self._container.setItemValue(self._itemId, self._propertyId, value)
+        self._container.getFilterEvaluator().valueChanged(self._itemId,
+                self._propertyId)
+
         # update the container filtering if this property is being filtered
         if self._container.isPropertyFiltered(self._propertyId):
-            self._container.filterAll()
+            self._container.filterItem(self._itemId)
 
         self._container.firePropertyValueChange(self)
 
@@ -882,3 +989,27 @@ class PropertyValueChangeEvent(EventObject, prop.ValueChangeEvent):
 
     def getProperty(self):
         return self.getSource()
+
+
+class ContainerPropertyValueChangeEvent(EventObject,
+            container.IPropertyValueChangeEvent):
+    """An C{Event} object specifying the item and property ids of a value
+    that has changed in an L{IndexedContainer}.
+    """
+
+    def __init__(self, source, itemId, propertyId):
+        super(ContainerPropertyValueChangeEvent, self).__init__(source)
+        self._itemId = itemId
+        self._propertyId = propertyId
+
+
+    def getContainer(self):
+        return self.getSource()
+
+
+    def getItemId(self):
+        return self._itemId
+
+
+    def getPropertyId(self):
+        return self._propertyId
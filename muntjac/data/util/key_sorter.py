@@ -0,0 +1,123 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Sorts the items of an in-memory container by sort keys."""
+
+
+class KeySorter(object):
+    """Sorts the item ids of an in-memory container in the order defined by
+    L{DefaultItemSorter} with its default comparator, without comparing
+    items pairwise.
+
+    The values of the sort properties of each item are read once into a
+    sort key tuple with C{getPropertyValues} of the container, and the item
+    ids are sorted by their keys with the stable built-in sort. C{None} is
+    less than any other value, which is how Python compares C{None}, and
+    descending properties are sorted in reverse, so equal items keep
+    their relative order in both directions like with the comparator.
+
+    The keys used by L{compare} are cached, so a sorter must not be used
+    after the values of the items change.
+
+    This class is subject to change and should not be used outside Muntjac
+    core.
+    """
+
+    def __init__(self, container, propertyIds, ascending):
+        """Creates a sorter of the items of a container.
+
+        @param container:
+                   the container of the items
+        @param propertyIds:
+                   the sort properties, most significant first
+        @param ascending:
+                   sort direction of each property, C{True} for ascending
+        """
+        self._container = container
+        self._propertyIds = list(propertyIds)
+        self._ascending = [bool(asc) for asc in ascending]
+
+        #: Item id -> sort key.
+        self._keys = dict()
+
+
+    def key(self, itemId):
+        """Returns the sort key of an item, the tuple of the values of the
+        sort properties."""
+        key = self._keys.get(itemId)
+        if key is None:
+            getItemValue = self._container.getItemValue
+            key = tuple([getItemValue(itemId, propertyId)
+                    for propertyId in self._propertyIds])
+            self._keys[itemId] = key
+        return key
+
+
+    def compare(self, itemId1, itemId2):
+        """Compares the sort keys of two items, taking the sort directions
+        into account."""
+        key1 = self.key(itemId1)
+        key2 = self.key(itemId2)
+        for i, ascending in enumerate(self._ascending):
+            r = cmp(key1[i], key2[i])
+            if r != 0:
+                return r if ascending else -r
+        return 0
+
+
+    def sort(self, itemIds):
+        """Returns the given item ids sorted by their keys. Items not
+        visible in the container are placed last in their current order,
+        as L{DefaultItemSorter} considers them greater than visible items.
+        """
+        container = self._container
+        if container.isFiltered():
+            visible = list()
+            hidden = list()
+            for itemId in itemIds:
+                if container.containsId(itemId):
+                    visible.append(itemId)
+                else:
+                    hidden.append(itemId)
+        else:
+            visible = list(itemIds)
+            hidden = list()
+
+        # the values are read by property
+        columns = [container.getPropertyValues(visible, propertyId)
+                for propertyId in self._propertyIds]
+
+        order = range(len(visible))
+        if len(set(self._ascending)) == 1:
+            # one pass comparing whole keys
+            keys = columns[0] if len(columns) == 1 else zip(*columns)
+            order.sort(key=keys.__getitem__, reverse=not self._ascending[0])
+        else:
+            # stable passes from the least significant property
+            for column, ascending in reversed(zip(columns, self._ascending)):
+                order.sort(key=column.__getitem__, reverse=not ascending)
+
+        return [visible[j] for j in order] + hidden
+
+
+def searchSorted(itemIds, itemId, compare):
+    """Finds the position of an item in a list of item ids sorted by the
+    given comparison function with a binary search. The position is after
+    the items equal to the item.
+
+    @param itemIds:
+               the sorted item ids, not containing C{itemId}
+    @param itemId:
+               the item id to look for
+    @param compare:
+               a function comparing two item ids
+    @return: the index at which to insert the item
+    """
+    lo, hi = 0, len(itemIds)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if compare(itemId, itemIds[mid]) < 0:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
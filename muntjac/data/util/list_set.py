@@ -8,14 +8,22 @@ a list and a set."""
 class ListSet(list):
     """ListSet is an internal Muntjac class which implements a combination of
     a List and a Set. The main purpose of this class is to provide a list with
-    a fast L{contains} method. Each inserted object must by unique (as
-    specified by L{equals}). The L{set} method allows duplicates because of
-    the way L{sort} works.
+    fast L{contains} and L{index} methods. Each inserted object must by unique
+    (as specified by L{equals}). The L{set} method allows duplicates because
+    of the way L{sort} works.
+
+    The positions of the elements are kept in a map that is rebuilt lazily
+    once indexes are looked up repeatedly after an operation that moves
+    elements. Appending elements keeps the map up to date.
 
     This class is subject to change and should not be used outside Muntjac
     core.
     """
 
+    #: Number of lookups searching the list before the map of positions is
+    #  rebuilt.
+    _LIST_LOOKUPS = 4
+
     def __init__(self, *args):
         self._itemSet = None
 
@@ -23,6 +31,13 @@ class ListSet(list):
         # Used to temporarily allow duplicates in the list.
         self._duplicates = dict()
 
+        # Map from an element to its position in the list, None if it must
+        # be rebuilt.
+        self._positions = None
+
+        # Number of lookups done since the positions were invalidated.
+        self._lookups = 0
+
         nargs = len(args)
         if nargs == 0:
             super(ListSet, self).__init__()
@@ -35,8 +50,7 @@ class ListSet(list):
             else:
                 c, = args
                 super(ListSet, self).__init__(c)
-                self._itemSet = set()#len(c))
-                self._itemSet = self._itemSet.union(c)
+                self._itemSet = set(self)
         else:
             raise ValueError, 'too many arguments'
 
@@ -47,7 +61,7 @@ class ListSet(list):
 
 
     def __contains__(self, item):
-        return self.contains(item)
+        return item in self._itemSet
 
 
     def containsAll(self, c):
@@ -74,22 +88,28 @@ class ListSet(list):
         nargs = len(args)
         if nargs == 1:
             e, = args
-            if self.contains(e):
+            if e in self._itemSet:
                 # Duplicates are not allowed
                 return False
-            if not super(ListSet, self).__contains__(e):
-                super(ListSet, self).append(e)
-                self._itemSet.add(e)
-                return True
-            else:
-                return False
+            super(ListSet, self).append(e)
+            self._itemSet.add(e)
+            if self._positions is not None:
+                self._positions[e] = len(self) - 1
+            return True
         elif nargs == 2:
             index, element = args
-            if self.contains(element):
+            if element in self._itemSet:
                 # Duplicates are not allowed
-                return
+                return False
+            size = len(self)
             super(ListSet, self).insert(index, element)
             self._itemSet.add(element)
+            if index >= size:
+                if self._positions is not None:
+                    self._positions[element] = size
+            else:
+                self.invalidatePositions()
+            return True
         else:
             raise ValueError, 'invalid number of arguments'
 
@@ -98,31 +118,27 @@ class ListSet(list):
         return self.addAll(iterable)
 
 
+    def __iadd__(self, iterable):
+        self.addAll(iterable)
+        return self
+
+
     def addAll(self, *args):
         nargs = len(args)
         if nargs == 1:
             c, = args
             modified = False
             for e in c:
-                if self.contains(e):
-                    continue
-
                 if self.add(e):
-                    self._itemSet.add(e)
                     modified = True
-
             return modified
         elif nargs == 2:
             index, c = args
-            #self.ensureCapacity(len(self) + len(c))
             modified = False
             for e in c:
-                if self.contains(e):
-                    continue
-                self.add(index, e)
-                index += 1
-                self._itemSet.add(e)
-                modified = True
+                if self.add(index, e):
+                    index += 1
+                    modified = True
             return modified
         else:
             raise ValueError, 'invalid number of arguments'
@@ -130,47 +146,115 @@ class ListSet(list):
 
     def clear(self):
         del self[:]
-        self._itemSet.clear()
 
 
     def index(self, val):
-        return self.indexOf(val)
+        """Returns the position of the given element. Raises a ValueError
+        if the element is not in the list, as list.index does.
+        """
+        idx = self.indexOf(val)
+        if idx < 0:
+            raise ValueError, '%r is not in list' % (val,)
+        return idx
 
 
     def indexOf(self, o):
-        if not self.contains(o):
+        """Returns the position of the given element or -1 if the element
+        is not in the list.
+        """
+        if o not in self._itemSet:
             return -1
-        return super(ListSet, self).index(o)
+        if self._duplicates:
+            # positions are ambiguous while sorting
+            return super(ListSet, self).index(o)
+        positions = self._positions
+        if positions is None:
+            if self._lookups < self._LIST_LOOKUPS:
+                # a few lookups between modifications are cheaper to do
+                # by searching the list
+                self._lookups += 1
+                return super(ListSet, self).index(o)
+            positions = self._positions = \
+                    dict((e, i) for i, e in enumerate(self))
+        return positions[o]
+
+
+    def invalidatePositions(self):
+        """Marks the positions of the elements to be rebuilt on lookup."""
+        self._positions = None
+        self._lookups = 0
 
 
     def lastIndexOf(self, o):
-        if not self.contains(o):
+        if o not in self._itemSet:
             return -1
-        return self[::-1].index(o)
+        return len(self) - 1 - self[::-1].index(o)
 
 
     def remove(self, o):
-        if isinstance(o, int):
-            index = o
-            e = super(ListSet, self).pop(index)
-            if e is not None:
-                self._itemSet.remove(e)
-            return e
-        else:
-            if super(ListSet, self).remove(o):
-                self._itemSet.remove(o)
-                return True
-            else:
-                return False
+        """Removes the given element, raising a ValueError if it is not
+        in the list, as list.remove does.
+        """
+        del self[self.index(o)]
+
+
+    def pop(self, index=-1):
+        e = self[index]
+        del self[index]
+        return e
 
 
     def removeRange(self, fromIndex, toIndex):
-        toRemove = set()
-        for idx in range(fromIndex, toIndex):
-            toRemove.add(self[idx])
         del self[fromIndex:toIndex]
-        for r in toRemove:
-            self._itemSet.remove(r)
+
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            removed = self[index]
+        else:
+            removed = [self[index]]
+        last = index == len(self) - 1 or index == -1
+        super(ListSet, self).__delitem__(index)
+        if len(self) == 0:
+            self._itemSet.clear()
+            self._duplicates.clear()
+        else:
+            for e in removed:
+                self.removeFromSet(e)
+        if last and self._positions is not None and not self._duplicates:
+            # removing the last element does not move the others
+            del self._positions[removed[0]]
+        else:
+            self.invalidatePositions()
+
+
+    def __delslice__(self, i, j):
+        # list defines __delslice__, so it must be overridden as well
+        self.__delitem__(slice(max(0, i), max(0, j)))
+
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            super(ListSet, self).__setitem__(index, value)
+            self._itemSet = set(self)
+            self._duplicates.clear()
+            self.invalidatePositions()
+        else:
+            self.set(index, value)
+
+
+    def __setslice__(self, i, j, sequence):
+        self.__setitem__(slice(max(0, i), max(0, j)), sequence)
+
+
+    def sort(self, *args, **kwargs):
+        super(ListSet, self).sort(*args, **kwargs)
+        self.invalidatePositions()
+
+
+    def reverse(self):
+        super(ListSet, self).reverse()
+        self.invalidatePositions()
 
 
     def set(self, index, element):  #@PydevCodeAnalysisIgnore
@@ -188,9 +272,11 @@ class ListSet(list):
                 # list. So we instead allow duplicates temporarily.
                 self.addDuplicate(element)
 
-        old = self[index] = element
+        old = self[index]
+        super(ListSet, self).__setitem__(index, element)
         self.removeFromSet(old)
         self._itemSet.add(element)
+        self.invalidatePositions()
 
         return old
 
@@ -232,4 +318,15 @@ class ListSet(list):
     def clone(self):
         v = ListSet(self[:])
         v._itemSet = set(self._itemSet)
+        v._duplicates = dict(self._duplicates)
         return v
+
+
+    def __reduce__(self):
+        # the elements are passed to the constructor, unpickling would
+        # otherwise append them before the set is restored, the positions
+        # are rebuilt when needed
+        state = self.__dict__.copy()
+        state['_positions'] = None
+        state['_lookups'] = 0
+        return (self.__class__, (list(self),), state)
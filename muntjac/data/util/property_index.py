@@ -0,0 +1,157 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Index of the values of a container property used for filtering."""
+
+from bisect import bisect_left, bisect_right
+
+
+class PropertyIndex(object):
+    """Index of the values of a single property of the items of an
+    in-memory container.
+
+    The items are grouped by value in a hash table, and the distinct
+    values other than C{None} are kept sorted. Looking up the items equal
+    to a value takes constant time and looking up the items within a range
+    of values takes a binary search, the cost of a lookup is proportional
+    to the number of items found.
+
+    If a value is not hashable the index is disabled and all lookups
+    return C{None}.
+
+    This class is subject to change and should not be used outside Muntjac
+    core.
+    """
+
+    def __init__(self, propertyId):
+        self._propertyId = propertyId
+
+        #: Item id -> indexed value.
+        self._values = dict()
+
+        #: Value -> set of item ids, None if the index is disabled.
+        self._buckets = dict()
+
+        #: Distinct values other than None in ascending order, None when
+        #  they must be sorted again.
+        self._sortedValues = None
+
+
+    def getPropertyId(self):
+        return self._propertyId
+
+
+    def isEnabled(self):
+        return self._buckets is not None
+
+
+    def add(self, itemId, value):
+        """Adds an item with the given value to the index."""
+        if self._buckets is None:
+            return
+
+        try:
+            bucket = self._buckets.get(value)
+        except TypeError:
+            # not hashable
+            self.disable()
+            return
+
+        self._values[itemId] = value
+        if bucket is None:
+            self._buckets[value] = set([itemId])
+            if value is not None and self._sortedValues is not None:
+                sortedValues = self._sortedValues
+                sortedValues.insert(bisect_left(sortedValues, value), value)
+        else:
+            bucket.add(itemId)
+
+
+    def remove(self, itemId):
+        """Removes an item from the index."""
+        if self._buckets is None or itemId not in self._values:
+            return
+
+        value = self._values.pop(itemId)
+        bucket = self._buckets[value]
+        bucket.discard(itemId)
+        if len(bucket) == 0:
+            del self._buckets[value]
+            if value is not None and self._sortedValues is not None:
+                sortedValues = self._sortedValues
+                i = bisect_left(sortedValues, value)
+                if i < len(sortedValues) and sortedValues[i] == value:
+                    del sortedValues[i]
+                else:
+                    self._sortedValues = None
+
+
+    def update(self, itemId, value):
+        """Updates the value of an item in the index."""
+        self.remove(itemId)
+        self.add(itemId, value)
+
+
+    def clear(self):
+        self._values.clear()
+        if self._buckets is not None:
+            self._buckets.clear()
+        self._sortedValues = None
+
+
+    def disable(self):
+        self._values.clear()
+        self._buckets = None
+        self._sortedValues = None
+
+
+    def equal(self, value):
+        """Returns the ids of the items whose value equals the given value.
+
+        @return: set of item ids, None if the index is disabled
+        """
+        if self._buckets is None:
+            return None
+        try:
+            return set(self._buckets.get(value, ()))
+        except TypeError:
+            return set()
+
+
+    def within(self, low, high, lowInclusive=True, highInclusive=True):
+        """Returns the ids of the items whose value is within the given
+        range. C{None} values are never included.
+
+        @param low:
+                   lower bound of the range, None for no bound
+        @param high:
+                   upper bound of the range, None for no bound
+        @return: set of item ids, None if the index is disabled
+        """
+        if self._buckets is None:
+            return None
+
+        if self._sortedValues is None:
+            self._sortedValues = sorted(value for value in self._buckets
+                    if value is not None)
+        sortedValues = self._sortedValues
+
+        if low is None:
+            start = 0
+        elif lowInclusive:
+            start = bisect_left(sortedValues, low)
+        else:
+            start = bisect_right(sortedValues, low)
+
+        if high is None:
+            end = len(sortedValues)
+        elif highInclusive:
+            end = bisect_right(sortedValues, high)
+        else:
+            end = bisect_left(sortedValues, high)
+
+        itemIds = set()
+        buckets = self._buckets
+        for value in sortedValues[start:end]:
+            itemIds.update(buckets[value])
+        return itemIds
@@ -0,0 +1,5 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Provides a lazy container of the rows of a database table read through
+a DB-API 2.0 connection."""
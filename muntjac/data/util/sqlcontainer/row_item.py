@@ -0,0 +1,124 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Read-only item of a row read by a SQLContainer."""
+
+from muntjac.data.item import IItem
+from muntjac.data import property as prop
+
+
+class RowItem(IItem):
+    """Read-only item holding the column values of a row read by a
+    L{SQLContainer}. The item is a snapshot of the row when it was read.
+    """
+
+    __slots__ = ('_itemId', '_container', '_values')
+
+    def __init__(self, itemId, container, values):
+        """Creates an item of a row.
+
+        @param itemId:
+                   the id of the item in the container
+        @param container:
+                   the container of the item
+        @param values:
+                   the values of the row in the order of the container
+                   property ids
+        """
+        self._itemId = itemId
+        self._container = container
+        self._values = values
+
+
+    def getId(self):
+        return self._itemId
+
+
+    def getItemProperty(self, idd):
+        index = self._container.getColumnIndex(idd)
+        if index < 0:
+            return None
+        return ColumnProperty(self, idd, self._values[index])
+
+
+    def getItemPropertyIds(self):
+        return self._container.getContainerPropertyIds()
+
+
+    def getContainer(self):
+        return self._container
+
+
+    def addItemProperty(self, idd, prop):
+        raise NotImplementedError, 'SQLContainer items are read-only'
+
+
+    def removeItemProperty(self, idd):
+        raise NotImplementedError, 'SQLContainer items are read-only'
+
+
+    def __str__(self):
+        return ' '.join([str(self.getItemProperty(propertyId))
+                for propertyId in self.getItemPropertyIds()])
+
+
+    def __eq__(self, obj):
+        return (isinstance(obj, RowItem)
+                and obj._container == self._container
+                and obj._itemId == self._itemId)
+
+
+    def __ne__(self, obj):
+        return not self.__eq__(obj)
+
+
+    def __hash__(self):
+        return hash(self._itemId)
+
+
+class ColumnProperty(prop.IProperty):
+    """Read-only property of a column value of a L{RowItem}."""
+
+    __slots__ = ('_item', '_propertyId', '_value')
+
+    def __init__(self, item, propertyId, value):
+        self._item = item
+        self._propertyId = propertyId
+        self._value = value
+
+
+    def getItemId(self):
+        """Returns the id of the item this property belongs to."""
+        return self._item.getId()
+
+
+    def getPropertyId(self):
+        """Returns the id of this property."""
+        return self._propertyId
+
+
+    def getType(self):
+        return self._item.getContainer().getType(self._propertyId)
+
+
+    def getValue(self):
+        return self._value
+
+
+    def setValue(self, newValue):
+        raise prop.ReadOnlyException, 'SQLContainer items are read-only'
+
+
+    def isReadOnly(self):
+        return True
+
+
+    def setReadOnly(self, newStatus):
+        if not newStatus:
+            raise NotImplementedError, 'SQLContainer items are read-only'
+
+
+    def __str__(self):
+        if self._value is None:
+            return ''
+        return str(self._value)
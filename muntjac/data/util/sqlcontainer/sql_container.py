@@ -0,0 +1,644 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Lazy container of the rows of a database table."""
+
+from collections import OrderedDict
+
+from muntjac.data.container import \
+    (IBulkIndexed, ISortable, IFilterable, ISimpleFilterable,
+     IItemSetChangeNotifier)
+
+from muntjac.data.util.abstract_container import AbstractContainer
+from muntjac.data.util.sqlcontainer.sql_generator import SQLGenerator
+from muntjac.data.util.sqlcontainer.row_item import RowItem
+from muntjac.data.util.filter.compare import Equal, Greater, Less
+from muntjac.data.util.filter.simple_string_filter import SimpleStringFilter
+
+
+class SQLContainer(AbstractContainer, IBulkIndexed, ISortable, IFilterable,
+            ISimpleFilterable, IItemSetChangeNotifier):
+    """Lazy, read-only container of the rows of a database table read
+    through a DB-API 2.0 connection.
+
+    The rows are read on demand in pages of L{getPageLength} rows, and a
+    limited number of pages is cached, evicting the least recently used
+    page. The default page length matches the rows a L{Table} fetches with
+    its default page length and cache rate, so that painting a page of a
+    table reads one page from the database.
+
+    Sorting and filtering are performed by the database: L{sort} becomes
+    the ORDER BY clause and the container filters the WHERE clause of the
+    queries, see L{SQLGenerator} for the filters supported. The primary
+    key columns always end the ORDER BY clause so that the rows have a
+    stable order.
+
+    The item ids are the primary key values of the rows, or tuples of them
+    if the primary key has several columns. The property ids are the column
+    names. The number of rows is counted once and cached until the sort
+    order or the filters change or L{refresh} is called, which must also be
+    done when the table is modified by other means.
+    """
+
+    #: Rows a Table reads at a time with its default page length of 15 and
+    #  cache rate of 2: the visible page and two pages both before and
+    #  after it.
+    DEFAULT_PAGE_LENGTH = 15 * (1 + 2 * 2)
+
+    #: Default number of pages kept in the cache.
+    DEFAULT_CACHE_SIZE = 10
+
+    def __init__(self, connection, tableName, primaryKeyColumns,
+                paramstyle='qmark', pageLength=None, cacheSize=None):
+        """Creates a container of the rows of a table.
+
+        @param connection:
+                   a DB-API 2.0 connection
+        @param tableName:
+                   the name of the table
+        @param primaryKeyColumns:
+                   the name of the primary key column or a list of the
+                   names of the primary key columns
+        @param paramstyle:
+                   the C{paramstyle} of the DB-API module of the
+                   connection
+        @param pageLength:
+                   the number of rows read at a time
+        @param cacheSize:
+                   the number of pages cached
+        """
+        super(SQLContainer, self).__init__()
+
+        self._connection = connection
+        self._tableName = tableName
+
+        if isinstance(primaryKeyColumns, basestring):
+            primaryKeyColumns = [primaryKeyColumns]
+        self._primaryKeyColumns = list(primaryKeyColumns)
+
+        self._generator = SQLGenerator(paramstyle)
+
+        self._pageLength = pageLength or self.DEFAULT_PAGE_LENGTH
+        self._cacheSize = cacheSize or self.DEFAULT_CACHE_SIZE
+
+        #: List of (column, ascending) tuples.
+        self._sortColumns = list()
+
+        self._filters = list()
+
+        #: Page number -> list of (item id, row values) in the order of
+        #  use, the most recently used last.
+        self._pages = OrderedDict()
+
+        #: Item id -> (index, row values) of the rows of the cached pages.
+        self._rows = dict()
+
+        #: (index, list of (item id, row values)) of the last range read
+        #  that was longer than a page, None if there is none.
+        self._range = None
+
+        #: Cached number of rows, None if not known.
+        self._size = None
+
+        #: Column -> type inferred from the values.
+        self._types = dict()
+
+        self._columns = self.readColumns()
+        self._columnIndexes = dict([(c, i)
+                for i, c in enumerate(self._columns)])
+
+        for column in self._primaryKeyColumns:
+            if column not in self._columnIndexes:
+                raise ValueError, ('primary key column not found: '
+                        + str(column))
+        self._keyIndexes = [self._columnIndexes[c]
+                for c in self._primaryKeyColumns]
+
+
+    def getConnection(self):
+        return self._connection
+
+
+    def getTableName(self):
+        return self._tableName
+
+
+    def getPrimaryKeyColumns(self):
+        return list(self._primaryKeyColumns)
+
+
+    def getSQLGenerator(self):
+        return self._generator
+
+
+    def setSQLGenerator(self, generator):
+        """Sets the generator of the SQL statements, for databases with
+        different dialects."""
+        self._generator = generator
+        self.refresh()
+
+
+    def getPageLength(self):
+        """Returns the number of rows read from the database at a time."""
+        return self._pageLength
+
+
+    def setPageLength(self, pageLength):
+        """Sets the number of rows read from the database at a time. To
+        read the rows a L{Table} needs with one query, use the page length
+        of the table multiplied by C{1 + 2 * cacheRate} of the table."""
+        if pageLength < 1:
+            raise ValueError, 'page length must be positive'
+        if pageLength != self._pageLength:
+            self._pageLength = pageLength
+            self.clearCache()
+
+
+    def getCacheSize(self):
+        """Returns the maximum number of pages cached."""
+        return self._cacheSize
+
+
+    def setCacheSize(self, cacheSize):
+        if cacheSize < 1:
+            raise ValueError, 'cache size must be positive'
+        self._cacheSize = cacheSize
+        while len(self._pages) > cacheSize:
+            self.evictPage()
+
+
+    def refresh(self):
+        """Discards the cached rows and row count and notifies the listeners
+        that the rows may have changed. Must be called after the table has
+        been modified."""
+        self.clearCache()
+        self.fireItemSetChange()
+
+
+    def clearCache(self):
+        """Discards the cached rows and row count."""
+        self._pages.clear()
+        self._rows.clear()
+        self._range = None
+        self._size = None
+
+
+    def execute(self, sql, params):
+        """Executes a statement and returns the cursor."""
+        cursor = self._connection.cursor()
+        cursor.execute(sql, params)
+        return cursor
+
+
+    def readColumns(self):
+        # the column names are read from the description of an empty result
+        cursor = self.execute('SELECT * FROM %s WHERE 1 = 0'
+                % self._generator.quoteIdentifier(self._tableName),
+                self._generator.bind([]))
+        try:
+            return [d[0] for d in cursor.description]
+        finally:
+            cursor.close()
+
+
+    def getColumnIndex(self, propertyId):
+        """Returns the index of the column in the rows, -1 if there is no
+        such column."""
+        return self._columnIndexes.get(propertyId, -1)
+
+
+    def itemIdOf(self, row):
+        """Returns the item id of a row."""
+        if len(self._keyIndexes) == 1:
+            return row[self._keyIndexes[0]]
+        return tuple([row[i] for i in self._keyIndexes])
+
+
+    def keyFilters(self, itemId):
+        """Returns the filters selecting the row of an item id."""
+        if len(self._primaryKeyColumns) == 1:
+            itemId = (itemId,)
+        elif not isinstance(itemId, tuple) \
+                or len(itemId) != len(self._primaryKeyColumns):
+            return None
+        return [Equal(c, v) for c, v in zip(self._primaryKeyColumns, itemId)]
+
+
+    def getPage(self, page):
+        """Returns the rows of a page, reading it from the database if it is
+        not cached."""
+        rows = self._pages.get(page)
+        if rows is not None:
+            # most recently used last
+            del self._pages[page]
+            self._pages[page] = rows
+            return rows
+
+        sql, params = self._generator.generateSelect(self._tableName,
+                self._columns, self._filters, self._sortColumns,
+                self._primaryKeyColumns, page * self._pageLength,
+                self._pageLength)
+        cursor = self.execute(sql, params)
+        try:
+            rows = [(self.itemIdOf(row), tuple(row))
+                    for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+        if len(self._pages) >= self._cacheSize:
+            self.evictPage()
+        self._pages[page] = rows
+        index = page * self._pageLength
+        for itemId, values in rows:
+            self._rows[itemId] = (index, values)
+            index += 1
+        return rows
+
+
+    def readRange(self, index, count):
+        """Reads the rows of a range longer than a page with one query.
+
+        The rows of the last range read are cached until the next range is
+        read. A range starting where the last range ended continues from
+        the key of its last row, instead of skipping the preceding rows,
+        when the container is sorted by a single-column primary key only.
+        """
+        filters = self._filters
+        offset = index
+        ascending = self.getKeyOrder()
+        if (ascending is not None and self._range is not None
+                and len(self._range[1]) > 0
+                and self._range[0] + len(self._range[1]) == index):
+            lastId = self._range[1][-1][0]
+            if ascending:
+                following = Greater(self._primaryKeyColumns[0], lastId)
+            else:
+                following = Less(self._primaryKeyColumns[0], lastId)
+            filters = filters + [following]
+            offset = 0
+
+        sql, params = self._generator.generateSelect(self._tableName,
+                self._columns, filters, self._sortColumns,
+                self._primaryKeyColumns, offset, count)
+        cursor = self.execute(sql, params)
+        try:
+            rows = [(self.itemIdOf(row), tuple(row))
+                    for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+        if self._range is not None:
+            for itemId, _ in self._range[1]:
+                self._rows.pop(itemId, None)
+        self._range = (index, rows)
+        for itemId, values in rows:
+            self._rows[itemId] = (index, values)
+            index += 1
+        return rows
+
+
+    def getKeyOrder(self):
+        """Returns C{True} if the rows are sorted by a single-column primary
+        key only in ascending order, C{False} if in descending order and
+        C{None} if they are sorted otherwise."""
+        if (len(self._primaryKeyColumns) != 1
+                or len([c for c, _ in self._sortColumns
+                        if c not in self._primaryKeyColumns]) > 0):
+            return None
+        if len(self._sortColumns) > 0:
+            return self._sortColumns[0][1]
+        return True
+
+
+    def evictPage(self):
+        """Discards the least recently used page."""
+        _, rows = self._pages.popitem(False)
+        for itemId, _ in rows:
+            self._rows.pop(itemId, None)
+
+
+    def readRow(self, itemId):
+        """Returns the values of the row of a visible item, None if there
+        is no such row."""
+        cached = self._rows.get(itemId)
+        if cached is not None:
+            return cached[1]
+
+        keyFilters = self.keyFilters(itemId)
+        if keyFilters is None:
+            return None
+        sql, params = self._generator.generateSelect(self._tableName,
+                self._columns, self._filters + keyFilters)
+        cursor = self.execute(sql, params)
+        try:
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        return None if row is None else tuple(row)
+
+
+    def getItem(self, itemId):
+        values = self.readRow(itemId)
+        if values is None:
+            return None
+        return RowItem(itemId, self, values)
+
+
+    def getContainerPropertyIds(self):
+        return list(self._columns)
+
+
+    def getItemIds(self):
+        sql, params = self._generator.generateSelect(self._tableName,
+                self._primaryKeyColumns, self._filters, self._sortColumns,
+                self._primaryKeyColumns)
+        cursor = self.execute(sql, params)
+        try:
+            if len(self._primaryKeyColumns) == 1:
+                return [row[0] for row in cursor.fetchall()]
+            return [tuple(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+    def getContainerProperty(self, itemId, propertyId):
+        item = self.getItem(itemId)
+        if item is None:
+            return None
+        return item.getItemProperty(propertyId)
+
+
+    def getType(self, propertyId):
+        """Returns the type of the values of a column, inferred from the
+        first value that is not C{NULL}, or C{object} if the column has
+        only C{NULL} values."""
+        if propertyId not in self._columnIndexes:
+            return None
+
+        typ = self._types.get(propertyId)
+        if typ is None:
+            generator = self._generator
+            column = generator.quoteIdentifier(propertyId)
+            params = list()
+            sql = 'SELECT %s FROM %s WHERE %s IS NOT NULL' % (column,
+                    generator.quoteIdentifier(self._tableName), column)
+            sql += generator.generatePaging(None, 1, params)
+            cursor = self.execute(sql, generator.bind(params))
+            try:
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+            typ = object if row is None else row[0].__class__
+            self._types[propertyId] = typ
+        return typ
+
+
+    def size(self):
+        if self._size is None:
+            sql, params = self._generator.generateCount(self._tableName,
+                    self._filters)
+            cursor = self.execute(sql, params)
+            try:
+                self._size = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+        return self._size
+
+
+    def __len__(self):
+        return self.size()
+
+
+    def containsId(self, itemId):
+        if itemId in self._rows:
+            return True
+        return self.readRow(itemId) is not None
+
+
+    def getIdByIndex(self, index):
+        if index < 0 or index >= self.size():
+            return None
+        page, offset = divmod(index, self._pageLength)
+        rows = self.getPage(page)
+        if offset >= len(rows):
+            # the table has changed since the size was counted
+            return None
+        return rows[offset][0]
+
+
+    def getItemIdsInRange(self, startIndex, numberOfItems):
+        itemIds = list()
+        index = max(startIndex, 0)
+        end = min(startIndex + numberOfItems, self.size())
+        if end - index > self._pageLength:
+            return [itemId for itemId, _ in
+                    self.readRange(index, end - index)]
+
+        while index < end:
+            page, offset = divmod(index, self._pageLength)
+            rows = self.getPage(page)
+            if offset >= len(rows):
+                break
+            count = min(len(rows) - offset, end - index)
+            itemIds.extend([itemId for itemId, _ in
+                    rows[offset:offset + count]])
+            index += count
+        return itemIds
+
+
+    def getItemValues(self, itemIds, propertyIds):
+        indexes = [self.getColumnIndex(propertyId)
+                for propertyId in propertyIds]
+        result = list()
+        for itemId in itemIds:
+            values = self.readRow(itemId)
+            if values is None:
+                result.append([None] * len(indexes))
+            else:
+                result.append([None if i < 0 else values[i]
+                        for i in indexes])
+        return result
+
+
+    def indexOfId(self, itemId):
+        """Returns the index of an item. The cached rows are looked up
+        first. Otherwise the preceding rows are counted when the container
+        is sorted by a single-column primary key only, and the ids are
+        scanned in order in other cases."""
+        cached = self._rows.get(itemId)
+        if cached is not None:
+            return cached[0]
+
+        if not self.containsId(itemId):
+            return -1
+
+        ascending = self.getKeyOrder()
+        if ascending is not None:
+            column = self._primaryKeyColumns[0]
+            if ascending:
+                preceding = Less(column, itemId)
+            else:
+                preceding = Greater(column, itemId)
+            sql, params = self._generator.generateCount(self._tableName,
+                    self._filters + [preceding])
+            cursor = self.execute(sql, params)
+            try:
+                return cursor.fetchone()[0]
+            finally:
+                cursor.close()
+
+        sql, params = self._generator.generateSelect(self._tableName,
+                self._primaryKeyColumns, self._filters, self._sortColumns,
+                self._primaryKeyColumns)
+        cursor = self.execute(sql, params)
+        try:
+            index = 0
+            while True:
+                rows = cursor.fetchmany(self._pageLength)
+                if not rows:
+                    return -1
+                for row in rows:
+                    if len(row) == 1:
+                        rowId = row[0]
+                    else:
+                        rowId = tuple(row)
+                    if rowId == itemId:
+                        return index
+                    index += 1
+        finally:
+            cursor.close()
+
+
+    def nextItemId(self, itemId):
+        index = self.indexOfId(itemId)
+        if index < 0:
+            return None
+        return self.getIdByIndex(index + 1)
+
+
+    def prevItemId(self, itemId):
+        index = self.indexOfId(itemId)
+        if index < 1:
+            return None
+        return self.getIdByIndex(index - 1)
+
+
+    def firstItemId(self):
+        return self.getIdByIndex(0)
+
+
+    def lastItemId(self):
+        return self.getIdByIndex(self.size() - 1)
+
+
+    def isFirstId(self, itemId):
+        return itemId is not None and itemId == self.firstItemId()
+
+
+    def isLastId(self, itemId):
+        return itemId is not None and itemId == self.lastItemId()
+
+
+    def sort(self, propertyId, ascending):
+        sortColumns = list()
+        for i, column in enumerate(propertyId):
+            if column in self._columnIndexes:
+                asc = ascending[i] if i < len(ascending) else True
+                sortColumns.append((column, bool(asc)))
+        self._sortColumns = sortColumns
+        self.refresh()
+
+
+    def getSortableContainerPropertyIds(self):
+        return list(self._columns)
+
+
+    def addContainerFilter(self, *args):
+        """Adds a container filter, translated to the WHERE clause of the
+        queries.
+
+        @raise UnsupportedFilterException:
+                    if the filter cannot be translated to SQL
+        """
+        nargs = len(args)
+        if nargs == 1:
+            fltr, = args
+        elif nargs == 4:
+            propertyId, filterString, ignoreCase, onlyMatchPrefix = args
+            fltr = SimpleStringFilter(propertyId, filterString, ignoreCase,
+                    onlyMatchPrefix)
+        else:
+            raise ValueError, 'invalid number of elements'
+
+        # fails early for filters that cannot be translated
+        self._generator.generateFilter(fltr, list())
+        self._filters.append(fltr)
+        self.refresh()
+
+
+    def removeContainerFilter(self, fltr):
+        if fltr in self._filters:
+            self._filters.remove(fltr)
+            self.refresh()
+
+
+    def removeContainerFilters(self, propertyId):
+        filters = [f for f in self._filters
+                if not f.appliesToProperty(propertyId)]
+        if len(filters) < len(self._filters):
+            self._filters = filters
+            self.refresh()
+
+
+    def removeAllContainerFilters(self):
+        if len(self._filters) > 0:
+            self._filters = list()
+            self.refresh()
+
+
+    def getContainerFilters(self):
+        return list(self._filters)
+
+
+    def addListener(self, listener, iface=None):
+        super(SQLContainer, self).addListener(listener, iface)
+
+
+    def addCallback(self, callback, eventType=None, *args):
+        super(SQLContainer, self).addCallback(callback, eventType, *args)
+
+
+    def removeListener(self, listener, iface=None):
+        super(SQLContainer, self).removeListener(listener, iface)
+
+
+    def removeCallback(self, callback, eventType=None):
+        super(SQLContainer, self).removeCallback(callback, eventType)
+
+
+    def addItem(self, itemId=None):
+        raise NotImplementedError, 'SQLContainer is read-only'
+
+
+    def addItemAfter(self, previousItemId, newItemId=None):
+        raise NotImplementedError, 'SQLContainer is read-only'
+
+
+    def addItemAt(self, index, newItemId=None):
+        raise NotImplementedError, 'SQLContainer is read-only'
+
+
+    def removeItem(self, itemId):
+        raise NotImplementedError, 'SQLContainer is read-only'
+
+
+    def removeAllItems(self):
+        raise NotImplementedError, 'SQLContainer is read-only'
+
+
+    def addContainerProperty(self, propertyId, typ, defaultValue):
+        raise NotImplementedError, 'SQLContainer is read-only'
+
+
+    def removeContainerProperty(self, propertyId):
+        raise NotImplementedError, 'SQLContainer is read-only'
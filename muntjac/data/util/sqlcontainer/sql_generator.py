@@ -0,0 +1,271 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Generates the SQL statements of a SQLContainer."""
+
+from muntjac.data.util.filter.compare import Compare
+from muntjac.data.util.filter.between import Between
+from muntjac.data.util.filter.in_ import In
+from muntjac.data.util.filter.is_null import IsNull
+from muntjac.data.util.filter.like import Like
+from muntjac.data.util.filter.and_ import And
+from muntjac.data.util.filter.or_ import Or
+from muntjac.data.util.filter.not_ import Not
+from muntjac.data.util.filter.simple_string_filter import SimpleStringFilter
+
+from muntjac.data.util.filter.unsupported_filter_exception import \
+    UnsupportedFilterException
+
+
+class SQLGenerator(object):
+    """Generates the SELECT statements used by L{SQLContainer} to read the
+    rows of a table, translating the container filters to a WHERE clause
+    and the sort order to an ORDER BY clause.
+
+    The statements use standard SQL and C{LIMIT ... OFFSET ...} for
+    paging, which is understood by SQLite, PostgreSQL, MySQL and H2
+    among others. Subclasses can override L{quoteIdentifier} and
+    L{generatePaging} for other databases.
+
+    Note that whether C{LIKE} is case-sensitive depends on the database.
+    For instance SQLite matches ASCII characters case-insensitively by
+    default, so case-sensitive L{Like} and L{SimpleStringFilter} filters
+    may match more rows than the same filters in an in-memory container.
+    """
+
+    #: The DB-API 2.0 parameter styles supported.
+    PARAMSTYLES = ('qmark', 'format', 'numeric', 'named', 'pyformat')
+
+    #: Escape character used in the generated LIKE patterns.
+    LIKE_ESCAPE = '!'
+
+    _OPERATORS = {
+        Compare.EQUAL: '=',
+        Compare.GREATER: '>',
+        Compare.LESS: '<',
+        Compare.GREATER_OR_EQUAL: '>=',
+        Compare.LESS_OR_EQUAL: '<=',
+    }
+
+    def __init__(self, paramstyle='qmark'):
+        """Creates a generator producing parameter placeholders in the given
+        style.
+
+        @param paramstyle:
+                   the C{paramstyle} of the DB-API module of the connection
+        """
+        if paramstyle not in self.PARAMSTYLES:
+            raise ValueError, 'unsupported paramstyle: ' + str(paramstyle)
+        self._paramstyle = paramstyle
+
+
+    def getParamstyle(self):
+        return self._paramstyle
+
+
+    def quoteIdentifier(self, identifier):
+        """Quotes a table or column name."""
+        return '"%s"' % str(identifier).replace('"', '""')
+
+
+    def parameter(self, value, params):
+        """Appends a value to the statement parameters and returns its
+        placeholder."""
+        params.append(value)
+        style = self._paramstyle
+        if style == 'qmark':
+            return '?'
+        elif style == 'format':
+            return '%s'
+        elif style == 'numeric':
+            return ':%d' % len(params)
+        elif style == 'named':
+            return ':p%d' % len(params)
+        else:
+            return '%%(p%d)s' % len(params)
+
+
+    def bind(self, params):
+        """Returns the statement parameters in the form expected by
+        C{execute} of the cursor."""
+        if self._paramstyle in ('named', 'pyformat'):
+            return dict([('p%d' % (i + 1), value)
+                    for i, value in enumerate(params)])
+        return tuple(params)
+
+
+    def generateSelect(self, tableName, columns, filters=None,
+                sortColumns=None, primaryKeyColumns=None, offset=None,
+                limit=None):
+        """Generates a SELECT statement.
+
+        @param tableName:
+                   the name of the table
+        @param columns:
+                   the selected columns
+        @param filters:
+                   the container filters, all of which must pass
+        @param sortColumns:
+                   list of (column, ascending) tuples
+        @param primaryKeyColumns:
+                   the primary key columns, appended to the sort order so
+                   that the order of the rows is always defined
+        @param offset:
+                   the number of rows to skip or None
+        @param limit:
+                   the maximum number of rows or None
+        @return: tuple of the statement and its parameters
+        """
+        params = list()
+        sql = 'SELECT %s FROM %s' % (
+                ', '.join([self.quoteIdentifier(c) for c in columns]),
+                self.quoteIdentifier(tableName))
+        sql += self.generateWhere(filters, params)
+        sql += self.generateOrderBy(sortColumns, primaryKeyColumns)
+        if offset is not None or limit is not None:
+            sql += self.generatePaging(offset, limit, params)
+        return sql, self.bind(params)
+
+
+    def generateCount(self, tableName, filters=None):
+        """Generates a statement counting the rows passing the filters.
+
+        @return: tuple of the statement and its parameters
+        """
+        params = list()
+        sql = 'SELECT COUNT(*) FROM %s' % self.quoteIdentifier(tableName)
+        sql += self.generateWhere(filters, params)
+        return sql, self.bind(params)
+
+
+    def generateWhere(self, filters, params):
+        """Generates the WHERE clause of the given filters, an empty string
+        if there are none.
+
+        @raise UnsupportedFilterException:
+                    if a filter cannot be translated to SQL
+        """
+        if not filters:
+            return ''
+        return ' WHERE ' + ' AND '.join([self.generateFilter(f, params)
+                for f in filters])
+
+
+    def generateOrderBy(self, sortColumns, primaryKeyColumns=None):
+        """Generates the ORDER BY clause, an empty string if there is no
+        order."""
+        terms = list()
+        sorted_ = set()
+        for column, ascending in (sortColumns or []):
+            terms.append(self.quoteIdentifier(column)
+                    + ('' if ascending else ' DESC'))
+            sorted_.add(column)
+
+        for column in (primaryKeyColumns or []):
+            if column not in sorted_:
+                terms.append(self.quoteIdentifier(column))
+
+        if len(terms) == 0:
+            return ''
+        return ' ORDER BY ' + ', '.join(terms)
+
+
+    def generatePaging(self, offset, limit, params):
+        """Generates the clause limiting the rows returned."""
+        if limit is None:
+            # LIMIT is mandatory with OFFSET in some databases
+            limit = -1
+        sql = ' LIMIT ' + self.parameter(limit, params)
+        if offset:
+            sql += ' OFFSET ' + self.parameter(offset, params)
+        return sql
+
+
+    def generateFilter(self, fltr, params):
+        """Translates a container filter to an SQL condition.
+
+        The conditions evaluate to false rather than unknown for C{NULL}
+        values where the in-memory filters do not accept C{None}, so that
+        L{Not} can be translated consistently with in-memory filtering.
+
+        @raise UnsupportedFilterException:
+                    if the filter cannot be translated to SQL
+        """
+        if isinstance(fltr, Compare):
+            column = self.quoteIdentifier(fltr.getPropertyId())
+            value = fltr.getValue()
+            if value is None:
+                if fltr.getOperation() == Compare.EQUAL:
+                    return column + ' IS NULL'
+                return '1 = 0'
+            return '%s %s %s' % (column,
+                    self._OPERATORS[fltr.getOperation()],
+                    self.parameter(value, params))
+
+        elif isinstance(fltr, Between):
+            return '%s BETWEEN %s AND %s' % (
+                    self.quoteIdentifier(fltr.getPropertyId()),
+                    self.parameter(fltr.getStartValue(), params),
+                    self.parameter(fltr.getEndValue(), params))
+
+        elif isinstance(fltr, In):
+            column = self.quoteIdentifier(fltr.getPropertyId())
+            values = [v for v in fltr.getValues() if v is not None]
+            terms = list()
+            if len(values) > 0:
+                terms.append('%s IN (%s)' % (column, ', '.join(
+                        [self.parameter(v, params) for v in values])))
+            if len(values) < len(fltr.getValues()):
+                terms.append(column + ' IS NULL')
+            if len(terms) == 0:
+                return '1 = 0'
+            return '(' + ' OR '.join(terms) + ')'
+
+        elif isinstance(fltr, IsNull):
+            return self.quoteIdentifier(fltr.getPropertyId()) + ' IS NULL'
+
+        elif isinstance(fltr, Like):
+            column = self.quoteIdentifier(fltr.getPropertyId())
+            value = fltr.getValue()
+            if not fltr.isCaseSensitive():
+                column = 'LOWER(%s)' % column
+                value = value.lower()
+            return '%s LIKE %s' % (column, self.parameter(value, params))
+
+        elif isinstance(fltr, SimpleStringFilter):
+            column = self.quoteIdentifier(fltr.getPropertyId())
+            if fltr.isIgnoreCase():
+                column = 'LOWER(%s)' % column
+            pattern = self.escapeLike(fltr.getFilterString()) + '%'
+            if not fltr.isOnlyMatchPrefix():
+                pattern = '%' + pattern
+            return "%s LIKE %s ESCAPE '%s'" % (column,
+                    self.parameter(pattern, params), self.LIKE_ESCAPE)
+
+        elif isinstance(fltr, And):
+            if len(fltr.getFilters()) == 0:
+                return '1 = 1'
+            return '(' + ' AND '.join([self.generateFilter(f, params)
+                    for f in fltr.getFilters()]) + ')'
+
+        elif isinstance(fltr, Or):
+            if len(fltr.getFilters()) == 0:
+                return '1 = 0'
+            return '(' + ' OR '.join([self.generateFilter(f, params)
+                    for f in fltr.getFilters()]) + ')'
+
+        elif isinstance(fltr, Not):
+            # an unknown result of the negated condition must not pass
+            return '(CASE WHEN %s THEN 1 ELSE 0 END) = 0' % \
+                    self.generateFilter(fltr.getFilter(), params)
+
+        raise UnsupportedFilterException, ('filter not supported by '
+                'SQLContainer: ' + fltr.__class__.__name__)
+
+
+    def escapeLike(self, value):
+        """Escapes the wildcard characters of a LIKE pattern."""
+        escape = self.LIKE_ESCAPE
+        for c in (escape, '%', '_'):
+            value = value.replace(c, escape + c)
+        return value
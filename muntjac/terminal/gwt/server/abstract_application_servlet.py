@@ -6,13 +6,12 @@ the server."""
 
 import re
 import logging
-import mimetypes
 
 from time import time
 from warnings import warn
 
 from urlparse import urljoin
-from os.path import exists, getmtime
+from email.utils import formatdate
 
 try:
     from StringIO import StringIO
@@ -31,6 +30,12 @@ from muntjac.terminal.terminal import IErrorEvent as TerminalErrorEvent
 
 from muntjac.terminal.gwt.server.paste_wsgi_servlet import PasteWsgiServlet
 
+from muntjac.terminal.gwt.server.static_resource_cache import \
+    StaticResourceCache
+
+from muntjac.terminal.gwt.server.locale_declaration_cache import \
+    LocaleDeclarationCache
+
 from muntjac.terminal.gwt.server.exceptions import \
     SessionExpiredException, SystemMessageException
 
@@ -161,10 +166,16 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
 
     UPLOAD_URL_PREFIX = 'APP/UPLOAD/'
 
+    #: Milliseconds after which the client should retry a request answered
+    #  with a busy response.
+    _BUSY_RETRY_AFTER = 1000
+
 
     def __init__(self, productionMode=False, debug=False, widgetset=None,
                  resourceCacheTime=3600, disableXsrfProtection=False,
-                 *args, **kw_args):
+                 streamUidl=False, staticResourceCacheSize=8388608,
+                 applicationLockTimeout=30, uploadProgressInterval=500,
+                 preloadLocales=None, *args, **kw_args):
 
         super(AbstractApplicationServlet, self).__init__(*args, **kw_args)
 
@@ -172,8 +183,13 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
         self._productionMode = False
         self._resourcePath = None
         self._resourceCacheTime = 3600
+        self._applicationLockTimeout = 30
         self._firstTransaction = True
 
+        # Bounded in-memory cache of the files in the VAADIN directory
+        self._staticResourceCache = \
+                StaticResourceCache(staticResourceCacheSize)
+
         self._applicationProperties[
                 self.SERVLET_PARAMETER_PRODUCTION_MODE] = \
                         'true' if productionMode else 'false'
@@ -192,6 +208,30 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
                 self.SERVLET_PARAMETER_DISABLE_XSRF_PROTECTION] = \
                         'true' if disableXsrfProtection else 'false'
 
+        # Write each painted change to the client as soon as it is complete
+        # instead of buffering the whole UIDL response.
+        self._applicationProperties[self.SERVLET_PARAMETER_STREAM_UIDL] = \
+                'true' if streamUidl else 'false'
+
+        # Seconds to wait for other requests to the same application before
+        # responding that the application is busy.
+        self._applicationProperties[
+                self.SERVLET_PARAMETER_APPLICATION_LOCK_TIMEOUT] = \
+                        str(applicationLockTimeout)
+
+        # Minimum number of milliseconds between upload progress events.
+        self._applicationProperties[
+                self.SERVLET_PARAMETER_UPLOAD_PROGRESS_INTERVAL] = \
+                        str(uploadProgressInterval)
+
+        # Locales of which the declarations sent to the client are
+        # serialized when the servlet is initialized.
+        if preloadLocales is not None:
+            if not isinstance(preloadLocales, basestring):
+                preloadLocales = ','.join(preloadLocales)
+            self._applicationProperties[
+                    self.SERVLET_PARAMETER_PRELOAD_LOCALES] = preloadLocales
+
 
     def init(self):
         """Called by the servlet container to indicate to a servlet that the
@@ -212,6 +252,8 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
             self.checkProductionMode()
             self.checkCrossSiteProtection()
             self.checkResourceCacheTime()
+            self.checkApplicationLockTimeout()
+            self.preloadLocales()
 
 
     def checkCrossSiteProtection(self):
@@ -264,6 +306,35 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
             logger.warning(self.WARNING_RESOURCE_CACHING_TIME_NOT_NUMERIC)
 
 
+    def checkApplicationLockTimeout(self):
+        # Check if the application lock timeout has been set in INI
+        # Default is 30s
+        try:
+            timeout = self.getApplicationOrSystemProperty(
+                    self.SERVLET_PARAMETER_APPLICATION_LOCK_TIMEOUT, '30')
+            self._applicationLockTimeout = float(timeout)
+        except ValueError:
+            self._applicationLockTimeout = 30
+            logger.warning(self.WARNING_APPLICATION_LOCK_TIMEOUT_NOT_NUMERIC)
+
+
+    def preloadLocales(self):
+        # Serialize the declarations of the locales listed in INI, so that
+        # the first requests of the applications don't need to
+        locales = self.getApplicationOrSystemProperty(
+                self.SERVLET_PARAMETER_PRELOAD_LOCALES, '')
+        names = [name.strip() for name in locales.split(',') if name.strip()]
+        if len(names) > 0:
+            LocaleDeclarationCache.getInstance().preload(names)
+
+
+    def getApplicationLockTimeout(self):
+        """Returns the number of seconds a request waits for other requests
+        to the same application to complete before a busy response is sent.
+        """
+        return self._applicationLockTimeout
+
+
     def getApplicationProperty(self, parameterName):
         """Gets an application property value.
 
@@ -347,6 +418,7 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
             self.checkWidgetsetVersion(request)
 
         application = None
+        locked = False
         transactionStarted = False
         requestStarted = False
 
@@ -373,10 +445,23 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
             if application is None:
                 return
 
+            # Requests to the same application are processed one at a time,
+            # requests to other applications are processed in parallel
+            if not application.getLock().acquire(
+                    timeout=self.getApplicationLockTimeout()):
+                self.busyResponse(request, response)
+                return
+            locked = True
+
             # Get or create a WebApplicationContext and an ApplicationManager
             # for the session
-            webApplicationContext = \
-                    self.getApplicationContext(self.getSession(request))
+            session = self.getSession(request)
+            webApplicationContext = self.getApplicationContext(session)
+
+            # Requests with content may change the application state
+            if (requestType in (RequestType.FILE_UPLOAD, RequestType.UIDL)
+                    and self.getContentLength(request) > 0):
+                self.getSessionStore().markDirty(self, session)
             applicationManager = \
                     webApplicationContext.getApplicationManager(
                             application, self)
@@ -454,8 +539,32 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
                     application.getContext().endTransaction(application,
                             request)
             finally:
-                if requestStarted:
-                    application.onRequestEnd(request, response)
+                try:
+                    if requestStarted:
+                        application.onRequestEnd(request, response)
+                finally:
+                    if locked:
+                        try:
+                            self.getSessionStore().requestEnd(self,
+                                    self.getSession(request, False))
+                        finally:
+                            application.getLock().release()
+
+
+    def busyResponse(self, request, response):
+        """Responds that the application is busy processing other requests
+        and that the request should be retried. The client retries UIDL
+        requests after the number of milliseconds given in the Retry-After
+        header, other clients expect the number of seconds.
+        """
+        self.setStatus(response, 503, 'Service Unavailable')
+        if self.isUIDLRequest(request):
+            retryAfter = self._BUSY_RETRY_AFTER
+        else:
+            retryAfter = max(1, self._BUSY_RETRY_AFTER / 1000)
+        self.setHeader(response, 'Retry-After', str(retryAfter))
+        self.setHeader(response, 'Content-Type', 'text/plain')
+        self.write(response, 'The application is busy, please try again.')
 
 
     def ensureCookiesEnabled(self, requestType, request, response):
@@ -705,7 +814,7 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
                 self.setHeader(response, 'Cache-Control',
                         'max-age=' + str(cacheTime / 1000))
                 self.setHeader(response, 'Expires',
-                        str(1000 * time() + cacheTime))
+                        formatdate(time() + (cacheTime / 1000), usegmt=True))
                 # Required to apply caching in some Tomcats
                 self.setHeader(response, 'Pragma', 'cache')
 
@@ -726,8 +835,58 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
                 self.setHeader(response, 'Content-Disposition',
                         contentDispositionValue)
 
-            self.write(response, data.read())
-            data.close()
+            bufferSize = stream.getBufferSize()
+            if bufferSize <= 0 or bufferSize > self.MAX_BUFFER_SIZE:
+                bufferSize = self.DEFAULT_BUFFER_SIZE
+
+            length = self.getStreamLength(data)
+            if length is None:
+                self.writeStream(request, response, data,
+                        blockSize=bufferSize)
+                return
+
+            self.setHeader(response, 'Accept-Ranges', 'bytes')
+
+            first, last = 0, length - 1
+            requestRange = self.getRequestRange(request, length)
+            if requestRange is not None:
+                first, last = requestRange
+                if first >= length:
+                    data.close()
+                    # replaces a Content-Length parameter of the stream
+                    self.setHeader(response, 'Content-Length', '0')
+                    self.setHeader(response, 'Content-Range',
+                            'bytes */%d' % length)
+                    self.setStatus(response, 416,
+                            'Requested Range Not Satisfiable')
+                    return
+                self.setHeader(response, 'Content-Range',
+                        'bytes %d-%d/%d' % (first, last, length))
+                self.setStatus(response, 206, 'Partial Content')
+
+            self.setHeader(response, 'Content-Length',
+                    str((last - first) + 1))
+
+            if requestRange is None:
+                self.writeStream(request, response, data,
+                        blockSize=bufferSize)
+            else:
+                self.writeStream(request, response, data, first,
+                        (last - first) + 1, bufferSize)
+
+
+    def getStreamLength(self, stream):
+        """Returns the number of bytes remaining in the given stream, or
+        None if the stream is not seekable.
+        """
+        try:
+            position = stream.tell()
+            stream.seek(0, 2)
+            end = stream.tell()
+            stream.seek(position)
+        except (AttributeError, IOError, ValueError):
+            return None
+        return end - position
 
 
     def createApplication(self, request):
@@ -925,6 +1084,9 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
             application.start(applicationUrl, self._applicationProperties,
                     webApplicationContext)
 
+            self.getSessionStore().markDirty(self,
+                    webApplicationContext.getHttpSession())
+
 
     def serveStaticResources(self, request, response):
         """Check if this is a request for a static resource and, if it is,
@@ -971,7 +1133,8 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
         #sc = self.getServletContext()  # FIXME: ServletContext
         resourceUrl = self.getResource(filename)
 
-        if not exists(resourceUrl):
+        resource = self._staticResourceCache.getResource(resourceUrl)
+        if resource is None:
             # cannot serve requested file
             msg = 'Requested resource [' + filename + '] not found'
             logger.info(msg)
@@ -987,46 +1150,165 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
             self.setStatus(response, 403, msg)
             return
 
-        # Find the modification timestamp
-        lastModifiedTime = 0
-        try:
-            lastModifiedTime = int(getmtime(resourceUrl) * 1000)
-            # Remove milliseconds to avoid comparison problems (milliseconds
-            # are not returned by the browser in the "If-Modified-Since"
-            # header).
-            lastModifiedTime = lastModifiedTime - (lastModifiedTime % 1000)
-
-            if self.browserHasNewestVersion(request, lastModifiedTime):
-                self.setStatus(response, 304, 'Not Modified')
+        lastModifiedTime = resource.getLastModified()
+
+        requestRange = self.getRequestRange(request, resource.size,
+                resource.etag, lastModifiedTime)
+
+        # The precompressed variant is sent instead of the whole file
+        sendGzip = (requestRange is None and resource.gzipPath is not None
+                and self.acceptsGzip(request))
+        etag = resource.gzipEtag if sendGzip else resource.etag
+
+        # The browser is allowed to cache for 1 hour without checking if
+        # the file has changed. This forces browsers to fetch a new version
+        # when the Muntjac version is updated. This will cause more requests
+        # to the servlet than without this but for high volume sites the
+        # static files should never be served through the servlet. The
+        # cache timeout can be configured by setting the resourceCacheTime
+        # parameter.
+        self.setHeader(response, 'Cache-Control',
+                'max-age=' + str(self._resourceCacheTime))
+        self.setHeader(response, 'ETag', etag)
+        self.setHeader(response, 'Last-Modified',
+                formatdate(lastModifiedTime / 1000, usegmt=True))
+        if resource.gzipPath is not None:
+            self.setHeader(response, 'Vary', 'Accept-Encoding')
+
+        ifNoneMatch = self.getHeader(request, 'HTTP_IF_NONE_MATCH')
+        if ifNoneMatch is not None:
+            notModified = (ifNoneMatch.strip() == '*'
+                    or etag in [value.strip()
+                            for value in ifNoneMatch.split(',')])
+        else:
+            notModified = self.browserHasNewestVersion(request,
+                    lastModifiedTime)
+
+        if notModified:
+            # a 304 response must not have content
+            self.removeHeader(response, 'Content-Type')
+            self.setStatus(response, 304, 'Not Modified')
+            return
+
+        if resource.mimetype is not None:
+            self.setHeader(response, 'Content-Type', resource.mimetype)
+
+        self.setHeader(response, 'Accept-Ranges', 'bytes')
+
+        if sendGzip:
+            self.setHeader(response, 'Content-Encoding', 'gzip')
+            self.setHeader(response, 'Content-Length',
+                    str(resource.gzipSize))
+            if resource.gzipData is not None:
+                self.write(response, resource.gzipData)
+            else:
+                self.writeStream(request, response,
+                        open(resource.gzipPath, 'rb'))
+            return
+
+        first, last = 0, resource.size - 1
+        if requestRange is not None:
+            first, last = requestRange
+            if first >= resource.size:
+                self.setHeader(response, 'Content-Range',
+                        'bytes */%d' % resource.size)
+                self.setStatus(response, 416,
+                        'Requested Range Not Satisfiable')
                 return
-        except Exception:
-            # Failed to find out last modified timestamp. Continue without it.
-            # Set type mime type if we can determine it based on the filename
-            logger.info('Failed to find out last modified timestamp. '
-                        + 'Continuing without it.')
-
-        mimetype, _ = mimetypes.guess_type(filename)
-        if mimetype is not None:
-            self.setHeader(response, 'Content-Type', mimetype)
-
-        # Provide modification timestamp to the browser if it is known.
-        if lastModifiedTime > 0:
-            self.setHeader(response, 'Last-Modified', str(lastModifiedTime))
-
-            # The browser is allowed to cache for 1 hour without checking if
-            # the file has changed. This forces browsers to fetch a new version
-            # when the Muntjac version is updated. This will cause more requests
-            # to the servlet than without this but for high volume sites the
-            # static files should never be served through the servlet. The
-            # cache timeout can be configured by setting the resourceCacheTime
-            # parameter in web.xml
-            self.setHeader(response, 'Cache-Control', 'max-age: '
-                               + str(self._resourceCacheTime))
+            self.setHeader(response, 'Content-Range',
+                    'bytes %d-%d/%d' % (first, last, resource.size))
+            self.setStatus(response, 206, 'Partial Content')
+
+        length = (last - first) + 1
+        self.setHeader(response, 'Content-Length', str(length))
 
         # Write the resource to the client.
-        fd = open(resourceUrl, 'rb')
-        self.write(response, fd.read())
-        fd.close()
+        if resource.data is not None:
+            if length == resource.size:
+                self.write(response, resource.data)
+            else:
+                self.write(response, resource.data[first:last + 1])
+        elif requestRange is None:
+            self.writeStream(request, response, open(resourceUrl, 'rb'))
+        else:
+            self.writeStream(request, response, open(resourceUrl, 'rb'),
+                    first, length)
+
+
+    def getRequestRange(self, request, size, etag=None, lastModified=0):
+        """Returns the byte range requested with the Range header.
+
+        Only a single byte range is supported. Requests for multiple
+        ranges, or conditional range requests whose If-Range header does
+        not match the given ETag or modification time, are served the
+        whole content.
+
+        @param size:
+                   the size of the content in bytes
+        @param etag:
+                   the ETag of the content
+        @param lastModified:
+                   the modification time of the content in milliseconds
+        @return: the first and last byte position of the range, the first
+                 position is not less than C{size} if the range can not be
+                 satisfied, or None if the whole content should be sent
+        """
+        header = self.getHeader(request, 'HTTP_RANGE')
+        if header is None:
+            return None
+
+        ifRange = self.getHeader(request, 'HTTP_IF_RANGE')
+        if ifRange is not None and ifRange.strip() != etag:
+            if (lastModified < 1 or ifRange.strip()
+                    != formatdate(lastModified / 1000, usegmt=True)):
+                return None
+
+        header = header.strip()
+        if not header.startswith('bytes=') or ',' in header:
+            return None
+
+        first, _, last = header[6:].partition('-')
+        try:
+            if first.strip() == '':
+                # suffix range with the length of the range
+                length = int(last)
+                if length <= 0:
+                    return size, size - 1
+                return max(0, size - length), size - 1
+
+            first = int(first)
+            last = int(last) if last.strip() != '' else size - 1
+        except ValueError:
+            return None
+
+        if first >= size:
+            return first, size - 1
+
+        if first < 0 or last < first:
+            return None
+
+        return first, min(last, size - 1)
+
+
+    def acceptsGzip(self, request):
+        """Checks if the client accepts gzip content encoding."""
+        acceptEncoding = self.getHeader(request, 'HTTP_ACCEPT_ENCODING')
+        if acceptEncoding is None:
+            return False
+
+        for coding in acceptEncoding.split(','):
+            params = coding.split(';')
+            if params[0].strip().lower() == 'gzip':
+                for param in params[1:]:
+                    name, _, value = param.partition('=')
+                    if name.strip() == 'q':
+                        try:
+                            return float(value) > 0
+                        except ValueError:
+                            return False
+                return True
+
+        return False
 
 
     def isAllowedVAADINResourceUrl(self, request, resourceUrl):
@@ -1146,6 +1428,13 @@ class AbstractApplicationServlet(PasteWsgiServlet, Constants):
         return False
 
 
+    def isStreamedRequest(self, environ):
+        # file uploads are streamed to the receiver
+        return (environ.get('REQUEST_METHOD') == 'POST'
+                and ('/' + self.UPLOAD_URL_PREFIX)
+                        in environ.get('PATH_INFO', ''))
+
+
     def isFileUploadRequest(self, request):
         pathInfo = self.getRequestPathInfo(request)
 
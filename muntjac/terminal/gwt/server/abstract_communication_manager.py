@@ -6,6 +6,7 @@ the communication system between the client code and the server side
 components."""
 
 import re
+import time
 import uuid
 import logging
 
@@ -14,12 +15,12 @@ from warnings import warn
 from sys import stderr
 from urlparse import urljoin
 
+from StringIO import StringIO
+
 try:
-    from cStringIO import StringIO as cStringIO
-    from StringIO import StringIO
-except ImportError, e:
-    from StringIO import StringIO as cStringIO
-    from StringIO import StringIO
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
 
 from babel import Locale
 
@@ -27,7 +28,8 @@ from muntjac.util import clsname
 
 from muntjac.terminal.gwt.server.json_paint_target import JsonPaintTarget
 from muntjac.terminal.gwt.server.exceptions import UploadException
-from muntjac.terminal.paintable import IPaintable, IRepaintRequestListener
+from muntjac.terminal.paintable import IPaintable, IRepaintRequestListener, \
+    IDetachListener
 from muntjac.terminal.terminal import IErrorEvent as TerminalErrorEvent
 from muntjac.terminal.uri_handler import IErrorEvent as URIHandlerErrorEvent
 
@@ -51,6 +53,9 @@ from muntjac.terminal.gwt.server.exceptions import \
 from muntjac.terminal.gwt.server.abstract_application_servlet import \
     AbstractApplicationServlet, URIHandlerErrorImpl
 
+from muntjac.terminal.gwt.server.locale_declaration_cache import \
+    LocaleDeclarationCache
+
 from muntjac.terminal.gwt.server.change_variables_error_event import \
     ChangeVariablesErrorEvent
 
@@ -61,7 +66,8 @@ from muntjac.terminal.gwt.server.streaming_events import \
 logger = logging.getLogger(__file__)
 
 
-class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
+class AbstractCommunicationManager(IPaintable, IRepaintRequestListener,
+            IDetachListener):
     """This is a common base class for the server-side implementations of
     the communication system between the client code (compiled with GWT
     into JavaScript) and the server side components. Its client side
@@ -111,10 +117,29 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
 
     VAR_ESCAPE_CHARACTER = u'\u001b'
 
+    # The separators as byte strings, payloads are split without decoding
+    # them to unicode
+    _BURST_SPLIT = str(VAR_BURST_SEPARATOR)
+    _RECORD_SPLIT = str(_VAR_RECORD_SEPARATOR)
+    _FIELD_SPLIT = str(_VAR_FIELD_SEPARATOR)
+    _ARRAYITEM_SPLIT = str(VAR_ARRAYITEM_SEPARATOR)
+    _ESCAPE = str(VAR_ESCAPE_CHARACTER)
+
+    # An escape character and the character following it
+    _ESCAPE_PATTERN = re.compile(re.escape(_ESCAPE) + '(.?)', re.DOTALL)
+
+    # Escaped characters, +0x30 makes these letters for easier reading
+    _UNESCAPED = dict((chr(ord(c) + 0x30), str(c)) for c in
+            (VAR_ESCAPE_CHARACTER, VAR_BURST_SEPARATOR, _VAR_RECORD_SEPARATOR,
+             _VAR_FIELD_SEPARATOR, VAR_ARRAYITEM_SEPARATOR))
+
     _MAX_BUFFER_SIZE = 64 * 1024
 
-    # Same as in apache commons file upload library that was previously used.
-    _MAX_UPLOAD_BUFFER_SIZE = 4 * 1024
+    # Size of the blocks read from uploaded files.
+    _MAX_UPLOAD_BUFFER_SIZE = 64 * 1024
+
+    # Default minimum number of milliseconds between upload progress events.
+    _UPLOAD_PROGRESS_INTERVAL = 500
 
     _GET_PARAM_ANALYZE_LAYOUTS = 'analyzeLayouts'
 
@@ -122,6 +147,9 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
 
     _LF = '\n'
     _CRLF = '\r\n'
+
+    # File name parameter of a Content-Disposition header, quoted or not
+    _FILENAME_PATTERN = re.compile(r'filename="([^"]*)"|filename=([^;\s]*)')
     _UTF8 = 'UTF8'
 
     _GET_PARAM_HIGHLIGHT_COMPONENT = "highlightComponent"
@@ -133,10 +161,16 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
 
         self._currentlyOpenWindowsInClient = dict()
 
-        self._dirtyPaintables = list()
+        # Insertion ordered set of paintables that have requested a
+        # repaint (the values are unused).
+        self._dirtyPaintables = OrderedDict()
 
         self._paintableIdMap = dict()
 
+        # Registered paintables that have been detached since the last
+        # cleanup. These are unregistered once the response is written.
+        self._detachedPaintables = set()
+
         self._idPaintableMap = dict()
 
         self._idSequence = 0
@@ -188,45 +222,35 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
 
         contentLength = request.getContentLength()
 
-        atStart = False
-        firstFileFieldFound = False
-
         rawfilename = 'unknown'
         rawMimeType = 'application/octet-stream'
 
-        # Read the stream until the actual file starts (empty line). Read
-        # filename and content type from multipart headers.
-        while not atStart:
-            readLine = inputStream.readline()
-            contentLength -= len(readLine) + 2
-            if (readLine.startswith('Content-Disposition:')
-                    and readLine.find('filename=') > 0):
-                rawfilename = readLine.replace('.*filename=', '')
-                parenthesis = rawfilename[:1]
-                rawfilename = rawfilename[1:]
-                rawfilename = rawfilename[:rawfilename.find(parenthesis)]
-                firstFileFieldFound = True
-            elif firstFileFieldFound and readLine == '':
-                atStart = True
-            elif readLine.startswith('Content-Type'):
-                rawMimeType = readLine.split(': ')[1]
-
-        contentLength -= (len(boundary) + len(self._CRLF)
-                + (2 * len(self._DASHDASH)) + 2)  # 2 == CRLF
-
-        # Reads bytes from the underlying stream. Compares the read bytes to
-        # the boundary string and returns -1 if met.
-        #
-        # The matching happens so that if the read byte equals to the first
-        # char of boundary string, the stream goes to "buffering mode". In
-        # buffering mode bytes are read until the character does not match
-        # the corresponding from boundary string or the full boundary string
-        # is found.
-        #
-        # Note, if this is someday needed elsewhere, don't shoot yourself to
-        # foot and split to a top level helper class.
-        simpleMultiPartReader = \
-                SimpleMultiPartInputStream(inputStream, boundary, self)
+        # Read the stream until the first file part starts. Read filename
+        # and content type from multipart headers.
+        simpleMultiPartReader = None
+        if inputStream is not None:
+            simpleMultiPartReader = SimpleMultiPartInputStream(inputStream,
+                    boundary, contentLength)
+            headers = simpleMultiPartReader.nextPart()
+            while headers is not None:
+                disposition = headers.get('content-disposition', '')
+                match = self._FILENAME_PATTERN.search(disposition)
+                if match is not None:
+                    rawfilename = match.group(1)
+                    if rawfilename is None:
+                        rawfilename = match.group(2)
+                    rawMimeType = headers.get('content-type', rawMimeType)
+                    break
+                headers = simpleMultiPartReader.nextPart()
+            else:
+                # no file in the request
+                simpleMultiPartReader = None
+
+            if simpleMultiPartReader is not None:
+                # the file ends before the closing boundary
+                contentLength -= (simpleMultiPartReader.tell()
+                        + len(boundary) + len(self._CRLF)
+                        + (2 * len(self._DASHDASH)) + 2)  # 2 == CRLF
 
         # Should report only the filename even if the browser sends the path
         filename = self.removePath(rawfilename)
@@ -262,6 +286,8 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         filename = 'unknown'
         mimeType = filename
         stream = request.getInputStream()
+        if stream is not None:
+            stream = LimitedInputStream(stream, contentLength)
 
         try:
             # safe cast as in GWT terminal all variable owners are expected
@@ -282,15 +308,43 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         self.sendUploadResponse(request, response)
 
 
+    def getUploadProgressInterval(self):
+        """Returns the minimum number of milliseconds between the progress
+        events of an upload.
+
+        @see: L{AbstractApplicationServlet.
+              SERVLET_PARAMETER_UPLOAD_PROGRESS_INTERVAL}
+        """
+        name = AbstractApplicationServlet.\
+                SERVLET_PARAMETER_UPLOAD_PROGRESS_INTERVAL
+        if name in self._application.getPropertyNames():
+            try:
+                return float(self._application.getProperty(name))
+            except ValueError:
+                pass
+        return self._UPLOAD_PROGRESS_INTERVAL
+
+
     def streamToReceiver(self, inputStream, streamVariable, filename, typ,
                 contentLength):
-        """@return: true if the streamvariable has informed that the terminal
+        """Reads the input stream in blocks and writes them to the output
+        stream of the stream variable.
+
+        The application lock is released while the content is read, so that
+        other requests to the application, like the ones polling for the
+        progress of the upload, can be processed. The stream variable is
+        called with the lock held. Progress events are sent at most once
+        every L{getUploadProgressInterval} milliseconds and when the whole
+        content has been read.
+
+        @return: true if the streamvariable has informed that the terminal
                     can forget this variable
         @raise UploadException:
         """
         if streamVariable is None:
             raise ValueError, 'StreamVariable for the post not found'
 
+        lock = self._application.getLock()
         out = None
         totalBytes = 0
         startedEvent = StreamingStartEventImpl(filename, typ, contentLength)
@@ -309,23 +363,36 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
                 raise NoInputStreamException()
 
             bufferSize = self._MAX_UPLOAD_BUFFER_SIZE
-            bytesReadToBuffer = 0
-            while totalBytes < len(inputStream):
-                buff = inputStream.read(bufferSize)
-                bytesReadToBuffer = inputStream.pos - bytesReadToBuffer
-
-                out.write(buff)
-                totalBytes += bytesReadToBuffer
+            interval = self.getUploadProgressInterval() / 1000.0
+            lastProgress = time.time()
 
-                if listenProgress:
-                    # update progress if listener set and contentLength
-                    # received
-                    progressEvent = StreamingProgressEventImpl(filename,
-                            typ, contentLength, totalBytes)
-                    streamVariable.onProgress(progressEvent)
-
-                if streamVariable.isInterrupted():
-                    raise UploadInterruptedException()
+            holdCount = lock.releaseAll()
+            try:
+                while True:
+                    buff = inputStream.read(bufferSize)
+                    if buff:
+                        out.write(buff)
+                        totalBytes += len(buff)
+
+                    if listenProgress:
+                        # to avoid event storms, events are sent in
+                        # intervals or at the end of the file
+                        now = time.time()
+                        if not buff or now - lastProgress >= interval:
+                            lastProgress = now
+                            progressEvent = StreamingProgressEventImpl(
+                                    filename, typ, contentLength, totalBytes)
+                            with lock:
+                                streamVariable.onProgress(progressEvent)
+
+                    if not buff:
+                        break
+
+                    # reading a flag, the lock is not needed
+                    if streamVariable.isInterrupted():
+                        raise UploadInterruptedException()
+            finally:
+                lock.reacquire(holdCount)
 
             # upload successful
             out.close()
@@ -377,8 +444,6 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         response.setContentType('text/html')
         out = response.getOutputStream()
         out.write('<html><body>download handled</body></html>')
-        out.flush()
-        out.close()
 
 
     def doHandleUidlRequest(self, request, response, callback, window):
@@ -402,86 +467,99 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         @raise IOException:
         @raise InvalidUIDLSecurityKeyException:
         """
-        self._requestThemeName = request.getParameter('theme')
-
-        self._maxInactiveInterval = \
-                request.getSession().getMaxInactiveInterval()
-
-        # repaint requested or session has timed out and new one is created
-        repaintAll = request.getParameter(
-                self._GET_PARAM_REPAINT_ALL) is not None
-        # || (request.getSession().isNew()); FIXME: What the h*ll is this??
-
-        out = response.getOutputStream()
-
-        analyzeLayouts = False
-        if repaintAll:
-            # analyzing can be done only with repaintAll
-            analyzeLayouts = request.getParameter(
-                    self._GET_PARAM_ANALYZE_LAYOUTS) is not None
-
-            param = request.getParameter(self._GET_PARAM_HIGHLIGHT_COMPONENT)
-            if param != None:
-                pid = request.getParameter(self._GET_PARAM_HIGHLIGHT_COMPONENT)
-                highLightedPaintable = self._idPaintableMap.get(pid)
-                self.highlightPaintable(highLightedPaintable)
-
-        outWriter = out
-
-        # The rest of the process is synchronized with the application
-        # in order to guarantee that no parallel variable handling is
-        # made
-        if self._application.isRunning():
-            # Returns if no window found
-            if window is None:
-                # This should not happen, no windows exists but
-                # application is still open.
-                logger.warning('Could not get window for application '
-                               'with request ID ' + request.getRequestID())
+        # The process is synchronized with the application in order to
+        # guarantee that no parallel variable handling is made. The servlet
+        # normally holds the lock already.
+        lock = self._application.getLock()
+        lock.acquire()
+        try:
+            self._requestThemeName = request.getParameter('theme')
+
+            self._maxInactiveInterval = \
+                    request.getSession().getMaxInactiveInterval()
+
+            # repaint requested or session has timed out and new one is created
+            repaintAll = request.getParameter(
+                    self._GET_PARAM_REPAINT_ALL) is not None
+            # || (request.getSession().isNew()); FIXME: What the h*ll is this??
+
+            out = response.getOutputStream()
+
+            analyzeLayouts = False
+            if repaintAll:
+                # analyzing can be done only with repaintAll
+                analyzeLayouts = request.getParameter(
+                        self._GET_PARAM_ANALYZE_LAYOUTS) is not None
+
+                param = request.getParameter(
+                        self._GET_PARAM_HIGHLIGHT_COMPONENT)
+                if param != None:
+                    pid = request.getParameter(
+                            self._GET_PARAM_HIGHLIGHT_COMPONENT)
+                    highLightedPaintable = self._idPaintableMap.get(pid)
+                    self.highlightPaintable(highLightedPaintable)
+
+            outWriter = out
+
+            if self._application.isRunning():
+                # Returns if no window found
+                if window is None:
+                    # This should not happen, no windows exists but
+                    # application is still open.
+                    logger.warning('Could not get window for application '
+                                   'with request ID ' + request.getRequestID())
+                    return
+            else:
+                # application has been closed
+                self.endApplication(request, response, self._application)
                 return
-        else:
-            # application has been closed
-            self.endApplication(request, response, self._application)
-            return
 
-        # Change all variables based on request parameters
-        if not self.handleVariables(request, response, callback,
-                self._application, window):
+            # Change all variables based on request parameters
+            if not self.handleVariables(request, response, callback,
+                    self._application, window):
 
-            # var inconsistency; the client is probably out-of-sync
-            ci = None
-            try:
-                ci = self._application.__class__.getSystemMessages()
-            except Exception:
-                # FIXME: Handle exception
-                # Not critical, but something is still wrong;
-                # print stacktrace
-                logger.warning('getSystemMessages() failed - continuing')
-
-            if ci is not None:
-                msg = ci.getOutOfSyncMessage()
-                cap = ci.getOutOfSyncCaption()
-                if (msg is not None) or (cap is not None):
-                    callback.criticalNotification(request, response, cap,
-                            msg, None, ci.getOutOfSyncURL())
-                    # will reload page after this
-                    return
+                # var inconsistency; the client is probably out-of-sync
+                ci = None
+                try:
+                    ci = self._application.__class__.getSystemMessages()
+                except Exception:
+                    # FIXME: Handle exception
+                    # Not critical, but something is still wrong;
+                    # print stacktrace
+                    logger.warning('getSystemMessages() failed - continuing')
+
+                if ci is not None:
+                    msg = ci.getOutOfSyncMessage()
+                    cap = ci.getOutOfSyncCaption()
+                    if (msg is not None) or (cap is not None):
+                        callback.criticalNotification(request, response, cap,
+                                msg, None, ci.getOutOfSyncURL())
+                        # will reload page after this
+                        return
+
+                # No message to show, let's just repaint all.
+                repaintAll = True
 
-            # No message to show, let's just repaint all.
-            repaintAll = True
+            self.paintAfterVariableChanges(request, response, callback,
+                    repaintAll, outWriter, window, analyzeLayouts,
+                    self.isStreamUidl())
 
-        self.paintAfterVariableChanges(request, response, callback, repaintAll,
-                outWriter, window, analyzeLayouts)
+            if self._closingWindowName is not None:
+                if (self._closingWindowName
+                        in self._currentlyOpenWindowsInClient):
+                    del self._currentlyOpenWindowsInClient[
+                            self._closingWindowName]
 
-        if self._closingWindowName is not None:
-            if self._closingWindowName in self._currentlyOpenWindowsInClient:
-                del self._currentlyOpenWindowsInClient[self._closingWindowName]
+                self._closingWindowName = None
 
-            self._closingWindowName = None
+            # Finds the window within the application
+            #outWriter.close()
+            self._requestThemeName = None
 
-        # Finds the window within the application
-        #outWriter.close()
-        self._requestThemeName = None
+            # respond as fast as possible, then do the cleanup
+            self.unregisterDetachedPaintables()
+        finally:
+            lock.release()
 
 
     def highlightPaintable(self, highLightedPaintable2):
@@ -540,9 +618,23 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
             sb.write(".java:1)")
 
 
+    def isStreamUidl(self):
+        """Returns true if each painted change should be sent to the client
+        as soon as it is complete, instead of buffering the whole response.
+
+        @see: L{AbstractApplicationServlet.SERVLET_PARAMETER_STREAM_UIDL}
+        """
+        name = AbstractApplicationServlet.SERVLET_PARAMETER_STREAM_UIDL
+        return ((name in self._application.getPropertyNames())
+                and (self._application.getProperty(name) == 'true'))
+
+
     def paintAfterVariableChanges(self, request, response, callback,
-                repaintAll, outWriter, window, analyzeLayouts):
-        """@raise PaintException:
+                repaintAll, outWriter, window, analyzeLayouts,
+                streamChanges=False):
+        """@param streamChanges:
+                   true to flush the response after each painted change
+        @raise PaintException:
         @raise IOException:
         """
         if repaintAll:
@@ -584,8 +676,9 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
                 window = newWindow
                 repaintAll = True
 
+            flush = response.flush if streamChanges else None
             self.writeUidlResponce(callback, repaintAll, outWriter, window,
-                    analyzeLayouts)
+                    analyzeLayouts, flush)
 
         self.closeJsonMessage(outWriter)
 
@@ -593,15 +686,21 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
 
 
     def writeUidlResponce(self, callback, repaintAll, outWriter, window,
-                analyzeLayouts):
+                analyzeLayouts, flush=None):
+        """Writes the changes, meta information, resources, type mappings
+        and locales of the UIDL response.
 
+        @param flush:
+                   callable that sends the content written so far to the
+                   client, called after each top-level change if given
+        """
         outWriter.write('\"changes\":[')
 
         paintables = None
 
         invalidComponentRelativeSizes = None
 
-        paintTarget = JsonPaintTarget(self, outWriter, not repaintAll)
+        paintTarget = JsonPaintTarget(self, outWriter, not repaintAll, flush)
         windowCache = self._currentlyOpenWindowsInClient.get(window.getName())
         if windowCache is None:
             windowCache = OpenWindowCache()
@@ -616,44 +715,18 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
             self._locales = None
             self.requireLocale( self._application.getLocale() )
         else:
-            # remove detached components from paintableIdMap so they
-            # can be GC'ed
-            # TODO figure out if we could move this beyond the painting phase,
-            # "respond as fast as possible, then do the cleanup". Beware of
-            # painting the dirty detatched components.
-            for p in self._paintableIdMap.keys():
-                if p.getApplication() is None:
-                    self.unregisterPaintable(p)
-                    if self._paintableIdMap[p] in self._idPaintableMap:
-                        del self._idPaintableMap[self._paintableIdMap[p]]
-                    if p in self._paintableIdMap:
-                        del self._paintableIdMap[p]
-                    if p in self._dirtyPaintables:
-                        self._dirtyPaintables.remove(p)
-
+            # Components detached during this request are unregistered after
+            # painting (see unregisterDetachedPaintables). The dirty ones are
+            # not painted as getDirtyVisibleComponents skips them.
             paintables = self.getDirtyVisibleComponents(window)
 
         if paintables is not None:
             # We need to avoid painting children before parent.
             # This is ensured by ordering list by depth in component
-            # tree
-
-            def compare(c1, c2):
-                d1 = 0
-                while c1.getParent() is not None:
-                    d1 += 1
-                    c1 = c1.getParent()
-                d2 = 0
-                while c2.getParent() is not None:
-                    d2 += 1
-                    c2 = c2.getParent()
-                if d1 < d2:
-                    return -1
-                if d1 > d2:
-                    return 1
-                return 0
-
-            paintables.sort(cmp=compare)
+            # tree. The sort is stable so paintables of equal depth
+            # keep the order in which they requested a repaint.
+            depths = dict()
+            paintables.sort(key=lambda p: self.getDepth(p, depths))
 
             for p in paintables:
                 # TODO CLEAN
@@ -880,6 +953,34 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         p.removeListener(self, IRepaintRequestListener)
 
 
+    def paintableDetached(self, paintable):
+        """@see: L{IDetachListener.paintableDetached}"""
+        self._detachedPaintables.add(paintable)
+
+
+    def unregisterDetachedPaintables(self):
+        """Removes paintables that have been detached from the application
+        since the last call from paintableIdMap so they can be GC'ed.
+
+        Only the paintables that have notified this manager of being
+        detached are checked, so this costs nothing if no components were
+        detached. Paintables that have been attached again in the meantime
+        are left registered.
+        """
+        while self._detachedPaintables:
+            p = self._detachedPaintables.pop()
+            if p.getApplication() is not None:
+                continue
+
+            self.unregisterPaintable(p)
+            idd = self._paintableIdMap.pop(p, None)
+            # the id may have been given to a new paintable already
+            if (idd is not None) and (self._idPaintableMap.get(idd) is p):
+                del self._idPaintableMap[idd]
+            if p in self._dirtyPaintables:
+                del self._dirtyPaintables[p]
+
+
     def handleVariables(self, request, response, callback, application2,
                 window):
         """If this method returns false, something was submitted that we did
@@ -894,10 +995,10 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         if changes is not None:
 
             # Manage bursts one by one
-            bursts = re.split(self.VAR_BURST_SEPARATOR, changes)
-            # FIXME: remove trailing empty string using re
-            if (len(bursts) > 0) & (bursts[-1] == ''):
-                bursts = bursts[:-1]
+            bursts = changes.split(self._BURST_SPLIT)
+            # remove trailing empty string
+            if bursts[-1] == '':
+                bursts.pop()
 
             # Security: double cookie submission pattern unless disabled by
             # property
@@ -924,18 +1025,15 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
                 success = self.handleVariableBurst(request, application2,
                         success, burst)
 
-                # In case that there were multiple bursts, we know that this
-                # is a special synchronous case for closing window. Thus we
-                # are not interested in sending any UIDL changes back to
-                # client. Still we must clear component tree between bursts
-                # to ensure that no removed components are updated. The
-                # painting after the last burst is handled normally by the
-                # calling method.
+                # In case that there were multiple bursts, we must clear the
+                # component tree between bursts to ensure that no removed
+                # components are updated. The changes of all bursts are
+                # painted after the last burst by the calling method.
                 if bi < (len(bursts) - 1):
-                    # We will be discarding all changes
-                    outWriter = cStringIO()
-                    self.paintAfterVariableChanges(request, response,
-                            callback, True, outWriter, window, False)
+                    if not self._application.isRunning():
+                        # the application is ended when painting
+                        break
+                    self.flushPendingChanges()
 
         # Note that we ignore inconsistencies while handling unload request.
         # The client can't remove invalid variable changes from the burst, and
@@ -944,13 +1042,30 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         return success or (self._closingWindowName is not None)
 
 
+    def flushPendingChanges(self):
+        """Completes the handling of a variable burst when more bursts
+        follow in the same request. Paintables detached by the burst are
+        unregistered, so that variable changes sent to them in the following
+        bursts are ignored. Nothing is painted and the paintables keep their
+        ids and dirty state.
+        """
+        self.unregisterDetachedPaintables()
+
+
+    def parseVariableBurst(self, burst):
+        """Splits a burst of variable changes into records of the encoded
+        value, the paintable id, the variable name and the variable type.
+
+        @return: list of the fields of each record
+        """
+        fieldSplit = self._FIELD_SPLIT
+        return [record.split(fieldSplit)
+                for record in burst.split(self._RECORD_SPLIT)]
+
+
     def handleVariableBurst(self, source, app, success, burst):
         # extract variables to two dim string array
-        tmp = re.split(self._VAR_RECORD_SEPARATOR, burst)
-        variableRecords = [None] * len(tmp)
-
-        for i in range(len(tmp)):
-            variableRecords[i] = re.split(self._VAR_FIELD_SEPARATOR, tmp[i])
+        variableRecords = self.parseVariableBurst(burst)
 
         i = 0
         while i < len(variableRecords):
@@ -1104,27 +1219,32 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
 
 
     def convertVariableValue(self, variableType, strValue):
-        m = {
-            self._VTYPE_ARRAY: lambda s: self.convertArray(s),
-            self._VTYPE_MAP: lambda s: self.convertMap(s),
-            self._VTYPE_STRINGARRAY: lambda s: self.convertStringArray(s),
-            self._VTYPE_STRING: lambda s: self.decodeVariableValue(s),
-            self._VTYPE_INTEGER: lambda s: int(s),
-            self._VTYPE_LONG: lambda s: long(s),
-            self._VTYPE_FLOAT: lambda s: float(s),
-            self._VTYPE_DOUBLE: lambda s: float(s),
-            self._VTYPE_BOOLEAN: lambda s: s.lower() == 'true',
-            self._VTYPE_PAINTABLE: lambda s: self._idPaintableMap.get(s)
-        }.get(variableType)
-
-        if m is not None:
-            return m(strValue)
+        # most common types first
+        if variableType == self._VTYPE_STRING:
+            return self.decodeVariableValue(strValue)
+        elif variableType == self._VTYPE_BOOLEAN:
+            return strValue.lower() == 'true'
+        elif variableType == self._VTYPE_INTEGER:
+            return int(strValue)
+        elif variableType == self._VTYPE_STRINGARRAY:
+            return self.convertStringArray(strValue)
+        elif variableType == self._VTYPE_ARRAY:
+            return self.convertArray(strValue)
+        elif variableType == self._VTYPE_MAP:
+            return self.convertMap(strValue)
+        elif variableType == self._VTYPE_LONG:
+            return long(strValue)
+        elif (variableType == self._VTYPE_FLOAT
+                or variableType == self._VTYPE_DOUBLE):
+            return float(strValue)
+        elif variableType == self._VTYPE_PAINTABLE:
+            return self._idPaintableMap.get(strValue)
         else:
             return None
 
 
     def convertMap(self, strValue):
-        parts = strValue.split(self.VAR_ARRAYITEM_SEPARATOR)
+        parts = strValue.split(self._ARRAYITEM_SPLIT)
         mapp = dict()
         i = 0
         while i < len(parts):
@@ -1141,29 +1261,25 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
 
 
     def convertStringArray(self, strValue):
-        # need to return delimiters and filter them out; otherwise empty
-        # strings are lost
-        # an extra empty delimiter at the end is automatically eliminated
-        arrayItemSeparator = self.VAR_ARRAYITEM_SEPARATOR
-        splitter = re.compile('(\\' + arrayItemSeparator + '+)')
-
-        tokens = list()
-        prevToken = arrayItemSeparator
-        for token in splitter.split(strValue):
-            if arrayItemSeparator != token:
-                # decode encoded separators
-                tokens.append(self.decodeVariableValue(token))
-            elif arrayItemSeparator == prevToken:
-                tokens.append('')
-            prevToken = token
+        # every item is followed by a separator, empty strings are kept and
+        # an extra empty item at the end is eliminated
+        tokens = strValue.split(self._ARRAYITEM_SPLIT)
+        if tokens[-1] == '':
+            tokens.pop()
 
-        return tokens
+        # decode encoded separators
+        decode = self.decodeVariableValue
+        return [decode(token) for token in tokens]
 
 
     def convertArray(self, strValue):
-        val = strValue.split(self.VAR_ARRAYITEM_SEPARATOR)
+        val = strValue.split(self._ARRAYITEM_SPLIT)
 
-        if len(val) == 0 or (len(val) == 1 and len(val[0]) == 0):
+        # trailing empty items are discarded
+        while val and len(val[-1]) == 0:
+            val.pop()
+
+        if len(val) == 0:
             return []
 
         values = [None] * len(val)
@@ -1183,51 +1299,31 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
 
         @param encodedValue: value to decode
         @return: decoded value
+        @raise ValueError: if an unknown character is escaped
         """
-        iterator = iter(encodedValue)
+        if self._ESCAPE not in encodedValue:
+            # nothing to decode
+            return encodedValue
 
-        try:
-            character = iterator.next()
-        except StopIteration:
-            return ''
+        return self._ESCAPE_PATTERN.sub(self.unescapeCharacter, encodedValue)
 
-        result = StringIO()
-        while True:
-            try:
-                if self.VAR_ESCAPE_CHARACTER == character:
-                    character = iterator.next()
-                    if character == chr(ord(self.VAR_ESCAPE_CHARACTER) + 0x30):
-                        # escaped escape character
-                        result.write(self.VAR_ESCAPE_CHARACTER)
-
-                    elif character == chr(ord(self.VAR_BURST_SEPARATOR) + 0x30):
-                        pass
-                    elif character == chr(ord(self._VAR_RECORD_SEPARATOR)+0x30):
-                        pass
-                    elif character == chr(ord(self._VAR_FIELD_SEPARATOR) +0x30):
-                        pass
-                    elif (character ==
-                            chr(ord(self.VAR_ARRAYITEM_SEPARATOR) + 0x30)):
-                        # +0x30 makes these letters for easier reading
-                        result.write( chr(ord(character) - 0x30) )
-                    else:
-                        # other escaped character - probably a client-server
-                        # version mismatch
-                        raise ValueError("Invalid escaped character from the "
-                                "client - check that the widgetset and server "
-                                "versions match")
-                else:
-                    # not a special character - add it to the result as is
-                    result.write(character)
 
-                character = iterator.next()
+    def unescapeCharacter(self, match):
+        """Returns the character escaped in the given match of the escape
+        character and the character following it."""
+        escaped = match.group(1)
+        if escaped == '':
+            # escape character at the end of the value
+            return ''
 
-            except StopIteration:
-                break
+        character = self._UNESCAPED.get(escaped)
+        if character is None:
+            # other escaped character - probably a client-server version
+            # mismatch
+            raise ValueError('Invalid escaped character from the client - '
+                    'check that the widgetset and server versions match')
 
-        r = result.getvalue()
-        result.close()
-        return r
+        return character
 
 
     def printLocaleDeclarations(self, outWriter):
@@ -1238,116 +1334,13 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         # Send locale informations to client
         outWriter.write(', \"locales\":[')
 
-        while self._pendingLocalesIndex < len(self._locales):
-            l = self.generateLocale(self._locales[self._pendingLocalesIndex])
-
-            # Locale name
-            outWriter.write('{\"name\":\"' + str(l) + '\",')
-
-            # Month names (both short and full)
-            months = l.months['format']['wide'].values()
-            short_months = l.months['format']['abbreviated'].values()
-
-            outWriter.write(('\"smn\":[\"'
-                    + short_months[0] + '\",\"' + short_months[1] + '\",\"'
-                    + short_months[2] + '\",\"' + short_months[3] + '\",\"'
-                    + short_months[4] + '\",\"' + short_months[5] + '\",\"'
-                    + short_months[6] + '\",\"' + short_months[7] + '\",\"'
-                    + short_months[8] + '\",\"' + short_months[9] + '\",\"'
-                    + short_months[10] + '\",\"' + short_months[11] + '\"'
-                    + '],').encode('utf-8'))
-            outWriter.write(('\"mn\":[\"'
-                    + months[0] + '\",\"' + months[1] + '\",\"'
-                    + months[2] + '\",\"' + months[3] + '\",\"'
-                    + months[4] + '\",\"' + months[5] + '\",\"'
-                    + months[6] + '\",\"' + months[7] + '\",\"'
-                    + months[8] + '\",\"' + months[9] + '\",\"'
-                    + months[10] + '\",\"' + months[11] + '\"'
-                    + '],').encode('utf-8'))
-
-            # Weekday names (both short and full)
-            days = l.days['format']['wide'].values()
-            short_days = l.days['format']['abbreviated'].values()
-            outWriter.write(('\"sdn\":[\"'
-                    + short_days[6] + '\",\"'
-                    + short_days[0] + '\",\"' + short_days[1] + '\",\"'
-                    + short_days[2] + '\",\"' + short_days[3] + '\",\"'
-                    + short_days[4] + '\",\"' + short_days[5] + '\"'
-                    + '],').encode('utf-8'))
-            outWriter.write(('\"dn\":[\"'
-                    + days[6] + '\",\"'
-                    + days[0] + '\",\"' + days[1] + '\",\"'
-                    + days[2] + '\",\"' + days[3] + '\",\"'
-                    + days[4] + '\",\"' + days[5] + '\"'
-                    + '],').encode('utf-8'))
-
-            # First day of week
-            # (Babel: 6 = sunday, 0 = monday, Vaadin: 0 = sunday, 1 = monday)
-            fdow = l.first_week_day
-            if fdow == 0:
-                fdow = 1
-            else:
-                fdow = 0
-            outWriter.write('\"fdow\":' + str(fdow) + ',')
-
-            # Date formatting (MM/DD/YYYY etc.)
-            try:
-                df = l.date_formats['short'].pattern
-                df += ' '
-                df += l.time_formats['short'].pattern
-                df = df.encode('utf-8')  # convert unicode to string
-            except KeyError:
-                logger.warning('Unable to get default date '
-                               'pattern for locale ' + str(l))
-                #df = locale.nl_langinfo(locale.D_T_FMT)
-                df = 'dd/MM/yy HH:mm'
-
-            timeStart = df.find('H')
-            if timeStart < 0:
-                timeStart = df.find('h')
-            ampm_first = df.find('a')
-            # E.g. in Korean locale AM/PM is before h:mm
-            # TODO should take that into consideration on client-side as well,
-            # now always h:mm a
-            if ampm_first > 0 and ampm_first < timeStart:
-                timeStart = ampm_first
-            # Hebrew locale has time before the date
-            timeFirst = timeStart == 0
-            if timeFirst:
-                dateStart = df.find(' ')
-                if ampm_first > dateStart:
-                    dateStart = df.find(' ', ampm_first)
-                dateformat = df[dateStart + 1:]
-            else:
-                dateformat = df[:timeStart - 1]
-
-            outWriter.write('\"df\":\"' + dateformat.strip() + '\",')
-
-            # Time formatting (24 or 12 hour clock and AM/PM suffixes)
-            timeformat = df[timeStart:len(df)]
-
-            # Doesn't return second or milliseconds.
-            #
-            # We use timeformat to determine 12/24-hour clock
-            twelve_hour_clock = timeformat.find('a') > -1
-
-            # TODO there are other possibilities as well, like 'h' in french
-            # (ignore them, too complicated)
-            hour_min_delimiter = '.' if timeformat.find('.') > -1 else ':'
-
-            # outWriter.write("\"tf\":\"" + timeformat + "\",");
-            outWriter.write('\"thc\":' + str(twelve_hour_clock).lower() + ',')
-            outWriter.write('\"hmd\":\"' + hour_min_delimiter + '\"')
-            if twelve_hour_clock:
-                ampm = [( l.periods['am'] ).encode('utf-8'),
-                        ( l.periods['pm'] ).encode('utf-8')]
-                outWriter.write(',\"ampm\":[\"' + ampm[0] + '\",\"'
-                                + ampm[1] + '\"]')
-            outWriter.write('}')
-            if self._pendingLocalesIndex < len(self._locales) - 1:
-                outWriter.write(',')
-
-            self._pendingLocalesIndex += 1
+        # the declarations depend only on the locale and are shared by all
+        # applications
+        cache = LocaleDeclarationCache.getInstance()
+        pending = self._locales[self._pendingLocalesIndex:]
+        outWriter.write(','.join([cache.getDeclaration(name,
+                self.generateLocale) for name in pending]))
+        self._pendingLocalesIndex = len(self._locales)
 
         outWriter.write(']')  # close locales
 
@@ -1521,51 +1514,86 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         @param w:
                    root window for which dirty components is to be fetched
         """
-        resultset = list(self._dirtyPaintables)
+        resultset = list()
 
         # The following algorithm removes any components that would be painted
         # as a direct descendant of other components from the dirty components
         # list. The result is that each component should be painted exactly
         # once and any unmodified components will be painted as "cached=true".
 
-        for p in self._dirtyPaintables:
+        for p in list(self._dirtyPaintables):
             if isinstance(p, IComponent):
                 component = p
                 if component.getApplication() is None:
                     # component is detached after requestRepaint is called
-                    resultset.remove(p)
-                    self._dirtyPaintables.remove(p)
-                else:
-                    componentsRoot = component.getWindow()
-                    if componentsRoot is None:
-                        # This should not happen unless somebody has overriden
-                        # getApplication or getWindow in an illegal way.
-                        raise ValueError('component.getWindow() returned null '
-                                'for a component attached to the application')
-
-                    if componentsRoot.getParent() is not None:
-                        # this is a subwindow
-                        componentsRoot = componentsRoot.getParent()
-
-                    if componentsRoot != w:
-                        resultset.remove(p)
-                    elif ((component.getParent() is not None)
-                            and not component.getParent().isVisible()):
-                        # Do not return components in an invisible subtree.
-                        #
-                        # Components that are invisible in visible subree, must
-                        # be rendered (to let client know that they need to be
-                        # hidden).
-                        resultset.remove(p)
+                    del self._dirtyPaintables[p]
+                    continue
+
+                componentsRoot = component.getWindow()
+                if componentsRoot is None:
+                    # This should not happen unless somebody has overriden
+                    # getApplication or getWindow in an illegal way.
+                    raise ValueError('component.getWindow() returned null '
+                            'for a component attached to the application')
+
+                if componentsRoot.getParent() is not None:
+                    # this is a subwindow
+                    componentsRoot = componentsRoot.getParent()
+
+                if componentsRoot != w:
+                    continue
+                elif ((component.getParent() is not None)
+                        and not component.getParent().isVisible()):
+                    # Do not return components in an invisible subtree.
+                    #
+                    # Components that are invisible in visible subree, must
+                    # be rendered (to let client know that they need to be
+                    # hidden).
+                    continue
+
+            resultset.append(p)
 
         return resultset
 
 
+    @classmethod
+    def getDepth(cls, paintable, depths):
+        """Returns the depth of the given paintable in the component tree.
+
+        Depths of the paintable and of every ancestor visited are cached in
+        the given dictionary, so that computing the depths of a whole set of
+        components walks each branch of the tree only once.
+
+        @param paintable:
+                   the paintable to get the depth of
+        @param depths:
+                   dictionary mapping paintables to their known depths
+        @return: the number of ancestors the paintable has
+        """
+        path = list()
+        p = paintable
+        depth = depths.get(p)
+        while depth is None:
+            parent = p.getParent() if isinstance(p, IComponent) else None
+            if parent is None:
+                depth = 0
+                depths[p] = depth
+                break
+            path.append(p)
+            p = parent
+            depth = depths.get(p)
+
+        for p in reversed(path):
+            depth += 1
+            depths[p] = depth
+
+        return depth
+
+
     def repaintRequested(self, event):
         """@see: L{IRepaintRequestListener.repaintRequested}"""
         p = event.getPaintable()
-        if p not in self._dirtyPaintables:
-            self._dirtyPaintables.append(p)
+        self._dirtyPaintables[p] = True
 
 
     def paintablePainted(self, paintable):
@@ -1573,7 +1601,7 @@ class AbstractCommunicationManager(IPaintable, IRepaintRequestListener):
         collecting new repaint requests for it.
         """
         if paintable in self._dirtyPaintables:
-            self._dirtyPaintables.remove(paintable)
+            del self._dirtyPaintables[paintable]
         paintable.requestRepaintRequests()
 
 
@@ -1804,6 +1832,16 @@ class IResponse(object):
         raise NotImplementedError
 
 
+    def flush(self):
+        """Sends the headers and the content written to the output stream
+        so far to the client. The content type can not be changed after
+        calling this method.
+
+        @raise IOException:
+        """
+        raise NotImplementedError
+
+
     def getWrappedResponse(self):
         """Gets the wrapped response object, usually a class implementing
         either L{ServletResponse}.
@@ -1924,125 +1962,168 @@ class OpenWindowCache(object):
         self._res.clear()
 
 
-class SimpleMultiPartInputStream(StringIO):  # FIXME InputStream
-    """Stream that extracts content from another stream until the boundary
-    string is encountered.
+class SimpleMultiPartInputStream(object):
+    """Stream that extracts the content of the parts of a multipart stream.
+
+    The underlying stream is read in large blocks that are searched for the
+    boundary string. The end of a block that may be the start of a boundary
+    is kept and searched together with the next block.
 
     Public only for unit tests, should be considered private for all other
     purposes.
     """
 
-    def __init__(self, realInputStream, boundaryString, manager):
-        super(SimpleMultiPartInputStream, self).__init__()
+    #: Maximum size of the headers of a part.
+    MAX_HEADER_SIZE = 64 * 1024
+
+    def __init__(self, realInputStream, boundaryString, contentLength=-1,
+                 bufferSize=64 * 1024):
+        """@param contentLength:
+                   the number of bytes to read from the stream at most, -1
+                   to read until the end of the stream
+        """
+        self._realInputStream = realInputStream
+
+        self._remaining = contentLength if contentLength >= 0 else None
 
-        # Counter of how many characters have been matched to boundary string
-        # from the stream
-        self._matchedCount = -1
+        self._bufferSize = bufferSize
 
-        # Used as pointer when returning bytes after partly matched boundary
-        # string.
-        self._curBoundaryIndex = 0
+        self._boundary = '\r\n--' + boundaryString
 
-        # The byte found after a "promising start for boundary"
-        self._bufferedByte = -1
+        # Bytes read but not yet returned. The first boundary is preceded
+        # by the line break of the boundary string.
+        self._buffer = '\r\n'
 
+        # Number of bytes of the underlying stream before the buffer
+        self._offset = -len(self._buffer)
+
+        # true if the content of the current part has been read, the
+        # content before the first part is read when the first part is
+        # requested
         self._atTheEnd = False
 
-        self._boundary = manager.CRLF + manager.DASHDASH + boundaryString
 
-        self._realInputStream = realInputStream
+    def nextPart(self):
+        """Skips to the next part of the stream.
 
+        @return: dictionary of the lower case header names and the values of
+                 the next part, or C{None} if there are no more parts
+        @raise IOError: if the stream ends unexpectedly
+        """
+        while self.read(self._bufferSize):
+            pass
 
-    def getvalue(self):
-        if self._atTheEnd:
+        # a closing boundary is followed by two dashes
+        self.fill(2)
+        if self._buffer.startswith('--'):
+            return None
 
-            # End boundary reached, nothing more to read
-            return -1
-        elif self._bufferedByte >= 0:
+        # the headers end with an empty line
+        index = self._buffer.find('\r\n\r\n')
+        while index < 0:
+            if len(self._buffer) > self.MAX_HEADER_SIZE:
+                raise IOError('The multipart headers are too long')
+            self.fill(len(self._buffer) + 1)
+            index = self._buffer.find('\r\n\r\n')
 
-            # Purge partially matched boundary if there was such
-            return self.getBuffered()
-        elif self._matchedCount != -1:
+        headers = dict()
+        for line in self._buffer[:index].split('\r\n')[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
 
-            # Special case where last "failed" matching ended with first
-            # character from boundary string
-            return self.matchForBoundary()
-        else:
+        self.consume(index + 4)
+        self._atTheEnd = False
 
-            fromActualStream = self._realInputStream.read()
-            if fromActualStream == -1:
+        return headers
 
-                # unexpected end of stream
-                raise IOError('The multipart stream ended unexpectedly')
-            if self._boundary[0] == fromActualStream:
 
-                # If matches the first character in boundary string, start
-                # checking if the boundary is fetched.
-                return self.matchForBoundary()
+    def read(self, size=-1):
+        """Reads at most C{size} bytes of the content of the current part.
 
-            return fromActualStream
+        @return: the bytes read, an empty string at the end of the part
+        @raise IOError: if the stream ends before the boundary
+        """
+        if size < 0:
+            size = self._bufferSize
 
+        boundary = self._boundary
+        while not self._atTheEnd:
+            buff = self._buffer
+            index = buff.find(boundary, 0, size + len(boundary) - 1)
+            if index >= 0:
+                if index == 0:
+                    self.consume(len(boundary))
+                    self._atTheEnd = True
+                    break
+                return self.consume(index)
 
-    def matchForBoundary(self):
-        """Reads the input to expect a boundary string. Expects that the first
-        character has already been matched.
+            # the end of the buffer may be the start of the boundary
+            available = len(buff) - len(boundary) + 1
+            if available > 0:
+                return self.consume(min(available, size))
 
-        @return: -1 if the boundary was matched, else returns the first byte
-                from boundary
-        @raise IOException:
+            self.fill(len(buff) + 1)
+
+        return ''
+
+
+    def fill(self, size):
+        """Reads blocks from the underlying stream until at least C{size}
+        bytes are buffered.
+
+        @raise IOError: if the stream ends before
         """
-        self._matchedCount = 0
+        while len(self._buffer) < size:
+            readSize = self._bufferSize
+            if self._remaining is not None:
+                readSize = min(readSize, self._remaining)
+
+            block = self._realInputStream.read(readSize) if readSize else ''
+            if not block:
+                raise IOError('The multipart stream ended unexpectedly')
 
-        # Going to "buffered mode". Read until full boundary match or a
-        # different character.
-        while True:
-            self._matchedCount += 1
-            if self._matchedCount == len(self._boundary):
-                # The whole boundary matched so we have reached the end of
-                # file
-                self._atTheEnd = True
-                return -1
+            if self._remaining is not None:
+                self._remaining -= len(block)
+            self._buffer += block
 
-            fromActualStream = self._realInputStream.read()
 
-            if fromActualStream != self._boundary[self._matchedCount]:
-                # Did not find full boundary, cache the mismatching byte
-                # and start returning the partially matched boundary.
-                self._bufferedByte = fromActualStream
-                return self.getBuffered()
+    def consume(self, size):
+        """Removes C{size} bytes from the start of the buffer and returns
+        them."""
+        data = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self._offset += size
+        return data
 
 
-    def getBuffered(self):
-        """Returns the partly matched boundary string and the byte following
-        that.
+    def tell(self):
+        """Returns the position in the underlying stream."""
+        return self._offset
 
-        @raise IOException:
+
+class LimitedInputStream(object):
+    """Stream that reads at most the given number of bytes from another
+    stream."""
+
+    def __init__(self, realInputStream, length=-1):
+        """@param length:
+                   the number of bytes to read at most, -1 to read until the
+                   end of the stream
         """
-        if self._matchedCount == 0:
-            # The boundary has been returned, return the buffered byte.
-            b = self._bufferedByte
-            self._bufferedByte = -1
-            self._matchedCount = -1
-        else:
-            b = self._boundary[self._curBoundaryIndex]
-            self._curBoundaryIndex += 1
-            if self._curBoundaryIndex == self._matchedCount:
-                # The full boundary has been returned, remaining is the
-                # char that did not match the boundary.
-                self._curBoundaryIndex = 0
-                if self._bufferedByte != self._boundary[0]:
-                    # next call for getBuffered will return the
-                    # bufferedByte that came after the partial boundary
-                    # match
-                    self._matchedCount = 0
-                else:
-                    # Special case where buffered byte again matches the
-                    # boundaryString. This could be the start of the real
-                    # end boundary.
-                    self._matchedCount = 0
-                    self._bufferedByte = -1
+        self._realInputStream = realInputStream
+        self._remaining = length if length >= 0 else None
+
+
+    def read(self, size=-1):
+        if self._remaining is not None:
+            if size < 0 or size > self._remaining:
+                size = self._remaining
+            if size == 0:
+                return ''
+
+        data = self._realInputStream.read(size)
 
-        if b == -1:
-            raise IOError('The multipart stream ended unexpectedly')
+        if self._remaining is not None:
+            self._remaining -= len(data)
 
-        return b
+        return data
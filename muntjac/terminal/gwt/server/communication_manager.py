@@ -75,7 +75,7 @@ class CommunicationManager(AbstractCommunicationManager):
                         streamVariable,
                         variableName,
                         source,
-                        contentType.split('boundary=')[1])
+                        contentType.split('boundary=')[1].strip('"'))
             else:
                 # if boundary string does not exist, the posted file is from
                 # XHR2.post(File)
@@ -87,7 +87,7 @@ class CommunicationManager(AbstractCommunicationManager):
                         streamVariable,
                         variableName,
                         source,
-                        applicationServlet.getContentType(request))
+                        applicationServlet.getContentLength(request))
         else:
             raise InvalidUIDLSecurityKeyException, \
                     'Security key in upload post did not match!'
@@ -288,6 +288,10 @@ class HttpServletResponseWrapper(IResponse):
         self.servlet.setHeader(self._response, 'Content-Type', typ)
 
 
+    def flush(self):
+        self.servlet.flush(self._response)
+
+
 class HttpSessionWrapper(ISession):
     """Concrete wrapper class for L{HttpSession}.
 
@@ -288,15 +288,15 @@ class ComponentSizeValidator(object):
                 componentArea = gl.getComponentArea(component)
                 rowHasHeight = False
 
-                row = componentArea.getRow1()
-                while not rowHasHeight and row <= componentArea.getRow2():
-                    row += 1
-                    column = 0
-                    while not rowHasHeight and column < gl.getColumns():
-                        column += 1
+                for row in xrange(componentArea.getRow1(),
+                        componentArea.getRow2() + 1):
+                    for column in xrange(gl.getColumns()):
                         c = gl.getComponent(column, row)
-                        if c is not None:
-                            rowHasHeight = not cls.hasRelativeHeight(c)
+                        if c is not None and not cls.hasRelativeHeight(c):
+                            rowHasHeight = True
+                            break
+                    if rowHasHeight:
+                        break
 
                 if not rowHasHeight:
                     return False
@@ -397,16 +397,15 @@ class ComponentSizeValidator(object):
                 gl = parent
                 componentArea = gl.getComponentArea(component)
                 columnHasWidth = False
-                col = componentArea.getColumn1()
-                while ((not columnHasWidth)
-                       and col <= componentArea.getColumn2()):
-                    col += 1
-                    row = 0
-                    while (not columnHasWidth) and row < gl.getRows():
-                        row += 1
+                for col in xrange(componentArea.getColumn1(),
+                        componentArea.getColumn2() + 1):
+                    for row in xrange(gl.getRows()):
                         c = gl.getComponent(col, row)
-                        if c is not None:
-                            columnHasWidth = not cls.hasRelativeWidth(c)
+                        if c is not None and not cls.hasRelativeWidth(c):
+                            columnHasWidth = True
+                            break
+                    if columnHasWidth:
+                        break
 
                 if not columnHasWidth:
                     return False
@@ -22,6 +22,12 @@ class Constants(object):
         'in INI. The default of 1h will be used.\n'
         '===========================================================')
 
+    WARNING_APPLICATION_LOCK_TIMEOUT_NOT_NUMERIC = ('\n'
+        '===========================================================\n'
+        'WARNING: applicationLockTimeout has been set to a non numeric '
+        'value in INI. The default of 30s will be used.\n'
+        '===========================================================')
+
     WIDGETSET_MISMATCH_INFO = ('\n'
         '=================================================================\n'
         'The widgetset in use does not seem to be built for the Muntjac\n'
@@ -40,6 +46,10 @@ class Constants(object):
     SERVLET_PARAMETER_PRODUCTION_MODE = 'productionMode'
     SERVLET_PARAMETER_DISABLE_XSRF_PROTECTION = 'disable-xsrf-protection'
     SERVLET_PARAMETER_RESOURCE_CACHE_TIME = 'resourceCacheTime'
+    SERVLET_PARAMETER_STREAM_UIDL = 'streamUidl'
+    SERVLET_PARAMETER_APPLICATION_LOCK_TIMEOUT = 'applicationLockTimeout'
+    SERVLET_PARAMETER_UPLOAD_PROGRESS_INTERVAL = 'uploadProgressInterval'
+    SERVLET_PARAMETER_PRELOAD_LOCALES = 'preloadLocales'
 
     # Configurable parameter names
     PARAMETER_VAADIN_RESOURCES = 'Resources'
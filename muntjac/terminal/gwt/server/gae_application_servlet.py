@@ -3,7 +3,7 @@ from gaesessions import get_current_session
 
 from muntjac.terminal.gwt.server.application_servlet import ApplicationServlet
 
-from muntjac.terminal.gwt.server.abstract_application_servlet import RequestType
+from muntjac.terminal.gwt.server.session_store import SnapshotSessionStore
 
 from muntjac.util import totalseconds
 
@@ -12,19 +12,10 @@ class GaeApplicationServlet(ApplicationServlet):
 
     SID = '0ce25c442d1f4fad8fb6eb44f24ff4a5e0df89e07ae97a3f'
 
-    def service(self, request, response):
-
-        requestType = self.getRequestType(request)
-
-        if requestType == RequestType.UIDL:
-            session = self.getSession(request, False)
-
-            if (session is not None) and session.is_active():
-                # force session save each request
-                reqs = session.get('uidl_reqs', 0)
-                session['uidl_reqs'] = reqs + 1
-
-        super(GaeApplicationServlet, self).service(request, response)
+    def createSessionStore(self):
+        # Requests may be handled by any instance. The snapshot is stored
+        # in the session, which is saved whenever a new snapshot is taken.
+        return SnapshotSessionStore()
 
 
     def getSession(self, request, allowSessionCreation=True):
@@ -40,6 +31,7 @@ class GaeApplicationServlet(ApplicationServlet):
 
     def invalidateSession(self, request):
         session = self.getSession(request)
+        self._sessionStore.invalidate(self, session)
         session.terminate()
 
 
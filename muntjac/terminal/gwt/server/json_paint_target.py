@@ -3,6 +3,7 @@
 
 """UIDL target"""
 
+import re
 import logging
 
 from warnings import warn
@@ -44,7 +45,7 @@ class JsonPaintTarget(IPaintTarget):
 
     _UIDL_ARG_NAME = 'name'
 
-    def __init__(self, manager, outWriter, cachingRequired):
+    def __init__(self, manager, outWriter, cachingRequired, flush=None):
         """Creates a new XMLPrintWriter, without automatic line flushing.
 
         @param manager:
@@ -53,6 +54,10 @@ class JsonPaintTarget(IPaintTarget):
         @param cachingRequired:
                    True if this is not a full repaint, i.e. caches are to
                    be used.
+        @param flush:
+                   Optional callable that is called after each top-level
+                   change has been written to the stream, so that the
+                   change can be sent to the client immediately.
         @raise PaintException:
                    if the paint operation failed.
         """
@@ -68,6 +73,8 @@ class JsonPaintTarget(IPaintTarget):
 
         self._cacheEnabled = cachingRequired
 
+        self._flush = flush
+
         self._closed = False
         self._changes = 0
         self._usedResources = set()
@@ -176,6 +183,8 @@ class JsonPaintTarget(IPaintTarget):
             self._uidlBuffer.write((',' if self._changes > 1 else '')
                     + self._tag.getJSON())
             self._tag = None
+            if self._flush is not None:
+                self._flush()
 
 
     @classmethod
@@ -201,49 +210,38 @@ class JsonPaintTarget(IPaintTarget):
 
         @param xml:
                 the string to be substituted.
-        @return: A new StringBuilder instance where all occurrences of XML
+        @return: A new string instance where all occurrences of XML
                 sensitive characters are substituted with entities.
         """
         if xml is None or len(xml) <= 0:
             return ''
 
-        buff = StringIO()  #(len(xml) * 2)
+        if isinstance(xml, unicode):
+            xml = xml.encode('utf-8')
 
-        for c in xml:
-            s = cls.toXmlChar(c)
-            if s is not None:
-                buff.write(s)
-            else:
-                buff.write(c)
+        # most strings contain nothing to escape
+        if cls._xml_pattern.search(xml) is None:
+            return xml
 
-        result = buff.getvalue()
-        buff.close()
-        return result
+        # '&' must be replaced first as the entities contain it
+        return (xml.replace('&', '&amp;').replace('>', '&gt;')
+                .replace('<', '&lt;').replace('"', '&quot;')
+                .replace("'", '&apos;'))
 
 
-    @staticmethod
-    def _default(ch, sb):
-        if ch >= '\u0000' and ch <= '\u001F':
-            ss = hex( int(ch) )
-            sb.write('\\u')
-            for _ in range(4 - len(ss)):
-                sb.write('0')
-            sb.write( ss.upper() )
-        else:
-            sb.write(ch)
-
-
-    _json_map = {
-        '"':  lambda ch, sb: sb.write('\\\"'),
-        '\\': lambda ch, sb: sb.write('\\\\'),
-        '\b': lambda ch, sb: sb.write('\\b'),
-        '\f': lambda ch, sb: sb.write('\\f'),
-        '\n': lambda ch, sb: sb.write('\\n'),
-        '\r': lambda ch, sb: sb.write('\\r'),
-        '\t': lambda ch, sb: sb.write('\\t'),
-        '/' : lambda ch, sb: sb.write('\\/')
+    _xml_map = {
+        '&': '&amp;',   # & => &amp;
+        '>': '&gt;',    # > => &gt;
+        '<': '&lt;',    # < => &lt;
+        '"': '&quot;',  # " => &quot;
+        "'": '&apos;'   # ' => &apos;
     }
 
+    _xml_pattern = re.compile('[&<>"\']')
+
+
+    _json_pattern = re.compile('["\\\\\b\f\n\r\t/]')
+
 
     @classmethod
     def escapeJSON(cls, s):
@@ -257,14 +255,18 @@ class JsonPaintTarget(IPaintTarget):
         if s is None:
             return ''
 
-        sb = StringIO()
+        if isinstance(s, unicode):
+            s = s.encode('utf-8')
 
-        for c in s:
-            cls._json_map.get(c, cls._default)(c, sb)
+        # most strings contain nothing to escape
+        if cls._json_pattern.search(s) is None:
+            return s
 
-        result = sb.getvalue()
-        sb.close()
-        return result
+        # the backslash must be replaced first as the escapes contain it
+        return (s.replace('\\', '\\\\').replace('"', '\\"')
+                .replace('/', '\\/').replace('\b', '\\b')
+                .replace('\f', '\\f').replace('\n', '\\n')
+                .replace('\r', '\\r').replace('\t', '\\t'))
 
 
     @classmethod
@@ -276,13 +278,7 @@ class JsonPaintTarget(IPaintTarget):
         @return: String of the entity or null if character is not to be
                 replaced with an entity.
         """
-        return {
-            '&': '&amp;',   # & => &amp;
-            '>': '&gt;',    # > => &gt;
-            '<': '&lt;',    # < => &lt;
-            '"': '&quot;',  # " => &quot;
-            "'": '&apos;'   # ' => &apos;
-        }.get(c)
+        return cls._xml_map.get(c)
 
 
     def addText(self, s):
@@ -0,0 +1,187 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Defines a process-wide cache of the locale declarations sent to the
+client."""
+
+import logging
+import threading
+
+from babel import Locale
+
+
+logger = logging.getLogger(__file__)
+
+
+class LocaleDeclarationCache(object):
+    """Cache of the UIDL locale declarations, the JSON objects describing
+    the month and day names and the date and time formats of a locale.
+
+    A declaration depends only on the locale, so it is serialized once per
+    process and shared by all applications.
+    """
+
+    _instance = None
+
+    _instanceLock = threading.Lock()
+
+    @classmethod
+    def getInstance(cls):
+        """Returns the cache shared by the whole process."""
+        if cls._instance is None:
+            with cls._instanceLock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+
+    def __init__(self):
+        # locale name -> serialized declaration
+        self._declarations = dict()
+
+
+    def getDeclaration(self, name, generateLocale=None):
+        """Returns the serialized declaration of the locale with the given
+        name.
+
+        @param name:
+                   the locale name, e.g. "en_US"
+        @param generateLocale:
+                   callable returning the L{Locale} of a name, used if the
+                   declaration is not cached yet
+        @return: the declaration as an UTF-8 encoded string
+        """
+        declaration = self._declarations.get(name)
+        if declaration is None:
+            if generateLocale is None:
+                generateLocale = generateLocaleFromName
+            declaration = serializeLocale(generateLocale(name))
+            # concurrent misses serialize the same declaration, the
+            # assignment is atomic
+            self._declarations[name] = declaration
+        return declaration
+
+
+    def preload(self, names):
+        """Serializes the declarations of the given locales in advance.
+
+        @param names:
+                   locale names, e.g. ["en_US", "fi_FI"]
+        """
+        for name in names:
+            try:
+                self.getDeclaration(name)
+            except Exception:
+                logger.warning('Unable to preload locale ' + str(name))
+
+
+    def clear(self):
+        self._declarations.clear()
+
+
+    def __contains__(self, name):
+        return name in self._declarations
+
+
+def generateLocaleFromName(value):
+    """Constructs a L{Locale} instance based on a short locale description
+    string.
+    """
+    temp = value.split('_')
+    if len(temp) == 1:
+        return Locale(temp[0], '')
+    else:
+        return Locale(temp[0], temp[1])
+
+
+def serializeLocale(l):
+    """Serializes the month and day names and the date and time formats of
+    the given locale in the UIDL format used by the client.
+
+    @return: UTF-8 encoded JSON object
+    """
+    out = list()
+
+    # Locale name
+    out.append('{\"name\":\"' + str(l) + '\",')
+
+    # Month names (both short and full)
+    months = l.months['format']['wide'].values()
+    short_months = l.months['format']['abbreviated'].values()
+
+    out.append(('\"smn\":[\"' + u'\",\"'.join(short_months[:12])
+            + '\"],').encode('utf-8'))
+    out.append(('\"mn\":[\"' + u'\",\"'.join(months[:12])
+            + '\"],').encode('utf-8'))
+
+    # Weekday names (both short and full), starting from sunday
+    days = l.days['format']['wide'].values()
+    short_days = l.days['format']['abbreviated'].values()
+    out.append(('\"sdn\":[\"' + u'\",\"'.join(short_days[6:7]
+            + short_days[:6]) + '\"],').encode('utf-8'))
+    out.append(('\"dn\":[\"' + u'\",\"'.join(days[6:7] + days[:6])
+            + '\"],').encode('utf-8'))
+
+    # First day of week
+    # (Babel: 6 = sunday, 0 = monday, Vaadin: 0 = sunday, 1 = monday)
+    fdow = l.first_week_day
+    if fdow == 0:
+        fdow = 1
+    else:
+        fdow = 0
+    out.append('\"fdow\":' + str(fdow) + ',')
+
+    # Date formatting (MM/DD/YYYY etc.)
+    try:
+        df = l.date_formats['short'].pattern
+        df += ' '
+        df += l.time_formats['short'].pattern
+        df = df.encode('utf-8')  # convert unicode to string
+    except KeyError:
+        logger.warning('Unable to get default date '
+                       'pattern for locale ' + str(l))
+        #df = locale.nl_langinfo(locale.D_T_FMT)
+        df = 'dd/MM/yy HH:mm'
+
+    timeStart = df.find('H')
+    if timeStart < 0:
+        timeStart = df.find('h')
+    ampm_first = df.find('a')
+    # E.g. in Korean locale AM/PM is before h:mm
+    # TODO should take that into consideration on client-side as well,
+    # now always h:mm a
+    if ampm_first > 0 and ampm_first < timeStart:
+        timeStart = ampm_first
+    # Hebrew locale has time before the date
+    timeFirst = timeStart == 0
+    if timeFirst:
+        dateStart = df.find(' ')
+        if ampm_first > dateStart:
+            dateStart = df.find(' ', ampm_first)
+        dateformat = df[dateStart + 1:]
+    else:
+        dateformat = df[:timeStart - 1]
+
+    out.append('\"df\":\"' + dateformat.strip() + '\",')
+
+    # Time formatting (24 or 12 hour clock and AM/PM suffixes)
+    timeformat = df[timeStart:len(df)]
+
+    # Doesn't return second or milliseconds.
+    #
+    # We use timeformat to determine 12/24-hour clock
+    twelve_hour_clock = timeformat.find('a') > -1
+
+    # TODO there are other possibilities as well, like 'h' in french
+    # (ignore them, too complicated)
+    hour_min_delimiter = '.' if timeformat.find('.') > -1 else ':'
+
+    out.append('\"thc\":' + str(twelve_hour_clock).lower() + ',')
+    out.append('\"hmd\":\"' + hour_min_delimiter + '\"')
+    if twelve_hour_clock:
+        ampm = [( l.periods['am'] ).encode('utf-8'),
+                ( l.periods['pm'] ).encode('utf-8')]
+        out.append(',\"ampm\":[\"' + ampm[0] + '\",\"' + ampm[1] + '\"]')
+    out.append('}')
+
+    return ''.join(out)
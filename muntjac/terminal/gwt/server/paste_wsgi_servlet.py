@@ -3,6 +3,8 @@ import logging
 
 from urlparse import urlparse
 
+from StringIO import StringIO
+
 from os.path import join, dirname, normpath
 
 try:
@@ -19,6 +21,8 @@ from babel.core import Locale, UnknownLocaleError
 import muntjac
 
 from muntjac.util import sys_path_install, defaultLocale
+
+from muntjac.terminal.gwt.server.session_store import InProcessSessionStore
 # Add 'FakeWebware' to sys path
 sys_path_install()
 
@@ -37,7 +41,12 @@ class PasteWsgiServlet(HTTPServlet):
 
     EndResponse = EndResponseException
 
-    def __init__(self, contextRoot=None, contextPath=None, timeout=1800):
+    #: Environment key of the input stream of a request with a streamed
+    #  body.
+    _STREAMED_INPUT = 'muntjac.input'
+
+    def __init__(self, contextRoot=None, contextPath=None, timeout=1800,
+                sessionStore=None):
 #        super(PasteWsgiServlet, self).__init__()
 
         if contextRoot is not None:
@@ -50,9 +59,29 @@ class PasteWsgiServlet(HTTPServlet):
 
         self._timeout = timeout
 
+        if sessionStore is not None:
+            self._sessionStore = sessionStore
+        else:
+            self._sessionStore = self.createSessionStore()
+
 
-#    def __call__(self, environ, start_response):
-#        pass
+    def __call__(self, environ, start_response):
+        if self.isStreamedRequest(environ):
+            # The request parses form data from the body before the servlet
+            # is called. Hide the body so that it can be read as it arrives.
+            environ[self._STREAMED_INPUT] = environ['wsgi.input']
+            environ['wsgi.input'] = StringIO()
+
+        return super(PasteWsgiServlet, self).__call__(environ,
+                start_response)
+
+
+    def isStreamedRequest(self, environ):
+        """Returns true if the body of the request with the given WSGI
+        environment should not be parsed into fields. The body of such a
+        request is returned by L{getInputStream}.
+        """
+        return False
 
     def awake(self, transaction):
 #        super(PasteWsgiServlet, self).awake(transaction)
@@ -147,7 +176,13 @@ class PasteWsgiServlet(HTTPServlet):
 
 
     def getContentLength(self, request):
-        return CONTENT_LENGTH(request.environ())
+        """Returns the length of the request body in bytes, or -1 if it
+        is not known."""
+        length = CONTENT_LENGTH(request.environ())
+        try:
+            return int(length)
+        except ValueError:
+            return -1
 
 
     def getContentType(self, request):
@@ -155,8 +190,10 @@ class PasteWsgiServlet(HTTPServlet):
 
 
     def getIfModifiedSince(self, request):
-        dh = IF_MODIFIED_SINCE(request.environ())
-        return int(dh) if dh else -1
+        """Returns the time of the If-Modified-Since header in
+        milliseconds, or -1 if the header is missing."""
+        t = IF_MODIFIED_SINCE.parse(request.environ())
+        return int(t) * 1000 if t else -1
 
 
     def getServerPort(self, request):
@@ -199,6 +236,9 @@ class PasteWsgiServlet(HTTPServlet):
 
 
     def getInputStream(self, request):
+        stream = request.environ().get(self._STREAMED_INPUT)
+        if stream is not None:
+            return stream
         return request.rawInput()
 
     # Response
@@ -207,6 +247,10 @@ class PasteWsgiServlet(HTTPServlet):
         response.setHeader(name, value)
 
 
+    def removeHeader(self, response, name):
+        response.headers().pop(name.lower(), None)
+
+
     def setStatus(self, response, n, msg=''):
         response.setStatus(n, msg)
 
@@ -215,6 +259,50 @@ class PasteWsgiServlet(HTTPServlet):
         response.write(value)
 
 
+    def flush(self, response):
+        """Sends the headers and the content written so far to the client.
+        Content written to the response afterwards is passed straight to
+        the WSGI server. No headers may be set after calling this method.
+        """
+        response.flush()
+        # WebKit keeps the flushed content for the WSGI iterable
+        del response._output[:]
+
+
+    def writeStream(self, request, response, stream, offset=0, length=None,
+                blockSize=8192):
+        """Sends the headers and then the content of the given file-like
+        object in blocks, using C{wsgi.file_wrapper} if the server provides
+        one, and ends the response. The stream is closed when it has been
+        sent.
+
+        @param offset:
+                   the number of bytes to skip from the current position of
+                   the stream
+        @param length:
+                   the number of bytes to send, or None to send the rest
+                   of the stream
+        """
+        if offset > 0:
+            if hasattr(stream, 'seek'):
+                stream.seek(offset, 1)
+            else:
+                while offset > 0:
+                    skipped = len(stream.read(min(offset, blockSize)))
+                    if skipped == 0:
+                        break
+                    offset -= skipped
+
+        fileWrapper = request.environ().get('wsgi.file_wrapper')
+        if length is None and fileWrapper is not None:
+            appIter = fileWrapper(stream, blockSize)
+        else:
+            appIter = StreamIterator(stream, length, blockSize)
+
+        response.commit()
+        raise self.ReturnIterException(appIter)
+
+
     def redirect(self, response, url):
         response.sendRedirect(url)
 
@@ -244,9 +332,24 @@ class PasteWsgiServlet(HTTPServlet):
             return None
 
 
+    def createSessionStore(self):
+        """Creates the store used for the application state of the
+        sessions if none is given to the constructor.
+
+        @return: the L{ISessionStore} of this servlet
+        """
+        return InProcessSessionStore()
+
+
+    def getSessionStore(self):
+        return self._sessionStore
+
+
     def invalidateSession(self, request):
         try:
-            request.session().invalidate()
+            session = request.session()
+            self._sessionStore.invalidate(self, session)
+            session.invalidate()
         except Exception, e:
             logger.error('Session invalidation error: %s' % e)
 
@@ -283,3 +386,34 @@ class PasteWsgiServlet(HTTPServlet):
             return session.isNew()
         else:
             return True
+
+
+class StreamIterator(object):
+    """WSGI iterable that reads a file-like object in blocks."""
+
+    def __init__(self, stream, length=None, blockSize=8192):
+        self._stream = stream
+        self._remaining = length
+        self._blockSize = blockSize
+
+
+    def __iter__(self):
+        return self
+
+
+    def next(self):
+        if self._remaining is None:
+            data = self._stream.read(self._blockSize)
+        elif self._remaining > 0:
+            data = self._stream.read(min(self._remaining, self._blockSize))
+            self._remaining -= len(data)
+        else:
+            data = ''
+
+        if not data:
+            raise StopIteration
+        return data
+
+
+    def close(self):
+        self._stream.close()
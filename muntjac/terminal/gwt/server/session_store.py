@@ -0,0 +1,328 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Stores for the application state of HTTP sessions."""
+
+import time
+import zlib
+import uuid
+import threading
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+
+class ISessionStore(object):
+    """Stores the application state of HTTP sessions between requests.
+
+    The application state (the L{WebApplicationContext} with all of its
+    applications and their component trees) is not stored in the HTTP
+    session directly, but through the session store of the servlet. This
+    avoids having the session backend pickle the whole component tree on
+    every request.
+    """
+
+    def getAttribute(self, servlet, session, name):
+        """Returns the value stored for the given session with the given
+        name or C{None} if no such value exists.
+        """
+        raise NotImplementedError
+
+
+    def setAttribute(self, servlet, session, name, value):
+        """Stores the given value for the given session."""
+        raise NotImplementedError
+
+
+    def markDirty(self, servlet, session):
+        """Notifies the store that the request being handled may have
+        modified the application state of the given session.
+        """
+        raise NotImplementedError
+
+
+    def requestEnd(self, servlet, session):
+        """Called by the servlet when it has finished handling a request
+        for the given session.
+        """
+        raise NotImplementedError
+
+
+    def invalidate(self, servlet, session):
+        """Removes all values stored for the given session."""
+        raise NotImplementedError
+
+
+class SessionAttributeStore(ISessionStore):
+    """Stores the values as attributes of the HTTP session. The session
+    backend serializes the values whenever it saves the session.
+    """
+
+    def getAttribute(self, servlet, session, name):
+        return servlet.getSessionAttribute(session, name)
+
+
+    def setAttribute(self, servlet, session, name, value):
+        servlet.setSessionAttribute(session, name, value)
+
+
+    def markDirty(self, servlet, session):
+        pass
+
+
+    def requestEnd(self, servlet, session):
+        pass
+
+
+    def invalidate(self, servlet, session):
+        pass
+
+
+class InProcessSessionStore(ISessionStore):
+    """Keeps the values in the memory of the server process. Only a short
+    key that identifies the values is stored in the HTTP session, so the
+    values are never serialized.
+
+    The values are discarded when the session has been inactive for longer
+    than its maximum inactive interval. As the values live in a single
+    process, this store may only be used if all requests of a session are
+    handled by the same process.
+    """
+
+    #: Name of the session attribute holding the key of the stored values.
+    KEY_ATTRIBUTE = 'muntjac.sessionStoreKey'
+
+    def __init__(self):
+        # session key -> StoreEntry, least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+
+    def getKey(self, servlet, session, create=True):
+        """Returns the key of the values stored for the given session.
+
+        @param create:
+                   true to create and store a new key in the session if
+                   none exists
+        """
+        if session is None:
+            return None
+        key = servlet.getSessionAttribute(session, self.KEY_ATTRIBUTE)
+        if key is None and create:
+            key = uuid.uuid4().hex
+            servlet.setSessionAttribute(session, self.KEY_ATTRIBUTE, key)
+        return key
+
+
+    def getEntry(self, servlet, session, create=False):
+        """Returns the entry of the given session and marks it as the most
+        recently used one.
+        """
+        key = self.getKey(servlet, session, create)
+        if key is None:
+            return None
+
+        self._lock.acquire()
+        try:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                if not create:
+                    return None
+                entry = self.createEntry(servlet, session)
+            self._entries[key] = entry
+            entry.lastAccessed = time.time()
+            entry.maxInactiveInterval = \
+                    servlet.getMaxInactiveInterval(session)
+            return entry
+        finally:
+            self._lock.release()
+
+
+    def createEntry(self, servlet, session):
+        return StoreEntry()
+
+
+    def getAttribute(self, servlet, session, name):
+        entry = self.getEntry(servlet, session)
+        if entry is None:
+            return None
+        return entry.values.get(name)
+
+
+    def setAttribute(self, servlet, session, name, value):
+        entry = self.getEntry(servlet, session, True)
+        if entry is not None:
+            entry.values[name] = value
+            entry.dirty = True
+
+
+    def markDirty(self, servlet, session):
+        entry = self.getEntry(servlet, session)
+        if entry is not None:
+            entry.dirty = True
+
+
+    def requestEnd(self, servlet, session):
+        self.removeExpired()
+
+
+    def invalidate(self, servlet, session):
+        key = self.getKey(servlet, session, False)
+        if key is not None:
+            self._lock.acquire()
+            try:
+                self._entries.pop(key, None)
+            finally:
+                self._lock.release()
+
+
+    def removeExpired(self):
+        """Discards the values of sessions that have been inactive for
+        longer than their maximum inactive interval. The entries are kept
+        in the order of access, so only the expired ones are visited.
+        """
+        now = time.time()
+        self._lock.acquire()
+        try:
+            expired = list()
+            for key, entry in self._entries.iteritems():
+                if not entry.isExpired(now):
+                    break
+                expired.append(key)
+            for key in expired:
+                del self._entries[key]
+        finally:
+            self._lock.release()
+
+
+    def size(self):
+        """Returns the number of sessions with stored values."""
+        return len(self._entries)
+
+
+class SnapshotSessionStore(InProcessSessionStore):
+    """Keeps the values in the memory of the server process and stores a
+    pickled snapshot of them in the HTTP session. A new snapshot is taken
+    at the end of a request only if the application state has been marked
+    dirty, or if the given interval has passed since the previous snapshot.
+
+    Each snapshot is versioned, so a process that finds a newer snapshot
+    in the session than the one its values are based on, e.g. after
+    another process has handled a request of the session, restores the
+    values from the snapshot.
+    """
+
+    #: Name of the session attribute holding the snapshot.
+    SNAPSHOT_ATTRIBUTE = 'muntjac.sessionStoreSnapshot'
+
+    def __init__(self, interval=None, protocol=pickle.HIGHEST_PROTOCOL,
+                 compressLevel=None):
+        """Creates a new snapshot session store.
+
+        @param interval:
+                   the number of seconds after which a snapshot is taken
+                   even if the application state has not been marked
+                   dirty, or C{None} to take snapshots of dirty state only
+        @param protocol:
+                   the pickle protocol used for the snapshots
+        @param compressLevel:
+                   the zlib compression level (1-9) for the snapshots, or
+                   C{None} to store them uncompressed
+        """
+        super(SnapshotSessionStore, self).__init__()
+
+        self._interval = interval
+        self._protocol = protocol
+        self._compressLevel = compressLevel
+
+
+    def getInterval(self):
+        return self._interval
+
+
+    def getProtocol(self):
+        return self._protocol
+
+
+    def getCompressLevel(self):
+        return self._compressLevel
+
+
+    def getEntry(self, servlet, session, create=False):
+        if session is None:
+            return None
+        snapshot = servlet.getSessionAttribute(session,
+                self.SNAPSHOT_ATTRIBUTE)
+        entry = super(SnapshotSessionStore, self).getEntry(servlet, session,
+                create or (snapshot is not None))
+
+        if (snapshot is not None) and (entry.version < snapshot[0]):
+            # restore the newer state taken by another process
+            entry.values = self.loads(snapshot[1])
+            entry.version = snapshot[0]
+            entry.lastSnapshot = time.time()
+            entry.dirty = False
+
+        return entry
+
+
+    def requestEnd(self, servlet, session):
+        entry = self.getEntry(servlet, session)
+        if entry is not None:
+            if entry.dirty or ((self._interval is not None)
+                    and (time.time() - entry.lastSnapshot > self._interval)):
+                self.snapshot(servlet, session, entry)
+
+        super(SnapshotSessionStore, self).requestEnd(servlet, session)
+
+
+    def invalidate(self, servlet, session):
+        super(SnapshotSessionStore, self).invalidate(servlet, session)
+        servlet.setSessionAttribute(session, self.SNAPSHOT_ATTRIBUTE, None)
+
+
+    def snapshot(self, servlet, session, entry):
+        """Stores a new snapshot of the given entry in the session."""
+        entry.version += 1
+        servlet.setSessionAttribute(session, self.SNAPSHOT_ATTRIBUTE,
+                (entry.version, self.dumps(entry.values)))
+        entry.lastSnapshot = time.time()
+        entry.dirty = False
+
+
+    def dumps(self, values):
+        data = pickle.dumps(values, self._protocol)
+        if self._compressLevel is not None:
+            data = zlib.compress(data, self._compressLevel)
+        return data
+
+
+    def loads(self, data):
+        if self._compressLevel is not None:
+            data = zlib.decompress(data)
+        return pickle.loads(data)
+
+
+class StoreEntry(object):
+    """The values stored for a session."""
+
+    def __init__(self):
+        self.values = dict()
+        self.dirty = False
+        self.version = 0
+        self.lastAccessed = time.time()
+        self.lastSnapshot = self.lastAccessed
+        self.maxInactiveInterval = None
+
+
+    def isExpired(self, now):
+        return ((self.maxInactiveInterval is not None)
+                and (self.maxInactiveInterval >= 0)
+                and (now - self.lastAccessed > self.maxInactiveInterval))
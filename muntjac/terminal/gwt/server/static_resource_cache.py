@@ -0,0 +1,219 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Defines a cache for static resources served from the VAADIN
+directory."""
+
+import os
+import stat
+import time
+import hashlib
+import mimetypes
+import threading
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+
+class StaticResourceCache(object):
+    """Bounded LRU cache of static resource files.
+
+    The content of files no larger than C{maxFileSize} bytes is kept in
+    memory, together with the content of a precompressed C{.gz} variant
+    of the file if one exists. Metadata (size, modification time, ETag
+    and mime type) is kept for every cached file. The files are checked
+    for modifications at most once every C{checkInterval} seconds.
+    """
+
+    def __init__(self, maxSize=8388608, maxFileSize=1048576,
+                 checkInterval=1):
+        """Creates a new cache.
+
+        @param maxSize:
+                   the maximum total number of bytes kept in memory, 0 to
+                   disable caching
+        @param maxFileSize:
+                   the maximum size of a file kept in memory
+        @param checkInterval:
+                   the number of seconds a cached file is served without
+                   checking it for modifications
+        """
+        self._maxSize = maxSize
+        self._maxFileSize = min(maxFileSize, maxSize)
+        self._checkInterval = checkInterval
+
+        # path -> StaticResource, least recently used first
+        self._resources = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+
+    def getResource(self, path):
+        """Returns the resource of the file with the given path, or C{None}
+        if no such regular file exists.
+
+        @return: the cached L{StaticResource} or a new uncached one if the
+                 file is too large to be cached
+        """
+        now = time.time()
+        self._lock.acquire()
+        try:
+            resource = self._resources.pop(path, None)
+            if resource is not None:
+                self._size -= resource.memorySize()
+        finally:
+            self._lock.release()
+
+        if resource is None or (now - resource.checked) >= self._checkInterval:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+
+            if not stat.S_ISREG(st.st_mode):
+                return None
+
+            if (resource is None or resource.size != st.st_size
+                    or resource.mtime != st.st_mtime):
+                resource = self.loadResource(path, st)
+            else:
+                # also check the precompressed variant
+                if resource.gzipMtime != self.getGzipMtime(path, st):
+                    resource = self.loadResource(path, st)
+
+            resource.checked = now
+
+        if resource.isCached():
+            self._lock.acquire()
+            try:
+                self._resources[path] = resource
+                self._size += resource.memorySize()
+                while self._size > self._maxSize:
+                    _, evicted = self._resources.popitem(last=False)
+                    self._size -= evicted.memorySize()
+            finally:
+                self._lock.release()
+
+        return resource
+
+
+    def loadResource(self, path, st):
+        """Creates the resource of the given file, reading its content
+        and that of its precompressed variant into memory if they fit in
+        the cache."""
+        resource = StaticResource(path, st.st_size, st.st_mtime)
+        resource.mimetype, _ = mimetypes.guess_type(path)
+
+        gzipMtime = self.getGzipMtime(path, st)
+        if gzipMtime is not None:
+            resource.gzipPath = path + '.gz'
+            resource.gzipMtime = gzipMtime
+            resource.gzipSize = os.path.getsize(resource.gzipPath)
+
+        if st.st_size + resource.gzipSize <= self._maxFileSize:
+            fd = open(path, 'rb')
+            try:
+                resource.data = fd.read()
+            finally:
+                fd.close()
+            # size may have changed while reading
+            resource.size = len(resource.data)
+            resource.etag = '"%s"' % hashlib.md5(resource.data).hexdigest()
+
+            if resource.gzipPath is not None:
+                fd = open(resource.gzipPath, 'rb')
+                try:
+                    resource.gzipData = fd.read()
+                finally:
+                    fd.close()
+                resource.gzipSize = len(resource.gzipData)
+                resource.gzipEtag = '"%s-gz"' % hashlib.md5(
+                        resource.gzipData).hexdigest()
+        else:
+            resource.etag = '"%x-%x"' % (int(st.st_mtime * 1000), st.st_size)
+            if resource.gzipPath is not None:
+                resource.gzipEtag = '"%x-%x-gz"' % (
+                        int(resource.gzipMtime * 1000), resource.gzipSize)
+
+        return resource
+
+
+    def getGzipMtime(self, path, st):
+        """Returns the modification time of the precompressed variant of
+        the given file, or C{None} if it does not exist or is older than
+        the file."""
+        try:
+            gzipMtime = os.path.getmtime(path + '.gz')
+        except OSError:
+            return None
+
+        if gzipMtime < st.st_mtime:
+            return None
+
+        return gzipMtime
+
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._resources.clear()
+            self._size = 0
+        finally:
+            self._lock.release()
+
+
+    def size(self):
+        """Returns the number of bytes kept in memory."""
+        return self._size
+
+
+    def __len__(self):
+        return len(self._resources)
+
+
+class StaticResource(object):
+    """A static resource file and its metadata."""
+
+    def __init__(self, path, size, mtime):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.mimetype = None
+        self.etag = None
+
+        #: The content of the file, C{None} if not cached.
+        self.data = None
+
+        self.gzipPath = None
+        self.gzipMtime = None
+        self.gzipSize = 0
+        self.gzipData = None
+
+        #: The ETag of the precompressed variant, which differs from the
+        #  ETag of the file as strong validators of different content
+        #  encodings must differ.
+        self.gzipEtag = None
+
+        self.checked = 0
+
+
+    def isCached(self):
+        return self.data is not None
+
+
+    def memorySize(self):
+        size = 0
+        if self.data is not None:
+            size += len(self.data)
+        if self.gzipData is not None:
+            size += len(self.gzipData)
+        return size
+
+
+    def getLastModified(self):
+        """Returns the modification time in milliseconds, rounded down to
+        whole seconds as sent in the Last-Modified header."""
+        lastModified = int(self.mtime * 1000)
+        return lastModified - (lastModified % 1000)
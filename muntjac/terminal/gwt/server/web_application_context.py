@@ -124,16 +124,17 @@ class WebApplicationContext(AbstractWebApplicationContext):
                    the HTTP session.
         @return: the application context for HttpSession.
         """
-        cx = servlet.getSessionAttribute(session,
-                clsname(WebApplicationContext), None)
+        store = servlet.getSessionStore()
+        cx = store.getAttribute(servlet, session,
+                clsname(WebApplicationContext))
 
         if cx is None:
             cx = WebApplicationContext()
-            servlet.setSessionAttribute(session,
+            store.setAttribute(servlet, session,
                 clsname(WebApplicationContext), cx)
 
-        if cx.session is None:
-            cx.session = session
+        # the context may outlive the session object of a single request
+        cx.session = session
 
         return cx
 
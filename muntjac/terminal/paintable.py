@@ -158,3 +158,23 @@ class IRepaintRequestListener(object):
                    the repaint request event specifying the paintable source.
         """
         raise NotImplementedError
+
+
+class IDetachListener(object):
+    """Listens for paintables being detached from the application. Terminals
+    that keep track of painted paintables implement this in addition to
+    L{IRepaintRequestListener} so that they can release the resources held
+    for a paintable without having to scan all of the paintables they know.
+    """
+
+    def paintableDetached(self, paintable):
+        """Receives notification of a paintable being detached.
+
+        The paintable may still be attached to the application when this
+        method is called and it may be attached again before the terminal
+        gets to process the notification.
+
+        @param paintable:
+                   the detached paintable.
+        """
+        raise NotImplementedError
@@ -166,3 +166,61 @@ class IStreamSource(object):
     def getStream(self):
         """Returns new input stream that is used for reading the resource."""
         pass
+
+
+class IterableStream(object):
+    """Read-only file-like object reading the byte strings produced by an
+    iterable, such as a generator. Only the strings not yet read are kept
+    in memory, so content generated while it is sent can be streamed to
+    the client without building it first.
+
+    The stream is not seekable, so the length of the content is not known
+    when it is sent.
+    """
+
+    def __init__(self, iterable):
+        """Creates a stream of the strings of the given iterable.
+
+        @param iterable:
+                   the iterable of the byte strings to read
+        """
+        self._iterable = iterable
+        self._iterator = iter(iterable)
+
+        #: The bytes read from the iterable, consumed up to the offset.
+        self._buffer = ''
+        self._offset = 0
+
+
+    def read(self, size=-1):
+        """Reads at most C{size} bytes, or all the remaining bytes if
+        C{size} is negative. An empty string is returned at the end of
+        the stream.
+        """
+        while ((size < 0 or len(self._buffer) - self._offset < size)
+                and self._iterator is not None):
+            try:
+                chunk = self._iterator.next()
+            except StopIteration:
+                self._iterator = None
+                break
+            self._buffer = self._buffer[self._offset:] + chunk
+            self._offset = 0
+
+        if size < 0:
+            end = len(self._buffer)
+        else:
+            end = min(self._offset + size, len(self._buffer))
+        data = self._buffer[self._offset:end]
+        self._offset = end
+        return data
+
+
+    def close(self):
+        """Closes the stream, closing the iterable if it is a generator."""
+        self._iterator = None
+        self._buffer = ''
+        self._offset = 0
+        close = getattr(self._iterable, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,251 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import re
+import time
+import random
+
+from unittest import TestCase
+
+from StringIO import StringIO
+
+from muntjac.application import Application
+from muntjac.ui.select import Select
+from muntjac.ui.combo_box import ComboBox
+from muntjac.data.util.indexed_container import IndexedContainer
+
+from muntjac.terminal.gwt.server.json_paint_target import JsonPaintTarget
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+FILTERS = ['', 'a', 'b', 'ba', 'an', 'ana', 'nan', 'bana', 'x', 'zz',
+        'banana', 'na b', 'e', 'ko']
+
+MODES = [Select.FILTERINGMODE_STARTSWITH, Select.FILTERINGMODE_CONTAINS]
+
+
+class SelectCaptionIndex(TestCase):
+
+    def setUp(self):
+        self.container = createContainer(500, random.Random(5))
+        self.select = Select('select', self.container)
+        self.select.setItemCaptionPropertyId('name')
+        self.select.setCaptionIndexEnabled(True)
+
+
+    def options(self, filterString, mode, page, nullOption, path):
+        """Returns the options of the page, the number of matches and the
+        adjusted page number using the given filtering path."""
+        select = self.select
+        select.setFilteringMode(mode)
+        select._filterstring = filterString
+        select._prevfilterstring = None
+        select._currentPage = page
+        select._optionRequest = True
+        if path == 'index':
+            options = select.getOptionsWithIndex(nullOption)
+        elif path == 'container':
+            options = select.getOptionsWithFilter(nullOption)
+        else:
+            options = select.getFilteredOptions()
+            select._filteredSize = len(options)
+            options = select.sanitetizeList(options, nullOption)
+        return options, select._filteredSize, select._currentPage
+
+
+    def check(self, path='memory'):
+        for mode in MODES:
+            for filterString in FILTERS:
+                for page in [0, 1, 3, 100]:
+                    for nullOption in [False, True]:
+                        expected = self.options(filterString, mode, page,
+                                nullOption, path)
+                        actual = self.options(filterString, mode, page,
+                                nullOption, 'index')
+                        if path == 'memory':
+                            # the in-memory filtering returns all matches
+                            # without adjusting the page when they fit on
+                            # one page
+                            if expected[1] <= self.select.pageLength:
+                                expected = expected[1:2]
+                                actual = actual[1:2]
+                            else:
+                                expected = expected[:2]
+                                actual = actual[:2]
+                        self.assertEquals(expected, actual)
+
+
+    def testMatchesInMemoryFiltering(self):
+        self.check()
+
+
+    def testMatchesContainerFilter(self):
+        self.check('container')
+
+
+    def testExplicitCaptions(self):
+        self.select.setItemCaptionMode(Select.ITEM_CAPTION_MODE_EXPLICIT)
+        for itemId in self.container.getItemIds():
+            self.select.setItemCaption(itemId,
+                    self.container.getContainerProperty(itemId,
+                            'name').getValue().upper())
+        self.check()
+
+
+    def testCaptionChanges(self):
+        # the index is updated item by item once built
+        for mode in MODES:
+            self.options('ban', mode, 0, False, 'index')
+
+        rnd = random.Random(9)
+        itemIds = list(self.container.getItemIds())
+        for _ in range(50):
+            itemId = rnd.choice(itemIds)
+            self.container.getContainerProperty(itemId, 'name').setValue(
+                    randomCaption(rnd))
+        self.check()
+
+        # captions set explicitly
+        self.select.setItemCaptionMode(
+                Select.ITEM_CAPTION_MODE_EXPLICIT_DEFAULTS_ID)
+        self.check()
+        for _ in range(50):
+            self.select.setItemCaption(rnd.choice(itemIds),
+                    randomCaption(rnd))
+        self.check()
+
+
+    def testItemSetChanges(self):
+        self.check()
+        self.select.removeItem(self.container.getIdByIndex(0))
+        item = self.select.addItem('added')
+        item.getItemProperty('name').setValue('banana split')
+        self.check()
+        self.assertEquals(['added'],
+                self.options('banana s', Select.FILTERINGMODE_STARTSWITH,
+                        0, False, 'index')[0])
+
+        self.select.setContainerDataSource(createContainer(50,
+                random.Random(6)))
+        self.select.setItemCaptionPropertyId('name')
+        self.container = self.select.getContainerDataSource()
+        self.check()
+
+
+    def testScrollToSelectedItem(self):
+        itemId = self.options('an', Select.FILTERINGMODE_CONTAINS, 0, False,
+                'memory')[0][-1]
+        self.select.setValue(itemId)
+        for mode in MODES:
+            for filterString in ['', 'an', 'a']:
+                self.options(filterString, mode, 0, False, 'container')
+                self.select._optionRequest = False
+                expected = self.select.getOptionsWithFilter(False)
+                if mode == Select.FILTERINGMODE_CONTAINS:
+                    self.assertTrue(itemId in expected)
+
+                self.options(filterString, mode, 0, False, 'index')
+                self.select._optionRequest = False
+                self.assertEquals(expected,
+                        self.select.getOptionsWithIndex(False))
+
+
+    def testDisable(self):
+        self.assertTrue(self.select.isCaptionIndexEnabled())
+        self.select.getOptionsWithIndex(False)
+        self.select.setCaptionIndexEnabled(False)
+        self.assertFalse(self.select.isCaptionIndexEnabled())
+        self.assertEquals(None, self.select.getOptionsWithIndex(False))
+        self.assertEquals([], self.container._propertyValueChangeListeners)
+
+
+    def testPaint(self):
+        comboBox = ComboBox('combo', self.container)
+        comboBox.setItemCaptionPropertyId('name')
+        comboBox.setFilteringMode(Select.FILTERINGMODE_CONTAINS)
+        for index in [False, True]:
+            comboBox.setCaptionIndexEnabled(index)
+            comboBox.changeVariables(comboBox, {'filter': 'ana', 'page': 1})
+            if index:
+                self.assertEquals(expected, paint(comboBox))
+            else:
+                expected = paint(comboBox)
+        self.assertEquals(comboBox.pageLength,
+                len(re.findall('"so"', expected)))
+
+
+class PerformanceTestSelectCaptionIndex(PerformanceTestCase):
+
+    _REPEATS = 5
+    _ITEMS = 50000
+    _KEYSTROKE_FAIL_THRESHOLD = 30
+
+
+    def testTypingLatency(self):
+        comboBox = ComboBox('combo', createContainer(self._ITEMS,
+                random.Random(1)))
+        comboBox.setItemCaptionPropertyId('name')
+
+        for mode, name in [(Select.FILTERINGMODE_STARTSWITH, 'starts with'),
+                (Select.FILTERINGMODE_CONTAINS, 'contains')]:
+            comboBox.setFilteringMode(mode)
+
+            # the container filter used prior to the caption index
+            comboBox.setCaptionIndexEnabled(False)
+            legacy = self.type(comboBox, 'banana')
+
+            comboBox.setCaptionIndexEnabled(True)
+            paint(comboBox) # builds the index
+            times = list()
+            for _ in range(self._REPEATS):
+                times.append(max(self.type(comboBox, 'banana')))
+
+            print ('Legacy %s keystroke timings (ms) for %d items: %s'
+                    % (name, self._ITEMS, legacy))
+            self.checkMedian(self._ITEMS, times, 'Slowest %s keystroke'
+                    % name, self._KEYSTROKE_FAIL_THRESHOLD)
+
+
+    def type(self, comboBox, text):
+        """Types the text one character at a time, repainting the options
+        after each keystroke."""
+        times = list()
+        for i in range(1, len(text) + 1):
+            start = 1000 * time.time()
+            comboBox.changeVariables(comboBox, {'filter': text[:i],
+                    'page': 0})
+            paint(comboBox)
+            times.append((1000 * time.time()) - start)
+        return times
+
+
+SYLLABLES = ['ba', 'na', 'an', 'ma', 'ra', 'te', 'ko', 'li', 'su', 'e',
+        ' ']
+
+
+def randomCaption(rnd):
+    return ''.join([rnd.choice(SYLLABLES)
+            for _ in range(rnd.randint(1, 8))])
+
+
+def createContainer(items, rnd):
+    container = IndexedContainer()
+    container.addContainerProperty('name', str, None)
+    for i in range(items):
+        container.addItem(i).getItemProperty('name').setValue(
+                randomCaption(rnd))
+    return container
+
+
+def paint(select):
+    """Paints the given select and returns the UIDL."""
+    out = StringIO()
+    target = JsonPaintTarget(AbstractCommunicationManager(Application()),
+            out, False)
+    select.paint(target)
+    target.close()
+    return out.getvalue()
@@ -30,20 +30,27 @@ from option_group_listeners import OptionGroupListeners
 from ordered_layout import TestOrderedLayout
 from panel_listeners import PanelListeners
 from popup_view_listeners import PopupViewListeners
+from select_caption_index import SelectCaptionIndex, \
+    PerformanceTestSelectCaptionIndex
 from select_listeners import SelectListeners
 from tab_sheet_listeners import TabSheetListeners
 from test_tab_sheet import TestTabSheet
 from test_tree_listeners import TestTreeListeners
 from tree_listeners import TreeListeners
+from tree_table_preorder import TestVisibleOrder, TreeTablePreOrder, \
+    PerformanceTestTreeTablePreOrder
 from upload_listeners import UploadListeners
 from uri_fragment_utility_listeners import UriFragmentUtilityListeners
 from window_listeners import WindowListeners
 
+from table.table_bulk_rendering import TableBulkRendering
 from table.table_column_alignments import TableColumnAlignments
 from table.table_generator import TableGenerator
 from table.table_listeners import TableListeners
 from table.table_visible_columns import TableVisibleColumns
 from table.test_footer import TestFooter
+from table.test_table_export import TestTableExport, \
+    PerformanceTestTableExport
 from table.test_multiple_selection import TestMultipleSelection
 
 
@@ -74,20 +81,28 @@ def suite():
     suite.addTest( unittest.makeSuite(TestOrderedLayout) )
     suite.addTest( unittest.makeSuite(PanelListeners) )
     suite.addTest( unittest.makeSuite(PopupViewListeners) )
+    suite.addTest( unittest.makeSuite(SelectCaptionIndex) )
+    suite.addTest( unittest.makeSuite(PerformanceTestSelectCaptionIndex) )
     suite.addTest( unittest.makeSuite(SelectListeners) )
     suite.addTest( unittest.makeSuite(TabSheetListeners) )
     suite.addTest( unittest.makeSuite(TestTabSheet) )
     suite.addTest( unittest.makeSuite(TestTreeListeners) )
     suite.addTest( unittest.makeSuite(TreeListeners) )
+    suite.addTest( unittest.makeSuite(TestVisibleOrder) )
+    suite.addTest( unittest.makeSuite(TreeTablePreOrder) )
+    suite.addTest( unittest.makeSuite(PerformanceTestTreeTablePreOrder) )
     suite.addTest( unittest.makeSuite(UploadListeners) )
     suite.addTest( unittest.makeSuite(UriFragmentUtilityListeners) )
     suite.addTest( unittest.makeSuite(WindowListeners) )
 
+    suite.addTest( unittest.makeSuite(TableBulkRendering) )
     suite.addTest( unittest.makeSuite(TableColumnAlignments) )
     suite.addTest( unittest.makeSuite(TableGenerator) )
     suite.addTest( unittest.makeSuite(TableListeners) )
     suite.addTest( unittest.makeSuite(TableVisibleColumns) )
     suite.addTest( unittest.makeSuite(TestFooter) )
+    suite.addTest( unittest.makeSuite(TestTableExport) )
+    suite.addTest( unittest.makeSuite(PerformanceTestTableExport) )
     suite.addTest( unittest.makeSuite(TestMultipleSelection) )
 
     return suite
@@ -0,0 +1,247 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import sqlite3
+
+from unittest import TestCase
+
+from muntjac.ui.table import Table, IColumnGenerator
+from muntjac.ui.tree_table import TreeTable
+from muntjac.ui.vertical_layout import VerticalLayout
+from muntjac.data.container import IContainer, IPropertyValueChangeEvent, \
+    IPropertyValueChangeNotifier
+from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.hierarchical_container import HierarchicalContainer
+from muntjac.data.util.sqlcontainer.sql_container import SQLContainer
+
+
+COLUMNS = ['id', 'name', 'age']
+
+
+class CountingSQLContainer(SQLContainer):
+    """Counts the calls made to the container while rendering."""
+
+    def __init__(self, *args, **kw_args):
+        self.calls = dict()
+        super(CountingSQLContainer, self).__init__(*args, **kw_args)
+
+
+    def count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+
+    def getItem(self, itemId):
+        self.count('getItem')
+        return super(CountingSQLContainer, self).getItem(itemId)
+
+
+    def getIdByIndex(self, index):
+        self.count('getIdByIndex')
+        return super(CountingSQLContainer, self).getIdByIndex(index)
+
+
+    def getItemIdsInRange(self, startIndex, numberOfItems):
+        self.count('getItemIdsInRange')
+        return super(CountingSQLContainer, self).getItemIdsInRange(
+                startIndex, numberOfItems)
+
+
+    def getItemValues(self, itemIds, propertyIds):
+        self.count('getItemValues')
+        return super(CountingSQLContainer, self).getItemValues(itemIds,
+                propertyIds)
+
+
+class FormattingTable(Table):
+
+    def formatPropertyValue(self, rowId, colId, prop):
+        return '<%s>' % super(FormattingTable, self).formatPropertyValue(
+                rowId, colId, prop)
+
+
+class NameLengthGenerator(IColumnGenerator):
+
+    def generateCell(self, source, itemId, columnId):
+        return len(source.getContainerProperty(itemId,
+                'name').getValue() or '')
+
+
+class UnorderedContainer(IContainer, IPropertyValueChangeNotifier):
+    """Keeps the value change listeners of a container that is not
+    ordered."""
+
+    def __init__(self):
+        self.listeners = list()
+
+
+    def addListener(self, listener, iface=None):
+        self.listeners.append(listener)
+
+
+    def removeListener(self, listener, iface=None):
+        self.listeners.remove(listener)
+
+
+class TableBulkRendering(TestCase):
+
+    def setUp(self):
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY,'
+                ' name TEXT, age INTEGER)')
+        self.expected = IndexedContainer()
+        for propertyId, typ in zip(COLUMNS, [int, unicode, int]):
+            self.expected.addContainerProperty(propertyId, typ, None)
+        for itemId in range(1, 101):
+            row = (itemId, u'name %d' % (itemId % 7) if itemId % 5 else None,
+                    itemId % 13 if itemId % 3 else None)
+            self.connection.execute('INSERT INTO people VALUES (?, ?, ?)',
+                    row)
+            item = self.expected.addItem(itemId)
+            for propertyId, value in zip(COLUMNS, row):
+                item.getItemProperty(propertyId).setValue(value)
+
+
+    def render(self, table, firstIndex, rows):
+        cells = table.getVisibleCellsNoCache(firstIndex, rows, True)
+        # the keys of the rows depend on the table
+        return cells[Table.CELL_ITEMID:]
+
+
+    def checkTables(self, table, expected):
+        for firstIndex, rows in [(0, 15), (40, 30), (90, 15), (100, 5)]:
+            self.assertEquals(self.render(expected, firstIndex, rows),
+                    self.render(table, firstIndex, rows))
+
+
+    def testSQLContainer(self):
+        container = SQLContainer(self.connection, 'people', 'id',
+                pageLength=20)
+        self.checkTables(Table('people', container),
+                Table('people', self.expected))
+
+        container.sort(['age', 'name'], [False, True])
+        self.expected.sort(['age', 'name', 'id'], [False, True, True])
+        self.checkTables(Table('people', container),
+                Table('people', self.expected))
+
+
+    def testColumns(self):
+        tables = [Table('people', SQLContainer(self.connection, 'people',
+                'id')), Table('people', self.expected)]
+        for table in tables:
+            table.setColumnCollapsingAllowed(True)
+            table.setColumnCollapsed('age', True)
+            table.addGeneratedColumn('length', NameLengthGenerator())
+        self.checkTables(*tables)
+
+
+    def testOverriddenFormatting(self):
+        container = CountingSQLContainer(self.connection, 'people', 'id')
+        table = FormattingTable('people', container)
+        expected = FormattingTable('people', self.expected)
+        self.checkTables(table, expected)
+        self.assertEquals('<>', self.render(table, 4, 1)[
+                Table.CELL_FIRSTCOL - Table.CELL_ITEMID + 1][0])
+        self.assertFalse('getItemValues' in container.calls)
+
+
+    def testContainerCalls(self):
+        container = CountingSQLContainer(self.connection, 'people', 'id',
+                pageLength=50)
+        table = Table('people', container)
+        container.size()
+        container.calls.clear()
+
+        cells = self.render(table, 10, 30)
+        self.assertEquals(range(11, 41), cells[0])
+        # the properties of the first row are looked at once
+        self.assertEquals({'getItemIdsInRange': 1, 'getItemValues': 1,
+                'getItem': len(COLUMNS)}, container.calls)
+
+
+    def testContainerValueChanges(self):
+        table = Table('people', self.expected)
+        table.setPageLength(10)
+        # the cells are rendered only when the table has a parent
+        VerticalLayout().addComponent(table)
+        table.refreshRenderedCells()
+        # the value changes are received from the container
+        self.assertEquals(0, len(table._listenedProperties))
+
+        pageBuffer = table._pageBuffer
+        self.expected.getContainerProperty(50, 'name').setValue(u'hidden')
+        self.assertTrue(pageBuffer is table._pageBuffer)
+
+        self.expected.getContainerProperty(3, 'name').setValue(u'shown')
+        self.assertFalse(pageBuffer is table._pageBuffer)
+        self.assertEquals(u'shown', table._pageBuffer[
+                Table.CELL_FIRSTCOL + 1][2])
+
+        # collapsed columns are not rendered
+        table.setColumnCollapsingAllowed(True)
+        table.setColumnCollapsed('age', True)
+        pageBuffer = table._pageBuffer
+        self.expected.getContainerProperty(3, 'age').setValue(99)
+        self.assertTrue(pageBuffer is table._pageBuffer)
+
+        table.setContainerDataSource(IndexedContainer())
+        self.expected.getContainerProperty(3, 'name').setValue(u'detached')
+        self.assertEquals([], self.expected.getListeners(
+                IPropertyValueChangeEvent))
+
+
+    def testValueChangeListenerOfDataSource(self):
+        table = Table('people', self.expected)
+        self.assertEquals([table], self.expected.getListeners(
+                IPropertyValueChangeEvent))
+
+        # the listener is only added to the container used by the table
+        unordered = UnorderedContainer()
+        self.assertRaises(NotImplementedError, table.setContainerDataSource,
+                unordered)
+        self.assertEquals([], unordered.listeners)
+
+        other = IndexedContainer()
+        table.setContainerDataSource(other)
+        self.assertEquals([], self.expected.getListeners(
+                IPropertyValueChangeEvent))
+        self.assertEquals([table], other.getListeners(
+                IPropertyValueChangeEvent))
+
+
+    def testEditableValueChanges(self):
+        table = Table('people', self.expected)
+        table.setPageLength(10)
+        table.setEditable(True)
+        # the cells are rendered only when the table has a parent
+        VerticalLayout().addComponent(table)
+        table.refreshRenderedCells()
+        pageBuffer = table._pageBuffer
+
+        # the fields show the new value of their property
+        field = pageBuffer[Table.CELL_FIRSTCOL + 1][2]
+        self.expected.getContainerProperty(3, 'name').setValue(u'edited')
+        self.assertTrue(pageBuffer is table._pageBuffer)
+        self.assertEquals(u'edited', field.getValue())
+
+
+    def testTreeTable(self):
+        container = HierarchicalContainer()
+        container.addContainerProperty('name', str, None)
+        for itemId in range(20):
+            container.addItem(itemId)
+            container.getContainerProperty(itemId, 'name').setValue(
+                    'item %d' % itemId)
+            if itemId >= 4:
+                container.setParent(itemId, itemId % 4)
+        treeTable = TreeTable('tree', container)
+        treeTable.setCollapsed(1, False)
+        treeTable.setCollapsed(9, False)
+
+        expected = [0, 1, 5, 9, 13, 17, 2, 3]
+        cells = self.render(treeTable, 0, 15)
+        self.assertEquals(expected, cells[0])
+        self.assertEquals(['item %d' % itemId for itemId in expected],
+                cells[Table.CELL_FIRSTCOL - Table.CELL_ITEMID])
+        self.assertEquals(expected[2:6],
+                self.render(treeTable, 2, 4)[0])
@@ -0,0 +1,433 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import csv
+import time
+import random
+import sqlite3
+import resource
+import zipfile
+import tempfile
+
+from unittest import TestCase
+from cStringIO import StringIO
+from xml.dom.minidom import parseString
+
+from paste.fixture import TestApp
+from paste.session import SessionMiddleware
+
+from muntjac.application import Application
+from muntjac.ui.window import Window
+
+from muntjac.ui.table import Table, IColumnGenerator, IRowGenerator, \
+    GeneratedRow
+from muntjac.ui.tree_table import TreeTable
+from muntjac.ui.check_box import CheckBox
+from muntjac.ui.label import Label
+from muntjac.ui.table_export import CSVExport, XLSXExport, columnName
+from muntjac.terminal.stream_resource import IterableStream
+from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.hierarchical_container import HierarchicalContainer
+from muntjac.data.util.sqlcontainer.sql_container import SQLContainer
+from muntjac.data.util.filter.compare import Greater
+from muntjac.demo.util import InMemorySession
+from muntjac.test.server.performance import sized, isLarge
+
+from muntjac.terminal.gwt.server.application_servlet import \
+    ApplicationServlet
+
+
+COLUMNS = ['id', 'name', 'age']
+
+
+class FormattingTable(Table):
+
+    def formatPropertyValue(self, rowId, colId, prop):
+        if colId == 'age':
+            return '%s years' % prop.getValue()
+        return super(FormattingTable, self).formatPropertyValue(rowId,
+                colId, prop)
+
+
+class NameLengthGenerator(IColumnGenerator):
+
+    def generateCell(self, source, itemId, columnId):
+        return len(source.getContainerProperty(itemId,
+                'name').getValue() or '')
+
+
+class SummaryRowGenerator(IRowGenerator):
+
+    def generateRow(self, table, itemId):
+        if itemId % 10 == 0:
+            return GeneratedRow('summary %d' % itemId)
+        if itemId % 10 == 5:
+            return GeneratedRow('a', 'b')
+        return None
+
+
+class LockCheckingContainer(IndexedContainer):
+    """Records if the lock of the application is held when pages of item
+    ids are read."""
+
+    def __init__(self, application):
+        super(LockCheckingContainer, self).__init__()
+        self.application = application
+        self.locked = list()
+
+
+    def getItemIdsInRange(self, startIndex, numberOfItems):
+        self.locked.append(
+                self.application.getLock().isHeldByCurrentThread())
+        return super(LockCheckingContainer, self).getItemIdsInRange(
+                startIndex, numberOfItems)
+
+
+class ExportApplication(Application):
+
+    instances = list()
+
+    def init(self):
+        self.instances.append(self)
+        self.container = LockCheckingContainer(self)
+        self.container.addContainerProperty('name', str, None)
+        for itemId in range(20):
+            self.container.addItem(itemId)
+            self.container.getContainerProperty(itemId, 'name').setValue(
+                    'name %d' % itemId)
+        main = Window('export')
+        self.setMainWindow(main)
+        table = Table('people', self.container)
+        main.addComponent(table)
+        self.resource = CSVExport(table, pageLength=7).createResource(self,
+                'people.csv')
+
+
+class TestTableExport(TestCase):
+
+    def setUp(self):
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY,'
+                ' name TEXT, age INTEGER)')
+        self.container = IndexedContainer()
+        for propertyId, typ in zip(COLUMNS, [int, unicode, int]):
+            self.container.addContainerProperty(propertyId, typ, None)
+        for itemId in range(1, 51):
+            row = (itemId, u'name, "%d"' % (itemId % 7) if itemId % 5
+                    else None, itemId % 13 if itemId % 3 else None)
+            self.connection.execute('INSERT INTO people VALUES (?, ?, ?)',
+                    row)
+            item = self.container.addItem(itemId)
+            for propertyId, value in zip(COLUMNS, row):
+                item.getItemProperty(propertyId).setValue(value)
+
+
+    def readCSV(self, export):
+        return list(csv.reader(StringIO(self.read(export))))
+
+
+    def read(self, export):
+        stream = export.getStream()
+        chunks = list()
+        while True:
+            data = stream.read(100)
+            if len(data) == 0:
+                break
+            chunks.append(data)
+        stream.close()
+        return ''.join(chunks)
+
+
+    def expectedRows(self, itemIds, columns=COLUMNS):
+        rows = list()
+        for itemId in itemIds:
+            row = list()
+            for propertyId in columns:
+                value = self.container.getContainerProperty(itemId,
+                        propertyId).getValue()
+                row.append('' if value is None else str(value))
+            rows.append(row)
+        return rows
+
+
+    def testCSV(self):
+        table = Table('people', self.container)
+        rows = self.readCSV(CSVExport(table, pageLength=7))
+        self.assertEquals(COLUMNS, rows[0])
+        self.assertEquals(self.expectedRows(range(1, 51)), rows[1:])
+
+        self.assertEquals(self.expectedRows(range(1, 51)),
+                self.readCSV(CSVExport(table, includeHeaders=False)))
+
+
+    def testColumns(self):
+        table = Table('people', self.container)
+        table.setColumnHeader('name', u'Name \xe4')
+        table.setColumnCollapsingAllowed(True)
+        table.setColumnCollapsed('age', True)
+        table.addGeneratedColumn('length', NameLengthGenerator())
+        table.setVisibleColumns(['length', 'name', 'age'])
+
+        rows = self.readCSV(CSVExport(table, pageLength=20))
+        self.assertEquals(['length', u'Name \xe4'.encode('utf-8')], rows[0])
+        for row, (name,) in zip(rows[1:],
+                self.expectedRows(range(1, 51), ['name'])):
+            self.assertEquals([str(len(name)), name], row)
+
+
+    def testFormatting(self):
+        table = FormattingTable('people', self.container)
+        rows = self.readCSV(CSVExport(table, includeHeaders=False))
+        self.assertEquals('1 years', rows[0][2])
+        self.assertEquals('None years', rows[2][2])
+
+
+    def testSortAndFilter(self):
+        self.container.sort(['age', 'id'], [False, True])
+        self.container.addContainerFilter(Greater('age', 5))
+        table = Table('people', self.container)
+        self.assertEquals(self.expectedRows(self.container.getItemIds()),
+                self.readCSV(CSVExport(table, pageLength=4,
+                        includeHeaders=False)))
+
+
+    def testSQLContainer(self):
+        expected = self.readCSV(CSVExport(Table('people', self.container)))
+        container = SQLContainer(self.connection, 'people', 'id',
+                pageLength=6)
+        for pageLength in [5, 50, 1000]:
+            self.assertEquals(expected, self.readCSV(CSVExport(
+                    Table('people', container), pageLength=pageLength)))
+
+        container.sort(['id'], [False])
+        expected.reverse()
+        self.assertEquals(expected[:-1], self.readCSV(CSVExport(
+                Table('people', container), pageLength=8,
+                includeHeaders=False)))
+
+
+    def testTreeTable(self):
+        container = HierarchicalContainer()
+        container.addContainerProperty('name', str, None)
+        for itemId in range(20):
+            container.addItem(itemId)
+            container.getContainerProperty(itemId, 'name').setValue(
+                    'item %d' % itemId)
+            if itemId >= 4:
+                container.setParent(itemId, itemId % 4)
+        treeTable = TreeTable('tree', container)
+        treeTable.setCollapsed(1, False)
+        treeTable.setCollapsed(9, False)
+
+        rows = self.readCSV(CSVExport(treeTable, pageLength=3,
+                includeHeaders=False))
+        self.assertEquals([['item %d' % itemId]
+                for itemId in [0, 1, 5, 9, 13, 17, 2, 3]], rows)
+
+
+    def testRowGenerator(self):
+        table = Table('people', self.container)
+        table.setRowGenerator(SummaryRowGenerator())
+        rows = self.readCSV(CSVExport(table, includeHeaders=False))
+        self.assertEquals(['a', 'b', ''], rows[4])
+        self.assertEquals(['summary 10', '', ''], rows[9])
+        self.assertEquals(self.expectedRows([11]), rows[10:11])
+
+
+    def testComponents(self):
+        container = IndexedContainer()
+        container.addContainerProperty('check', CheckBox, None)
+        container.addContainerProperty('label', Label, None)
+        item = container.addItem(1)
+        item.getItemProperty('check').setValue(CheckBox('c', True))
+        item.getItemProperty('label').setValue(Label('text'))
+        table = Table('components', container)
+        self.assertEquals([['True', 'text']], self.readCSV(CSVExport(table,
+                includeHeaders=False)))
+
+
+    def testXLSX(self):
+        table = Table('people', self.container)
+        table.setColumnHeader('name', u'Name & <\xe4>')
+        data = self.read(XLSXExport(table, pageLength=9, sheetName='People'))
+        archive = zipfile.ZipFile(StringIO(data))
+        self.assertTrue(archive.testzip() is None)
+        self.assertEquals(['[Content_Types].xml', '_rels/.rels',
+                'xl/workbook.xml', 'xl/_rels/workbook.xml.rels',
+                'xl/worksheets/sheet1.xml'], archive.namelist())
+
+        workbook = parseString(archive.read('xl/workbook.xml'))
+        self.assertEquals('People', workbook.getElementsByTagName(
+                'sheet')[0].getAttribute('name'))
+
+        sheet = parseString(archive.read('xl/worksheets/sheet1.xml'))
+        rows = sheet.getElementsByTagName('row')
+        self.assertEquals(51, len(rows))
+
+        cells = dict()
+        for cell in sheet.getElementsByTagName('c'):
+            text = ''.join([node.data for node in
+                    cell.getElementsByTagName('t')[0].childNodes]
+                    if cell.getAttribute('t') == 'inlineStr' else
+                    cell.getElementsByTagName('v')[0].firstChild.data)
+            cells[cell.getAttribute('r')] = (cell.getAttribute('t'), text)
+        self.assertEquals(('inlineStr', u'Name & <\xe4>'), cells['B1'])
+        self.assertEquals(('', '2'), cells['A3'])
+        self.assertEquals(('inlineStr', u'name, "2"'), cells['B3'])
+        self.assertEquals(('', '2'), cells['C3'])
+        # empty cells are left out
+        self.assertFalse('C4' in cells)
+        self.assertFalse('B6' in cells)
+
+        for row, expected in zip(rows[1:], self.expectedRows(range(1, 51))):
+            self.assertEquals(len([text for text in expected if text]),
+                    len(row.getElementsByTagName('c')))
+
+
+    def testColumnName(self):
+        self.assertEquals(['A', 'B', 'Z', 'AA', 'AZ', 'BA', 'ZZ', 'AAA'],
+                [columnName(index) for index in
+                        [0, 1, 25, 26, 51, 52, 701, 702]])
+
+
+    def testApplicationLock(self):
+        app = TestApp(SessionMiddleware(ApplicationServlet(ExportApplication),
+                session_class=InMemorySession))
+        app.get('/')
+        application = ExportApplication.instances.pop()
+        url = application.getRelativeLocation(application.resource)
+
+        application.container.locked = list()
+        response = app.get(url.replace('app://', '/'))
+        self.assertEquals('text/csv', response.header('Content-Type'))
+        self.assertEquals(['name'] + ['name %d' % itemId
+                for itemId in range(20)], response.body.splitlines())
+        # the pages are read while the response is iterated
+        self.assertEquals([True, True, True], application.container.locked)
+        self.assertFalse(application.getLock().isHeldByCurrentThread())
+
+
+    def testIterableStream(self):
+        closed = list()
+
+        def generate():
+            try:
+                for chunk in ['abc', '', 'defgh', 'i']:
+                    yield chunk
+            finally:
+                closed.append(True)
+
+        stream = IterableStream(generate())
+        self.assertEquals('ab', stream.read(2))
+        self.assertEquals('cdef', stream.read(4))
+        self.assertEquals('ghi', stream.read())
+        self.assertEquals('', stream.read(5))
+
+        stream = IterableStream(generate())
+        self.assertEquals('a', stream.read(1))
+        stream.close()
+        self.assertEquals([True, True], closed)
+        self.assertEquals('', stream.read())
+
+
+class PerformanceTestTableExport(TestCase):
+
+    _ROWS = sized(10000, 1000000)
+    _CSV_FAIL_THRESHOLD = sized(1000, 40000)
+    _XLSX_FAIL_THRESHOLD = sized(2000, 90000)
+    # kilobytes
+    _MEMORY_FAIL_THRESHOLD = 50000
+
+
+    def setUp(self):
+        rnd = random.Random(1)
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY,'
+                ' name TEXT, age INTEGER)')
+        self.connection.executemany('INSERT INTO people VALUES (?, ?, ?)',
+                ((itemId, 'name %d' % itemId, rnd.randint(0, 99))
+                        for itemId in xrange(self._ROWS)))
+
+
+    def testExport(self):
+        table = Table('people', SQLContainer(self.connection, 'people',
+                'id'))
+        for cls, threshold in [(CSVExport, self._CSV_FAIL_THRESHOLD),
+                (XLSXExport, self._XLSX_FAIL_THRESHOLD)]:
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = 1000 * time.time()
+            stream = cls(table).getStream()
+            out = tempfile.TemporaryFile()
+            size = 0
+            while True:
+                data = stream.read(65536)
+                if len(data) == 0:
+                    break
+                out.write(data)
+                size += len(data)
+            elapsed = (1000 * time.time()) - start
+            growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss \
+                    - before
+
+            print ('%s timings (ms) for %d rows: %s, %d bytes, peak memory '
+                    'growth %d kB' % (cls.__name__, self._ROWS, [elapsed],
+                            size, growth))
+            self.assertTrue(elapsed <= threshold,
+                '%s too slow, time %.2fms for %s rows' %
+                (cls.__name__, elapsed, self._ROWS))
+            self.assertTrue(growth <= self._MEMORY_FAIL_THRESHOLD,
+                '%s used too much memory, %d kB for %s rows' %
+                (cls.__name__, growth, self._ROWS))
+
+            out.seek(0)
+            if cls is CSVExport:
+                self.checkCSV(out)
+            else:
+                self.checkXLSX(out)
+            out.close()
+
+
+    def expectedRow(self, index):
+        return list(self.connection.execute('SELECT * FROM people '
+                'WHERE id = ?', (index,)).fetchone())
+
+
+    def checkCSV(self, out):
+        rows = 0
+        for row in csv.reader(out):
+            if rows == 0:
+                self.assertEquals(['id', 'name', 'age'], row)
+            elif rows in (1, self._ROWS):
+                self.assertEquals([str(value)
+                        for value in self.expectedRow(rows - 1)], row)
+            rows += 1
+        self.assertEquals(self._ROWS + 1, rows)
+
+
+    def checkXLSX(self, out):
+        archive = zipfile.ZipFile(out)
+        self.assertTrue(archive.testzip() is None)
+        sheet = archive.open('xl/worksheets/sheet1.xml')
+        rows = 0
+        # keeps the end of the previous block, a tag may span two blocks
+        tail = ''
+        while True:
+            data = sheet.read(65536)
+            if len(data) == 0:
+                break
+            data = tail + data
+            rows += data.count('<row ')
+            tail = data[-4:]
+        sheet.close()
+        self.assertEquals(self._ROWS + 1, rows)
+
+        if not isLarge():
+            rows = parseString(archive.read('xl/worksheets/sheet1.xml')
+                    ).getElementsByTagName('row')
+            cells = list()
+            for cell in rows[-1].getElementsByTagName('c'):
+                tag = 't' if cell.getAttribute('t') == 'inlineStr' else 'v'
+                cells.append(''.join([node.data for node in
+                        cell.getElementsByTagName(tag)[0].childNodes]))
+            self.assertEquals([str(value) for value in
+                    self.expectedRow(self._ROWS - 1)], cells)
@@ -0,0 +1,271 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+import random
+
+from unittest import TestCase
+
+from muntjac.ui.tree_table import TreeTable
+from muntjac.ui.vertical_layout import VerticalLayout
+from muntjac.ui.treetable.visible_order import VisibleOrder
+from muntjac.data.util.hierarchical_container import HierarchicalContainer
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+class TestVisibleOrder(TestCase):
+
+    def testSplicing(self):
+        rnd = random.Random(7)
+        expected = range(100)
+        order = VisibleOrder(expected, 8)
+        nextId = 100
+
+        for _ in range(300):
+            index = rnd.randint(0, len(expected))
+            if rnd.random() < 0.5:
+                itemIds = range(nextId, nextId + rnd.randint(0, 20))
+                nextId += len(itemIds)
+                expected[index:index] = itemIds
+                order.insert(index, itemIds)
+            else:
+                count = rnd.randint(0, 20)
+                removed = expected[index:index + count]
+                del expected[index:index + count]
+                self.assertEquals(removed, order.remove(index, count))
+
+            self.assertEquals(len(expected), len(order))
+            self.assertEquals(expected, list(order))
+            for i in range(0, len(expected), 7):
+                self.assertEquals(expected[i], order.get(i))
+                self.assertEquals(i, order.index(expected[i]))
+                self.assertEquals(expected[i:i + 13], order.range(i, 13))
+
+        self.assertRaises(ValueError, order.index, -1)
+        self.assertRaises(IndexError, order.get, len(expected))
+
+
+class TreeTablePreOrder(TestCase):
+
+    def setUp(self):
+        self.container = createTree(3, 4)
+        self.treeTable = TreeTable('tree', self.container)
+        self.strategy = self.treeTable.getContainerStrategy()
+
+
+    def expectedPreOrder(self):
+        itemIds = list()
+
+        def add(itemId):
+            itemIds.append(itemId)
+            if not self.treeTable.isCollapsed(itemId):
+                for childId in self.container.getChildren(itemId) or []:
+                    add(childId)
+
+        for itemId in self.container.rootItemIds():
+            add(itemId)
+        return itemIds
+
+
+    def check(self):
+        expected = self.expectedPreOrder()
+        self.assertEquals(expected, self.treeTable.getItemIds())
+        self.assertEquals(len(expected), len(self.treeTable))
+        for index, itemId in enumerate(expected):
+            self.assertEquals(index, self.treeTable.indexOfId(itemId))
+            self.assertEquals(itemId, self.treeTable.getIdByIndex(index))
+            self.assertEquals(itemId.count('/'),
+                    self.strategy.getDepth(itemId))
+        for index in range(0, len(expected) + 5, 5):
+            self.assertEquals(expected[index:index + 10],
+                    self.treeTable.getRowItemIds(index, 10))
+        if len(expected) > 1:
+            self.assertEquals(expected[1],
+                    self.treeTable.nextItemId(expected[0]))
+            self.assertEquals(expected[-2],
+                    self.treeTable.prevItemId(expected[-1]))
+            self.assertEquals(expected[-1], self.treeTable.lastItemId())
+
+
+    def testToggle(self):
+        rnd = random.Random(3)
+        itemIds = list(self.container.getItemIds())
+        self.check()
+        for _ in range(100):
+            itemId = rnd.choice(itemIds)
+            self.treeTable.setCollapsed(itemId,
+                    not self.treeTable.isCollapsed(itemId))
+            self.check()
+
+
+    def testToggleHiddenItem(self):
+        self.treeTable.setCollapsed('0/1', False)
+        self.check()
+        self.treeTable.setCollapsed('0', False)
+        self.check()
+        self.assertTrue('0/1/2' in self.treeTable.getItemIds())
+
+
+    def testItemSetChange(self):
+        self.treeTable.setCollapsed('0', False)
+        self.treeTable.setCollapsed('0/1', False)
+        self.check()
+        self.container.removeItem('0/1/2')
+        self.container.addItem('0/new')
+        self.container.setParent('0/new', '0')
+        self.check()
+        self.assertEquals(-1, self.treeTable.indexOfId('0/1/2'))
+
+
+    def testComponentParent(self):
+        layout = VerticalLayout()
+        layout.addComponent(self.treeTable)
+        self.assertTrue(self.treeTable.getParent() is layout)
+        self.assertEquals('0', self.treeTable.getParent('0/1'))
+
+
+class PerformanceTestTreeTablePreOrder(PerformanceTestCase):
+
+    _REPEATS = 5
+    _TOGGLES = 20
+    _LEGACY_TOGGLES = 2
+    _PAGE_LENGTH = 50
+    _TOGGLE_FAIL_THRESHOLD = 100
+
+
+    def testWideTree(self):
+        # 100 roots with 1000 children each
+        self.runToggles(createTree(2, 1000, 100), 0, 'wide')
+
+
+    def testDeepTree(self):
+        # binary tree 16 levels deep
+        self.runToggles(createTree(17, 2), 8, 'deep')
+
+
+    def runToggles(self, container, depth, name):
+        treeTable = TreeTable('tree', container)
+        strategy = treeTable.getContainerStrategy()
+        for itemId in container.getItemIds():
+            if container.hasChildren(itemId):
+                strategy.toggleChildVisibility(itemId)
+        size = len(container)
+        self.assertEquals(size, len(treeTable))
+
+        # the nodes toggled are at the given depth in the middle of the
+        # preorder
+        toggled = [itemId for itemId in treeTable.getItemIds()
+                if itemId.count('/') == depth]
+        toggled = toggled[len(toggled) / 2:][:self._TOGGLES]
+
+        legacy = LegacyStrategy(treeTable, strategy._openItems)
+        legacyTimes = list()
+        for itemId in toggled[:self._LEGACY_TOGGLES]:
+            start = 1000 * time.time()
+            toggle(legacy, itemId, self._PAGE_LENGTH)
+            toggle(legacy, itemId, self._PAGE_LENGTH)
+            legacyTimes.append((1000 * time.time()) - start)
+
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            for itemId in toggled:
+                toggle(strategy, itemId, self._PAGE_LENGTH)
+                toggle(strategy, itemId, self._PAGE_LENGTH)
+            times.append((1000 * time.time()) - start)
+            self.assertEquals(size, len(treeTable))
+
+        print ('Legacy %s tree collapse and expand timings (ms) for %d items: '
+                '%s' % (name, size, legacyTimes))
+        self.checkMedian(size, times, '%d %s tree collapses and expands'
+                % (len(toggled), name), self._TOGGLE_FAIL_THRESHOLD)
+
+
+def toggle(strategy, itemId, pageLength):
+    """Toggles the item and looks up what is needed to paint the page of
+    rows starting from it."""
+    strategy.toggleChildVisibility(itemId)
+    strategy.size()
+    index = strategy.indexOfId(itemId)
+    for i in range(index, min(index + pageLength, strategy.size())):
+        strategy.getDepth(strategy.getIdByIndex(i))
+
+
+class LegacyStrategy(object):
+    """Rebuilds the whole preorder after each toggle and walks to the root
+    for each depth, as done prior to the incremental preorder."""
+
+    def __init__(self, treetable, openItems):
+        self._treetable = treetable
+        self._openItems = set(openItems)
+        self._preOrder = None
+
+
+    def toggleChildVisibility(self, itemId):
+        if itemId in self._openItems:
+            self._openItems.remove(itemId)
+        else:
+            self._openItems.add(itemId)
+        self._preOrder = None
+
+
+    def getPreOrder(self):
+        if self._preOrder is None:
+            self._preOrder = list()
+            dataSource = self._treetable.getContainerDataSource()
+            for idd in dataSource.rootItemIds():
+                self._preOrder.append(idd)
+                self.addVisibleChildTree(idd)
+        return self._preOrder
+
+
+    def addVisibleChildTree(self, idd):
+        if idd in self._openItems:
+            dataSource = self._treetable.getContainerDataSource()
+            children = dataSource.getChildren(idd)
+            if children is not None:
+                for childId in children:
+                    self._preOrder.append(childId)
+                    self.addVisibleChildTree(childId)
+
+
+    def size(self):
+        return len(self.getPreOrder())
+
+
+    def indexOfId(self, itemId):
+        return self.getPreOrder().index(itemId)
+
+
+    def getIdByIndex(self, index):
+        return self.getPreOrder()[index]
+
+
+    def getDepth(self, itemId):
+        depth = 0
+        hierarchicalContainer = self._treetable.getContainerDataSource()
+        while not hierarchicalContainer.isRoot(itemId):
+            depth += 1
+            itemId = hierarchicalContainer.getParent(itemId)
+        return depth
+
+
+def createTree(levels, children, roots=None):
+    """Creates a container of a tree with the given number of levels, the
+    id of an item is the path of child indexes from the root."""
+    container = HierarchicalContainer()
+    parents = [None]
+    for level in range(levels):
+        count = children if roots is None or level > 0 else roots
+        nextParents = list()
+        for parentId in parents:
+            for i in range(1 if parentId is None and roots is None
+                    else count):
+                itemId = str(i) if parentId is None else '%s/%d' % (parentId, i)
+                container.addItem(itemId)
+                if parentId is not None:
+                    container.setParent(itemId, parentId)
+                nextParents.append(itemId)
+        parents = nextParents
+    return container
@@ -0,0 +1,284 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import re
+import json
+import time
+
+from unittest import TestCase
+
+from StringIO import StringIO
+
+from muntjac.application import Application
+from muntjac.ui.label import Label
+from muntjac.ui.text_field import TextField
+from muntjac.ui.grid_layout import GridLayout, OverlapsException
+
+from muntjac.terminal.gwt.server.json_paint_target import JsonPaintTarget
+
+from muntjac.terminal.gwt.server.component_size_validator import \
+    ComponentSizeValidator
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.test.server.performance import sized, isLarge
+
+
+class LegacyGridLayout(GridLayout):
+    """Compares areas with all the existing areas, as was done prior to
+    the cell index."""
+
+    def checkExistingOverlaps(self, area):
+        for existingArea in self._areas:
+            if existingArea.overlaps(area):
+                raise OverlapsException(existingArea)
+
+
+    def getComponent(self, x, y):
+        for area in self._areas:
+            if (area.getColumn1() <= x and x <= area.getColumn2()
+                    and area.getRow1() <= y and y <= area.getRow2()):
+                return area.getComponent()
+        return None
+
+
+class TestGridLayoutCellIndex(TestCase):
+
+    def setUp(self):
+        self.grid = GridLayout(4, 3)
+        self.a = Label('A')
+        self.b = Label('B')
+        self.c = Label('C')
+        self.d = Label('D')
+        self.grid.addComponent(self.d, 0, 2, 2, 2)
+        self.grid.addComponent(self.b, 3, 0, 3, 1)
+        self.grid.addComponent(self.a, 0, 0, 1, 0)
+        self.grid.addComponent(self.c, 1, 1)
+
+
+    def layout(self, grid):
+        """Returns the components of the cells row by row."""
+        return [[grid.getComponent(x, y) for x in range(grid.getColumns())]
+                for y in range(grid.getRows())]
+
+
+    def checkIndex(self, grid):
+        cells = dict()
+        for area in grid._areas:
+            for x in range(area.getColumn1(), area.getColumn2() + 1):
+                for y in range(area.getRow1(), area.getRow2() + 1):
+                    cells[(x, y)] = area
+        self.assertEquals(cells, grid._cells)
+
+        # top-down, left-right order
+        self.assertEquals(sorted(grid._areas,
+                key=lambda area: (area.getRow1(), area.getColumn1())),
+                grid._areas)
+        self.assertEquals([area.getComponent() for area in grid._areas],
+                list(grid.getComponentIterator()))
+        for area in grid._areas:
+            self.assertTrue(grid.getComponentArea(area.getComponent())
+                    is area)
+
+
+    def testGetComponent(self):
+        a, b, c, d = self.a, self.b, self.c, self.d
+        self.assertEquals([[a, a, None, b], [None, c, None, b],
+                [d, d, d, None]], self.layout(self.grid))
+        self.assertEquals(None, self.grid.getComponent(4, 0))
+        self.assertEquals(None, self.grid.getComponent(0, -1))
+        self.checkIndex(self.grid)
+
+
+    def testOverlaps(self):
+        for area in [(2, 0, 3, 0), (1, 1, 1, 1), (2, 1, 2, 2),
+                (0, 0, 3, 2)]:
+            try:
+                self.grid.addComponent(Label('X'), *area)
+                self.fail('%s does not overlap' % (area,))
+            except OverlapsException, e:
+                self.assertTrue(e.getArea() in self.grid._areas)
+
+        self.grid.addComponent(Label('X'), 2, 0, 2, 1)
+        self.assertEquals(5, self.grid.getComponentCount())
+        self.checkIndex(self.grid)
+
+
+    def testCursor(self):
+        grid = GridLayout(3, 1)
+        grid.addComponent(Label('X'), 1, 0)
+        labels = [Label(str(i)) for i in range(4)]
+        for label in labels:
+            grid.addComponent(label)
+        self.assertEquals([labels[0], 1, labels[1]],
+                [grid.getComponent(x, 0) if x != 1 else 1
+                        for x in range(3)])
+        self.assertEquals(labels[2:], [grid.getComponent(x, 1)
+                for x in range(2)])
+        self.checkIndex(grid)
+
+
+    def testRemoveComponent(self):
+        a, b, c, d = self.a, self.b, self.c, self.d
+        # only the upper left corner of an area removes it
+        self.grid.removeComponent(1, 0)
+        self.grid.removeComponent(3, 1)
+        self.assertEquals(4, self.grid.getComponentCount())
+
+        self.grid.removeComponent(3, 0)
+        self.grid.removeComponent(c)
+        self.assertEquals([[a, a, None, None], [None, None, None, None],
+                [d, d, d, None]], self.layout(self.grid))
+        self.checkIndex(self.grid)
+
+        self.grid.addComponent(b, 1, 1, 3, 1)
+        self.checkIndex(self.grid)
+
+        self.grid.removeAllComponents()
+        self.assertEquals(dict(), self.grid._cells)
+        self.checkIndex(self.grid)
+
+
+    def testReplaceComponent(self):
+        a, b, c, d = self.a, self.b, self.c, self.d
+        self.grid.replaceComponent(a, d)
+        self.assertEquals([[d, d, None, b], [None, c, None, b],
+                [a, a, a, None]], self.layout(self.grid))
+        self.checkIndex(self.grid)
+
+        self.grid.removeComponent(d)
+        self.grid.replaceComponent(c, d)
+        self.assertEquals([[None, None, None, b], [None, d, None, b],
+                [a, a, a, None]], self.layout(self.grid))
+        self.checkIndex(self.grid)
+
+
+    def testInsertRow(self):
+        a, b, c, d = self.a, self.b, self.c, self.d
+        self.grid.insertRow(1)
+        self.assertEquals([[a, a, None, b], [None, None, None, b],
+                [None, c, None, b], [d, d, d, None]], self.layout(self.grid))
+        self.checkIndex(self.grid)
+
+        self.grid.insertRow(4)
+        self.assertEquals(5, self.grid.getRows())
+        self.checkIndex(self.grid)
+
+
+    def testRemoveRow(self):
+        a, b, d = self.a, self.b, self.d
+        self.grid.removeRow(1)
+        self.assertEquals([[a, a, None, b], [d, d, d, None]],
+                self.layout(self.grid))
+        self.checkIndex(self.grid)
+
+        self.grid.removeRow(0)
+        self.assertEquals([[d, d, d, None]], self.layout(self.grid))
+        self.assertEquals(1, self.grid.getComponentCount())
+        self.checkIndex(self.grid)
+
+
+    def testPaint(self):
+        cells = paintedCells(self.grid)
+        # spanned cells are not painted as empty cells
+        self.assertEquals([
+                ({'x': 0, 'y': 0, 'w': 2}, 'A'),
+                ({'x': 2, 'y': 0}, None),
+                ({'x': 3, 'y': 0, 'h': 2}, 'B'),
+                ({'x': 0, 'y': 1}, None),
+                ({'x': 1, 'y': 1}, 'C'),
+                ({'x': 2, 'y': 1}, None),
+                ({'x': 0, 'y': 2, 'w': 3}, 'D'),
+                ({'x': 3, 'y': 2}, None)], cells)
+
+
+    def testParentCanDefineSize(self):
+        grid = GridLayout(2, 2)
+        grid.setSizeUndefined()
+        relative = Label('relative')
+        relative.setSizeFull()
+        fixed = Label('fixed')
+        fixed.setWidth('100px')
+        fixed.setHeight('100px')
+        grid.addComponent(relative, 1, 0)
+        self.assertFalse(ComponentSizeValidator.parentCanDefineWidth(
+                relative))
+        self.assertFalse(ComponentSizeValidator.parentCanDefineHeight(
+                relative))
+
+        # the column and the row of the component are looked at
+        grid.addComponent(fixed, 1, 1)
+        self.assertTrue(ComponentSizeValidator.parentCanDefineWidth(
+                relative))
+        self.assertFalse(ComponentSizeValidator.parentCanDefineHeight(
+                relative))
+        grid.removeComponent(fixed)
+        grid.addComponent(fixed, 0, 0)
+        self.assertFalse(ComponentSizeValidator.parentCanDefineWidth(
+                relative))
+        self.assertTrue(ComponentSizeValidator.parentCanDefineHeight(
+                relative))
+
+
+class PerformanceTestGridLayoutCellIndex(TestCase):
+
+    _COLUMNS = 100
+    _ROWS = sized(10, 50)
+    _BUILD_FAIL_THRESHOLD = 1000
+    _PAINT_FAIL_THRESHOLD = 1000
+
+
+    def testBuildAndPaint(self):
+        # the legacy layout is slow to build, it is only compared with
+        # the full size grid
+        layouts = [LegacyGridLayout, GridLayout] if isLarge() else [GridLayout]
+        for cls in layouts:
+            start = 1000 * time.time()
+            grid = cls(self._COLUMNS, 1)
+            for _ in range(self._COLUMNS * self._ROWS):
+                grid.addComponent(TextField())
+            for x in range(self._COLUMNS):
+                for y in range(self._ROWS):
+                    grid.getComponent(x, y)
+            built = (1000 * time.time()) - start
+
+            start = 1000 * time.time()
+            paintedCells(grid)
+            painted = (1000 * time.time()) - start
+
+            self.assertEquals(self._ROWS, grid.getRows())
+            if cls is LegacyGridLayout:
+                print ('Legacy build and lookup timings (ms) for %dx%d '
+                        'cells: %s' % (self._COLUMNS, self._ROWS, [built]))
+                continue
+
+            print ('Build and lookup timings (ms) for %dx%d cells: %s'
+                    % (self._COLUMNS, self._ROWS, [built]))
+            print ('Paint timings (ms) for %dx%d cells: %s'
+                    % (self._COLUMNS, self._ROWS, [painted]))
+            self.assertTrue(built <= self._BUILD_FAIL_THRESHOLD,
+                'Building too slow, time %.2fms for %d cells' %
+                (built, self._COLUMNS * self._ROWS))
+            self.assertTrue(painted <= self._PAINT_FAIL_THRESHOLD,
+                'Painting too slow, time %.2fms for %d cells' %
+                (painted, self._COLUMNS * self._ROWS))
+
+
+def paintedCells(grid):
+    """Paints the given grid and returns the attributes of the painted
+    cells with the text of their label, if any."""
+    out = StringIO()
+    target = JsonPaintTarget(AbstractCommunicationManager(Application()),
+            out, False)
+    grid.paint(target)
+    target.close()
+
+    cells = list()
+    for attributes, text in re.findall(
+            r'\["gc",(\{[^}]*\})(?:,\["\d+",\{[^}]*\},"([^"]*)"\])?\]',
+            out.getvalue()):
+        attributes = dict((str(key), value)
+                for key, value in json.loads(attributes).items())
+        cells.append((attributes, text or None))
+    return cells
@@ -5,6 +5,8 @@ from component_attach_detach_listener_test \
     import ComponentAttachDetachListenerTest
 
 from combo_box_value_change import TestComboBoxValueChange
+from grid_layout_cell_index import TestGridLayoutCellIndex, \
+    PerformanceTestGridLayoutCellIndex
 from grid_layout_last_row_removal import TestGridLayoutLastRowRemoval
 from text_field_value_change import TestTextFieldValueChange
 from window import TestWindow
@@ -16,6 +18,8 @@ def suite():
 
     suite.addTest( unittest.makeSuite(ComponentAttachDetachListenerTest) )
     suite.addTest( unittest.makeSuite(TestComboBoxValueChange) )
+    suite.addTest( unittest.makeSuite(TestGridLayoutCellIndex) )
+    suite.addTest( unittest.makeSuite(PerformanceTestGridLayoutCellIndex) )
     suite.addTest( unittest.makeSuite(TestGridLayoutLastRowRemoval) )
     suite.addTest( unittest.makeSuite(TestTextFieldValueChange) )
     suite.addTest( unittest.makeSuite(TestWindow) )
@@ -8,12 +8,30 @@ from util.container_hierarchical_wrapper_test \
 from util.indexed_container_performance_test \
     import PerformanceTestIndexedContainer
 
+from util.columnar_indexed_container_performance_test \
+    import PerformanceTestColumnarIndexedContainer
+
 from util.container_sorting_test import TestContainerSorting
-from util.hierarchical_container_test import TestHierarchicalContainer
+from util.hierarchical_container_test import TestHierarchicalContainer, \
+    PerformanceTestHierarchicalContainer
 from util.indexed_container_test import TestIndexedContainer
 from util.object_property_test import ObjectPropertyTest
+from util.list_set_test import TestListSet
+from util.columnar_indexed_container_test \
+    import TestColumnarIndexedContainer
+
+from util.filter_evaluator_test import TestPropertyIndex, \
+    TestFilterEvaluator, PerformanceTestFilterEvaluator
+
+from util.sql_container_test import TestSQLContainer, TestSQLGenerator, \
+    PerformanceTestSQLContainer
+
+from util.key_sorter_test import TestKeySorter, PerformanceTestKeySorter
 
 from util.filter.simple_string_filter_test import SimpleStringFilterTest
+from util.filter.compare_filter_test import CompareFilterTest
+from util.filter.like_filter_test import LikeFilterTest
+from util.filter.and_or_filter_test import AndOrFilterTest
 
 
 def suite():
@@ -24,10 +42,25 @@ def suite():
     suite.addTest( unittest.makeSuite(PerformanceTestIndexedContainer) )
     suite.addTest( unittest.makeSuite(TestContainerSorting) )
     suite.addTest( unittest.makeSuite(TestHierarchicalContainer) )
+    suite.addTest( unittest.makeSuite(PerformanceTestHierarchicalContainer) )
     suite.addTest( unittest.makeSuite(TestIndexedContainer) )
     suite.addTest( unittest.makeSuite(ObjectPropertyTest) )
+    suite.addTest( unittest.makeSuite(TestListSet) )
+    suite.addTest( unittest.makeSuite(TestColumnarIndexedContainer) )
+    suite.addTest( unittest.makeSuite(PerformanceTestColumnarIndexedContainer) )
+    suite.addTest( unittest.makeSuite(TestPropertyIndex) )
+    suite.addTest( unittest.makeSuite(TestFilterEvaluator) )
+    suite.addTest( unittest.makeSuite(PerformanceTestFilterEvaluator) )
+    suite.addTest( unittest.makeSuite(TestSQLContainer) )
+    suite.addTest( unittest.makeSuite(TestSQLGenerator) )
+    suite.addTest( unittest.makeSuite(PerformanceTestSQLContainer) )
+    suite.addTest( unittest.makeSuite(TestKeySorter) )
+    suite.addTest( unittest.makeSuite(PerformanceTestKeySorter) )
 
     suite.addTest( unittest.makeSuite(SimpleStringFilterTest) )
+    suite.addTest( unittest.makeSuite(CompareFilterTest) )
+    suite.addTest( unittest.makeSuite(LikeFilterTest) )
+    suite.addTest( unittest.makeSuite(AndOrFilterTest) )
 
     return suite
 
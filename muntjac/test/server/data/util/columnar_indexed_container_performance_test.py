@@ -0,0 +1,93 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import sys
+import time
+
+from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.filter.simple_string_filter import SimpleStringFilter
+
+from muntjac.data.util.columnar_indexed_container import \
+    ColumnarIndexedContainer
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+class PerformanceTestColumnarIndexedContainer(PerformanceTestCase):
+
+    _REPEATS = 3
+    _ITEMS = 20000
+    _PROPERTIES = 20
+    _READ_FAIL_THRESHOLD = 5000
+    _SORT_FAIL_THRESHOLD = 500
+    _FILTER_FAIL_THRESHOLD = 500
+
+
+    def testColumnarIndexedContainerPerformance(self):
+        legacy = self.createContainer(IndexedContainer)
+        c = self.createContainer(ColumnarIndexedContainer)
+
+        print ('Storage size (bytes) for %d items with %d properties: '
+                'IndexedContainer %d, ColumnarIndexedContainer %d' %
+                (self._ITEMS, self._PROPERTIES,
+                 sum([sys.getsizeof(legacy._items)] +
+                        [sys.getsizeof(t) for t in legacy._items.values()]),
+                 sum([sys.getsizeof(c._rows), sys.getsizeof(c._rowIds)] +
+                        [sys.getsizeof(col) for col in c._columns.values()])))
+
+        for container, name in [(legacy, 'IndexedContainer'),
+                (c, 'ColumnarIndexedContainer')]:
+            times = self.timeRepeats(lambda: self.readAll(container))
+            self.checkMedian(self._ITEMS, times, name + ' read',
+                    self._READ_FAIL_THRESHOLD)
+
+            times = self.timeRepeats(lambda: container.sort(['p1', 'p0'],
+                    [False, True]))
+            if container is c:
+                self.checkMedian(self._ITEMS, times, name + '.sort()',
+                        self._SORT_FAIL_THRESHOLD)
+            else:
+                print '%s.sort() timings (ms): %s' % (name, times)
+
+            def applyFilter():
+                container.removeAllContainerFilters()
+                container.addContainerFilter(SimpleStringFilter('p2', '7',
+                        False, False))
+            times = self.timeRepeats(applyFilter)
+            if container is c:
+                self.checkMedian(self._ITEMS, times, name + ' filtering',
+                        self._FILTER_FAIL_THRESHOLD)
+            else:
+                print '%s filtering timings (ms): %s' % (name, times)
+
+        self.assertEquals(legacy.getItemIds(), c.getItemIds())
+
+
+    def createContainer(self, cls):
+        container = cls()
+        propertyIds = ['p%d' % i for i in range(self._PROPERTIES)]
+        for propertyId in propertyIds:
+            container.addContainerProperty(propertyId, int, None)
+        for itemId in range(self._ITEMS):
+            container.addItem(itemId)
+            for i, propertyId in enumerate(propertyIds):
+                container.setItemValue(itemId, propertyId,
+                        (itemId * (i + 7)) % 1000)
+        return container
+
+
+    def readAll(self, container):
+        propertyIds = container.getContainerPropertyIds()
+        for itemId in container.getItemIds():
+            item = container.getItem(itemId)
+            for propertyId in propertyIds:
+                item.getItemProperty(propertyId).getValue()
+
+
+    def timeRepeats(self, method):
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            method()
+            times.append((1000 * time.time()) - start)
+        return times
@@ -0,0 +1,162 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from muntjac.test.server.data.util.abstract_container_test \
+    import ItemSetChangeCounter
+
+from muntjac.test.server.data.util.abstract_in_memory_container_test \
+    import AbstractInMemoryContainerTest
+
+from muntjac.data.property import IValueChangeListener
+from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.filter.simple_string_filter import SimpleStringFilter
+
+from muntjac.data.util.columnar_indexed_container import \
+    ColumnarIndexedContainer
+
+
+class TestColumnarIndexedContainer(AbstractInMemoryContainerTest):
+
+    def testBasicOperations(self):
+        c = ColumnarIndexedContainer()
+        self._testBasicContainerOperations(c)
+
+
+    def testFiltering(self):
+        c = ColumnarIndexedContainer()
+        self._testContainerFiltering(c)
+
+
+    def testSorting(self):
+        c = ColumnarIndexedContainer()
+        self._testContainerSorting(c)
+
+
+    def testSortingAndFiltering(self):
+        c = ColumnarIndexedContainer()
+        self._testContainerSortingAndFiltering(c)
+
+
+    def testContainerOrdered(self):
+        c = ColumnarIndexedContainer()
+        self._testContainerOrdered(c)
+
+
+    def testContainerIndexed(self):
+        c = ColumnarIndexedContainer()
+        self._testContainerIndexed(c, self.sampleData[2], 2, True,
+                'newItemId', True)
+
+
+    def testRemoveItemKeepsColumnsCompact(self):
+        c = self.createContainer(5)
+        self.assertTrue(c.removeItem(1))
+
+        self.assertEquals(4, len(c.getColumn('name')))
+        self.assertEquals([0, 2, 3, 4], c.getItemIds())
+        for itemId in c.getItemIds():
+            self.assertEquals('item%d' % itemId,
+                    c.getContainerProperty(itemId, 'name').getValue())
+        self.assertEquals(None, c.getItem(1))
+
+        c.removeAllItems()
+        self.assertEquals([], c.getColumn('name'))
+
+
+    def testProperties(self):
+        c = self.createContainer(3)
+        c.addContainerProperty('size', int, 7)
+        self.assertEquals(7, c.getContainerProperty(2, 'size').getValue())
+
+        c.addItem('new')
+        self.assertEquals(7, c.getContainerProperty('new', 'size').getValue())
+        self.assertEquals(None,
+                c.getContainerProperty('new', 'name').getValue())
+
+        c.removeContainerProperty('name')
+        self.assertEquals(None, c.getColumn('name'))
+        self.assertEquals(['size'], c.getItem(0).getItemPropertyIds())
+
+
+    def testValueChangeListeners(self):
+        c = self.createContainer(3)
+        listener = ValueChangeCounter()
+        c.addListener(listener, IValueChangeListener)
+        single = ValueChangeCounter()
+        c.getContainerProperty(1, 'name').addListener(single,
+                IValueChangeListener)
+
+        c.getItem(1).getItemProperty('name').setValue('changed')
+        c.getItem(2).getItemProperty('name').setValue('changed')
+
+        self.assertEquals(2, listener.count)
+        self.assertEquals(1, single.count)
+        self.assertEquals('changed', c.getColumn('name')[1])
+
+
+    def testItemSetChangeListeners(self):
+        c = self.createContainer(3)
+        counter = ItemSetChangeCounter()
+        c.addListener(counter)
+
+        c.addItem('new')
+        counter.assertOnce()
+        c.removeItem(0)
+        counter.assertOnce()
+        c.sort(['name'], [False])
+        counter.assertOnce()
+
+
+    def testSortSameAsIndexedContainer(self):
+        values = [('b', 2), (None, 1), ('a', 3), ('b', 1), ('a', None)]
+        for propertyIds, ascending in [(['name'], [True]),
+                (['name', 'size'], [False, True]),
+                (['size', 'name'], [True, False])]:
+            containers = [IndexedContainer(), ColumnarIndexedContainer()]
+            for c in containers:
+                c.addContainerProperty('name', str, None)
+                c.addContainerProperty('size', int, None)
+                for i, (name, size) in enumerate(values):
+                    item = c.addItem(i)
+                    item.getItemProperty('name').setValue(name)
+                    item.getItemProperty('size').setValue(size)
+                c.addContainerFilter(SimpleStringFilter('name', 'b', False,
+                        False))
+                c.sort(propertyIds, ascending)
+                c.removeAllContainerFilters()
+
+            self.assertEquals(containers[0].getItemIds(),
+                    containers[1].getItemIds())
+
+
+    def testPickle(self):
+        c = self.createContainer(3)
+        prop = c.getContainerProperty(2, 'name')
+        for protocol in [0, pickle.HIGHEST_PROTOCOL]:
+            copy = pickle.loads(pickle.dumps(prop, protocol))
+            self.assertEquals('item2', copy.getValue())
+            self.assertEquals(['item0', 'item1', 'item2'],
+                    copy.getHost().getColumn('name'))
+
+
+    def createContainer(self, items):
+        c = ColumnarIndexedContainer()
+        c.addContainerProperty('name', str, None)
+        for i in range(items):
+            c.addItem(i).getItemProperty('name').setValue('item%d' % i)
+        return c
+
+
+class ValueChangeCounter(IValueChangeListener):
+
+    def __init__(self):
+        self.count = 0
+
+
+    def valueChange(self, event):
+        self.count += 1
@@ -0,0 +1,66 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+from muntjac.test.server.data.util.filter.abstract_filter_test \
+    import AbstractFilterTest, TestItem
+
+from muntjac.data.util.filter.compare import Equal
+from muntjac.data.util.filter.and_ import And
+from muntjac.data.util.filter.or_ import Or
+from muntjac.data.util.filter.not_ import Not
+
+
+class AndOrFilterTest(AbstractFilterTest):
+
+    def setUp(self):
+        super(AndOrFilterTest, self).setUp()
+        self.item1 = TestItem('a', 'b')
+        self.item2 = TestItem('a', 'c')
+        self.item3 = TestItem('b', 'b')
+        self.a = Equal(self.PROPERTY1, 'a')
+        self.b = Equal(self.PROPERTY2, 'b')
+
+
+    def testNoFilters(self):
+        self.assertTrue(And().passesFilter(None, self.item1))
+        self.assertFalse(Or().passesFilter(None, self.item1))
+
+
+    def testAnd(self):
+        fltr = And(self.a, self.b)
+        self.assertTrue(fltr.passesFilter(None, self.item1))
+        self.assertFalse(fltr.passesFilter(None, self.item2))
+        self.assertFalse(fltr.passesFilter(None, self.item3))
+
+
+    def testOr(self):
+        fltr = Or(self.a, self.b)
+        self.assertTrue(fltr.passesFilter(None, self.item1))
+        self.assertTrue(fltr.passesFilter(None, self.item2))
+        self.assertTrue(fltr.passesFilter(None, self.item3))
+        self.assertFalse(fltr.passesFilter(None, TestItem('b', 'c')))
+
+
+    def testNot(self):
+        fltr = Not(And(self.a, self.b))
+        self.assertFalse(fltr.passesFilter(None, self.item1))
+        self.assertTrue(fltr.passesFilter(None, self.item2))
+        self.assertEquals(fltr, Not(And(self.a, self.b)))
+        self.assertNotEquals(fltr, Not(Or(self.a, self.b)))
+
+
+    def testAppliesToProperty(self):
+        fltr = Or(self.a, Not(self.b))
+        self.assertTrue(fltr.appliesToProperty(self.PROPERTY1))
+        self.assertTrue(fltr.appliesToProperty(self.PROPERTY2))
+        self.assertFalse(And(self.a).appliesToProperty(self.PROPERTY2))
+        self.assertFalse(And().appliesToProperty(self.PROPERTY1))
+
+
+    def testEqualsHashCode(self):
+        self.assertEquals(And(self.a, self.b), And(self.a, self.b))
+        self.assertEquals(hash(And(self.a, self.b)),
+                hash(And(self.a, self.b)))
+        self.assertNotEquals(And(self.a, self.b), Or(self.a, self.b))
+        self.assertNotEquals(And(self.a, self.b), And(self.b, self.a))
+        self.assertNotEquals(And(self.a), And(self.a, self.b))
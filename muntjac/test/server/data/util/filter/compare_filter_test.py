@@ -0,0 +1,121 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+from muntjac.test.server.data.util.filter.abstract_filter_test \
+    import AbstractFilterTest, TestItem
+
+from muntjac.data.util.filter.compare import \
+    Compare, Equal, Greater, Less, GreaterOrEqual, LessOrEqual
+
+from muntjac.data.util.filter.between import Between
+from muntjac.data.util.filter.in_ import In
+from muntjac.data.util.filter.is_null import IsNull
+
+
+class CompareFilterTest(AbstractFilterTest):
+
+    def setUp(self):
+        super(CompareFilterTest, self).setUp()
+        self.itemNull = TestItem(None, None)
+        self.itemEmpty = TestItem('', None)
+        self.itemA = TestItem('a', 1)
+        self.itemB = TestItem('b', 2)
+        self.itemC = TestItem('c', 3)
+
+
+    def testCompareString(self):
+        equalB = Equal(self.PROPERTY1, 'b')
+        self.assertFalse(equalB.passesFilter(None, self.itemEmpty))
+        self.assertFalse(equalB.passesFilter(None, self.itemA))
+        self.assertTrue(equalB.passesFilter(None, self.itemB))
+        self.assertFalse(equalB.passesFilter(None, self.itemC))
+
+        greaterB = Greater(self.PROPERTY1, 'b')
+        self.assertFalse(greaterB.passesFilter(None, self.itemA))
+        self.assertFalse(greaterB.passesFilter(None, self.itemB))
+        self.assertTrue(greaterB.passesFilter(None, self.itemC))
+
+        lessB = Less(self.PROPERTY1, 'b')
+        self.assertTrue(lessB.passesFilter(None, self.itemEmpty))
+        self.assertTrue(lessB.passesFilter(None, self.itemA))
+        self.assertFalse(lessB.passesFilter(None, self.itemB))
+
+        greaterEqualB = GreaterOrEqual(self.PROPERTY1, 'b')
+        self.assertFalse(greaterEqualB.passesFilter(None, self.itemA))
+        self.assertTrue(greaterEqualB.passesFilter(None, self.itemB))
+        self.assertTrue(greaterEqualB.passesFilter(None, self.itemC))
+
+        lessEqualB = LessOrEqual(self.PROPERTY1, 'b')
+        self.assertTrue(lessEqualB.passesFilter(None, self.itemA))
+        self.assertTrue(lessEqualB.passesFilter(None, self.itemB))
+        self.assertFalse(lessEqualB.passesFilter(None, self.itemC))
+
+
+    def testCompareNull(self):
+        equalNull = Equal(self.PROPERTY1, None)
+        self.assertTrue(equalNull.passesFilter(None, self.itemNull))
+        self.assertFalse(equalNull.passesFilter(None, self.itemEmpty))
+        self.assertFalse(equalNull.passesFilter(None, self.itemA))
+
+        # None never passes the ordering comparisons
+        for cls in [Greater, Less, GreaterOrEqual, LessOrEqual]:
+            self.assertFalse(cls(self.PROPERTY1, 'b').passesFilter(None,
+                    self.itemNull))
+            self.assertFalse(cls(self.PROPERTY1, None).passesFilter(None,
+                    self.itemA))
+
+
+    def testCompareAppliesToProperty(self):
+        fltr = Equal(self.PROPERTY1, 'a')
+        self.assertTrue(fltr.appliesToProperty(self.PROPERTY1))
+        self.assertFalse(fltr.appliesToProperty(self.PROPERTY2))
+
+
+    def testCompareEqualsHashCode(self):
+        equal1 = Equal(self.PROPERTY1, 'a')
+        equal1b = Equal(self.PROPERTY1, 'a')
+        equal2 = Equal(self.PROPERTY1, 'b')
+        greater1 = Greater(self.PROPERTY1, 'a')
+        other1 = Equal(self.PROPERTY2, 'a')
+
+        self.assertEquals(equal1, equal1b)
+        self.assertEquals(hash(equal1), hash(equal1b))
+        self.assertNotEquals(equal1, equal2)
+        self.assertNotEquals(equal1, greater1)
+        self.assertNotEquals(equal1, other1)
+        self.assertEquals(Compare.EQUAL, equal1.getOperation())
+        self.assertEquals('a', equal1.getValue())
+
+
+    def testBetween(self):
+        fltr = Between(self.PROPERTY2, 2, 3)
+        self.assertFalse(fltr.passesFilter(None, self.itemNull))
+        self.assertFalse(fltr.passesFilter(None, self.itemA))
+        self.assertTrue(fltr.passesFilter(None, self.itemB))
+        self.assertTrue(fltr.passesFilter(None, self.itemC))
+
+        self.assertEquals(fltr, Between(self.PROPERTY2, 2, 3))
+        self.assertNotEquals(fltr, Between(self.PROPERTY2, 1, 3))
+
+
+    def testIn(self):
+        fltr = In(self.PROPERTY1, ['a', 'c'])
+        self.assertFalse(fltr.passesFilter(None, self.itemNull))
+        self.assertTrue(fltr.passesFilter(None, self.itemA))
+        self.assertFalse(fltr.passesFilter(None, self.itemB))
+        self.assertTrue(fltr.passesFilter(None, self.itemC))
+        self.assertFalse(fltr.passesValue([]))
+
+        self.assertEquals(fltr, In(self.PROPERTY1, ['c', 'a']))
+        self.assertEquals(hash(fltr), hash(In(self.PROPERTY1, ['c', 'a'])))
+        self.assertNotEquals(fltr, In(self.PROPERTY1, ['a']))
+
+
+    def testIsNull(self):
+        fltr = IsNull(self.PROPERTY1)
+        self.assertTrue(fltr.passesFilter(None, self.itemNull))
+        self.assertFalse(fltr.passesFilter(None, self.itemEmpty))
+        self.assertFalse(fltr.passesFilter(None, self.itemA))
+
+        self.assertEquals(fltr, IsNull(self.PROPERTY1))
+        self.assertNotEquals(fltr, IsNull(self.PROPERTY2))
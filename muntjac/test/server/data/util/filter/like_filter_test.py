@@ -0,0 +1,73 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+from muntjac.test.server.data.util.filter.abstract_filter_test \
+    import AbstractFilterTest, TestItem
+
+from muntjac.data.util.filter.like import Like
+
+
+class LikeFilterTest(AbstractFilterTest):
+
+    def setUp(self):
+        super(LikeFilterTest, self).setUp()
+        self.item1 = TestItem('a1', 42)
+        self.item2 = TestItem('a2', 1042)
+        self.item3 = TestItem('b2', None)
+
+
+    def testLikeExactMatch(self):
+        fltr = Like(self.PROPERTY1, 'a1')
+        self.assertTrue(fltr.passesFilter(None, self.item1))
+        self.assertFalse(fltr.passesFilter(None, self.item2))
+        self.assertFalse(fltr.passesFilter(None, self.item3))
+
+
+    def testLikeWildcards(self):
+        self.assertTrue(Like(self.PROPERTY1, 'a%').passesFilter(None,
+                self.item2))
+        self.assertFalse(Like(self.PROPERTY1, 'a%').passesFilter(None,
+                self.item3))
+        self.assertTrue(Like(self.PROPERTY1, '%2').passesFilter(None,
+                self.item3))
+        self.assertTrue(Like(self.PROPERTY1, '_2').passesFilter(None,
+                self.item2))
+        self.assertFalse(Like(self.PROPERTY1, '_').passesFilter(None,
+                self.item2))
+        self.assertTrue(Like(self.PROPERTY1, '%').passesFilter(None,
+                self.item1))
+
+
+    def testLikeSpecialCharacters(self):
+        item = TestItem('a.b*c', None)
+        self.assertTrue(Like(self.PROPERTY1, 'a.b*%').passesFilter(None,
+                item))
+        self.assertFalse(Like(self.PROPERTY1, 'a.b*').passesFilter(None,
+                item))
+        self.assertFalse(Like(self.PROPERTY1, 'axb%').passesFilter(None,
+                item))
+
+
+    def testLikeCaseSensitivity(self):
+        self.assertFalse(Like(self.PROPERTY1, 'A%').passesFilter(None,
+                self.item1))
+        self.assertTrue(Like(self.PROPERTY1, 'A%', False).passesFilter(None,
+                self.item1))
+
+
+    def testLikeNonString(self):
+        self.assertTrue(Like(self.PROPERTY2, '%42').passesFilter(None,
+                self.item2))
+        self.assertFalse(Like(self.PROPERTY2, '%').passesFilter(None,
+                self.item3))
+
+
+    def testLikeEqualsHashCode(self):
+        self.assertEquals(Like(self.PROPERTY1, 'a%'),
+                Like(self.PROPERTY1, 'a%'))
+        self.assertEquals(hash(Like(self.PROPERTY1, 'a%')),
+                hash(Like(self.PROPERTY1, 'a%')))
+        self.assertNotEquals(Like(self.PROPERTY1, 'a%'),
+                Like(self.PROPERTY1, 'a%', False))
+        self.assertNotEquals(Like(self.PROPERTY1, 'a%'),
+                Like(self.PROPERTY2, 'a%'))
@@ -0,0 +1,244 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+import random
+
+from unittest import TestCase
+
+from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.hierarchical_container import HierarchicalContainer
+from muntjac.data.util.property_index import PropertyIndex
+
+from muntjac.data.util.columnar_indexed_container import \
+    ColumnarIndexedContainer
+
+from muntjac.data.util.filter.compare import \
+    Equal, Greater, Less, GreaterOrEqual, LessOrEqual
+
+from muntjac.data.util.filter.between import Between
+from muntjac.data.util.filter.in_ import In
+from muntjac.data.util.filter.is_null import IsNull
+from muntjac.data.util.filter.like import Like
+from muntjac.data.util.filter.and_ import And
+from muntjac.data.util.filter.or_ import Or
+from muntjac.data.util.filter.not_ import Not
+from muntjac.data.util.filter.simple_string_filter import SimpleStringFilter
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+FILTERS = [
+    Equal('n', 5),
+    Equal('x', None),
+    Greater('n', 7),
+    Less('n', 2),
+    GreaterOrEqual('n', 7),
+    LessOrEqual('x', 1),
+    Between('n', 3, 4),
+    In('s', ['a', 'c', 'zz']),
+    IsNull('x'),
+    Like('s', 'b%'),
+    And(Equal('s', 'b'), Greater('n', 3)),
+    And(Equal('s', 'b'), Like('s', '%')),
+    Or(Equal('n', 1), IsNull('x')),
+    Or(Equal('n', 1), Not(Equal('x', 2))),
+    Not(Equal('n', 5)),
+    SimpleStringFilter('s', 'b', False, True),
+    Equal('missing', None),
+]
+
+
+class TestPropertyIndex(TestCase):
+
+    def testLookups(self):
+        index = PropertyIndex('p')
+        for itemId, value in enumerate([3, 1, None, 2, 3, 5]):
+            index.add(itemId, value)
+
+        self.assertEquals(set([0, 4]), index.equal(3))
+        self.assertEquals(set([2]), index.equal(None))
+        self.assertEquals(set(), index.equal(4))
+        self.assertEquals(set([3, 0, 4]), index.within(2, 3))
+        self.assertEquals(set([0, 4, 5]), index.within(2, None, False))
+        self.assertEquals(set([1, 3]), index.within(None, 3, True, False))
+
+        index.update(0, 4)
+        index.remove(5)
+        self.assertEquals(set([4]), index.equal(3))
+        self.assertEquals(set([0, 4]), index.within(3, None))
+
+        # unhashable values disable the index
+        index.add(6, [])
+        self.assertFalse(index.isEnabled())
+        self.assertEquals(None, index.equal(3))
+        self.assertEquals(None, index.within(3, None))
+
+
+class TestFilterEvaluator(TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(11)
+
+
+    def createContainer(self, cls, items):
+        container = cls()
+        container.addContainerProperty('n', int, None)
+        container.addContainerProperty('s', str, None)
+        container.addContainerProperty('x', int, None)
+        for itemId in range(items):
+            self.addItem(container, itemId)
+        return container
+
+
+    def addItem(self, container, itemId):
+        item = container.addItem(itemId)
+        rnd = self.rnd
+        item.getItemProperty('n').setValue(rnd.randint(0, 9))
+        item.getItemProperty('s').setValue(rnd.choice(['a', 'b', 'c', 'bb']))
+        item.getItemProperty('x').setValue(rnd.choice([None, 1, 2]))
+
+
+    def expected(self, container, filters):
+        """Filters all the items through the item objects."""
+        itemIds = list()
+        for itemId in container.getAllItemIds():
+            item = container.getUnfilteredItem(itemId)
+            for f in filters:
+                if not f.passesFilter(itemId, item):
+                    break
+            else:
+                itemIds.append(itemId)
+        return itemIds
+
+
+    def check(self, container):
+        for f in FILTERS:
+            container.removeAllContainerFilters()
+            container.addContainerFilter(f)
+            self.assertEquals(self.expected(container, [f]),
+                    list(container.getItemIds()), f)
+
+        for _ in range(10):
+            filters = self.rnd.sample(FILTERS, 2)
+            container.removeAllContainerFilters()
+            for f in filters:
+                container.addContainerFilter(f)
+            self.assertEquals(self.expected(container, filters),
+                    list(container.getItemIds()))
+
+        container.removeAllContainerFilters()
+
+
+    def checkContainer(self, cls):
+        container = self.createContainer(cls, 300)
+        self.check(container)
+        container.addPropertyIndex('n')
+        container.addPropertyIndex('s')
+        container.addPropertyIndex('x')
+        self.assertTrue(container.hasPropertyIndex('n'))
+        self.check(container)
+
+        # the indexes follow the changes of the items
+        rnd = self.rnd
+        container.addContainerFilter(Equal('n', 5))
+        for itemId in rnd.sample(list(container.getAllItemIds()), 50):
+            container.removeItem(itemId)
+        for itemId in range(300, 350):
+            self.addItem(container, itemId)
+        for itemId in rnd.sample(list(container.getAllItemIds()), 50):
+            container.getUnfilteredItem(itemId).getItemProperty(
+                    'n').setValue(rnd.randint(0, 9))
+        self.assertEquals(self.expected(container, [Equal('n', 5)]),
+                list(container.getItemIds()))
+        container.removeAllContainerFilters()
+
+        container.sort(['s', 'n'], [True, False])
+        self.check(container)
+
+        container.removeContainerProperty('x')
+        self.assertFalse(container.hasPropertyIndex('x'))
+        container.removePropertyIndex('s')
+        self.assertFalse(container.hasPropertyIndex('s'))
+        self.check(container)
+
+        container.removeAllItems()
+        self.check(container)
+
+
+    def testIndexedContainer(self):
+        self.checkContainer(IndexedContainer)
+
+
+    def testColumnarIndexedContainer(self):
+        self.checkContainer(ColumnarIndexedContainer)
+
+
+    def testHierarchicalContainer(self):
+        container = self.createContainer(HierarchicalContainer, 100)
+        for itemId in range(1, 100):
+            container.setParent(itemId, self.rnd.randint(0, itemId - 1))
+        container.addPropertyIndex('n')
+
+        container.setIncludeParentsWhenFiltering(False)
+        container.addContainerFilter(Equal('n', 5))
+        self.assertEquals(self.expected(container, [Equal('n', 5)]),
+                list(container.getItemIds()))
+
+        # the parents of matching items are included
+        container.setIncludeParentsWhenFiltering(True)
+        for itemId in container.getItemIds():
+            parentId = container.getParent(itemId)
+            self.assertTrue(parentId is None
+                    or container.containsId(parentId))
+
+
+class PerformanceTestFilterEvaluator(PerformanceTestCase):
+
+    _REPEATS = 5
+    _ITEMS = 200000
+    _FILTER_FAIL_THRESHOLD = 20
+
+
+    def testSelectiveFilter(self):
+        container = IndexedContainer()
+        container.addContainerProperty('code', int, None)
+        container.addContainerProperty('name', str, None)
+        for itemId in range(self._ITEMS):
+            container.addItem(itemId)
+            container.setItemValue(itemId, 'code', itemId % 2000)
+            container.setItemValue(itemId, 'name', 'name %d' % itemId)
+        container.addPropertyIndex('code')
+
+        filters = [Equal('code', 7), Between('code', 10, 11),
+                In('code', [1, 2, 3])]
+
+        legacy = list()
+        for f in filters:
+            start = 1000 * time.time()
+            legacyFilter(container, f)
+            legacy.append((1000 * time.time()) - start)
+
+        for f in filters:
+            def applyFilter():
+                container.removeAllContainerFilters()
+                container.addContainerFilter(f)
+            times = list()
+            for _ in range(self._REPEATS):
+                start = 1000 * time.time()
+                applyFilter()
+                times.append((1000 * time.time()) - start)
+            self.assertEquals(legacyFilter(container, f),
+                    list(container.getItemIds()))
+            self.checkMedian(self._ITEMS, times, 'Indexed %s filtering'
+                    % f.__class__.__name__, self._FILTER_FAIL_THRESHOLD)
+
+        print ('Legacy filtering timings (ms) for %d items: %s'
+                % (self._ITEMS, legacy))
+
+
+def legacyFilter(container, fltr):
+    # the filtering done prior to the property indexes, through a new item
+    # for each item
+    return [itemId for itemId in container.getAllItemIds()
+            if fltr.passesFilter(itemId, container.getUnfilteredItem(itemId))]
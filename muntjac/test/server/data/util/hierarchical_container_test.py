@@ -1,10 +1,22 @@
 # @MUNTJAC_COPYRIGHT@
 # @MUNTJAC_LICENSE@
 
+import time
+import random
+import pickle
+
+from unittest import TestCase
+from collections import OrderedDict
+
 from muntjac.test.server.data.util.abstract_hierarchical_container_test \
     import AbstractHierarchicalContainerTest
 
-from muntjac.data.container import IFilter
+from muntjac.test.server.data.util.abstract_container_test \
+    import ItemSetChangeCounter
+
+from muntjac.data.container import IFilter, IItemSetChangeListener
+from muntjac.data.util.filter.not_ import Not
+from muntjac.data.util.filter.compare import Equal
 from muntjac.data.util.hierarchical_container import HierarchicalContainer
 
 
@@ -262,3 +274,213 @@ class TestHierarchicalContainer(AbstractHierarchicalContainerTest):
                 'com.vaadin.terminal.gwt.client.ui.VTabsheetPanel',
                 'com.vaadin.terminal.gwt.client.ui.VPopupCalendar',
                 'blah', True, expectedSize, expectedRoots, False)
+
+
+    def createNamedContainer(self):
+        c = HierarchicalContainer()
+        c.addContainerProperty('name', str, None)
+        return c
+
+
+    def testAddItemsWithParents(self):
+        c = HierarchicalContainer()
+        c.addItem('existing')
+        # parents can follow their children
+        self.assertTrue(c.addItemsWithParents([('b1', 'b'), ('a', None),
+                ('b', None), ('a2', 'a'), ('a1', 'a'), ('b2', 'b'),
+                ('c', 'existing')]))
+
+        self.assertEquals(['existing', 'a', 'b'], c.rootItemIds())
+        self.assertEquals(['a2', 'a1'], c.getChildren('a'))
+        self.assertEquals(['b1', 'b2'], c.getChildren('b'))
+        self.assertEquals(['c'], c.getChildren('existing'))
+        self.assertEquals('b', c.getParent('b1'))
+        self.assertEquals(8, len(c))
+
+        # duplicates, loops and missing parents fail
+        self.assertFalse(c.addItemsWithParents([('a', None)]))
+        self.assertFalse(c.addItemsWithParents([('x', 'y'), ('y', 'x')]))
+        self.assertFalse(c.addItemsWithParents([('z', 'missing')]))
+        self.assertTrue(c.isRoot('z'))
+
+
+    def testAddItemsWithParentsExisting(self):
+        c = HierarchicalContainer()
+        c.addItemsWithParents([('a', None), ('b', None), ('c', 'a')])
+
+        # the parents of existing items are not changed
+        self.assertFalse(c.addItemsWithParents([('c', 'b'), ('d', 'b'),
+                ('d', 'a')]))
+        self.assertEquals('a', c.getParent('c'))
+        self.assertEquals(['c'], c.getChildren('a'))
+        self.assertEquals('b', c.getParent('d'))
+        self.assertEquals(['d'], c.getChildren('b'))
+
+
+    def testAddItemsWithParentsFiltered(self):
+        c = self.createNamedContainer()
+        c.addItem('a').getItemProperty('name').setValue('a')
+        c.addContainerFilter('name', 'a', False, False)
+
+        counter = ItemSetChangeCounter()
+        c.addListener(counter, IItemSetChangeListener)
+        # the items are filtered with their parents
+        self.assertTrue(c.addItemsWithParents([('b', 'a'), ('c', 'b')]))
+        counter.assertOnce()
+        self.assertEquals(['a'], c.rootItemIds())
+        self.assertFalse(c.containsId('b'))
+
+        c.removeAllContainerFilters()
+        self.assertEquals(['b'], c.getChildren('a'))
+        self.assertEquals(['c'], c.getChildren('b'))
+
+
+    def testAddItemTree(self):
+        c = HierarchicalContainer()
+        c.addItem('top')
+        self.assertTrue(c.addItemTree([('a', [('a1', None),
+                ('a2', [('a21', [])])]), ('b', None)], 'top'))
+        self.assertEquals(['top'], c.rootItemIds())
+        self.assertEquals(['a', 'b'], c.getChildren('top'))
+        self.assertEquals(['a1', 'a2'], c.getChildren('a'))
+        self.assertEquals(['a21'], c.getChildren('a2'))
+        self.assertFalse(c.hasChildren('b'))
+
+        c.addItemTree(OrderedDict([('r', OrderedDict([('r2', None),
+                ('r1', None)]))]))
+        self.assertEquals(['top', 'r'], c.rootItemIds())
+        self.assertEquals(['r2', 'r1'], c.getChildren('r'))
+
+        # deep trees are added without recursion
+        node = None
+        for itemId in range(5000, 0, -1):
+            node = [(itemId, node)]
+        self.assertTrue(c.addItemTree(node))
+        self.assertEquals(4999, c.getParent(5000))
+
+
+    def testBatch(self):
+        c = self.createNamedContainer()
+        for itemId in ['a', 'b', 'ab', 'c']:
+            c.addItem(itemId)
+            c.getContainerProperty(itemId, 'name').setValue(itemId)
+        c.addContainerFilter('name', 'a', False, False)
+        self.assertEquals(['a', 'ab'], c.rootItemIds())
+
+        counter = ItemSetChangeCounter()
+        c.addListener(counter, IItemSetChangeListener)
+        with c.batch() as batch:
+            self.assertTrue(batch is c)
+            self.assertTrue(c.isBatch())
+            c.setParent('ab', 'a')
+            with c.batch():
+                c.getUnfilteredItem('c').getItemProperty('name').setValue(
+                        'ca')
+                c.addItem('d')
+            # the filtered view is updated when the batch ends
+            self.assertEquals(['a', 'ab'], c.rootItemIds())
+            counter.assertNone()
+        counter.assertOnce()
+        self.assertFalse(c.isBatch())
+
+        self.assertEquals(['a', 'c'], c.rootItemIds())
+        self.assertEquals(['ab'], c.getChildren('a'))
+
+        # nothing is sent for an empty batch
+        with c.batch():
+            pass
+        counter.assertNone()
+
+        # the batch ends with an exception
+        try:
+            with c.batch():
+                c.setParent('c', 'a')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        counter.assertOnce()
+        self.assertEquals(['a'], c.rootItemIds())
+        self.assertEquals(['ab', 'c'], c.getChildren('a'))
+        self.assertRaises(ValueError, c.endBatch)
+
+
+    def testMoveAfterSibling(self):
+        c = HierarchicalContainer()
+        c.addItemsWithParents([('p', None), ('a', 'p'), ('b', 'p'),
+                ('c', 'p'), ('r', None)])
+        c.moveAfterSibling('a', 'c')
+        self.assertEquals(['b', 'c', 'a'], c.getChildren('p'))
+        c.moveAfterSibling('a', None)
+        self.assertEquals(['a', 'b', 'c'], c.getChildren('p'))
+        c.moveAfterSibling('b', 'b')
+        self.assertEquals(['a', 'b', 'c'], c.getChildren('p'))
+        c.moveAfterSibling('p', 'r')
+        self.assertEquals(['r', 'p'], c.rootItemIds())
+        self.assertRaises(ValueError, c.moveAfterSibling, 'a', 'r')
+
+
+    def testRemoveChildren(self):
+        c = HierarchicalContainer()
+        c.addItemsWithParents([(itemId, None if itemId == 0 else 0)
+                for itemId in range(100)])
+        for itemId in range(1, 100, 2):
+            c.removeItem(itemId)
+        self.assertEquals(range(2, 100, 2), c.getChildren(0))
+        c.removeItem(0)
+        self.assertEquals(range(2, 100, 2), c.rootItemIds())
+
+
+    def testPickle(self):
+        c = HierarchicalContainer()
+        c.addItemsWithParents([(itemId, None if itemId < 10 else itemId % 10)
+                for itemId in range(3000)])
+        c = pickle.loads(pickle.dumps(c, pickle.HIGHEST_PROTOCOL))
+        self.assertEquals(range(10), c.rootItemIds())
+        self.assertEquals(range(13, 3000, 10), c.getChildren(3))
+
+
+class PerformanceTestHierarchicalContainer(TestCase):
+
+    _ITEMS = 100000
+    # setting parents one by one filters the container every time, time
+    # less items
+    _LEGACY_ITEMS = 500
+    _ADD_ITEMS_FAIL_THRESHOLD = 10000
+
+
+    def createContainer(self):
+        c = HierarchicalContainer()
+        c.addContainerProperty('name', str, None)
+        # passed by all the items
+        c.addContainerFilter(Not(Equal('name', 'x')))
+        c.addListener(ItemSetChangeCounter(), IItemSetChangeListener)
+        return c
+
+
+    def testAddItems(self):
+        rnd = random.Random(1)
+        items = [(itemId, rnd.randint(0, itemId - 1) if itemId > 10 else None)
+                for itemId in range(self._ITEMS)]
+
+        c = self.createContainer()
+        start = 1000 * time.time()
+        for itemId, parentId in items[:self._LEGACY_ITEMS]:
+            c.addItem(itemId)
+            if parentId is not None:
+                c.setParent(itemId, parentId)
+        legacy = (1000 * time.time()) - start
+        print ('Legacy setParent() timings (ms) for %d items: %s'
+                % (self._LEGACY_ITEMS, [legacy]))
+
+        c = self.createContainer()
+        start = 1000 * time.time()
+        self.assertTrue(c.addItemsWithParents(items))
+        elapsed = (1000 * time.time()) - start
+        self.assertEquals(self._ITEMS, len(c))
+        self.assertEquals(range(11), c.rootItemIds())
+
+        print ('HierarchicalContainer.addItemsWithParents() timings (ms) for '
+                '%d items: %s' % (self._ITEMS, [elapsed]))
+        self.assertTrue(elapsed <= self._ADD_ITEMS_FAIL_THRESHOLD,
+            'addItemsWithParents() too slow, time %.2fms for %s items' %
+            (elapsed, self._ITEMS))
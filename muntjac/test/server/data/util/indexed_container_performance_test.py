@@ -3,11 +3,13 @@
 
 import time
 
-from unittest import TestCase
 from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.filter.simple_string_filter import SimpleStringFilter
 
+from muntjac.test.server.performance import PerformanceTestCase, sized
 
-class PerformanceTestIndexedContainer(TestCase):
+
+class PerformanceTestIndexedContainer(PerformanceTestCase):
 
     _REPEATS = 10
     _ITEMS = 1000
@@ -17,6 +19,14 @@ class PerformanceTestIndexedContainer(TestCase):
     _ADD_ITEM_AFTER_FAIL_THRESHOLD = 5000
     _ADD_ITEM_AFTER_LAST_FAIL_THRESHOLD = 5000
     _ADD_ITEMS_CONSTRUCTOR_FAIL_THRESHOLD = 200
+    _ITERATE_ITEMS = 100000
+    _ITERATE_FAIL_THRESHOLD = 1000
+    # iterating a list with index() is quadratic, time less items
+    _LEGACY_ITERATE_ITEMS = 5000
+    # every seventh item is edited
+    _FILTERED_ITEMS = sized(_ITEMS, 20000)
+    _FILTERED_EDITS = sized(100, 200)
+    _FILTERED_SET_VALUE_FAIL_THRESHOLD = sized(100, 1000)
 
 
     def testAddItemPerformance(self):
@@ -86,16 +96,77 @@ class PerformanceTestIndexedContainer(TestCase):
                 self._ADD_ITEMS_CONSTRUCTOR_FAIL_THRESHOLD)
 
 
-    def checkMedian(self, items, times, methodName, threshold):
-        median = self.median(times)
-        print '%s timings (ms) for %d items: %s' % (methodName, items, times)
-        self.assertTrue(median <= threshold,
-            '%s too slow, median time %.2fms for %s items' %
-            (methodName, median, items))
+    def testNextItemIdPerformance(self):
+        c = IndexedContainer()
+        c.addContainerProperty('name', str, '')
+        for i in range(self._ITERATE_ITEMS):
+            c.addItem(i).getItemProperty('name').setValue('item%d' % i)
+
+        legacyIds = range(self._LEGACY_ITERATE_ITEMS)
+        legacy = self.timeIteration(legacyIds[0],
+                lambda itemId: legacyNextItemId(legacyIds, itemId))
+        print ('list.index() iteration timings (ms) for %d items: %s' %
+                (self._LEGACY_ITERATE_ITEMS, legacy))
+
+        times = self.timeIteration(c.firstItemId(), c.nextItemId)
+        self.checkMedian(self._ITERATE_ITEMS, times,
+                'IndexedContainer.nextItemId()', self._ITERATE_FAIL_THRESHOLD)
+
+        # filtered view
+        c.addContainerFilter(SimpleStringFilter('name', '1', False, False))
+        times = self.timeIteration(c.firstItemId(), c.nextItemId)
+        self.checkMedian(len(c), times,
+                'Filtered IndexedContainer.nextItemId()',
+                self._ITERATE_FAIL_THRESHOLD)
 
 
-    def median(self, times):
-        lst = list(times)
-        lst.sort()
-        # not exact median in some cases, but good enough
-        return lst[len(lst) / 2]
+    def timeIteration(self, firstItemId, nextItemId):
+        times = list()
+        for _ in range(3):
+            start = 1000 * time.time()
+            itemId = firstItemId
+            while itemId is not None:
+                itemId = nextItemId(itemId)
+            times.append((1000 * time.time()) - start)
+        return times
+
+
+    def testFilteredSetValuePerformance(self):
+        c = IndexedContainer()
+        c.addContainerProperty('name', str, '')
+        for i in range(self._FILTERED_ITEMS):
+            c.addItem(i).getItemProperty('name').setValue('item%d' % i)
+        c.addContainerFilter(SimpleStringFilter('name', '7', False, False))
+
+        # re-filtering all the items after each edit
+        legacy = list()
+        for _ in range(3):
+            start = 1000 * time.time()
+            for i in range(self._FILTERED_EDITS / 10):
+                c.setItemValue(i, 'name', 'edited%d' % (i % 2))
+                c.filterAll()
+            legacy.append((1000 * time.time()) - start)
+        print ('filterAll() timings (ms) for %d edits: %s' %
+                (self._FILTERED_EDITS / 10, legacy))
+
+        times = list()
+        for repeat in range(3):
+            start = 1000 * time.time()
+            for i in range(self._FILTERED_EDITS):
+                c.getUnfilteredItem(i * 7).getItemProperty('name').setValue(
+                        'edited%d' % ((i + repeat) % 8))
+            times.append((1000 * time.time()) - start)
+        self.checkMedian(self._FILTERED_EDITS, times,
+                'Filtered IndexedContainerProperty.setValue()',
+                self._FILTERED_SET_VALUE_FAIL_THRESHOLD)
+
+
+def legacyNextItemId(itemIds, itemId):
+    # nextItemId() prior to the position index
+    try:
+        index = itemIds.index(itemId)
+    except ValueError:
+        index = -1
+    if index >= 0 and index < len(itemIds) - 1:
+        return itemIds[index + 1]
+    return None
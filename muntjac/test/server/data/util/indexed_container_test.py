@@ -7,6 +7,9 @@ from muntjac.test.server.data.util.abstract_container_test \
 from muntjac.test.server.data.util.abstract_in_memory_container_test \
     import AbstractInMemoryContainerTest
 
+from muntjac.data.container import \
+    IItemSetChangeListener, IPropertyValueChangeListener, \
+    IPropertyValueChangeEvent
 from muntjac.data.util.indexed_container import IndexedContainer
 
 
@@ -276,3 +279,86 @@ class TestIndexedContainer(AbstractInMemoryContainerTest):
         # no visible items
         container.removeAllItems()
         counter.assertNone()
+
+
+    def testFilteringAfterPropertyChange(self):
+        container = IndexedContainer()
+        self.initializeContainer(container)
+        container.addContainerFilter(self.SIMPLE_NAME, 'Table', False, False)
+        events = ItemSetChangeRecorder()
+        container.addListener(events)
+
+        itemId = self.sampleData[1]
+        self.assertFalse(container.containsId(itemId))
+        prop = container.getUnfilteredItem(itemId).getItemProperty(
+                self.SIMPLE_NAME)
+
+        # becomes visible at the position given by the unfiltered order
+        prop.setValue('ATable')
+        expected = [i for i in container.getAllItemIds()
+                if container.passesFilters(i)]
+        self.assertEquals(expected, container.getItemIds())
+        self.assertEquals(1, len(events.events))
+        self.assertEquals(expected.index(itemId),
+                events.events[0].getAddedItemIndex())
+
+        # no change in visibility, no event
+        prop.setValue('BTable')
+        self.assertEquals(1, len(events.events))
+
+        prop.setValue('Other')
+        self.assertFalse(container.containsId(itemId))
+        self.assertEquals(2, len(events.events))
+
+        container.filterAll()
+        self.assertEquals(expected[:expected.index(itemId)]
+                + expected[expected.index(itemId) + 1:],
+                container.getItemIds())
+
+
+    def testPropertyValueChangeListeners(self):
+        container = IndexedContainer()
+        self.initializeContainer(container)
+        events = PropertyValueChangeRecorder()
+        container.addListener(events, IPropertyValueChangeListener)
+        callbacks = list()
+        container.addCallback(lambda event, *args: callbacks.append(args),
+                IPropertyValueChangeEvent, 'x')
+
+        itemId = self.sampleData[2]
+        container.getItem(itemId).getItemProperty(
+                self.SIMPLE_NAME).setValue('changed')
+        self.assertEquals([(itemId, self.SIMPLE_NAME)],
+                [(e.getItemId(), e.getPropertyId()) for e in events.events])
+        self.assertEquals(container, events.events[0].getContainer())
+        self.assertEquals([('x',)], callbacks)
+
+        # stored values do not send events
+        container.setItemValue(itemId, self.SIMPLE_NAME, 'stored')
+        self.assertEquals(1, len(events.events))
+
+        container.removeListener(events, IPropertyValueChangeListener)
+        container.getContainerProperty(itemId,
+                self.SIMPLE_NAME).setValue('again')
+        self.assertEquals(1, len(events.events))
+        self.assertEquals(2, len(callbacks))
+
+
+class ItemSetChangeRecorder(IItemSetChangeListener):
+
+    def __init__(self):
+        self.events = list()
+
+
+    def containerItemSetChange(self, event):
+        self.events.append(event)
+
+
+class PropertyValueChangeRecorder(IPropertyValueChangeListener):
+
+    def __init__(self):
+        self.events = list()
+
+
+    def containerPropertyValueChange(self, event):
+        self.events.append(event)
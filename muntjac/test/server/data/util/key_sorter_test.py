@@ -0,0 +1,291 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+import random
+
+from unittest import TestCase
+
+from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.hierarchical_container import HierarchicalContainer
+from muntjac.data.util.default_item_sorter import DefaultItemSorter
+from muntjac.data.util.item_sorter import IItemSorter
+from muntjac.data.util.filter.compare import Equal, Greater
+
+from muntjac.data.util.columnar_indexed_container import \
+    ColumnarIndexedContainer
+
+from muntjac.test.server.performance import PerformanceTestCase, sized
+
+
+SORTS = [
+    (['n'], [True]),
+    (['n'], [False]),
+    (['s', 'n'], [True, True]),
+    (['s', 'n'], [False, True]),
+    (['x', 's', 'n'], [True, False, False]),
+    (['n', 'missing'], [False, True]),
+    ([], []),
+]
+
+
+class LegacyItemSorter(DefaultItemSorter):
+    """The default item sorter, compared pairwise as it is not exactly a
+    DefaultItemSorter."""
+    pass
+
+
+class ReverseIdSorter(IItemSorter):
+
+    def setSortProperties(self, container, propertyId, ascending):
+        pass
+
+
+    def compare(self, itemId1, itemId2):
+        return cmp(itemId2, itemId1)
+
+
+class TestKeySorter(TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(4)
+
+
+    def createContainer(self, cls, items):
+        container = cls()
+        container.addContainerProperty('n', int, None)
+        container.addContainerProperty('s', str, None)
+        container.addContainerProperty('x', int, None)
+        for itemId in range(items):
+            container.addItem(itemId)
+            self.setValues(container, itemId)
+        return container
+
+
+    def setValues(self, container, itemId):
+        rnd = self.rnd
+        container.setItemValue(itemId, 'n', rnd.choice([None, 1, 2, 3, 4]))
+        container.setItemValue(itemId, 's', rnd.choice([None, 'a', 'b']))
+        container.setItemValue(itemId, 'x', rnd.choice([None, 1, -1]))
+
+
+    def checkSorts(self, cls):
+        container = self.createContainer(cls, 200)
+        legacy = self.createContainer(cls, 0)
+        for itemId in container.getAllItemIds():
+            legacy.addItem(itemId)
+            for propertyId in ['n', 's', 'x']:
+                legacy.setItemValue(itemId, propertyId,
+                        container.getItemValue(itemId, propertyId))
+        legacy.setItemSorter(LegacyItemSorter())
+
+        for fltr in [None, Greater('n', 2)]:
+            for c in [container, legacy]:
+                c.removeAllContainerFilters()
+                if fltr is not None:
+                    c.addContainerFilter(fltr)
+
+            for propertyIds, ascending in SORTS:
+                container.sort(propertyIds, ascending)
+                legacy.sort(propertyIds, ascending)
+                self.assertEquals(list(legacy.getAllItemIds()),
+                        list(container.getAllItemIds()))
+                self.assertEquals(list(legacy.getItemIds()),
+                        list(container.getItemIds()))
+
+
+    def testIndexedContainer(self):
+        self.checkSorts(IndexedContainer)
+
+
+    def testColumnarIndexedContainer(self):
+        self.checkSorts(ColumnarIndexedContainer)
+
+
+    def testHierarchicalContainer(self):
+        self.checkSorts(HierarchicalContainer)
+
+
+    def testNoneOrder(self):
+        container = IndexedContainer()
+        container.addContainerProperty('n', int, None)
+        for itemId, value in enumerate([2, None, 1]):
+            container.addItem(itemId).getItemProperty('n').setValue(value)
+        container.sort(['n'], [True])
+        self.assertEquals([1, 2, 0], list(container.getItemIds()))
+        container.sort(['n'], [False])
+        self.assertEquals([0, 2, 1], list(container.getItemIds()))
+
+
+    def assertSorted(self, container, itemIds, propertyIds, ascending):
+        keys = [tuple([container.getItemValue(itemId, p)
+                for p in propertyIds]) for itemId in itemIds]
+        for key1, key2 in zip(keys, keys[1:]):
+            for i, asc in enumerate(ascending):
+                r = cmp(key1[i], key2[i]) if asc else cmp(key2[i], key1[i])
+                self.assertTrue(r <= 0, (keys, key1, key2))
+                if r < 0:
+                    break
+
+
+    def testSortItem(self):
+        for cls in [IndexedContainer, ColumnarIndexedContainer]:
+            container = self.createContainer(cls, 200)
+            self.assertFalse(container.sortItem(5))
+
+            container.sort(['s', 'n'], [False, True])
+            # hides the items with a -1 or None x, the items are not
+            # filtered again when their values change
+            container.addContainerFilter(Greater('x', 0))
+            shown = set(container.getItemIds())
+            self.assertTrue(0 < len(shown) < 200)
+            hidden = [itemId for itemId in container.getAllItemIds()
+                    if itemId not in shown]
+            for itemId in self.rnd.sample(range(200), 40):
+                self.setValues(container, itemId)
+                container.sortItem(itemId)
+            for itemId in range(200, 220):
+                container.addItem(itemId)
+                self.setValues(container, itemId)
+                container.sortItem(itemId)
+
+            # the hidden items and the ones added under the filter keep
+            # their positions
+            allItemIds = list(container.getAllItemIds())
+            self.assertEquals(220, len(allItemIds))
+            self.assertEquals(hidden + range(200, 220),
+                    [itemId for itemId in allItemIds if itemId not in shown])
+            self.assertSorted(container, container.getItemIds(), ['s', 'n'],
+                    [False, True])
+            self.assertEquals([itemId for itemId in allItemIds
+                    if itemId in shown], list(container.getItemIds()))
+
+            container.removeAllContainerFilters()
+            self.assertEquals(allItemIds, list(container.getItemIds()))
+
+
+    def testSortItemFiltered(self):
+        for cls in [IndexedContainer, ColumnarIndexedContainer]:
+            container = cls()
+            container.addContainerProperty('n', int, None)
+            container.addContainerProperty('v', int, None)
+            for itemId, value in enumerate([1, 0, 1, 0, 1, 1, 0]):
+                container.addItem(itemId)
+                container.setItemValue(itemId, 'n', itemId)
+                container.setItemValue(itemId, 'v', value)
+            container.addContainerFilter(Equal('v', 1))
+            container.sort(['n'], [True])
+            self.assertEquals([0, 2, 4, 5, 1, 3, 6],
+                    list(container.getAllItemIds()))
+
+            # the hidden items stay last
+            container.setItemValue(0, 'n', 8)
+            self.assertTrue(container.sortItem(0))
+            self.assertEquals([2, 4, 5, 0, 1, 3, 6],
+                    list(container.getAllItemIds()))
+            self.assertEquals([2, 4, 5, 0], list(container.getItemIds()))
+
+            container.setItemValue(5, 'n', -1)
+            self.assertTrue(container.sortItem(5))
+            container.setItemValue(3, 'n', -1)
+            self.assertFalse(container.sortItem(3))
+            self.assertEquals([5, 2, 4, 0, 1, 3, 6],
+                    list(container.getAllItemIds()))
+            self.assertEquals([5, 2, 4, 0], list(container.getItemIds()))
+
+
+    def testSortItemHierarchical(self):
+        container = self.createContainer(HierarchicalContainer, 100)
+        for itemId in range(10, 100):
+            container.setParent(itemId, self.rnd.randint(0, 9))
+        container.sort(['n', 's'], [True, True])
+        # hides the items with a -1 or None x that have no shown
+        # descendants
+        container.addContainerFilter(Greater('x', 0))
+        shownRoots = sorted(container.rootItemIds())
+        shownChildren = dict((itemId, sorted(container.getChildren(itemId)
+                or [])) for itemId in shownRoots)
+        self.assertTrue(0 < len(container) < 100)
+        for itemId in self.rnd.sample(range(100), 30):
+            self.setValues(container, itemId)
+            container.sortItem(itemId)
+
+        self.assertSorted(container, container.rootItemIds(), ['n', 's'],
+                [True, True])
+        self.assertEquals(shownRoots, sorted(container.rootItemIds()))
+        for itemId in shownRoots:
+            children = container.getChildren(itemId) or []
+            self.assertSorted(container, children, ['n', 's'], [True, True])
+            self.assertEquals(shownChildren[itemId], sorted(children))
+
+        container.removeAllContainerFilters()
+        self.assertEquals(range(10), sorted(container.rootItemIds()))
+        self.assertSorted(container, container.rootItemIds(), ['n', 's'],
+                [True, True])
+        for itemId in range(10):
+            children = container.getChildren(itemId) or []
+            self.assertSorted(container, children, ['n', 's'], [True, True])
+            self.assertEquals([childId for childId in range(10, 100)
+                    if container.getParent(childId) == itemId],
+                    sorted(children))
+
+
+    def testCustomSorter(self):
+        container = self.createContainer(IndexedContainer, 20)
+        container.setItemSorter(ReverseIdSorter())
+        container.sort(['n'], [True])
+        self.assertEquals(range(19, -1, -1), list(container.getItemIds()))
+
+        container.addItem(50)
+        self.assertTrue(container.sortItem(50))
+        self.assertEquals([50] + range(19, -1, -1),
+                list(container.getItemIds()))
+
+
+class PerformanceTestKeySorter(PerformanceTestCase):
+
+    _REPEATS = 5
+    _ITEMS = sized(10000, 50000)
+    _SORT_FAIL_THRESHOLD = sized(40, 200)
+    _SORT_ITEM_FAIL_THRESHOLD = 20
+
+
+    def testSort(self):
+        rnd = random.Random(2)
+        container = IndexedContainer()
+        container.addContainerProperty('n', int, None)
+        container.addContainerProperty('s', str, None)
+        for itemId in range(self._ITEMS):
+            container.addItem(itemId)
+            container.setItemValue(itemId, 'n', rnd.randint(0, 1000))
+            container.setItemValue(itemId, 's', rnd.choice([None, 'a', 'b']))
+
+        # the pairwise comparisons used prior to the sort keys
+        container.setItemSorter(LegacyItemSorter())
+        start = 1000 * time.time()
+        container.sort(['s', 'n'], [False, True])
+        legacy = (1000 * time.time()) - start
+        expected = list(container.getItemIds())
+
+        container.setItemSorter(DefaultItemSorter())
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            container.sort(['s', 'n'], [False, True])
+            times.append((1000 * time.time()) - start)
+        self.assertEquals(expected, list(container.getItemIds()))
+
+        print ('Legacy sort timings (ms) for %d items: %s'
+                % (self._ITEMS, [legacy]))
+        self.checkMedian(self._ITEMS, times, 'Key sort',
+                self._SORT_FAIL_THRESHOLD)
+
+        times = list()
+        for itemId in rnd.sample(range(self._ITEMS), self._REPEATS):
+            start = 1000 * time.time()
+            container.getUnfilteredItem(itemId).getItemProperty(
+                    'n').setValue(rnd.randint(0, 1000))
+            container.sortItem(itemId)
+            times.append((1000 * time.time()) - start)
+        self.checkMedian(self._ITEMS, times, 'Changed item re-sort',
+                self._SORT_ITEM_FAIL_THRESHOLD)
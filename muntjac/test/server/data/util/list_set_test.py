@@ -0,0 +1,76 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from unittest import TestCase
+
+from muntjac.data.util.list_set import ListSet
+
+
+class TestListSet(TestCase):
+
+    def testIndex(self):
+        ls = ListSet(['a', 'b', 'c'])
+        self.assertEquals(1, ls.index('b'))
+        self.assertEquals(-1, ls.indexOf('d'))
+        self.assertRaises(ValueError, ls.index, 'd')
+
+        ls.append('d')
+        self.assertEquals(3, ls.index('d'))
+        self.assertFalse(ls.add('a'))
+        self.assertEquals(4, len(ls))
+
+
+    def testIndexAfterModification(self):
+        ls = ListSet(['a', 'b', 'c'])
+        ls.index('a')
+
+        ls.insert(0, 'x')
+        self.assertEquals(['x', 'a', 'b', 'c'], ls)
+        self.assertEquals(2, ls.index('b'))
+
+        ls.remove('a')
+        self.assertEquals(1, ls.index('b'))
+        self.assertFalse('a' in ls)
+        self.assertRaises(ValueError, ls.remove, 'a')
+
+        ls.sort()
+        self.assertEquals(0, ls.index('b'))
+        self.assertEquals('x', ls.pop())
+        self.assertEquals(-1, ls.indexOf('x'))
+
+        del ls[:]
+        self.assertEquals(0, len(ls))
+        self.assertFalse('b' in ls)
+
+
+    def testIntegerElements(self):
+        # integers are elements, not indexes
+        ls = ListSet([3, 2, 1, 0])
+        ls.remove(1)
+        self.assertEquals([3, 2, 0], ls)
+        self.assertEquals(2, ls.index(0))
+
+
+    def testSetAllowsTemporaryDuplicates(self):
+        ls = ListSet(['a', 'b'])
+        ls[0] = 'b'
+        self.assertEquals(0, ls.index('b'))
+        ls[1] = 'a'
+        self.assertEquals(['b', 'a'], ls)
+        self.assertEquals(1, ls.index('a'))
+
+
+    def testCloneAndPickle(self):
+        ls = ListSet(['a', 'b'])
+        ls.index('a')
+        for copy in [ls.clone(), pickle.loads(pickle.dumps(ls)),
+                pickle.loads(pickle.dumps(ls, pickle.HIGHEST_PROTOCOL))]:
+            self.assertTrue(isinstance(copy, ListSet))
+            copy.append('c')
+            self.assertEquals(2, copy.index('c'))
+            self.assertEquals(['a', 'b'], ls)
@@ -0,0 +1,381 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+import random
+import sqlite3
+
+from unittest import TestCase
+
+from muntjac.ui.table import Table
+from muntjac.data.container import IFilter, IItemSetChangeListener
+from muntjac.data.property import ReadOnlyException
+from muntjac.data.util.indexed_container import IndexedContainer
+from muntjac.data.util.sqlcontainer.sql_container import SQLContainer
+from muntjac.data.util.sqlcontainer.sql_generator import SQLGenerator
+
+from muntjac.data.util.filter.compare import \
+    Equal, Greater, Less, GreaterOrEqual, LessOrEqual
+
+from muntjac.data.util.filter.between import Between
+from muntjac.data.util.filter.in_ import In
+from muntjac.data.util.filter.is_null import IsNull
+from muntjac.data.util.filter.like import Like
+from muntjac.data.util.filter.and_ import And
+from muntjac.data.util.filter.or_ import Or
+from muntjac.data.util.filter.not_ import Not
+from muntjac.data.util.filter.simple_string_filter import SimpleStringFilter
+
+from muntjac.data.util.filter.unsupported_filter_exception import \
+    UnsupportedFilterException
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+FILTERS = [
+    Equal('age', 5),
+    Equal('city', None),
+    Greater('age', 7),
+    Less('age', 2),
+    GreaterOrEqual('age', 7),
+    LessOrEqual('city', 'b'),
+    Between('age', 3, 4),
+    In('city', ['a', 'c', 'zz']),
+    In('city', ['a', None]),
+    IsNull('city'),
+    Like('name', 'b%', False),
+    Like('name', '_a%'),
+    And(Equal('name', 'bb'), Greater('age', 3)),
+    Or(Equal('age', 1), IsNull('city')),
+    Not(Equal('city', 'a')),
+    Not(Or(Less('age', 3), IsNull('city'))),
+    SimpleStringFilter('name', 'B', True, True),
+    SimpleStringFilter('name', 'a', True, False),
+    SimpleStringFilter('name', '%', True, False),
+]
+
+SORTS = [
+    (['age'], [True]),
+    (['city', 'age'], [False, True]),
+    (['name', 'city'], [True, False]),
+    (['id'], [False]),
+]
+
+
+class TestSQLContainer(TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(3)
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY,'
+                ' name TEXT, age INTEGER, city TEXT)')
+        self.expected = IndexedContainer()
+        self.expected.addContainerProperty('id', int, None)
+        self.expected.addContainerProperty('name', unicode, None)
+        self.expected.addContainerProperty('age', int, None)
+        self.expected.addContainerProperty('city', unicode, None)
+        for itemId in range(1, 301):
+            self.insert(itemId)
+        self.container = SQLContainer(self.connection, 'people', 'id',
+                pageLength=7, cacheSize=3)
+
+
+    def insert(self, itemId):
+        rnd = self.rnd
+        row = (itemId, rnd.choice([u'a', u'ba', u'Bb', u'ca', u'%a']),
+                rnd.choice([None, 1, 2, 3, 4, 5, 6, 7, 8]),
+                rnd.choice([None, u'a', u'b', u'c']))
+        self.connection.execute('INSERT INTO people VALUES (?, ?, ?, ?)',
+                row)
+        item = self.expected.addItem(itemId)
+        for propertyId, value in zip(['id', 'name', 'age', 'city'], row):
+            item.getItemProperty(propertyId).setValue(value)
+
+
+    def rows(self, container, itemIds):
+        return [tuple([container.getContainerProperty(itemId,
+                p).getValue() for p in ['id', 'name', 'age', 'city']])
+                for itemId in itemIds]
+
+
+    def check(self):
+        container = self.container
+        itemIds = list(self.expected.getItemIds())
+        self.assertEquals(len(itemIds), container.size())
+        self.assertEquals(itemIds, container.getItemIds())
+        self.assertEquals(itemIds, [container.getIdByIndex(i)
+                for i in range(container.size())])
+        self.assertEquals(self.rows(self.expected, itemIds),
+                self.rows(container, itemIds))
+        self.assertEquals(None, container.getIdByIndex(len(itemIds)))
+
+        # cached and not cached rows in random order
+        for i in self.rnd.sample(range(len(itemIds)), min(30, len(itemIds))):
+            container.clearCache()
+            self.assertEquals(i, container.indexOfId(itemIds[i]))
+            self.assertEquals(i, container.indexOfId(itemIds[i]))
+        self.assertTrue(len(container._pages) <= container.getCacheSize())
+
+        if len(itemIds) > 0:
+            self.assertEquals(itemIds[0], container.firstItemId())
+            self.assertEquals(itemIds[-1], container.lastItemId())
+            self.assertTrue(container.isFirstId(itemIds[0]))
+            self.assertTrue(container.isLastId(itemIds[-1]))
+        if len(itemIds) > 1:
+            self.assertEquals(itemIds[1], container.nextItemId(itemIds[0]))
+            self.assertEquals(itemIds[-2], container.prevItemId(itemIds[-1]))
+            self.assertEquals(None, container.nextItemId(itemIds[-1]))
+
+        for itemId in self.expected.getAllItemIds():
+            if itemId not in itemIds:
+                self.assertFalse(container.containsId(itemId))
+                self.assertEquals(None, container.getItem(itemId))
+                self.assertEquals(-1, container.indexOfId(itemId))
+
+
+    def testPaging(self):
+        self.check()
+        self.assertEquals(SQLContainer.DEFAULT_PAGE_LENGTH,
+                SQLContainer(self.connection, 'people', 'id').getPageLength())
+
+
+    def testSort(self):
+        for propertyIds, ascending in SORTS:
+            # the rows with equal values are ordered by the primary key
+            self.expected.sort(propertyIds + ['id'], ascending + [True])
+            self.container.sort(propertyIds, ascending)
+            self.check()
+
+
+    def testFilters(self):
+        for f in FILTERS:
+            self.expected.removeAllContainerFilters()
+            self.container.removeAllContainerFilters()
+            self.expected.addContainerFilter(f)
+            self.container.addContainerFilter(f)
+            self.check()
+
+        self.expected.sort(['city', 'id'], [False, True])
+        self.container.sort(['city'], [False])
+        self.expected.addContainerFilter('name', 'b', True, True)
+        self.container.addContainerFilter('name', 'b', True, True)
+        self.check()
+
+        self.expected.removeContainerFilters('name')
+        self.container.removeContainerFilters('name')
+        self.assertEquals(self.expected.size(), self.container.size())
+
+
+    def testRanges(self):
+        for propertyIds, ascending in [([], []), (['id'], [False]),
+                (['city'], [True])]:
+            for f in [None, Greater('age', 3)]:
+                self.expected.removeAllContainerFilters()
+                self.container.removeAllContainerFilters()
+                if f is not None:
+                    self.expected.addContainerFilter(f)
+                    self.container.addContainerFilter(f)
+                # hidden items are sorted last in an in-memory container
+                self.expected.sort(propertyIds + ['id'], ascending + [True])
+                self.container.sort(propertyIds, ascending)
+                itemIds = list(self.expected.getItemIds())
+
+                # consecutive ranges continue from the last row read
+                for start in range(0, len(itemIds), 40):
+                    rangeIds = self.container.getItemIdsInRange(start, 40)
+                    self.assertEquals(itemIds[start:start + 40], rangeIds)
+                    self.assertEquals(self.rows(self.expected, rangeIds),
+                            [tuple(values) for values in
+                                    self.container.getItemValues(rangeIds,
+                                            ['id', 'name', 'age', 'city'])])
+
+                for start in [130, 17, 18, 200]:
+                    self.assertEquals(itemIds[start:start + 30],
+                            self.container.getItemIdsInRange(start, 30))
+                self.check()
+
+
+    def testUnsupportedFilter(self):
+        self.assertRaises(UnsupportedFilterException,
+                self.container.addContainerFilter, CustomFilter())
+        self.assertEquals([], self.container.getContainerFilters())
+
+
+    def testItems(self):
+        item = self.container.getItem(5)
+        self.assertEquals(['id', 'name', 'age', 'city'],
+                item.getItemPropertyIds())
+        self.assertEquals(5, item.getItemProperty('id').getValue())
+        self.assertEquals(None, item.getItemProperty('missing'))
+        self.assertRaises(ReadOnlyException,
+                item.getItemProperty('name').setValue, 'x')
+        self.assertEquals(int, self.container.getType('age'))
+        self.assertEquals(unicode, self.container.getType('city'))
+        self.assertEquals(None, self.container.getType('missing'))
+        self.assertFalse(self.container.containsId('x'))
+        self.assertRaises(NotImplementedError, self.container.addItem)
+        self.assertRaises(NotImplementedError, self.container.removeItem, 5)
+
+
+    def testCachedSize(self):
+        listener = ItemSetChangeListener()
+        self.container.addListener(listener, IItemSetChangeListener)
+        self.assertEquals(300, self.container.size())
+
+        # modified outside of the container
+        self.insert(301)
+        self.assertEquals(300, self.container.size())
+        self.assertEquals(0, listener.events)
+        self.container.refresh()
+        self.assertEquals(1, listener.events)
+        self.assertEquals(301, self.container.size())
+        self.check()
+
+        self.container.sort(['age'], [True])
+        self.container.addContainerFilter(Equal('age', 3))
+        self.assertEquals(3, listener.events)
+
+
+    def testCompositeKey(self):
+        self.connection.execute('CREATE TABLE visits (person INTEGER, '
+                'day INTEGER, place TEXT, PRIMARY KEY (person, day))')
+        for person in range(20):
+            for day in range(5):
+                self.connection.execute('INSERT INTO visits VALUES (?, ?, ?)',
+                        (person, 4 - day, 'p%d' % ((person * day) % 3)))
+        container = SQLContainer(self.connection, 'visits',
+                ['person', 'day'], pageLength=6)
+        container.sort(['place'], [False])
+
+        itemIds = container.getItemIds()
+        self.assertEquals(100, len(itemIds))
+        self.assertEquals(('p2', 1, 2), (container.getContainerProperty(
+                itemIds[0], 'place').getValue(),) + itemIds[0])
+        for i in [0, 17, 99]:
+            container.clearCache()
+            self.assertEquals(i, container.indexOfId(itemIds[i]))
+            self.assertEquals(itemIds[i], container.getIdByIndex(i))
+        self.assertFalse(container.containsId(1))
+        self.assertEquals(-1, container.indexOfId((1, 7)))
+
+
+    def testTable(self):
+        table = Table('people', self.container)
+        table.setPageLength(10)
+        table.setCurrentPageFirstItemIndex(120)
+        self.assertEquals(self.container.getIdByIndex(120),
+                table.getCurrentPageFirstItemId())
+        cells = table.getVisibleCellsNoCache(120, 10, False)
+        self.assertEquals(list(self.expected.getItemIds())[120:130],
+                list(cells[Table.CELL_ITEMID]))
+
+
+class TestSQLGenerator(TestCase):
+
+    def testParamstyles(self):
+        fltr = And(Equal('a', 1), In('b', [2]))
+        for paramstyle, where, params in [
+                ('qmark', '("a" = ? AND ("b" IN (?)))', (1, 2)),
+                ('format', '("a" = %s AND ("b" IN (%s)))', (1, 2)),
+                ('numeric', '("a" = :1 AND ("b" IN (:2)))', (1, 2)),
+                ('named', '("a" = :p1 AND ("b" IN (:p2)))',
+                        {'p1': 1, 'p2': 2}),
+                ('pyformat', '("a" = %(p1)s AND ("b" IN (%(p2)s)))',
+                        {'p1': 1, 'p2': 2})]:
+            generator = SQLGenerator(paramstyle)
+            sql, bound = generator.generateSelect('t', ['a'], [fltr],
+                    [('b', False)], ['a'], 20, 10)
+            self.assertEquals('SELECT "a" FROM "t" WHERE ' + where
+                    + ' ORDER BY "b" DESC, "a" LIMIT '
+                    + generator.parameter(None, [None] * 2) + ' OFFSET '
+                    + generator.parameter(None, [None] * 3), sql)
+            if isinstance(params, dict):
+                params = dict(params, p3=10, p4=20)
+            else:
+                params = params + (10, 20)
+            self.assertEquals(params, bound)
+        self.assertRaises(ValueError, SQLGenerator, 'unknown')
+
+
+    def testQuoting(self):
+        generator = SQLGenerator()
+        self.assertEquals('"a""b"', generator.quoteIdentifier('a"b'))
+        params = list()
+        self.assertEquals("LOWER(\"s\") LIKE ? ESCAPE '!'",
+                generator.generateFilter(SimpleStringFilter('s', '5%_!',
+                        True, False), params))
+        self.assertEquals(['%5!%!_!!%'], params)
+
+
+class PerformanceTestSQLContainer(PerformanceTestCase):
+
+    _REPEATS = 5
+    _ROWS = 100000
+    _PAGE_FAIL_THRESHOLD = 50
+
+    def testTableScrolling(self):
+        rnd = random.Random(1)
+        connection = sqlite3.connect(':memory:')
+        connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY, '
+                'name TEXT, age INTEGER)')
+        connection.execute('CREATE INDEX people_age ON people (age)')
+        connection.executemany('INSERT INTO people VALUES (?, ?, ?)',
+                [(i, 'name %d' % i, rnd.randint(0, 99))
+                        for i in xrange(self._ROWS)])
+
+        # the rows read into an in-memory container prior to SQLContainer
+        start = 1000 * time.time()
+        legacyContainer(connection)
+        legacy = (1000 * time.time()) - start
+
+        container = SQLContainer(connection, 'people', 'id')
+        container.sort(['age'], [True])
+        container.addContainerFilter(Greater('age', 10))
+        table = Table('people', container)
+
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            firstIndex = rnd.randint(0, container.size() - 15)
+            table.setCurrentPageFirstItemIndex(firstIndex)
+            table.getVisibleCellsNoCache(firstIndex,
+                    SQLContainer.DEFAULT_PAGE_LENGTH, False)
+            times.append((1000 * time.time()) - start)
+
+        print ('Legacy loading timings (ms) for %d rows: %s'
+                % (self._ROWS, [legacy]))
+        self.checkMedian(self._ROWS, times, 'Table page',
+                self._PAGE_FAIL_THRESHOLD)
+
+
+def legacyContainer(connection):
+    container = IndexedContainer()
+    container.addContainerProperty('name', unicode, None)
+    container.addContainerProperty('age', int, None)
+    for itemId, name, age in connection.execute('SELECT * FROM people'):
+        item = container.addItem(itemId)
+        item.getItemProperty('name').setValue(name)
+        item.getItemProperty('age').setValue(age)
+    container.addContainerFilter(Greater('age', 10))
+    container.sort(['age'], [True])
+    return container
+
+
+class CustomFilter(IFilter):
+
+    def passesFilter(self, itemId, item):
+        return True
+
+
+    def appliesToProperty(self, propertyId):
+        return False
+
+
+class ItemSetChangeListener(IItemSetChangeListener):
+
+    def __init__(self):
+        self.events = 0
+
+
+    def containerItemSetChange(self, event):
+        self.events += 1
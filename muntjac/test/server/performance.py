@@ -0,0 +1,42 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import os
+
+from unittest import TestCase
+
+
+#: Environment variable that runs the performance tests with their full
+#  size data sets instead of the smaller ones used by default.
+LARGE_PERFORMANCE_TESTS = 'MUNTJAC_LARGE_PERFORMANCE_TESTS'
+
+
+def isLarge():
+    """Returns C{True} if the performance tests are run with their full
+    size data sets."""
+    return os.environ.get(LARGE_PERFORMANCE_TESTS, '') not in ('', '0')
+
+
+def sized(small, large):
+    """Returns the given large size or threshold if the performance tests
+    are run with their full size data sets, otherwise the small one."""
+    return large if isLarge() else small
+
+
+class PerformanceTestCase(TestCase):
+    """Base class of the performance tests, which check the median of
+    repeated timings against a threshold."""
+
+    def checkMedian(self, items, times, methodName, threshold):
+        median = self.median(times)
+        print '%s timings (ms) for %d items: %s' % (methodName, items, times)
+        self.assertTrue(median <= threshold,
+            '%s too slow, median time %.2fms for %s items' %
+            (methodName, median, items))
+
+
+    def median(self, times):
+        lst = list(times)
+        lst.sort()
+        # not exact median in some cases, but good enough
+        return lst[len(lst) / 2]
@@ -17,6 +17,44 @@ from propertyset_item_listeners import PropertysetItemListeners
 from terminal.gwt.server.test_static_files_location \
     import TestStaticFilesLocation
 
+from terminal.gwt.server.dirty_paintables_performance_test \
+    import PerformanceTestDirtyPaintables
+
+from terminal.gwt.server.detached_paintables_test \
+    import TestDetachedPaintables, TestDetachedPaintablesRequests
+
+from terminal.gwt.server.json_escape_performance_test \
+    import PerformanceTestJsonEscape
+
+from terminal.gwt.server.uidl_streaming_performance_test \
+    import PerformanceTestUidlStreaming
+
+from terminal.gwt.server.session_store_test import TestSessionStore
+
+from terminal.gwt.server.session_store_performance_test \
+    import PerformanceTestSessionStore
+
+from terminal.gwt.server.static_resource_cache_test import \
+    TestStaticResourceCache, TestStaticResourceServing, \
+    PerformanceTestStaticResourceCache
+
+from terminal.gwt.server.stream_iterator_test import TestStreamIterator, \
+    TestDownloads
+
+from terminal.gwt.server.application_lock_test import \
+    TestReentrantLock, StressTestApplicationLock
+
+from terminal.gwt.server.variable_bursts_test import \
+    TestVariableBursts, PerformanceTestVariableBursts
+
+from terminal.gwt.server.variable_decoding_test import \
+    TestVariableDecoding, PerformanceTestVariableDecoding
+from terminal.gwt.server.multipart_upload_test import \
+    TestSimpleMultiPartInputStream, TestStreamToReceiver, \
+    PerformanceTestMultipartUpload
+from terminal.gwt.server.locale_declaration_cache_test import \
+    TestLocaleDeclarationCache, PerformanceTestLocaleDeclarationCache
+
 from componentcontainer.add_remove_component_test import AddRemoveComponentTest
 
 from validation.test_read_only_validation import TestReadOnlyValidation
@@ -38,6 +76,29 @@ def suite():
     suite.addTest( unittest.makeSuite(PropertysetItemListeners) )
 
 #    suite.addTest( unittest.makeSuite(TestStaticFilesLocation) )
+    suite.addTest( unittest.makeSuite(PerformanceTestDirtyPaintables) )
+    suite.addTest( unittest.makeSuite(TestDetachedPaintables) )
+    suite.addTest( unittest.makeSuite(TestDetachedPaintablesRequests) )
+    suite.addTest( unittest.makeSuite(PerformanceTestJsonEscape) )
+    suite.addTest( unittest.makeSuite(PerformanceTestUidlStreaming) )
+    suite.addTest( unittest.makeSuite(TestSessionStore) )
+    suite.addTest( unittest.makeSuite(PerformanceTestSessionStore) )
+    suite.addTest( unittest.makeSuite(TestStaticResourceCache) )
+    suite.addTest( unittest.makeSuite(TestStaticResourceServing) )
+    suite.addTest( unittest.makeSuite(PerformanceTestStaticResourceCache) )
+    suite.addTest( unittest.makeSuite(TestStreamIterator) )
+    suite.addTest( unittest.makeSuite(TestDownloads) )
+    suite.addTest( unittest.makeSuite(TestReentrantLock) )
+    suite.addTest( unittest.makeSuite(StressTestApplicationLock) )
+    suite.addTest( unittest.makeSuite(TestVariableBursts) )
+    suite.addTest( unittest.makeSuite(PerformanceTestVariableBursts) )
+    suite.addTest( unittest.makeSuite(TestVariableDecoding) )
+    suite.addTest( unittest.makeSuite(PerformanceTestVariableDecoding) )
+    suite.addTest( unittest.makeSuite(TestSimpleMultiPartInputStream) )
+    suite.addTest( unittest.makeSuite(TestStreamToReceiver) )
+    suite.addTest( unittest.makeSuite(PerformanceTestMultipartUpload) )
+    suite.addTest( unittest.makeSuite(TestLocaleDeclarationCache) )
+    suite.addTest( unittest.makeSuite(PerformanceTestLocaleDeclarationCache) )
 
     suite.addTest( unittest.makeSuite(AddRemoveComponentTest) )
 
@@ -0,0 +1,285 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import re
+import time
+import threading
+
+from unittest import TestCase
+
+from paste.fixture import TestApp
+from paste.session import SessionMiddleware
+
+from muntjac.util import ReentrantLock
+from muntjac.application import Application
+from muntjac.ui.window import Window
+from muntjac.ui.label import Label
+from muntjac.ui.button import Button, IClickListener
+from muntjac.demo.Calc import Calc
+from muntjac.demo.util import InMemorySession
+
+from muntjac.terminal.gwt.server.application_servlet import \
+    ApplicationServlet
+
+
+class TestReentrantLock(TestCase):
+
+    def testReentrant(self):
+        lock = ReentrantLock()
+        self.assertTrue(lock.acquire())
+        self.assertTrue(lock.acquire())
+        self.assertTrue(lock.isHeldByCurrentThread())
+        lock.release()
+        self.assertTrue(lock.isHeldByCurrentThread())
+        lock.release()
+        self.assertFalse(lock.isHeldByCurrentThread())
+
+
+    def testTimeout(self):
+        lock = ReentrantLock()
+        results = list()
+
+        def acquire():
+            results.append(lock.acquire(timeout=0.05))
+
+        with lock:
+            thread = threading.Thread(target=acquire)
+            thread.start()
+            thread.join()
+        self.assertEquals([False], results)
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        thread.join()
+        self.assertEquals([False, True], results)
+
+
+    def testReleaseNotOwned(self):
+        lock = ReentrantLock()
+        self.assertRaises(RuntimeError, lock.release)
+
+
+class UidlClient(object):
+    """Posts UIDL requests to an application of the servlet, the session
+    cookie of the client identifies the application."""
+
+    def __init__(self, app):
+        self._app = app
+        self._key = None
+
+
+    def post(self, body, query=''):
+        return self._app.post('/UIDL/' + query, body,
+                headers={'Content-Type': 'text/plain;charset=utf-8'},
+                status='*')
+
+
+    def init(self):
+        self._app.get('/')
+        response = self.post('init', '?repaintAll=1&sh=900&sw=1400')
+        self._key = re.search(r'"Vaadin-Security-Key":"([^"]*)"',
+                response.body).group(1)
+        return response
+
+
+    def click(self, pid):
+        return self.post(self._key + '\x1dtrue\x1f' + pid + '\x1fstate\x1fb')
+
+
+class OverlapRecorder(object):
+    """Records the number of threads inside an application at once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.maxActive = 0
+
+
+    def enter(self):
+        with self._lock:
+            self.active += 1
+            self.maxActive = max(self.maxActive, self.active)
+
+
+    def exit(self):
+        with self._lock:
+            self.active -= 1
+
+
+class RecordingLabel(Label):
+
+    def paintContent(self, target):
+        recorder = self.getApplication().recorder
+        recorder.enter()
+        try:
+            super(RecordingLabel, self).paintContent(target)
+            # gives the other requests time to enter
+            time.sleep(0.001)
+        finally:
+            recorder.exit()
+
+
+class SerializedApplication(Application, IClickListener):
+    """Counts the clicks of its button and repaints a label on each click,
+    recording the requests that overlap inside the application."""
+
+    instances = list()
+
+    def init(self):
+        self.instances.append(self)
+        self.recorder = OverlapRecorder()
+        self.clicks = 0
+        main = Window('serialized')
+        self.setMainWindow(main)
+        self.label = RecordingLabel('0')
+        main.addComponent(self.label)
+        self.button = Button('click', self)
+        main.addComponent(self.button)
+
+
+    def buttonClick(self, event):
+        self.recorder.enter()
+        try:
+            clicks = self.clicks
+            time.sleep(0.002)
+            self.clicks = clicks + 1
+            self.label.setValue(str(self.clicks))
+        finally:
+            self.recorder.exit()
+
+
+class StressTestApplicationLock(TestCase):
+
+    _THREADS = 8
+    _REQUESTS = 10
+
+
+    def setUp(self):
+        del SerializedApplication.instances[:]
+
+
+    def createApp(self, servlet):
+        return TestApp(SessionMiddleware(servlet,
+                session_class=InMemorySession),
+                extra_environ={'HTTP_ACCEPT_LANGUAGE': 'en-US'})
+
+
+    def createClient(self, servlet):
+        client = UidlClient(self.createApp(servlet))
+        client.init()
+        application = SerializedApplication.instances[-1]
+        manager = application.getContext().getApplicationManager(
+                application, servlet)
+        client.pid = manager.getPaintableId(application.button)
+        return client, application
+
+
+    def runClients(self, clients):
+        """Clicks the button of the applications of the clients
+        concurrently and returns the responses."""
+        responses = list()
+        errors = list()
+
+        def run(client):
+            try:
+                for _ in range(self._REQUESTS):
+                    responses.append(client.click(client.pid))
+            except Exception, e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(client,))
+                for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals([], errors)
+        return responses
+
+
+    def checkSerialized(self, application, clicks):
+        # no two requests were inside the application at once
+        self.assertEquals(1, application.recorder.maxActive)
+        self.assertEquals(0, application.recorder.active)
+        # no click was lost by concurrent updates
+        self.assertEquals(clicks, application.clicks)
+
+
+    def testDistinctApplications(self):
+        servlet = ApplicationServlet(SerializedApplication)
+        clients = [self.createClient(servlet)
+                for _ in range(self._THREADS)]
+        responses = self.runClients([client for client, _ in clients])
+
+        self.assertEquals([200] * (self._THREADS * self._REQUESTS),
+                [response.status for response in responses])
+        for _, application in clients:
+            self.checkSerialized(application, self._REQUESTS)
+
+
+    def testSharedApplication(self):
+        servlet = ApplicationServlet(SerializedApplication)
+        client, application = self.createClient(servlet)
+        responses = self.runClients([client] * self._THREADS)
+
+        self.assertEquals([200] * (self._THREADS * self._REQUESTS),
+                [response.status for response in responses])
+        self.checkSerialized(application, self._THREADS * self._REQUESTS)
+
+        # the application still responds after the concurrent requests
+        self.assertEquals(200, client.click(client.pid).status)
+
+
+    def testSharedApplicationBusy(self):
+        servlet = ApplicationServlet(SerializedApplication,
+                applicationLockTimeout=0.001)
+        client, application = self.createClient(servlet)
+        responses = self.runClients([client] * self._THREADS)
+
+        statuses = [response.status for response in responses]
+        self.assertEquals(set([200, 503]), set(statuses))
+        for response in responses:
+            if response.status == 503:
+                self.assertEquals('1000', response.header('Retry-After'))
+        # the requests timing out were not processed
+        self.checkSerialized(application, statuses.count(200))
+
+
+    def testBusyResponse(self):
+        servlet = ApplicationServlet(Calc, applicationLockTimeout=0.05)
+        client = UidlClient(self.createApp(servlet))
+        client.init()
+
+        applications = list()
+        original = servlet.findApplicationInstance
+
+        def findApplicationInstance(request, requestType):
+            application = original(request, requestType)
+            applications.append(application)
+            return application
+
+        servlet.findApplicationInstance = findApplicationInstance
+        self.assertEquals(200, client.click('PID3').status)
+
+        acquired = threading.Event()
+        done = threading.Event()
+
+        def hold():
+            with applications[0].getLock():
+                acquired.set()
+                done.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        acquired.wait()
+        try:
+            response = client.click('PID3')
+        finally:
+            done.set()
+            thread.join()
+
+        self.assertEquals(503, response.status)
+        self.assertEquals('1000', response.header('Retry-After'))
+
+        self.assertEquals(200, client.click('PID3').status)
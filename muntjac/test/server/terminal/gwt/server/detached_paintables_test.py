@@ -0,0 +1,160 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import re
+
+from StringIO import StringIO
+
+from unittest import TestCase
+
+from babel import Locale
+
+from paste.fixture import TestApp as PasteTestApp
+from paste.session import SessionMiddleware
+
+from muntjac.application import Application
+from muntjac.ui.window import Window
+from muntjac.ui.label import Label
+from muntjac.ui.panel import Panel
+from muntjac.ui.button import Button, IClickListener
+from muntjac.ui.vertical_layout import VerticalLayout
+from muntjac.terminal.paintable import RepaintRequestEvent
+
+from muntjac.demo.util import InMemorySession
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.terminal.gwt.server.application_servlet import \
+    ApplicationServlet
+
+
+class TestDetachedPaintables(TestCase):
+
+    def setUp(self):
+        self.app = TestApp()
+        self.app.setLocale(Locale('en', 'US'))
+        self.app.init()
+        self.window = self.app.getMainWindow()
+
+        self.layout = VerticalLayout()
+        self.window.addComponent(self.layout)
+        self.label = Label('label')
+        self.layout.addComponent(self.label)
+        self.panel = Panel()
+        self.window.addComponent(self.panel)
+        self.panelLabel = Label('panel label')
+        self.panel.addComponent(self.panelLabel)
+
+        self.manager = AbstractCommunicationManager(self.app)
+        self.paint(True)
+
+
+    def paint(self, repaintAll):
+        self.manager.writeUidlResponce(None, repaintAll, StringIO(),
+                self.window, False)
+
+
+    def testRemovedComponentsAreUnregistered(self):
+        self.assertTrue(self.manager.hasPaintableId(self.label))
+        self.assertTrue(self.manager.hasPaintableId(self.panelLabel))
+
+        self.window.removeComponent(self.layout)
+        self.window.removeComponent(self.panel)
+        self.paint(False)
+        self.manager.unregisterDetachedPaintables()
+
+        for c in [self.layout, self.label, self.panel, self.panelLabel]:
+            self.assertFalse(self.manager.hasPaintableId(c))
+            self.assertFalse(self.manager in c.getListeners(
+                    RepaintRequestEvent))
+
+
+    def testMovedComponentStaysRegistered(self):
+        pid = self.manager.getPaintableId(self.label)
+
+        self.layout.removeComponent(self.label)
+        self.panel.addComponent(self.label)
+        self.paint(False)
+        self.manager.unregisterDetachedPaintables()
+
+        self.assertEquals(pid, self.manager.getPaintableId(self.label))
+        self.assertEquals(self.label, self.manager.getVariableOwner(pid))
+
+
+    def testNothingDetached(self):
+        self.label.setValue('changed')
+        self.paint(False)
+        self.manager.unregisterDetachedPaintables()
+
+        self.assertEquals(0, len(self.manager._detachedPaintables))
+        self.assertTrue(self.manager.hasPaintableId(self.label))
+
+
+class TestDetachedPaintablesRequests(TestCase):
+
+    def setUp(self):
+        self.servlet = ApplicationServlet(RemovingApp)
+        self.app = PasteTestApp(SessionMiddleware(self.servlet,
+                session_class=InMemorySession),
+                extra_environ={'HTTP_ACCEPT_LANGUAGE': 'en-US'})
+        self.app.get('/')
+        response = self.post('init', '?repaintAll=1&sh=900&sw=1400')
+        self.key = re.search(r'"Vaadin-Security-Key":"([^"]*)"',
+                response.body).group(1)
+
+        self.application = RemovingApp.instances.pop()
+        self.manager = self.application.getContext().getApplicationManager(
+                self.application, self.servlet)
+
+
+    def post(self, body, query=''):
+        return self.app.post('/UIDL/' + query, body,
+                headers={'Content-Type': 'text/plain;charset=utf-8'})
+
+
+    def testRequestUnregistersDetached(self):
+        application = self.application
+        removed = [application.panel, application.label]
+        for c in removed + [application.button]:
+            self.assertTrue(self.manager.hasPaintableId(c))
+        pid = self.manager.getPaintableId(application.button)
+
+        self.post(self.key + '\x1dtrue\x1f' + pid + '\x1fstate\x1fb')
+
+        self.assertEquals(None, application.panel.getParent())
+        for c in removed:
+            self.assertFalse(self.manager.hasPaintableId(c))
+            self.assertFalse(self.manager in c.getListeners(
+                    RepaintRequestEvent))
+        self.assertEquals(0, len(self.manager._detachedPaintables))
+        self.assertEquals(pid,
+                self.manager.getPaintableId(application.button))
+
+
+class RemovingApp(Application, IClickListener):
+    """Removes a panel when the button is clicked."""
+
+    instances = list()
+
+    def init(self):
+        self.instances.append(self)
+        w = Window('Main window')
+        self.setMainWindow(w)
+        self.panel = Panel()
+        self.label = Label('panel label')
+        self.panel.addComponent(self.label)
+        w.addComponent(self.panel)
+        self.button = Button('remove', self)
+        w.addComponent(self.button)
+
+
+    def buttonClick(self, event):
+        self.getMainWindow().removeComponent(self.panel)
+
+
+class TestApp(Application):
+
+    def init(self):
+        w = Window('Main window')
+        self.setMainWindow(w)
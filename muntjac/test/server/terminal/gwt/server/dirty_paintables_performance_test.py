@@ -0,0 +1,120 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+
+from muntjac.application import Application
+from muntjac.ui.window import Window
+from muntjac.ui.label import Label
+from muntjac.ui.vertical_layout import VerticalLayout
+from muntjac.terminal.paintable import RepaintRequestEvent
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+class PerformanceTestDirtyPaintables(PerformanceTestCase):
+
+    _REPEATS = 5
+    _COMPONENTS = 10000
+    _LAYOUTS = 100
+    _DIRTY_PAINTABLES_FAIL_THRESHOLD = 2000
+
+
+    def setUp(self):
+        self.app = TestApp()
+        self.app.init()
+        self.window = self.app.getMainWindow()
+
+        self.components = list()
+        for _ in range(self._LAYOUTS):
+            layout = VerticalLayout()
+            self.window.addComponent(layout)
+            self.components.append(layout)
+            for _ in range(self._COMPONENTS / self._LAYOUTS):
+                label = Label()
+                layout.addComponent(label)
+                self.components.append(label)
+
+
+    def testDirtyPaintablesPerformance(self):
+        times = list()
+        for _ in range(self._REPEATS):
+            manager = AbstractCommunicationManager(self.app)
+            start = 1000 * time.time()
+            paintables = self.collectDirty(manager)
+            times.append((1000 * time.time()) - start)
+
+            self.assertEquals(len(self.components), len(paintables))
+            self.assertTrue(isinstance(paintables[0], VerticalLayout))
+            self.assertTrue(isinstance(paintables[-1], Label))
+            self.assertEquals(0, len(manager._dirtyPaintables))
+
+        # the list-based implementation is quadratic, so time it only once
+        start = 1000 * time.time()
+        self.collectDirtyLegacy()
+        legacyTime = (1000 * time.time()) - start
+
+        print ('Dirty paintables list-based timing (ms) for %d items: %.2f' %
+                (len(self.components), legacyTime))
+        self.checkMedian(len(self.components), times,
+                'AbstractCommunicationManager dirty paintables',
+                self._DIRTY_PAINTABLES_FAIL_THRESHOLD)
+
+
+    def collectDirty(self, manager):
+        for c in self.components:
+            manager.repaintRequested(RepaintRequestEvent(c))
+        # duplicate requests are ignored
+        for c in self.components:
+            manager.repaintRequested(RepaintRequestEvent(c))
+
+        paintables = manager.getDirtyVisibleComponents(self.window)
+        depths = dict()
+        paintables.sort(key=lambda p: manager.getDepth(p, depths))
+
+        for p in paintables:
+            manager.paintablePainted(p)
+
+        return paintables
+
+
+    def collectDirtyLegacy(self):
+        # list and cmp based implementation used prior to the ordered set
+        dirty = list()
+        for c in self.components:
+            if c not in dirty:
+                dirty.append(c)
+
+        resultset = list(dirty)
+        for p in dirty:
+            if p.getWindow() != self.window:
+                resultset.remove(p)
+
+        def compare(c1, c2):
+            d1 = 0
+            while c1.getParent() is not None:
+                d1 += 1
+                c1 = c1.getParent()
+            d2 = 0
+            while c2.getParent() is not None:
+                d2 += 1
+                c2 = c2.getParent()
+            return cmp(d1, d2)
+
+        resultset.sort(cmp=compare)
+
+        for p in resultset:
+            if p in dirty:
+                dirty.remove(p)
+
+        return resultset
+
+
+class TestApp(Application):
+
+    def init(self):
+        w = Window('Main window')
+        self.setMainWindow(w)
@@ -0,0 +1,134 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+
+try:
+    from cStringIO import StringIO
+except ImportError, e:
+    from StringIO import StringIO
+
+from muntjac.terminal.gwt.server.json_paint_target import JsonPaintTarget
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+class PerformanceTestJsonEscape(PerformanceTestCase):
+
+    _REPEATS = 10
+    _ROWS = 1000
+    _COLUMNS = 10
+    _ESCAPE_JSON_FAIL_THRESHOLD = 500
+    _ESCAPE_XML_FAIL_THRESHOLD = 500
+
+
+    def setUp(self):
+        # cell values like the ones painted by a Table with a mix of plain
+        # text, numbers, paths, quotes and multi-line content
+        self.cells = list()
+        for row in range(self._ROWS):
+            for col in range(self._COLUMNS):
+                if col % 5 == 0:
+                    value = 'Item %d, column %d' % (row, col)
+                elif col % 5 == 1:
+                    value = str(row * col * 1.5)
+                elif col % 5 == 2:
+                    value = '/home/user/reports/%d/summary.pdf' % row
+                elif col % 5 == 3:
+                    value = 'He said "%d" \\ <b>bold</b> & \'more\'' % row
+                else:
+                    value = 'Line one\nline\ttwo\r\n\b\f%d' % row
+                self.cells.append(value)
+        self.cells.append(u'unicode caption')
+        self.cells.append('')
+
+
+    def testEscapeJSONOutput(self):
+        for cell in self.cells:
+            self.assertEquals(legacyEscapeJSON(cell),
+                    JsonPaintTarget.escapeJSON(cell))
+        self.assertEquals('', JsonPaintTarget.escapeJSON(None))
+
+
+    def testEscapeXMLOutput(self):
+        for cell in self.cells:
+            self.assertEquals(legacyEscapeXML(cell),
+                    JsonPaintTarget.escapeXML(cell))
+        self.assertEquals('', JsonPaintTarget.escapeXML(None))
+
+
+    def testEscapeJSONPerformance(self):
+        legacy = self.timeEscape(legacyEscapeJSON)
+        times = self.timeEscape(JsonPaintTarget.escapeJSON)
+        print ('Legacy escapeJSON timings (ms) for %d items: %s' %
+                (len(self.cells), legacy))
+        self.checkMedian(len(self.cells), times, 'JsonPaintTarget.escapeJSON',
+                self._ESCAPE_JSON_FAIL_THRESHOLD)
+
+
+    def testEscapeXMLPerformance(self):
+        legacy = self.timeEscape(legacyEscapeXML)
+        times = self.timeEscape(JsonPaintTarget.escapeXML)
+        print ('Legacy escapeXML timings (ms) for %d items: %s' %
+                (len(self.cells), legacy))
+        self.checkMedian(len(self.cells), times, 'JsonPaintTarget.escapeXML',
+                self._ESCAPE_XML_FAIL_THRESHOLD)
+
+
+    def timeEscape(self, escape):
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            for cell in self.cells:
+                escape(cell)
+            times.append((1000 * time.time()) - start)
+        return times
+
+
+# character at a time implementations used prior to the whole string
+# escapers, kept as a reference for output and throughput
+
+_LEGACY_JSON_MAP = {
+    '"':  lambda ch, sb: sb.write('\\\"'),
+    '\\': lambda ch, sb: sb.write('\\\\'),
+    '\b': lambda ch, sb: sb.write('\\b'),
+    '\f': lambda ch, sb: sb.write('\\f'),
+    '\n': lambda ch, sb: sb.write('\\n'),
+    '\r': lambda ch, sb: sb.write('\\r'),
+    '\t': lambda ch, sb: sb.write('\\t'),
+    '/' : lambda ch, sb: sb.write('\\/')
+}
+
+
+def _legacyDefault(ch, sb):
+    sb.write(ch)
+
+
+def legacyEscapeJSON(s):
+    sb = StringIO()
+    for c in s:
+        _LEGACY_JSON_MAP.get(c, _legacyDefault)(c, sb)
+    result = sb.getvalue()
+    sb.close()
+    return result
+
+
+def legacyEscapeXML(xml):
+    if len(xml) <= 0:
+        return ''
+    buff = StringIO()
+    for c in xml:
+        s = {
+            '&': '&amp;',
+            '>': '&gt;',
+            '<': '&lt;',
+            '"': '&quot;',
+            "'": '&apos;'
+        }.get(c)
+        if s is not None:
+            buff.write(s)
+        else:
+            buff.write(c)
+    result = buff.getvalue()
+    buff.close()
+    return result
@@ -0,0 +1,216 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+
+from unittest import TestCase
+
+from StringIO import StringIO
+
+from babel import Locale
+
+from muntjac.application import Application
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.terminal.gwt.server.application_servlet import \
+    ApplicationServlet
+
+from muntjac.terminal.gwt.server.locale_declaration_cache import \
+    LocaleDeclarationCache, generateLocaleFromName
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+LOCALES = ['en', 'en_US', 'en_GB', 'fi_FI', 'sv_SE', 'de_DE', 'fr_FR',
+        'ja_JP', 'ko_KR', 'he_IL', 'ar_EG', 'ru_RU', 'zh', 'pt_BR']
+
+
+class TestLocaleDeclarationCache(TestCase):
+
+    def testDeclarationsUnchanged(self):
+        cache = LocaleDeclarationCache()
+        for name in LOCALES:
+            self.assertEquals(legacySerializeLocale(
+                    generateLocaleFromName(name)), cache.getDeclaration(name))
+
+
+    def testDeclarationCached(self):
+        cache = LocaleDeclarationCache()
+        calls = list()
+
+        def generateLocale(name):
+            calls.append(name)
+            return generateLocaleFromName(name)
+
+        declaration = cache.getDeclaration('fi_FI', generateLocale)
+        self.assertTrue(declaration is cache.getDeclaration('fi_FI',
+                generateLocale))
+        self.assertEquals(['fi_FI'], calls)
+
+
+    def testSharedInstance(self):
+        self.assertTrue(LocaleDeclarationCache.getInstance()
+                is LocaleDeclarationCache.getInstance())
+
+
+    def testPreload(self):
+        cache = LocaleDeclarationCache()
+        cache.preload(['fi_FI', 'xx_XX', 'sv_SE'])
+        self.assertTrue('fi_FI' in cache)
+        self.assertTrue('sv_SE' in cache)
+        self.assertFalse('xx_XX' in cache)
+
+
+    def testServletPreload(self):
+        cache = LocaleDeclarationCache.getInstance()
+        cache.clear()
+        servlet = ApplicationServlet(Application,
+                preloadLocales=['de_DE', 'fr_FR'])
+        self.assertFalse('de_DE' in cache)
+        servlet.init()
+        self.assertTrue('de_DE' in cache)
+        self.assertTrue('fr_FR' in cache)
+
+
+    def testPrintLocaleDeclarations(self):
+        app = Application()
+        app.setLocale(Locale('fi', 'FI'))
+        manager = AbstractCommunicationManager(app)
+        manager.requireLocale('sv_SE')
+
+        out = StringIO()
+        manager.printLocaleDeclarations(out)
+        self.assertEquals(', "locales":[' + ','.join([legacySerializeLocale(
+                generateLocaleFromName(name)) for name in ['fi_FI', 'sv_SE']])
+                + ']', out.getvalue())
+
+        # sent locales are not repeated
+        manager.requireLocale('de_DE')
+        out = StringIO()
+        manager.printLocaleDeclarations(out)
+        self.assertEquals(', "locales":[' + legacySerializeLocale(
+                generateLocaleFromName('de_DE')) + ']', out.getvalue())
+
+
+class PerformanceTestLocaleDeclarationCache(PerformanceTestCase):
+
+    _REPEATS = 5
+    _REPAINTS = 200
+    _LOCALES_FAIL_THRESHOLD = 30
+
+
+    def testRepaintPerformance(self):
+        # the declarations of the locales used by a typical application
+        # printed on each full repaint
+        names = ['en_US', 'fi_FI', 'de_DE']
+
+        legacy = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            for _ in range(self._REPAINTS):
+                for name in names:
+                    legacySerializeLocale(generateLocaleFromName(name))
+            legacy.append((1000 * time.time()) - start)
+
+        LocaleDeclarationCache.getInstance().preload(names)
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            for _ in range(self._REPAINTS):
+                app = Application()
+                app.setLocale(Locale('en', 'US'))
+                manager = AbstractCommunicationManager(app)
+                for name in names:
+                    manager.requireLocale(name)
+                manager.printLocaleDeclarations(StringIO())
+            times.append((1000 * time.time()) - start)
+
+        print ('Legacy locale serialization timings (ms) for %d repaints: %s'
+                % (self._REPAINTS, legacy))
+        self.checkMedian(self._REPAINTS, times, 'Locale declarations',
+                self._LOCALES_FAIL_THRESHOLD)
+
+
+def legacySerializeLocale(l):
+    # the serialization done for each locale on every full repaint prior
+    # to the cache
+    outWriter = StringIO()
+    outWriter.write('{\"name\":\"' + str(l) + '\",')
+
+    months = l.months['format']['wide'].values()
+    short_months = l.months['format']['abbreviated'].values()
+
+    outWriter.write(('\"smn\":[\"'
+            + short_months[0] + '\",\"' + short_months[1] + '\",\"'
+            + short_months[2] + '\",\"' + short_months[3] + '\",\"'
+            + short_months[4] + '\",\"' + short_months[5] + '\",\"'
+            + short_months[6] + '\",\"' + short_months[7] + '\",\"'
+            + short_months[8] + '\",\"' + short_months[9] + '\",\"'
+            + short_months[10] + '\",\"' + short_months[11] + '\"'
+            + '],').encode('utf-8'))
+    outWriter.write(('\"mn\":[\"'
+            + months[0] + '\",\"' + months[1] + '\",\"'
+            + months[2] + '\",\"' + months[3] + '\",\"'
+            + months[4] + '\",\"' + months[5] + '\",\"'
+            + months[6] + '\",\"' + months[7] + '\",\"'
+            + months[8] + '\",\"' + months[9] + '\",\"'
+            + months[10] + '\",\"' + months[11] + '\"'
+            + '],').encode('utf-8'))
+
+    days = l.days['format']['wide'].values()
+    short_days = l.days['format']['abbreviated'].values()
+    outWriter.write(('\"sdn\":[\"'
+            + short_days[6] + '\",\"'
+            + short_days[0] + '\",\"' + short_days[1] + '\",\"'
+            + short_days[2] + '\",\"' + short_days[3] + '\",\"'
+            + short_days[4] + '\",\"' + short_days[5] + '\"'
+            + '],').encode('utf-8'))
+    outWriter.write(('\"dn\":[\"'
+            + days[6] + '\",\"'
+            + days[0] + '\",\"' + days[1] + '\",\"'
+            + days[2] + '\",\"' + days[3] + '\",\"'
+            + days[4] + '\",\"' + days[5] + '\"'
+            + '],').encode('utf-8'))
+
+    fdow = 1 if l.first_week_day == 0 else 0
+    outWriter.write('\"fdow\":' + str(fdow) + ',')
+
+    try:
+        df = l.date_formats['short'].pattern
+        df += ' '
+        df += l.time_formats['short'].pattern
+        df = df.encode('utf-8')
+    except KeyError:
+        df = 'dd/MM/yy HH:mm'
+
+    timeStart = df.find('H')
+    if timeStart < 0:
+        timeStart = df.find('h')
+    ampm_first = df.find('a')
+    if ampm_first > 0 and ampm_first < timeStart:
+        timeStart = ampm_first
+    if timeStart == 0:
+        dateStart = df.find(' ')
+        if ampm_first > dateStart:
+            dateStart = df.find(' ', ampm_first)
+        dateformat = df[dateStart + 1:]
+    else:
+        dateformat = df[:timeStart - 1]
+
+    outWriter.write('\"df\":\"' + dateformat.strip() + '\",')
+
+    timeformat = df[timeStart:len(df)]
+    twelve_hour_clock = timeformat.find('a') > -1
+    hour_min_delimiter = '.' if timeformat.find('.') > -1 else ':'
+
+    outWriter.write('\"thc\":' + str(twelve_hour_clock).lower() + ',')
+    outWriter.write('\"hmd\":\"' + hour_min_delimiter + '\"')
+    if twelve_hour_clock:
+        ampm = [( l.periods['am'] ).encode('utf-8'),
+                ( l.periods['pm'] ).encode('utf-8')]
+        outWriter.write(',\"ampm\":[\"' + ampm[0] + '\",\"'
+                        + ampm[1] + '\"]')
+    outWriter.write('}')
+    return outWriter.getvalue()
@@ -0,0 +1,387 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+
+from unittest import TestCase
+
+from StringIO import StringIO
+
+from babel import Locale
+
+from muntjac.application import Application
+from muntjac.ui.window import Window
+
+from muntjac.terminal.stream_variable import IStreamVariable
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager, SimpleMultiPartInputStream, \
+    LimitedInputStream
+
+from muntjac.terminal.gwt.server.abstract_application_servlet import \
+    AbstractApplicationServlet
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+BOUNDARY = '----WebKitFormBoundaryx8Qz3kPp'
+
+
+def multipart(*parts):
+    """Returns a multipart body of the given (headers, content) parts."""
+    body = StringIO()
+    for headers, content in parts:
+        body.write('--' + BOUNDARY + '\r\n')
+        for header in headers:
+            body.write(header + '\r\n')
+        body.write('\r\n')
+        body.write(content)
+        body.write('\r\n')
+    body.write('--' + BOUNDARY + '--\r\n')
+    return body.getvalue()
+
+
+def filePart(content, filename='file.bin'):
+    return (['Content-Disposition: form-data; name="upload"; '
+            'filename="%s"' % filename,
+            'Content-Type: application/octet-stream'], content)
+
+
+def readAll(stream, size):
+    content = StringIO()
+    data = stream.read(size)
+    while data:
+        content.write(data)
+        data = stream.read(size)
+    return content.getvalue()
+
+
+class TestSimpleMultiPartInputStream(TestCase):
+
+    #: content ending with partial matches of the boundary
+    CONTENTS = ['', 'a', 'abc\r\n', '\r\n--', '\r\n-' + BOUNDARY[:-1],
+            'x\r\n--' + BOUNDARY[:5] + '\r\n--' + BOUNDARY[:-2] + 'y',
+            ''.join(chr(i % 256) for i in range(5000))]
+
+    def testSinglePart(self):
+        for content in self.CONTENTS:
+            body = multipart(filePart(content))
+            for bufferSize in [1, 7, len(BOUNDARY), 64 * 1024]:
+                for readSize in [1, 3, 1024]:
+                    stream = SimpleMultiPartInputStream(StringIO(body),
+                            BOUNDARY, len(body), bufferSize)
+                    headers = stream.nextPart()
+                    self.assertEquals('application/octet-stream',
+                            headers['content-type'])
+                    self.assertEquals(content, readAll(stream, readSize))
+                    self.assertEquals(None, stream.nextPart())
+
+
+    def testMultipleParts(self):
+        body = multipart((['Content-Disposition: form-data; name="a"'], '1'),
+                filePart('content\r\n'),
+                (['Content-Disposition: form-data; name="b"'], ''))
+        stream = SimpleMultiPartInputStream(StringIO(body), BOUNDARY,
+                len(body), 7)
+
+        self.assertEquals({'content-disposition': 'form-data; name="a"'},
+                stream.nextPart())
+        self.assertEquals('1', stream.read(10))
+
+        self.assertTrue('filename' in stream.nextPart()['content-disposition'])
+        self.assertEquals('content\r\n', readAll(stream, 4))
+
+        # the content of the last part is skipped
+        self.assertEquals('form-data; name="b"',
+                stream.nextPart()['content-disposition'])
+        self.assertEquals(None, stream.nextPart())
+
+
+    def testTell(self):
+        preamble = multipart(filePart(''))
+        preamble = preamble[:preamble.index('\r\n\r\n') + 4]
+        body = multipart(filePart('content'))
+        stream = SimpleMultiPartInputStream(StringIO(body), BOUNDARY,
+                len(body), 3)
+        stream.nextPart()
+        self.assertEquals(len(preamble), stream.tell())
+        self.assertEquals('content', readAll(stream, 2))
+
+
+    def testContentLength(self):
+        body = multipart(filePart('content'))
+        stream = SimpleMultiPartInputStream(StringIO(body + 'trailing'),
+                BOUNDARY, len(body) - 10)
+        stream.nextPart()
+        self.assertRaises(IOError, readAll, stream, 1024)
+
+
+    def testUnexpectedEnd(self):
+        body = multipart(filePart('content'))
+        body = body[:body.rindex('\r\n--')]
+        stream = SimpleMultiPartInputStream(StringIO(body), BOUNDARY)
+        stream.nextPart()
+        self.assertRaises(IOError, readAll, stream, 1024)
+
+        stream = SimpleMultiPartInputStream(StringIO('--' + BOUNDARY
+                + '\r\nContent-Type: text/plain'), BOUNDARY)
+        self.assertRaises(IOError, stream.nextPart)
+
+
+    def testLimitedInputStream(self):
+        stream = LimitedInputStream(StringIO('abcdefgh'), 5)
+        self.assertEquals('abc', stream.read(3))
+        self.assertEquals('de', stream.read(3))
+        self.assertEquals('', stream.read(3))
+
+        stream = LimitedInputStream(StringIO('abcdefgh'))
+        self.assertEquals('abcdefgh', stream.read())
+
+
+class TestStreamToReceiver(TestCase):
+
+    def setUp(self):
+        self.app = createApplication(0)
+        self.manager = AbstractCommunicationManager(self.app)
+
+
+    def testLockReleasedWhileReading(self):
+        lock = self.app.getLock()
+        stream = LockCheckingStream(lock, 'x' * 100000)
+        variable = StreamVariable(lock, CountingStream())
+
+        with lock:
+            with lock:
+                self.manager.streamToReceiver(stream, variable, 'file.bin',
+                        'application/octet-stream', 100000)
+            self.assertTrue(lock.isHeldByCurrentThread())
+
+        self.assertTrue(stream.reads > 1)
+        self.assertEquals([False] * stream.reads, stream.lockHeld)
+        self.assertTrue(variable.lockHeld)
+        self.assertFalse(False in variable.lockHeld)
+        self.assertEquals(100000, variable.out.count)
+        self.assertEquals(100000, variable.finished.getBytesReceived())
+
+
+    def testProgressEveryBlock(self):
+        lock = self.app.getLock()
+        stream = LockCheckingStream(lock, 'x' * 100000)
+        variable = StreamVariable(lock)
+
+        self.manager.streamToReceiver(stream, variable, 'file.bin',
+                'application/octet-stream', 100000)
+
+        received = [e.getBytesReceived() for e in variable.progress]
+        self.assertEquals(stream.reads, len(received))
+        self.assertEquals(100000, received[-1])
+
+
+    def testProgressThrottled(self):
+        app = createApplication(60 * 60 * 1000)
+        manager = AbstractCommunicationManager(app)
+        stream = LockCheckingStream(app.getLock(), 'x' * 100000)
+        variable = StreamVariable(app.getLock())
+
+        manager.streamToReceiver(stream, variable, 'file.bin',
+                'application/octet-stream', 100000)
+
+        # only the final progress event is sent
+        self.assertEquals([100000],
+                [e.getBytesReceived() for e in variable.progress])
+
+
+class PerformanceTestMultipartUpload(PerformanceTestCase):
+
+    _REPEATS = 3
+    _SIZE = 100 * 1024 * 1024
+    _LEGACY_SIZE = 1024 * 1024
+    _UPLOAD_FAIL_THRESHOLD = 1000
+
+
+    def setUp(self):
+        self.app = createApplication(500)
+        self.manager = AbstractCommunicationManager(self.app)
+
+
+    def testUploadThroughput(self):
+        legacy = list()
+        for _ in range(self._REPEATS):
+            stream = GeneratedMultipartStream(self._LEGACY_SIZE)
+            sink = CountingStream()
+            start = 1000 * time.time()
+            legacyStreamContent(stream, BOUNDARY, sink)
+            legacy.append((1000 * time.time()) - start)
+            self.assertEquals(self._LEGACY_SIZE, sink.count)
+
+        times = list()
+        for _ in range(self._REPEATS):
+            stream = GeneratedMultipartStream(self._SIZE)
+            variable = StreamVariable(self.app.getLock(), CountingStream())
+            start = 1000 * time.time()
+            with self.app.getLock():
+                reader = SimpleMultiPartInputStream(stream, BOUNDARY,
+                        len(stream))
+                reader.nextPart()
+                self.manager.streamToReceiver(reader, variable, 'file.bin',
+                        'application/octet-stream', self._SIZE)
+            times.append((1000 * time.time()) - start)
+            self.assertEquals(self._SIZE, variable.out.count)
+
+        print ('Legacy byte by byte multipart parsing timings (ms) for %d '
+                'bytes: %s' % (self._LEGACY_SIZE, legacy))
+        self.checkMedian(self._SIZE, times, 'Multipart upload',
+                self._UPLOAD_FAIL_THRESHOLD)
+
+
+def legacyStreamContent(stream, boundary, out):
+    # the byte by byte boundary matching done prior to the block parser
+    boundary = '\r\n--' + boundary
+    while stream.read(1) != '\n':
+        pass
+    headerEnd = ''
+    while headerEnd != '\r\n\r\n':
+        headerEnd = headerEnd[-3:] + stream.read(1)
+
+    matched = 0
+    while True:
+        c = stream.read(1)
+        if c == '':
+            raise IOError('The multipart stream ended unexpectedly')
+        if c == boundary[matched]:
+            matched += 1
+            if matched == len(boundary):
+                return
+        else:
+            if matched > 0:
+                out.write(boundary[:matched])
+                matched = 0
+                if c == boundary[0]:
+                    matched = 1
+                    continue
+            out.write(c)
+
+
+class GeneratedMultipartStream(object):
+    """Multipart body of a single file of the given size, the content is
+    generated as it is read."""
+
+    def __init__(self, size):
+        self._head = multipart(filePart(''))
+        self._tail = self._head[self._head.rindex('\r\n--'):]
+        self._head = self._head[:self._head.index('\r\n\r\n') + 4]
+        self._size = size
+        self._position = 0
+        self._block = ''.join(chr(i % 251) for i in range(64 * 1024))
+
+
+    def __len__(self):
+        return len(self._head) + self._size + len(self._tail)
+
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self)
+        position = self._position
+        head = len(self._head)
+        if position < head:
+            data = self._head[position:position + size]
+        elif position < head + self._size:
+            start = (position - head) % len(self._block)
+            data = self._block[start:start + min(size,
+                    head + self._size - position)]
+        else:
+            start = position - head - self._size
+            data = self._tail[start:start + size]
+        self._position += len(data)
+        return data
+
+
+class CountingStream(object):
+
+    def __init__(self):
+        self.count = 0
+
+
+    def write(self, data):
+        self.count += len(data)
+
+
+    def close(self):
+        pass
+
+
+class LockCheckingStream(object):
+    """Records whether the lock is held when the stream is read."""
+
+    def __init__(self, lock, content):
+        self._lock = lock
+        self._stream = StringIO(content)
+        self.lockHeld = list()
+        self.reads = 0
+
+
+    def read(self, size=-1):
+        self.lockHeld.append(self._lock.isHeldByCurrentThread())
+        self.reads += 1
+        return self._stream.read(size)
+
+
+class StreamVariable(IStreamVariable):
+    """Records the events and whether the lock is held when called."""
+
+    def __init__(self, lock, out=None):
+        self._lock = lock
+        self.out = StringIO() if out is None else out
+        self.lockHeld = list()
+        self.progress = list()
+        self.finished = None
+
+
+    def getOutputStream(self):
+        self.lockHeld.append(self._lock.isHeldByCurrentThread())
+        return self.out
+
+
+    def listenProgress(self):
+        return True
+
+
+    def onProgress(self, event):
+        self.lockHeld.append(self._lock.isHeldByCurrentThread())
+        self.progress.append(event)
+
+
+    def streamingStarted(self, event):
+        pass
+
+
+    def streamingFinished(self, event):
+        self.lockHeld.append(self._lock.isHeldByCurrentThread())
+        self.finished = event
+
+
+    def streamingFailed(self, event):
+        raise event.getException()
+
+
+    def isInterrupted(self):
+        return False
+
+
+def createApplication(progressInterval):
+    app = TestApp()
+    app.setLocale(Locale('en', 'US'))
+    app.start('http://localhost/', {
+        AbstractApplicationServlet.SERVLET_PARAMETER_DISABLE_XSRF_PROTECTION:
+                'true',
+        AbstractApplicationServlet.SERVLET_PARAMETER_UPLOAD_PROGRESS_INTERVAL:
+                str(progressInterval)}, None)
+    return app
+
+
+class TestApp(Application):
+
+    def init(self):
+        w = Window('Main window')
+        self.setMainWindow(w)
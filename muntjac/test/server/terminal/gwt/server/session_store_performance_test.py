@@ -0,0 +1,133 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from StringIO import StringIO
+
+from babel import Locale
+
+from muntjac.application import Application
+from muntjac.ui.window import Window
+from muntjac.ui.table import Table
+
+from muntjac.terminal.gwt.server.web_application_context import \
+    WebApplicationContext
+
+from muntjac.terminal.gwt.server.session_store import \
+    SessionAttributeStore, InProcessSessionStore, SnapshotSessionStore
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.test.server.terminal.gwt.server.session_store_test import \
+    SessionServlet
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+class PerformanceTestSessionStore(PerformanceTestCase):
+    """Measures the serialization cost of a request, i.e. the time taken
+    to pickle the session as the session backend does at the end of each
+    request, for an application with a few large tables."""
+
+    _REPEATS = 5
+    _TABLES = 4
+    _ROWS = 500
+    _COLUMNS = 5
+    _IN_PROCESS_FAIL_THRESHOLD = 50
+    _SNAPSHOT_FAIL_THRESHOLD = 50
+
+
+    def setUp(self):
+        self.app = TestApp()
+        self.app.setLocale(Locale('en', 'US'))
+        self.app.init()
+        window = self.app.getMainWindow()
+
+        for _ in range(self._TABLES):
+            table = Table()
+            for col in range(self._COLUMNS):
+                table.addContainerProperty('col%d' % col, str, '')
+            for row in range(self._ROWS):
+                table.addItem(['Row %d, column %d' % (row, col)
+                        for col in range(self._COLUMNS)], row)
+            table.setPageLength(self._ROWS)
+            window.addComponent(table)
+
+        manager = AbstractCommunicationManager(self.app)
+        manager.writeUidlResponce(None, True, StringIO(), window, False)
+
+        self.context = WebApplicationContext()
+        self.context.addApplication(self.app)
+        self.context.applicationToAjaxAppMgrMap[self.app] = manager
+
+        self.servlet = SessionServlet()
+
+
+    def testSessionStorePerformance(self):
+        legacy = self.timeRequests(SessionAttributeStore(), False)
+        inProcess = self.timeRequests(InProcessSessionStore(), False)
+        clean = self.timeRequests(SnapshotSessionStore(), False)
+        dirty = self.timeRequests(SnapshotSessionStore(), True)
+        compressed = self.timeRequests(SnapshotSessionStore(
+                compressLevel=1), True)
+
+        print ('Session attribute store request timings (ms): %s' % legacy)
+        print ('Snapshot store dirty request timings (ms): %s' % dirty)
+        print ('Compressed snapshot store dirty request timings (ms): %s'
+                % compressed)
+        print ('Session size (bytes): attribute store %d, in-process store '
+                '%d, snapshot store %d, compressed snapshot store %d' %
+                (self.sessionSize(SessionAttributeStore(), False),
+                 self.sessionSize(InProcessSessionStore(), False),
+                 self.sessionSize(SnapshotSessionStore(), True),
+                 self.sessionSize(SnapshotSessionStore(compressLevel=1),
+                        True)))
+
+        self.assertTrue(self.median(inProcess) < self.median(legacy))
+        self.assertTrue(self.median(clean) < self.median(legacy))
+
+        self.checkMedian(self._TABLES * self._ROWS, inProcess,
+                'In-process store request', self._IN_PROCESS_FAIL_THRESHOLD)
+        self.checkMedian(self._TABLES * self._ROWS, clean,
+                'Snapshot store clean request', self._SNAPSHOT_FAIL_THRESHOLD)
+
+
+    def request(self, store, session, dirty):
+        name = 'context'
+        if store.getAttribute(self.servlet, session, name) is None:
+            store.setAttribute(self.servlet, session, name, self.context)
+        if dirty:
+            store.markDirty(self.servlet, session)
+        store.requestEnd(self.servlet, session)
+        # saved by the session backend
+        return pickle.dumps(session, pickle.HIGHEST_PROTOCOL)
+
+
+    def timeRequests(self, store, dirty):
+        session = dict()
+        self.request(store, session, True)
+
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            self.request(store, session, dirty)
+            times.append((1000 * time.time()) - start)
+        return times
+
+
+    def sessionSize(self, store, dirty):
+        return len(self.request(store, dict(), dirty))
+
+
+class TestApp(Application):
+
+    def init(self):
+        w = Window('Main window')
+        self.setMainWindow(w)
@@ -0,0 +1,142 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+
+from unittest import TestCase
+
+from muntjac.terminal.gwt.server.session_store import \
+    InProcessSessionStore, SnapshotSessionStore, SessionAttributeStore
+
+
+class TestSessionStore(TestCase):
+
+    def setUp(self):
+        self.servlet = SessionServlet()
+        self.session = dict()
+
+
+    def testSessionAttributeStore(self):
+        store = SessionAttributeStore()
+        store.setAttribute(self.servlet, self.session, 'name', 'value')
+        self.assertEquals('value', self.session['name'])
+        self.assertEquals('value',
+                store.getAttribute(self.servlet, self.session, 'name'))
+
+
+    def testInProcessStoreKeepsValuesOutOfSession(self):
+        store = InProcessSessionStore()
+        value = object()
+        store.setAttribute(self.servlet, self.session, 'name', value)
+
+        self.assertEquals([InProcessSessionStore.KEY_ATTRIBUTE],
+                self.session.keys())
+        self.assertTrue(value is store.getAttribute(self.servlet,
+                self.session, 'name'))
+        self.assertEquals(None, store.getAttribute(self.servlet, dict(),
+                'name'))
+
+
+    def testInProcessStoreInvalidate(self):
+        store = InProcessSessionStore()
+        store.setAttribute(self.servlet, self.session, 'name', 'value')
+        store.invalidate(self.servlet, self.session)
+
+        self.assertEquals(0, store.size())
+        self.assertEquals(None, store.getAttribute(self.servlet,
+                self.session, 'name'))
+
+
+    def testInProcessStoreRemovesExpired(self):
+        store = InProcessSessionStore()
+        store.setAttribute(self.servlet, self.session, 'name', 'value')
+        other = dict()
+        store.setAttribute(self.servlet, other, 'name', 'value')
+
+        self.servlet.timeout = 0
+        store.getAttribute(self.servlet, other, 'name')
+        self.servlet.timeout = -1
+        store.getAttribute(self.servlet, self.session, 'name')
+        time.sleep(0.01)
+        store.requestEnd(self.servlet, self.session)
+
+        # a negative interval never expires
+        self.assertEquals(1, store.size())
+        self.assertEquals(None, store.getAttribute(self.servlet, other,
+                'name'))
+
+
+    def testSnapshotOnlyWhenDirty(self):
+        store = SnapshotSessionStore()
+        store.setAttribute(self.servlet, self.session, 'name', ['value'])
+        store.requestEnd(self.servlet, self.session)
+        snapshot = self.session[SnapshotSessionStore.SNAPSHOT_ATTRIBUTE]
+        self.assertEquals(1, snapshot[0])
+
+        # clean request
+        store.getAttribute(self.servlet, self.session, 'name')
+        store.requestEnd(self.servlet, self.session)
+        self.assertTrue(snapshot is
+                self.session[SnapshotSessionStore.SNAPSHOT_ATTRIBUTE])
+
+        store.getAttribute(self.servlet, self.session, 'name')
+        store.markDirty(self.servlet, self.session)
+        store.requestEnd(self.servlet, self.session)
+        self.assertEquals(2,
+                self.session[SnapshotSessionStore.SNAPSHOT_ATTRIBUTE][0])
+
+
+    def testSnapshotInterval(self):
+        store = SnapshotSessionStore(interval=0)
+        store.setAttribute(self.servlet, self.session, 'name', ['value'])
+        store.requestEnd(self.servlet, self.session)
+        time.sleep(0.01)
+        store.requestEnd(self.servlet, self.session)
+        self.assertEquals(2,
+                self.session[SnapshotSessionStore.SNAPSHOT_ATTRIBUTE][0])
+
+
+    def testSnapshotRestoredInOtherProcess(self):
+        for level in [None, 6]:
+            store = SnapshotSessionStore(compressLevel=level)
+            session = dict()
+            store.setAttribute(self.servlet, session, 'name', ['value'])
+            store.requestEnd(self.servlet, session)
+
+            # another process with an older state of the session
+            other = SnapshotSessionStore(compressLevel=level)
+            self.assertEquals(['value'],
+                    other.getAttribute(self.servlet, session, 'name'))
+            other.getAttribute(self.servlet, session, 'name').append('more')
+            other.markDirty(self.servlet, session)
+            other.requestEnd(self.servlet, session)
+
+            self.assertEquals(['value', 'more'],
+                    store.getAttribute(self.servlet, session, 'name'))
+
+
+    def testRequestEndWithoutSession(self):
+        # the servlet ends requests that have not created a session
+        for store in [InProcessSessionStore(),
+                SnapshotSessionStore(interval=0)]:
+            store.requestEnd(self.servlet, None)
+            self.assertEquals(0, store.size())
+
+
+class SessionServlet(object):
+    """Servlet storing the session attributes in a dictionary."""
+
+    def __init__(self):
+        self.timeout = 1800
+
+
+    def getSessionAttribute(self, session, name, default=None):
+        return session.get(name, default)
+
+
+    def setSessionAttribute(self, session, name, value):
+        session[name] = value
+
+
+    def getMaxInactiveInterval(self, session):
+        return self.timeout
@@ -0,0 +1,378 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import os
+import gzip
+import time
+import shutil
+import tempfile
+import mimetypes
+
+from unittest import TestCase
+from email.utils import formatdate
+
+from paste.fixture import TestApp
+
+from muntjac.demo.Calc import Calc
+
+from muntjac.terminal.gwt.server.application_servlet import \
+    ApplicationServlet
+
+from muntjac.terminal.gwt.server.static_resource_cache import \
+    StaticResourceCache
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+class TestStaticResourceCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def createFile(self, name, content, mtime=None):
+        path = os.path.join(self.directory, name)
+        fd = open(path, 'wb')
+        fd.write(content)
+        fd.close()
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+
+    def testCachedResource(self):
+        path = self.createFile('styles.css', 'body {}')
+        cache = StaticResourceCache(checkInterval=60)
+
+        resource = cache.getResource(path)
+        self.assertEquals('body {}', resource.data)
+        self.assertEquals(7, resource.size)
+        self.assertEquals('text/css', resource.mimetype)
+        self.assertTrue(resource.etag.startswith('"'))
+        self.assertTrue(resource is cache.getResource(path))
+        self.assertEquals(1, len(cache))
+        self.assertEquals(7, cache.size())
+
+
+    def testMissingResource(self):
+        cache = StaticResourceCache()
+        self.assertEquals(None, cache.getResource(
+                os.path.join(self.directory, 'missing.css')))
+        self.assertEquals(None, cache.getResource(self.directory))
+
+
+    def testModifiedResourceReloaded(self):
+        path = self.createFile('styles.css', 'body {}', 1000)
+        cache = StaticResourceCache(checkInterval=0)
+        resource = cache.getResource(path)
+
+        self.createFile('styles.css', 'body {color: red}', 2000)
+        modified = cache.getResource(path)
+        self.assertEquals('body {color: red}', modified.data)
+        self.assertNotEquals(resource.etag, modified.etag)
+        self.assertEquals(2000000, modified.getLastModified())
+
+
+    def testPrecompressedVariant(self):
+        path = self.createFile('app.js', 'var a = 1;', 1000)
+        gz = gzip.open(path + '.gz', 'wb')
+        gz.write('var a = 1;')
+        gz.close()
+
+        resource = StaticResourceCache().getResource(path)
+        self.assertEquals(path + '.gz', resource.gzipPath)
+        self.assertEquals(resource.gzipSize, len(resource.gzipData))
+        self.assertTrue(resource.gzipEtag.endswith('-gz"'))
+        self.assertNotEquals(resource.etag, resource.gzipEtag)
+
+        # outdated variants are ignored
+        self.createFile('app.js', 'var a = 2;', time.time() + 10)
+        resource = StaticResourceCache().getResource(path)
+        self.assertEquals(None, resource.gzipPath)
+
+
+    def testLargeResourceNotCached(self):
+        path = self.createFile('large.bin', 'x' * 100)
+        cache = StaticResourceCache(maxSize=1000, maxFileSize=50)
+
+        resource = cache.getResource(path)
+        self.assertFalse(resource.isCached())
+        self.assertEquals(100, resource.size)
+        self.assertEquals(0, len(cache))
+
+
+    def testLeastRecentlyUsedEvicted(self):
+        cache = StaticResourceCache(maxSize=250, maxFileSize=100,
+                checkInterval=60)
+        paths = [self.createFile('%d.txt' % i, 'x' * 100)
+                for i in range(3)]
+
+        cache.getResource(paths[0])
+        cache.getResource(paths[1])
+        cache.getResource(paths[0])
+        cache.getResource(paths[2])
+
+        self.assertEquals(2, len(cache))
+        self.assertEquals(200, cache.size())
+        self.assertTrue(cache.getResource(paths[0])
+                is cache.getResource(paths[0]))
+
+
+class RecordingFileWrapper(object):
+    """A C{wsgi.file_wrapper} recording the files it sends."""
+
+    def __init__(self):
+        self.wrapped = list()
+
+
+    def __call__(self, stream, blockSize=8192):
+        self.wrapped.append(stream.name)
+        return iter(lambda: stream.read(blockSize), '')
+
+
+class TestStaticResourceServing(TestCase):
+
+    _CONTENT = 'body { color: red; }'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'VAADIN', 'themes'))
+        self.path = self.createFile('styles.css', self._CONTENT)
+        self.fileWrapper = RecordingFileWrapper()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def createFile(self, name, content):
+        path = os.path.join(self.directory, 'VAADIN', 'themes', name)
+        fd = open(path, 'wb')
+        fd.write(content)
+        fd.close()
+        return path
+
+
+    def createGzipFile(self):
+        gz = gzip.open(self.path + '.gz', 'wb')
+        gz.write(self._CONTENT)
+        gz.close()
+        fd = open(self.path + '.gz', 'rb')
+        data = fd.read()
+        fd.close()
+        return data
+
+
+    def createApp(self, **kw_args):
+        servlet = ApplicationServlet(Calc, contextRoot=self.directory,
+                **kw_args)
+        return TestApp(servlet,
+                extra_environ={'wsgi.file_wrapper': self.fileWrapper})
+
+
+    def get(self, app, name='styles.css', **headers):
+        return app.get('/VAADIN/themes/' + name, headers=headers,
+                status='*')
+
+
+    def headerValues(self, response, name):
+        return [value for header, value in response.headers
+                if header.lower() == name.lower()]
+
+
+    def testHeaders(self):
+        response = self.get(self.createApp(resourceCacheTime=60))
+        self.assertEquals(200, response.status)
+        self.assertEquals(self._CONTENT, response.body)
+        self.assertEquals('text/css', response.header('Content-Type'))
+        self.assertEquals('max-age=60', response.header('Cache-Control'))
+        self.assertEquals(str(len(self._CONTENT)),
+                response.header('Content-Length'))
+        self.assertEquals('bytes', response.header('Accept-Ranges'))
+        self.assertEquals(formatdate(int(os.path.getmtime(self.path)),
+                usegmt=True), response.header('Last-Modified'))
+        self.assertEquals([], self.headerValues(response, 'Vary'))
+
+        self.assertEquals(404, self.get(self.createApp(),
+                'missing.css').status)
+
+
+    def testNotModified(self):
+        app = self.createApp()
+        response = self.get(app)
+        etag = response.header('ETag')
+        lastModified = response.header('Last-Modified')
+
+        for ifNoneMatch in [etag, '"other", ' + etag, '*']:
+            response = self.get(app, If_None_Match=ifNoneMatch)
+            self.assertEquals(304, response.status)
+            self.assertEquals('', response.body)
+            self.assertEquals([], self.headerValues(response,
+                    'Content-Type'))
+            self.assertEquals(etag, response.header('ETag'))
+
+        response = self.get(app, If_None_Match='"other"')
+        self.assertEquals(200, response.status)
+        self.assertEquals(self._CONTENT, response.body)
+
+        self.assertEquals(304, self.get(app,
+                If_Modified_Since=lastModified).status)
+        # If-None-Match takes precedence over If-Modified-Since
+        self.assertEquals(200, self.get(app, If_None_Match='"other"',
+                If_Modified_Since=lastModified).status)
+
+
+    def testRange(self):
+        for app in [self.createApp(),
+                self.createApp(staticResourceCacheSize=0)]:
+            size = len(self._CONTENT)
+            etag = self.get(app).header('ETag')
+
+            for header, first, last in [('bytes=2-5', 2, 5),
+                    ('bytes=-4', size - 4, size - 1),
+                    ('bytes=10-', 10, size - 1),
+                    ('bytes=10-1000', 10, size - 1)]:
+                response = self.get(app, Range=header)
+                self.assertEquals(206, response.status)
+                self.assertEquals(self._CONTENT[first:last + 1],
+                        response.body)
+                self.assertEquals('bytes %d-%d/%d' % (first, last, size),
+                        response.header('Content-Range'))
+                self.assertEquals(str((last - first) + 1),
+                        response.header('Content-Length'))
+
+            response = self.get(app, Range='bytes=%d-' % size)
+            self.assertEquals(416, response.status)
+            self.assertEquals('bytes */%d' % size,
+                    response.header('Content-Range'))
+
+            # multiple ranges and outdated conditional ranges get the
+            # whole file
+            for headers in [{'Range': 'bytes=0-1,4-5'},
+                    {'Range': 'bytes=2-5', 'If_Range': '"other"'}]:
+                response = self.get(app, **headers)
+                self.assertEquals(200, response.status)
+                self.assertEquals(self._CONTENT, response.body)
+
+            response = self.get(app, Range='bytes=2-5', If_Range=etag)
+            self.assertEquals(206, response.status)
+
+
+    def testGzip(self):
+        gzipData = self.createGzipFile()
+        for app in [self.createApp(),
+                self.createApp(staticResourceCacheSize=0)]:
+            response = self.get(app)
+            self.assertEquals(self._CONTENT, response.body)
+            self.assertEquals([], self.headerValues(response,
+                    'Content-Encoding'))
+            self.assertEquals('Accept-Encoding', response.header('Vary'))
+            etag = response.header('ETag')
+
+            response = self.get(app, Accept_Encoding='deflate, gzip')
+            self.assertEquals(gzipData, response.body)
+            self.assertEquals('gzip', response.header('Content-Encoding'))
+            self.assertEquals(str(len(gzipData)),
+                    response.header('Content-Length'))
+            self.assertEquals('Accept-Encoding', response.header('Vary'))
+            gzipEtag = response.header('ETag')
+            self.assertNotEquals(etag, gzipEtag)
+
+            self.assertEquals(self._CONTENT, self.get(app,
+                    Accept_Encoding='gzip;q=0').body)
+
+            # the validator of the variant sent is matched
+            self.assertEquals(304, self.get(app, If_None_Match=gzipEtag,
+                    Accept_Encoding='gzip').status)
+            self.assertEquals(200, self.get(app, If_None_Match=etag,
+                    Accept_Encoding='gzip').status)
+            self.assertEquals(200, self.get(app,
+                    If_None_Match=gzipEtag).status)
+            self.assertEquals(304, self.get(app, If_None_Match=etag).status)
+
+            # ranges are served from the file
+            response = self.get(app, Range='bytes=0-3',
+                    Accept_Encoding='gzip')
+            self.assertEquals(206, response.status)
+            self.assertEquals(self._CONTENT[:4], response.body)
+            self.assertEquals(etag, response.header('ETag'))
+
+
+    def testFileWrapper(self):
+        self.createGzipFile()
+        app = self.createApp(staticResourceCacheSize=0)
+
+        response = self.get(app)
+        self.assertEquals(self._CONTENT, response.body)
+        self.assertEquals([self.path], self.fileWrapper.wrapped)
+
+        self.assertEquals(206, self.get(app, Range='bytes=1-2').status)
+        self.assertEquals([self.path], self.fileWrapper.wrapped)
+
+        self.get(app, Accept_Encoding='gzip')
+        self.assertEquals([self.path, self.path + '.gz'],
+                self.fileWrapper.wrapped)
+
+        # cached resources are sent from memory
+        self.get(self.createApp())
+        self.assertEquals(2, len(self.fileWrapper.wrapped))
+
+
+class PerformanceTestStaticResourceCache(PerformanceTestCase):
+
+    _REPEATS = 5
+    _FILES = 50
+    _REQUESTS = 2000
+    _CACHED_FAIL_THRESHOLD = 500
+
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = list()
+        for i in range(self._FILES):
+            path = os.path.join(self.directory, 'file%d.js' % i)
+            fd = open(path, 'wb')
+            fd.write('var x%d = "%s";\n' % (i, 'x' * 20000))
+            fd.close()
+            self.paths.append(path)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def testStaticResourceCachePerformance(self):
+        cache = StaticResourceCache()
+        legacy = self.timeRequests(legacyServe)
+        times = self.timeRequests(lambda path: cache.getResource(path).data)
+
+        print ('Uncached static resource timings (ms) for %d requests: %s' %
+                (self._REQUESTS, legacy))
+        self.checkMedian(self._REQUESTS, times, 'StaticResourceCache',
+                self._CACHED_FAIL_THRESHOLD)
+
+
+    def timeRequests(self, serve):
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            for i in range(self._REQUESTS):
+                serve(self.paths[i % self._FILES])
+            times.append((1000 * time.time()) - start)
+        return times
+
+
+def legacyServe(path):
+    # the file system access done for every request prior to the cache
+    if not os.path.exists(path):
+        return None
+    os.path.getmtime(path)
+    mimetypes.guess_type(path)
+    fd = open(path, 'rb')
+    data = fd.read()
+    fd.close()
+    return data
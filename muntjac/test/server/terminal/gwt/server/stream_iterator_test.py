@@ -0,0 +1,170 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import os
+import tempfile
+
+from unittest import TestCase
+
+from StringIO import StringIO
+
+from paste.fixture import TestApp
+from paste.session import SessionMiddleware
+
+from muntjac.application import Application
+from muntjac.ui.window import Window
+from muntjac.demo.util import InMemorySession
+from muntjac.terminal.file_resource import FileResource
+from muntjac.terminal.stream_resource import \
+    StreamResource, IStreamSource, IterableStream
+
+from muntjac.terminal.gwt.server.paste_wsgi_servlet import StreamIterator
+
+from muntjac.terminal.gwt.server.application_servlet import \
+    ApplicationServlet
+
+from muntjac.terminal.gwt.server.abstract_application_servlet import \
+    AbstractApplicationServlet
+
+
+class TestStreamIterator(TestCase):
+
+    def setUp(self):
+        self.data = ''.join([chr(i % 256) for i in range(10000)])
+
+
+    def testBlocks(self):
+        blocks = list(StreamIterator(StringIO(self.data), None, 4096))
+        self.assertEquals([4096, 4096, 1808], [len(b) for b in blocks])
+        self.assertEquals(self.data, ''.join(blocks))
+
+
+    def testLength(self):
+        stream = StringIO(self.data)
+        stream.seek(100)
+        blocks = list(StreamIterator(stream, 5000, 4096))
+        self.assertEquals([4096, 904], [len(b) for b in blocks])
+        self.assertEquals(self.data[100:5100], ''.join(blocks))
+
+
+    def testClose(self):
+        stream = StringIO(self.data)
+        StreamIterator(stream).close()
+        self.assertRaises(ValueError, stream.read)
+
+
+    def testStreamLength(self):
+        servlet = AbstractApplicationServlet()
+        stream = StringIO(self.data)
+        stream.seek(1000)
+        self.assertEquals(9000, servlet.getStreamLength(stream))
+        self.assertEquals(1000, stream.tell())
+        self.assertEquals(None, servlet.getStreamLength(object()))
+
+
+DATA = ''.join([chr(i % 256) for i in range(10000)])
+
+
+class IterableSource(IStreamSource):
+    """A source of streams that can not be seeked."""
+
+    def getStream(self):
+        return IterableStream(iter([DATA[:3000], DATA[3000:]]))
+
+
+class DownloadApplication(Application):
+
+    instances = list()
+
+    def init(self):
+        self.instances.append(self)
+        self.setMainWindow(Window('downloads'))
+        self.file = FileResource(self.path, self)
+        self.stream = StreamResource(IterableSource(), 'data.bin', self)
+
+
+class RecordingFileWrapper(object):
+    """A C{wsgi.file_wrapper} recording the streams it sends."""
+
+    def __init__(self):
+        self.wrapped = list()
+
+
+    def __call__(self, stream, blockSize=8192):
+        self.wrapped.append(stream)
+        return iter(lambda: stream.read(blockSize), '')
+
+
+class TestDownloads(TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp('.bin')
+        os.write(fd, DATA)
+        os.close(fd)
+        DownloadApplication.path = self.path
+
+        self.fileWrapper = RecordingFileWrapper()
+        self.app = TestApp(SessionMiddleware(
+                ApplicationServlet(DownloadApplication),
+                session_class=InMemorySession),
+                extra_environ={'wsgi.file_wrapper': self.fileWrapper})
+        self.app.get('/')
+        self.application = DownloadApplication.instances.pop()
+
+
+    def tearDown(self):
+        os.remove(self.path)
+
+
+    def get(self, resource, **headers):
+        url = self.application.getRelativeLocation(resource)
+        return self.app.get(url.replace('app://', '/'), headers=headers,
+                status='*')
+
+
+    def testFile(self):
+        response = self.get(self.application.file)
+        self.assertEquals(200, response.status)
+        self.assertEquals(DATA, response.body)
+        self.assertEquals(str(len(DATA)), response.header('Content-Length'))
+        self.assertEquals('bytes', response.header('Accept-Ranges'))
+        # whole files are sent with the file wrapper of the server
+        self.assertEquals([self.path],
+                [stream.name for stream in self.fileWrapper.wrapped])
+
+
+    def testRange(self):
+        size = len(DATA)
+        for header, first, last in [('bytes=100-4195', 100, 4195),
+                ('bytes=-10', size - 10, size - 1),
+                ('bytes=9000-', 9000, size - 1)]:
+            response = self.get(self.application.file, Range=header)
+            self.assertEquals(206, response.status)
+            self.assertEquals(DATA[first:last + 1], response.body)
+            self.assertEquals('bytes %d-%d/%d' % (first, last, size),
+                    response.header('Content-Range'))
+            self.assertEquals(str((last - first) + 1),
+                    response.header('Content-Length'))
+        self.assertEquals([], self.fileWrapper.wrapped)
+
+        response = self.get(self.application.file,
+                Range='bytes=%d-' % size)
+        self.assertEquals(416, response.status)
+        self.assertEquals('bytes */%d' % size,
+                response.header('Content-Range'))
+        self.assertEquals('0', response.header('Content-Length'))
+        self.assertEquals('', response.body)
+
+        # multiple ranges get the whole file
+        response = self.get(self.application.file, Range='bytes=0-1,5-6')
+        self.assertEquals(200, response.status)
+        self.assertEquals(DATA, response.body)
+
+
+    def testUnseekableStream(self):
+        # the length of the stream is not known, so ranges are ignored
+        response = self.get(self.application.stream, Range='bytes=0-9')
+        self.assertEquals(200, response.status)
+        self.assertEquals(DATA, response.body)
+        self.assertEquals([], [name for name, _ in response.headers
+                if name.lower() in ('content-length', 'accept-ranges')])
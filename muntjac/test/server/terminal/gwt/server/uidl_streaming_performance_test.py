@@ -0,0 +1,149 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+
+from StringIO import StringIO
+
+from babel import Locale
+
+from muntjac.application import Application
+from muntjac.ui.window import Window
+from muntjac.ui.table import Table
+from muntjac.ui.vertical_layout import VerticalLayout
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+class PerformanceTestUidlStreaming(PerformanceTestCase):
+
+    _REPEATS = 5
+    _TABLES = 8
+    _ROWS = 500
+    _COLUMNS = 5
+    _STREAMING_FAIL_THRESHOLD = 1000
+
+
+    def setUp(self):
+        self.app = TestApp()
+        self.app.setLocale(Locale('en', 'US'))
+        self.app.init()
+        self.window = self.app.getMainWindow()
+
+        self.tables = list()
+        for _ in range(self._TABLES):
+            # one top-level change per table
+            layout = VerticalLayout()
+            self.window.addComponent(layout)
+            table = Table()
+            for col in range(self._COLUMNS):
+                table.addContainerProperty('col%d' % col, str, '')
+            for row in range(self._ROWS):
+                table.addItem(['Row %d, column %d' % (row, col)
+                        for col in range(self._COLUMNS)], row)
+            table.setPageLength(self._ROWS)
+            layout.addComponent(table)
+            self.tables.append(table)
+
+        self.manager = AbstractCommunicationManager(self.app)
+        self.manager.writeUidlResponce(None, True, StringIO(), self.window,
+                False)
+
+
+    def testStreamingOutput(self):
+        self.invalidate()
+        buffered = self.paint(None)
+
+        self.invalidate()
+        out = StreamingOutput()
+        self.paint(out)
+
+        self.assertEquals(buffered.getvalue(), out.getvalue())
+        # one flush per repainted table
+        self.assertEquals(self._TABLES, out.flushes)
+
+
+    def testStreamingPerformance(self):
+        ttfb = list()
+        peak = list()
+        for _ in range(self._REPEATS):
+            self.invalidate()
+            start = 1000 * time.time()
+            out = self.paint(None)
+            ttfb.append((1000 * time.time()) - start)
+            peak.append(len(out.getvalue()))
+
+        times = list()
+        for _ in range(self._REPEATS):
+            self.invalidate()
+            out = StreamingOutput()
+            start = 1000 * time.time()
+            self.paint(out)
+            times.append(out.firstFlush - start)
+
+            peakBuffered = out.peak
+            self.assertTrue(peakBuffered < self.median(peak))
+
+        print ('Buffered UIDL time to first byte (ms): %s, peak buffered '
+                'bytes: %d' % (ttfb, self.median(peak)))
+        print ('Streamed UIDL peak buffered bytes: %d' % peakBuffered)
+        self.checkMedian(self._TABLES * self._ROWS, times,
+                'Streamed UIDL time to first byte',
+                self._STREAMING_FAIL_THRESHOLD)
+
+
+    def invalidate(self):
+        for table in self.tables:
+            table.refreshRowCache()
+
+
+    def paint(self, out):
+        if out is None:
+            out = StringIO()
+            flush = None
+        else:
+            flush = out.flush
+        self.manager.writeUidlResponce(None, False, out, self.window, False,
+                flush)
+        return out
+
+
+class StreamingOutput(object):
+    """Output stream that records when content is first sent to the
+    client and how much content is buffered between flushes."""
+
+    def __init__(self):
+        self._buffer = StringIO()
+        self._sent = StringIO()
+        self.firstFlush = None
+        self.flushes = 0
+        self.peak = 0
+
+
+    def write(self, s):
+        self._buffer.write(s)
+
+
+    def flush(self):
+        if self.firstFlush is None:
+            self.firstFlush = 1000 * time.time()
+        self.flushes += 1
+        value = self._buffer.getvalue()
+        self.peak = max(self.peak, len(value))
+        self._sent.write(value)
+        self._buffer = StringIO()
+
+
+    def getvalue(self):
+        # content written after the last change is sent with the response
+        return self._sent.getvalue() + self._buffer.getvalue()
+
+
+class TestApp(Application):
+
+    def init(self):
+        w = Window('Main window')
+        self.setMainWindow(w)
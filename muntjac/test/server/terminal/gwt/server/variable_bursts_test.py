@@ -0,0 +1,222 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import time
+
+from unittest import TestCase
+
+from StringIO import StringIO
+
+from babel import Locale
+
+from muntjac.application import Application
+from muntjac.ui.window import Window
+from muntjac.ui.label import Label
+from muntjac.ui.button import Button, IClickListener
+from muntjac.ui.text_field import TextField
+from muntjac.ui.vertical_layout import VerticalLayout
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.terminal.gwt.server.abstract_application_servlet import \
+    AbstractApplicationServlet
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+BURST = AbstractCommunicationManager.VAR_BURST_SEPARATOR
+RECORD = AbstractCommunicationManager._VAR_RECORD_SEPARATOR
+FIELD = AbstractCommunicationManager._VAR_FIELD_SEPARATOR
+
+
+class TestVariableBursts(TestCase):
+
+    def setUp(self):
+        self.app = createApplication()
+        self.window = self.app.getMainWindow()
+
+        self.field = TextField()
+        self.window.addComponent(self.field)
+        self.removeButton = Button('Remove', ClickListener(
+                lambda: self.window.removeComponent(self.field)))
+        self.window.addComponent(self.removeButton)
+        self.label = Label('label')
+        self.window.addComponent(self.label)
+        self.labelButton = Button('Change label', ClickListener(
+                lambda: self.label.setValue('changed')))
+        self.window.addComponent(self.labelButton)
+
+        self.manager = AbstractCommunicationManager(self.app)
+        self.manager.writeUidlResponce(None, True, StringIO(), self.window,
+                False)
+
+
+    def handle(self, *bursts):
+        payload = BURST.join(['key'] + [RECORD.join(b) for b in bursts])
+        return self.manager.handleVariables(Request(payload), Response(),
+                None, self.app, self.window)
+
+
+    def textChange(self, component, value):
+        return FIELD.join([value, self.manager.getPaintableId(component),
+                'text', 's'])
+
+
+    def click(self, button):
+        return FIELD.join(['true', self.manager.getPaintableId(button),
+                'state', 'b'])
+
+
+    def testChangesOfAllBurstsPainted(self):
+        pid = self.manager.getPaintableId(self.field)
+        self.assertTrue(self.handle([self.click(self.labelButton)],
+                [self.textChange(self.field, 'first')],
+                [self.textChange(self.field, 'second')]))
+
+        self.assertEquals('second', self.field.getValue())
+        self.assertEquals(pid, self.manager.getPaintableId(self.field))
+        # the changes of the first burst are painted in the response
+        self.assertTrue(self.label in self.manager._dirtyPaintables)
+
+
+    def testRemovedComponentNotUpdated(self):
+        fieldChange = self.textChange(self.field, 'changed')
+        click = self.click(self.removeButton)
+
+        self.assertFalse(self.handle([click], [fieldChange]))
+        self.assertEquals(None, self.field.getApplication())
+        self.assertFalse(self.manager.hasPaintableId(self.field))
+        self.assertNotEquals('changed', self.field.getValue())
+
+
+class PerformanceTestVariableBursts(PerformanceTestCase):
+
+    _REPEATS = 5
+    _BURSTS = 5
+    _LAYOUTS = 50
+    _COMPONENTS = 4000
+    _BURSTS_FAIL_THRESHOLD = 100
+
+
+    def setUp(self):
+        self.app = createApplication()
+        self.window = self.app.getMainWindow()
+
+        for _ in range(self._LAYOUTS):
+            layout = VerticalLayout()
+            self.window.addComponent(layout)
+            for i in range(self._COMPONENTS / self._LAYOUTS):
+                layout.addComponent(Label('Label %d' % i))
+
+        self.field = TextField()
+        self.window.addComponent(self.field)
+
+        self.manager = AbstractCommunicationManager(self.app)
+        self.manager.writeUidlResponce(None, True, StringIO(), self.window,
+                False)
+
+
+    def testMultiBurstPerformance(self):
+        # the ids of paintables without a debug id change on repaint
+        self.field.setDebugId('field')
+        legacy = self.timeRequests(LegacyCommunicationManager(self.app))
+        times = self.timeRequests(self.manager)
+
+        print ('Multi-burst request timings with repaint between bursts '
+                '(ms): %s' % legacy)
+        self.checkMedian(self._COMPONENTS, times, 'Multi-burst request',
+                self._BURSTS_FAIL_THRESHOLD)
+
+
+    def timeRequests(self, manager):
+        manager.writeUidlResponce(None, True, StringIO(), self.window, False)
+        times = list()
+        for r in range(self._REPEATS):
+            bursts = [FIELD.join(['value %d %d' % (r, b),
+                    manager.getPaintableId(self.field), 'text', 's'])
+                    for b in range(self._BURSTS)]
+            request = Request(BURST.join(['key'] + bursts))
+            start = 1000 * time.time()
+            manager.handleVariables(request, Response(), None, self.app,
+                    self.window)
+            times.append((1000 * time.time()) - start)
+
+            self.assertEquals('value %d %d' % (r, self._BURSTS - 1),
+                    self.field.getValue())
+        return times
+
+
+class LegacyCommunicationManager(AbstractCommunicationManager):
+    """Repaints the whole window between bursts, as done prior to
+    L{flushPendingChanges}."""
+
+    def handleVariables(self, request, response, callback, application2,
+                window):
+        self._legacyArgs = (request, response, window)
+        return super(LegacyCommunicationManager, self).handleVariables(
+                request, response, callback, application2, window)
+
+
+    def flushPendingChanges(self):
+        request, response, window = self._legacyArgs
+        self.paintAfterVariableChanges(request, response, None, True,
+                StringIO(), window, False)
+
+
+class ClickListener(IClickListener):
+
+    def __init__(self, action):
+        self._action = action
+
+
+    def buttonClick(self, event):
+        self._action()
+
+
+class Request(object):
+
+    def __init__(self, payload):
+        self._payload = payload
+        self._attributes = dict()
+
+
+    def getContentLength(self):
+        return len(self._payload)
+
+
+    def getInputStream(self):
+        return StringIO(self._payload)
+
+
+    def getAttribute(self, name, default=None):
+        return self._attributes.get(name, default)
+
+
+    def setAttribute(self, name, value):
+        self._attributes[name] = value
+
+
+    def getParameter(self, name):
+        return None
+
+
+class Response(object):
+
+    def setContentType(self, contentType):
+        pass
+
+
+def createApplication():
+    app = TestApp()
+    app.setLocale(Locale('en', 'US'))
+    app.start('http://localhost/', {AbstractApplicationServlet.\
+            SERVLET_PARAMETER_DISABLE_XSRF_PROTECTION: 'true'}, None)
+    return app
+
+
+class TestApp(Application):
+
+    def init(self):
+        w = Window('Main window')
+        self.setMainWindow(w)
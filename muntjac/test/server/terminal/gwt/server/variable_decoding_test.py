@@ -0,0 +1,254 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+import re
+import time
+
+from unittest import TestCase
+
+from StringIO import StringIO
+
+from babel import Locale
+
+from muntjac.application import Application
+
+from muntjac.terminal.gwt.server.abstract_communication_manager import \
+    AbstractCommunicationManager
+
+from muntjac.test.server.performance import PerformanceTestCase
+
+
+BURST = '\x1d'
+RECORD = '\x1e'
+FIELD = '\x1f'
+ITEM = '\x1c'
+ESCAPE = '\x1b'
+
+
+def record(value, pid, name, typ):
+    return FIELD.join([value, pid, name, typ])
+
+
+#: UIDL request payloads recorded from the sampler, the security key is
+#  replaced by "key".
+PAYLOADS = [
+    # scrolling a table
+    BURST.join(['key', RECORD.join([
+        record('45', 'PID12', 'firstToBeRendered', 'i'),
+        record('115', 'PID12', 'lastToBeRendered', 'i'),
+        record('60', 'PID12', 'firstvisible', 'i'),
+        record('91', 'PID12', 'reqfirstrow', 'i'),
+        record('24', 'PID12', 'reqrows', 'i')])]),
+
+    # typing in an immediate text field
+    BURST.join(['key', RECORD.join([
+        record('Hyv\xc3\xa4\xc3\xa4 p\xc3\xa4iv\xc3\xa4\xc3\xa4 maailma',
+                'PID25', 'text', 's'),
+        record('24', 'PID25', 'c', 'i')])]),
+
+    # selecting rows of a multi-select table
+    BURST.join(['key', RECORD.join([
+        record(ITEM.join(['1', '5', '9', '12', '33', '']), 'PID12',
+                'selected', 'c'),
+        record('true', 'PID12', 'clickEvent', 'b')])]),
+
+    # dropping on a tree
+    BURST.join(['key', RECORD.join([
+        record(ITEM.join(['sdetail', 'BOTTOM', 'sitemIdOver', '7',
+                'ssourceid', 'PID31', 'btransferable', 'true']),
+                'DD', 'dd', 'm'),
+        record('2', 'DD', 'visitId', 'i'),
+        record('drop', 'DD', 'type', 's')])]),
+
+    # resizing the browser window, two bursts
+    BURST.join(['key', RECORD.join([
+        record('1004', 'PID0', 'height', 'i'),
+        record('1680', 'PID0', 'width', 'i'),
+        record('0', 'PID0', 'scrollTop', 'i'),
+        record('0', 'PID0', 'scrollLeft', 'i')]),
+        RECORD.join([record('true', 'PID0', 'close', 'b')])]),
+
+    # a date field
+    BURST.join(['key', RECORD.join([
+        record('2011', 'PID40', 'year', 'i'),
+        record('11', 'PID40', 'month', 'i'),
+        record('23', 'PID40', 'day', 'i'),
+        record('-1', 'PID40', 'hour', 'i'),
+        record('-1', 'PID40', 'min', 'i')])]),
+
+    # pasting text containing separator characters
+    BURST.join(['key', RECORD.join([
+        record('col1' + ESCAPE + 'Lcol2' + ESCAPE + 'Kend', 'PID25', 'text',
+                's')])]),
+]
+
+
+class TestVariableDecoding(TestCase):
+
+    def setUp(self):
+        app = Application()
+        app.setLocale(Locale('en', 'US'))
+        self.manager = AbstractCommunicationManager(app)
+
+
+    def testDecodeUnescaped(self):
+        value = 'no escapes \xc3\xa4'
+        self.assertTrue(value is self.manager.decodeVariableValue(value))
+        self.assertEquals('', self.manager.decodeVariableValue(''))
+
+
+    def testDecodeEscaped(self):
+        decode = self.manager.decodeVariableValue
+        self.assertEquals('a\x1bb', decode('a' + ESCAPE + 'Kb'))
+        self.assertEquals('\x1d\x1e\x1f\x1c', decode(ESCAPE + 'M' + ESCAPE
+                + 'N' + ESCAPE + 'O' + ESCAPE + 'L'))
+        self.assertEquals(u'\xe4\x1c', decode(u'\xe4' + ESCAPE + 'L'))
+        self.assertEquals('a', decode('a' + ESCAPE))
+        self.assertRaises(ValueError, decode, 'a' + ESCAPE + 'Z')
+
+
+    def testConvertStringArray(self):
+        convert = self.manager.convertStringArray
+        self.assertEquals(['a', '', 'b'], convert(ITEM.join(['a', '', 'b',
+                ''])))
+        self.assertEquals(['a', 'b'], convert(ITEM.join(['a', 'b'])))
+        self.assertEquals([], convert(''))
+        self.assertEquals([''], convert(ITEM))
+        self.assertEquals(['a\x1cb'], convert('a' + ESCAPE + 'Lb' + ITEM))
+
+
+    def testConvertArray(self):
+        self.assertEquals([1, 'x', True], self.manager.convertArray(
+                ITEM.join(['i1', 'sx', 'btrue', ''])))
+        self.assertEquals([], self.manager.convertArray(''))
+
+
+    def testConvertMap(self):
+        self.assertEquals({'k': 'v', 'n': 5}, self.manager.convertMap(
+                ITEM.join(['sk', 'v', 'in', '5'])))
+
+
+    def testParseVariableBurst(self):
+        burst = PAYLOADS[1].split(BURST)[1]
+        records = self.manager.parseVariableBurst(burst)
+        self.assertEquals(['24', 'PID25', 'c', 'i'], records[1])
+        self.assertEquals(24, self.manager.convertVariableValue('i',
+                records[1][0]))
+
+
+class PerformanceTestVariableDecoding(PerformanceTestCase):
+
+    _REPEATS = 5
+    _REQUESTS = 2000
+    _DECODING_FAIL_THRESHOLD = 200
+
+
+    def setUp(self):
+        app = Application()
+        app.setLocale(Locale('en', 'US'))
+        self.manager = AbstractCommunicationManager(app)
+
+
+    def testDecodingPerformance(self):
+        legacy = self.timeDecoding(lambda payload: legacyDecodePayload(
+                self.manager, payload))
+        times = self.timeDecoding(lambda payload: decodePayload(
+                self.manager, payload))
+
+        print ('Legacy UIDL payload decoding timings (ms) for %d requests: '
+                '%s' % (self._REQUESTS, legacy))
+        self.checkMedian(self._REQUESTS, times, 'UIDL payload decoding',
+                self._DECODING_FAIL_THRESHOLD)
+
+
+    def timeDecoding(self, decode):
+        times = list()
+        for _ in range(self._REPEATS):
+            start = 1000 * time.time()
+            for i in range(self._REQUESTS):
+                decode(PAYLOADS[i % len(PAYLOADS)])
+            times.append((1000 * time.time()) - start)
+        return times
+
+
+def decodePayload(manager, payload):
+    values = list()
+    bursts = payload.split(BURST)
+    for burst in bursts[1:]:
+        for variable in manager.parseVariableBurst(burst):
+            values.append(manager.convertVariableValue(variable[3][0],
+                    variable[0]))
+    return values
+
+
+def legacyDecodePayload(manager, payload):
+    # the regular expression splitting and character by character
+    # decoding done prior to the fast path
+    values = list()
+    bursts = re.split(BURST, payload)
+    for burst in bursts[1:]:
+        tmp = re.split(RECORD, burst)
+        for i in range(len(tmp)):
+            variable = re.split(FIELD, tmp[i])
+            values.append(legacyConvertVariableValue(manager,
+                    variable[3][0], variable[0]))
+    return values
+
+
+def legacyConvertVariableValue(manager, variableType, strValue):
+    m = {
+        'a': lambda s: [legacyConvertVariableValue(manager, v[0], v[1:])
+                for v in s.split(ITEM)],
+        'm': lambda s: manager.convertMap(s),
+        'c': lambda s: legacyConvertStringArray(s),
+        's': lambda s: legacyDecodeVariableValue(s),
+        'i': lambda s: int(s),
+        'l': lambda s: long(s),
+        'f': lambda s: float(s),
+        'd': lambda s: float(s),
+        'b': lambda s: s.lower() == 'true',
+        'p': lambda s: None
+    }.get(variableType)
+    return m(strValue)
+
+
+def legacyConvertStringArray(strValue):
+    splitter = re.compile('(\\' + ITEM + '+)')
+    tokens = list()
+    prevToken = ITEM
+    for token in splitter.split(strValue):
+        if ITEM != token:
+            tokens.append(legacyDecodeVariableValue(token))
+        elif ITEM == prevToken:
+            tokens.append('')
+        prevToken = token
+    return tokens
+
+
+def legacyDecodeVariableValue(encodedValue):
+    iterator = iter(encodedValue)
+    try:
+        character = iterator.next()
+    except StopIteration:
+        return ''
+
+    result = StringIO()
+    while True:
+        try:
+            if ESCAPE == character:
+                character = iterator.next()
+                if character == chr(ord(ESCAPE) + 0x30):
+                    result.write(ESCAPE)
+                elif character == chr(ord(ITEM) + 0x30):
+                    result.write(ITEM)
+                elif character not in ('M', 'N', 'O'):
+                    raise ValueError('Invalid escaped character')
+            else:
+                result.write(character)
+            character = iterator.next()
+        except StopIteration:
+            break
+
+    r = result.getvalue()
+    result.close()
+    return r
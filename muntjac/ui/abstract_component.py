@@ -11,7 +11,7 @@ from muntjac.event.method_event_source import IMethodEventSource
 from muntjac.event.event_router import EventRouter
 from muntjac.terminal.terminal import IErrorEvent as ITerminalErrorEvent
 from muntjac.terminal.paintable import RepaintRequestEvent,\
-    IRepaintRequestListener
+    IRepaintRequestListener, IDetachListener
 from muntjac.util import fullname
 
 from muntjac.ui.component import \
@@ -505,7 +505,16 @@ class AbstractComponent(IComponent, IMethodEventSource):
 
     def detach(self):
         # Detach the component from application.
-        pass
+        self.fireDetachEvent()
+
+
+    def fireDetachEvent(self):
+        """Notifies the repaint request listeners that are also
+        L{IDetachListener}s that this component is being detached.
+        """
+        for listener in self._repaintRequestListeners:
+            if isinstance(listener, IDetachListener):
+                listener.paintableDetached(self)
 
 
     def focus(self):
@@ -0,0 +1,259 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Defines an index of the item captions of a select used for filtering
+the options as the user types."""
+
+from bisect import bisect_left, insort
+
+from muntjac.data import property as prop
+from muntjac.ui import abstract_select
+
+
+class CaptionIndex(prop.IValueChangeListener):
+    """Index of the lower case captions of the items of a L{Select}.
+
+    The captions sorted alphabetically are used to find the items whose
+    caption starts with the filter string and an index of the three
+    character substrings of the captions to find the items whose caption
+    contains the filter string. The matches are returned as the positions
+    of the items in the container order, so that the select can return the
+    requested page of the filtered options without filtering the container.
+
+    The index is built when first searched and is rebuilt after the items
+    of the container change. Caption changes are applied to the index item
+    by item: the index listens to the property value changes of the
+    container, and the select informs it of explicit caption changes.
+    """
+
+    #: Length of the substrings in the substring index.
+    GRAM = 3
+
+    def __init__(self, select):
+        self._select = select
+
+        #: The container listened for value changes.
+        self._container = None
+
+        #: Item ids in the container order.
+        self._itemIds = None
+
+        #: Item id -> position in the container order.
+        self._positions = None
+
+        #: Normalized captions in the container order.
+        self._captions = None
+
+        #: Captions sorted alphabetically and the positions of their items.
+        self._sortedCaptions = None
+        self._sortedPositions = None
+
+        #: Substring -> ascending positions of the items containing it.
+        self._grams = None
+
+
+    def isApplicable(self):
+        """Returns true if the captions can be kept in sync with the
+        container of the select."""
+        mode = self._select.getItemCaptionMode()
+        if mode in (abstract_select.AbstractSelect.ITEM_CAPTION_MODE_ID,
+                abstract_select.AbstractSelect.ITEM_CAPTION_MODE_EXPLICIT,
+                abstract_select.AbstractSelect.\
+                        ITEM_CAPTION_MODE_EXPLICIT_DEFAULTS_ID,
+                abstract_select.AbstractSelect.ITEM_CAPTION_MODE_INDEX):
+            return True
+        # the captions come from the item properties
+        return isinstance(self._select.getContainerDataSource(),
+                prop.IValueChangeNotifier)
+
+
+    def invalidate(self):
+        """Discards the index, it is rebuilt when next searched."""
+        self._itemIds = None
+        self._positions = None
+        self._captions = None
+        self._sortedCaptions = None
+        self._sortedPositions = None
+        self._grams = None
+
+
+    def detach(self):
+        """Stops listening to the container and discards the index."""
+        if self._container is not None:
+            self._container.removeListener(self, prop.IValueChangeListener)
+            self._container = None
+        self.invalidate()
+
+
+    def __len__(self):
+        self.build()
+        return len(self._itemIds)
+
+
+    def getItemId(self, position):
+        """Returns the id of the item at the given position."""
+        self.build()
+        return self._itemIds[position]
+
+
+    def getPosition(self, itemId):
+        """Returns the position of the given item, -1 if not indexed."""
+        self.build()
+        return self._positions.get(itemId, -1)
+
+
+    def search(self, filterString, prefix):
+        """Returns the positions of the items whose caption starts with or
+        contains the given string, ignoring case.
+
+        @param prefix:
+                   true to match the start of the captions only
+        @return: ascending list of positions, None if all items match
+        """
+        self.build()
+        filterString = normalize(filterString)
+        if filterString == '':
+            return None
+        if prefix:
+            return self.searchPrefix(filterString)
+        else:
+            return self.searchSubstring(filterString)
+
+
+    def searchPrefix(self, filterString):
+        self.buildSorted()
+        captions = self._sortedCaptions
+        start = bisect_left(captions, filterString)
+        end = bisect_left(captions, filterString[:-1]
+                + unichr(ord(filterString[-1]) + 1), start)
+        positions = self._sortedPositions[start:end]
+        positions.sort()
+        return positions
+
+
+    def searchSubstring(self, filterString):
+        captions = self._captions
+        if len(filterString) < self.GRAM:
+            return [position for position, caption in enumerate(captions)
+                    if filterString in caption]
+
+        self.buildGrams()
+        postings = list()
+        for gram in grams(filterString, self.GRAM):
+            posting = self._grams.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+
+        if len(filterString) > self.GRAM:
+            # all substrings present does not mean the whole string is
+            positions = [position for position in candidates
+                    if filterString in captions[position]]
+        else:
+            positions = list(candidates)
+        positions.sort()
+        return positions
+
+
+    def build(self):
+        container = self._select.getContainerDataSource()
+        if container is not self._container:
+            self.detach()
+            if isinstance(container, prop.IValueChangeNotifier):
+                container.addListener(self, prop.IValueChangeListener)
+            self._container = container
+
+        if self._itemIds is None:
+            select = self._select
+            self._itemIds = list(select.getItemIds())
+            self._positions = dict((itemId, position) for position, itemId
+                    in enumerate(self._itemIds))
+            self._captions = [normalize(select.getItemCaption(itemId))
+                    for itemId in self._itemIds]
+
+
+    def buildSorted(self):
+        if self._sortedCaptions is None:
+            pairs = sorted((caption, position) for position, caption
+                    in enumerate(self._captions))
+            self._sortedCaptions = [caption for caption, _ in pairs]
+            self._sortedPositions = [position for _, position in pairs]
+
+
+    def buildGrams(self):
+        if self._grams is None:
+            index = dict()
+            size = self.GRAM
+            for position, caption in enumerate(self._captions):
+                for gram in grams(caption, size):
+                    posting = index.get(gram)
+                    if posting is None:
+                        index[gram] = [position]
+                    elif posting[-1] != position:
+                        posting.append(position)
+            self._grams = index
+
+
+    def captionChanged(self, itemId):
+        """Updates the caption of the given item in the index."""
+        if self._itemIds is None:
+            return
+
+        position = self._positions.get(itemId)
+        if position is None:
+            return
+
+        old = self._captions[position]
+        new = normalize(self._select.getItemCaption(itemId))
+        if old == new:
+            return
+        self._captions[position] = new
+
+        if self._sortedCaptions is not None:
+            i = bisect_left(self._sortedCaptions, old)
+            while self._sortedPositions[i] != position:
+                i += 1
+            del self._sortedCaptions[i]
+            del self._sortedPositions[i]
+            i = bisect_left(self._sortedCaptions, new)
+            self._sortedCaptions.insert(i, new)
+            self._sortedPositions.insert(i, position)
+
+        if self._grams is not None:
+            oldGrams = set(grams(old, self.GRAM))
+            newGrams = set(grams(new, self.GRAM))
+            for gram in oldGrams - newGrams:
+                posting = self._grams[gram]
+                posting.remove(position)
+                if len(posting) == 0:
+                    del self._grams[gram]
+            for gram in newGrams - oldGrams:
+                insort(self._grams.setdefault(gram, []), position)
+
+
+    def valueChange(self, event):
+        source = event.getProperty()
+        getItemId = getattr(source, 'getItemId', None)
+        if getItemId is None:
+            self.invalidate()
+        else:
+            self.captionChanged(getItemId())
+
+
+def normalize(caption):
+    """Returns the lower case unicode version of a caption."""
+    if caption is None:
+        return u''
+    if isinstance(caption, str):
+        caption = caption.decode('utf-8', 'replace')
+    return caption.lower()
+
+
+def grams(caption, size):
+    """Returns the substrings of the given length of a caption."""
+    return [caption[i:i + size] for i in range(len(caption) - size + 1)]
@@ -75,9 +75,16 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         #  components with grid area definition.
         self._areas = list()
 
-        #: Mapping from components to their respective areas.
+        #: Components in the order of their areas.
         self._components = list()
 
+        #: Mapping from components to their respective areas.
+        self._componentToArea = dict()
+
+        #: Mapping from the (column, row) of each occupied cell to the area
+        #  occupying it.
+        self._cells = dict()
+
         #: Mapping from components to alignments (horizontal + vertical).
         self._componentToAlignment = dict()
 
@@ -175,7 +182,7 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
                 raise ValueError, 'Component must not be null'
 
             # Checks that the component does not already exist in the container
-            if component in self._components:
+            if component in self._componentToArea:
                 raise ValueError, 'Component is already in the container'
 
             # Creates the area
@@ -195,28 +202,20 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
             # Inserts the component to right place at the list
             # Respect top-down, left-right ordering
             # component.setParent(this);
-            index = 0
-            done = False
-            while not done and (index < len(self._areas)):
-                existingArea = self._areas[index]
-                if ((existingArea._row1 >= row1
-                        and existingArea._column1 > column1)
-                                or (existingArea._row1 > row1)):
-                    self._areas.insert(index, area)
-                    self._components.insert(index, component)
-                    done = True
-                index += 1
-
-            if not done:
-                self._areas.append(area)
-                self._components.append(component)
+            index = self.getAreaIndex(column1, row1)
+            self._areas.insert(index, area)
+            self._components.insert(index, component)
+            self._componentToArea[component] = area
+            self.addAreaCells(area)
 
             # Attempt to add to super
             try:
                 super(GridLayout, self).addComponent(component)
             except ValueError, e:
-                self._areas.remove(area)
-                self._components.remove(component)
+                del self._areas[index]
+                del self._components[index]
+                del self._componentToArea[component]
+                self.removeAreaCells(area)
                 raise e
 
             # update cursor position, if it's within this area; use first
@@ -248,10 +247,57 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         @raise OverlapsException:
                     if C{area} overlaps with any existing area.
         """
-        for existingArea in self._areas:
-            if existingArea.overlaps(area):
-                # Component not added, overlaps with existing component
-                raise OverlapsException(existingArea)
+        columns = area._column2 - area._column1 + 1
+        rows = area._row2 - area._row1 + 1
+        if columns * rows <= len(self._areas):
+            # looks up the cells of the area
+            cells = self._cells
+            for row in xrange(area._row1, area._row2 + 1):
+                for column in xrange(area._column1, area._column2 + 1):
+                    existingArea = cells.get((column, row))
+                    if existingArea is not None:
+                        # Component not added, overlaps with existing
+                        # component
+                        raise OverlapsException(existingArea)
+        else:
+            for existingArea in self._areas:
+                if existingArea.overlaps(area):
+                    # Component not added, overlaps with existing component
+                    raise OverlapsException(existingArea)
+
+
+    def getAreaIndex(self, column, row):
+        """Returns the position of the area with the given upper left corner
+        in the top-down, left-right ordered areas, or the position where it
+        would be inserted.
+        """
+        areas = self._areas
+        key = (row, column)
+        low, high = 0, len(areas)
+        while low < high:
+            mid = (low + high) / 2
+            area = areas[mid]
+            if (area._row1, area._column1) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+
+    def addAreaCells(self, area):
+        """Marks the cells of the given area as occupied by it."""
+        cells = self._cells
+        for row in xrange(area._row1, area._row2 + 1):
+            for column in xrange(area._column1, area._column2 + 1):
+                cells[(column, row)] = area
+
+
+    def removeAreaCells(self, area):
+        """Marks the cells of the given area as free."""
+        cells = self._cells
+        for row in xrange(area._row1, area._row2 + 1):
+            for column in xrange(area._column1, area._column2 + 1):
+                del cells[(column, row)]
 
 
     def newLine(self):
@@ -292,16 +338,14 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         nargs = len(args)
         if nargs == 1:
             component, = args
-            if component is None or component not in self._components:
+            if component is None or component not in self._componentToArea:
                 return
-            area = None
-            for a in self._areas:
-                if a.getComponent() == component:
-                    area = a
+            area = self._componentToArea.pop(component)
 
-            self._components.remove(component)
-            if area is not None:
-                self._areas.remove(area)
+            index = self.getAreaIndex(area._column1, area._row1)
+            del self._components[index]
+            del self._areas[index]
+            self.removeAreaCells(area)
 
             if component in self._componentToAlignment:
                 del self._componentToAlignment[component]
@@ -312,10 +356,10 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         elif nargs == 2:
             column, row = args
             # Finds the area
-            for area in self._areas:
-                if area.getColumn1() == column and area.getRow1() == row:
-                    self.removeComponent(area.getComponent())
-                    return
+            area = self._cells.get((column, row))
+            if (area is not None and area.getColumn1() == column
+                    and area.getRow1() == row):
+                self.removeComponent(area.getComponent())
         else:
             raise ValueError, 'too many arguments'
 
@@ -356,17 +400,8 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         if self._spacing:
             target.addAttribute('spacing', self._spacing)
 
-        # Area iterator
-        areaiterator = iter(self._areas)
-
-        # Current item to be processed (fetch first item)
-        try:
-            area = areaiterator.next()
-        except StopIteration:
-            area = None
-
-        # Collects rowspan related information here
-        cellUsed = dict()
+        # Occupied cells
+        cells = self._cells
 
         # Empty cell collector
         emptyCells = 0
@@ -418,93 +453,49 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
 
             # Iterates every applicable column
             for curx in range(self._cols):
+                area = cells.get((curx, cury))
 
-                # Checks if current item is located at curx,cury
-                if (area is not None and (area._row1 == cury)
-                        and (area._column1 == curx)):
+                if area is None:
+                    # empty cell is needed
+                    emptyCells += 1
+                    continue
 
-                    # First check if empty cell needs to be rendered
-                    if emptyCells > 0:
-                        target.startTag('gc')
-                        target.addAttribute('x', curx - emptyCells)
-                        target.addAttribute('y', cury)
-                        if emptyCells > 1:
-                            target.addAttribute('w', emptyCells)
-
-                        target.endTag('gc')
-                        emptyCells = 0
-
-                    # Now proceed rendering current item
-                    cols = (area._column2 - area._column1) + 1
-                    rows = (area._row2 - area._row1) + 1
+                # First check if empty cell needs to be rendered
+                if emptyCells > 0:
                     target.startTag('gc')
-
-                    target.addAttribute('x', curx)
+                    target.addAttribute('x', curx - emptyCells)
                     target.addAttribute('y', cury)
-
-                    if cols > 1:
-                        target.addAttribute('w', cols)
-
-                    if rows > 1:
-                        target.addAttribute('h', rows)
-
-                    area.getComponent().paint(target)
-
-                    ca = self.getComponentAlignment( area.getComponent() )
-                    alignmentsArray[index] = str(ca.getBitMask())
-                    index += 1
+                    if emptyCells > 1:
+                        target.addAttribute('w', emptyCells)
 
                     target.endTag('gc')
+                    emptyCells = 0
 
-                    # Fetch next item
-                    try:
-                        area = areaiterator.next()
-                    except StopIteration:
-                        area = None
-
-                    # Updates the cellUsed if rowspan needed
-                    if rows > 1:
-                        spannedx = curx
-                        for _ in range(1, self._cols + 1):
-                            cellUsed[int(spannedx)] = int((cury + rows) - 1)
-                            spannedx += 1
-
-                    # Skips the current item's spanned columns
-                    if cols > 1:
-                        curx += cols - 1
-                else:
-                    # Checks against cellUsed, render space or ignore cell
-                    if int(curx) in cellUsed:
+                # Cells spanned by an item are ignored
+                if (area._row1 != cury) or (area._column1 != curx):
+                    continue
 
-                        # Current column contains already an item,
-                        # check if rowspan affects at current x,y position
-                        rowspanDepth = int( cellUsed.get(int(curx)) )
+                # Now proceed rendering current item
+                cols = (area._column2 - area._column1) + 1
+                rows = (area._row2 - area._row1) + 1
+                target.startTag('gc')
 
-                        if rowspanDepth >= cury:
+                target.addAttribute('x', curx)
+                target.addAttribute('y', cury)
 
-                            # ignore cell
-                            # Check if empty cell needs to be rendered
-                            if emptyCells > 0:
-                                target.startTag('gc')
-                                target.addAttribute('x', curx - emptyCells)
-                                target.addAttribute('y', cury)
-                                if emptyCells > 1:
-                                    target.addAttribute('w', emptyCells)
+                if cols > 1:
+                    target.addAttribute('w', cols)
 
-                                target.endTag('gc')
+                if rows > 1:
+                    target.addAttribute('h', rows)
 
-                                emptyCells = 0
-                        else:
+                area.getComponent().paint(target)
 
-                            # empty cell is needed
-                            emptyCells += 1
+                ca = self.getComponentAlignment( area.getComponent() )
+                alignmentsArray[index] = str(ca.getBitMask())
+                index += 1
 
-                            # Removes the cellUsed key as it has become
-                            # obsolete
-                            del cellUsed[int(curx)]
-                    else:
-                        # empty cell is needed
-                        emptyCells += 1
+                target.endTag('gc')
 
             # Last column handled of current row
 
@@ -573,7 +564,7 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         # Checks for overlaps
         if self._cols > columns:
             for area in self._areas:
-                if area.column2 >= columns:
+                if area._column2 >= columns:
                     raise OutOfBoundsException(area)
 
         self._cols = columns
@@ -608,7 +599,7 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         # Checks for overlaps
         if self._rows > rows:
             for area in self._areas:
-                if area.row2 >= rows:
+                if area._row2 >= rows:
                     raise OutOfBoundsException(area)
 
         self._rows = rows
@@ -664,16 +655,8 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
 
     def replaceComponent(self, oldComponent, newComponent):
         # Gets the locations
-        oldLocation = None
-        newLocation = None
-
-        for location in self._areas:
-            component = location.getComponent()
-            if component == oldComponent:
-                oldLocation = location
-
-            if component == newComponent:
-                newLocation = location
+        oldLocation = self._componentToArea.get(oldComponent)
+        newLocation = self._componentToArea.get(newComponent)
 
         if oldLocation is None:
             self.addComponent(newComponent)
@@ -685,6 +668,14 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         else:
             oldLocation.setComponent(newComponent)
             newLocation.setComponent(oldComponent)
+            self._componentToArea[newComponent] = oldLocation
+            self._componentToArea[oldComponent] = newLocation
+            oldIndex = self.getAreaIndex(oldLocation._column1,
+                    oldLocation._row1)
+            newIndex = self.getAreaIndex(newLocation._column1,
+                    newLocation._row1)
+            self._components[oldIndex] = newComponent
+            self._components[newIndex] = oldComponent
             self.requestRepaint()
 
 
@@ -746,16 +737,23 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         @param row: Number of the row the new row will be inserted before
         """
         if row > self._rows:
-            raise ValueError, ('Cannot insert row at '
-                    + row + ' in a gridlayout with height ' + self._rows)
+            raise ValueError, ('Cannot insert row at %d in a gridlayout '
+                    'with height %d' % (row, self._rows))
+
+        # Areas ending below the row needs to be moved down or stretched
+        moved = [existingArea for existingArea in self._areas
+                if existingArea._row2 >= row]
 
-        for existingArea in self._areas:
-            # Areas ending below the row needs to be moved down or stretched
-            if existingArea.row2 >= row:
-                existingArea.row2 += 1
+        for existingArea in moved:
+            self.removeAreaCells(existingArea)
 
-                if existingArea.row1 >= row:
-                    existingArea.row1 += 1
+        for existingArea in moved:
+            existingArea._row2 += 1
+
+            if existingArea._row1 >= row:
+                existingArea._row1 += 1
+
+            self.addAreaCells(existingArea)
 
         if self._cursorY >= row:
             self._cursorY += 1
@@ -777,20 +775,27 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         @param row: The row number to remove
         """
         if row >= self._rows:
-            raise ValueError, ('Cannot delete row '
-                    + row + ' from a gridlayout with height ' + self._rows)
+            raise ValueError, ('Cannot delete row %d from a gridlayout '
+                    'with height %d' % (row, self._rows))
 
         # Remove all components in row
         for col in range(self.getColumns()):
             self.removeComponent(col, row)
 
         # Shrink or remove areas in the selected row
-        for existingArea in self._areas:
-            if existingArea.row2 >= row:
-                existingArea.row2 -= 1
+        moved = [existingArea for existingArea in self._areas
+                if existingArea._row2 >= row]
+
+        for existingArea in moved:
+            self.removeAreaCells(existingArea)
+
+        for existingArea in moved:
+            existingArea._row2 -= 1
+
+            if existingArea._row1 > row:
+                existingArea._row1 -= 1
 
-                if existingArea.row1 > row:
-                    existingArea.row1 -= 1
+            self.addAreaCells(existingArea)
 
         if self._rows == 1:
             # Removing the last row means that the dimensions of the Grid
@@ -868,12 +873,11 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
                    y-index
         @return: Component in given cell or null if empty
         """
-        for area in self._areas:
-            if (area.getColumn1() <= x and x <= area.getColumn2()
-                    and area.getRow1() <= y and y <= area.getRow2()):
-                return area.getComponent()
+        area = self._cells.get((x, y))
+        if area is None:
+            return None
 
-        return None
+        return area.getComponent()
 
 
     def getComponentArea(self, component):
@@ -885,10 +889,7 @@ class GridLayout(AbstractLayout, IAlignmentHandler, ISpacingHandler,
         @return: an Area object that contains information how component is
                 layed in the grid
         """
-        for area in self._areas:
-            if area.getComponent() == component:
-                return area
-        return None
+        return self._componentToArea.get(component)
 
 
     def addListener(self, listener, iface=None):
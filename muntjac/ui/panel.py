@@ -422,6 +422,7 @@ class Panel(AbstractComponentContainer, IScrollable,
         @see: L{IComponent.detach}
         """
         # can't call parent here as this is Panels hierarchy is a hack
+        self.fireDetachEvent()
         if self._content is not None:
             self._content.detach()
 
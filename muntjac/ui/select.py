@@ -5,11 +5,13 @@
 in a UI."""
 
 from warnings import warn
+from bisect import bisect_left
 
 from muntjac.event import field_events
 from muntjac.data.util.filter.simple_string_filter import SimpleStringFilter
 from muntjac.data.container import IContainer, IFilterable, IIndexed
 from muntjac.ui import abstract_select
+from muntjac.ui.caption_index import CaptionIndex
 
 from muntjac.event.field_events import \
     FocusEvent, BlurEvent, IBlurListener, IFocusListener
@@ -70,6 +72,9 @@ class Select(abstract_select.AbstractSelect, abstract_select.IFiltering,
         #  in many large lazy loading containers.
         self._scrollToSelectedItem = True
 
+        #: Index of the item captions used for filtering, None if disabled.
+        self._captionIndex = None
+
         nargs = len(args)
         if nargs == 0:
             super(Select, self).__init__()
@@ -158,8 +163,11 @@ class Select(abstract_select.AbstractSelect, abstract_select.IFiltering,
         # page
         nullOptionVisible = needNullSelectOption and not nullFilteredOut
 
-        # first try if using container filters is possible
-        options = self.getOptionsWithFilter(nullOptionVisible)
+        # first try if using the caption index or container filters is
+        # possible
+        options = self.getOptionsWithIndex(nullOptionVisible)
+        if None is options:
+            options = self.getOptionsWithFilter(nullOptionVisible)
         if None is options:
             # not able to use container filters, perform explicit
             # in-memory filtering
@@ -238,6 +246,69 @@ class Select(abstract_select.AbstractSelect, abstract_select.IFiltering,
             target.addAttribute('hideErrors', True)
 
 
+    def getOptionsWithIndex(self, needNullSelectOption):
+        """Returns the filtered options for the current page using the
+        caption index.
+
+        As a size effect, L{filteredSize} is set to the total number of
+        items passing the filter.
+
+        The caption index must be enabled with L{setCaptionIndexEnabled}
+        and applicable to the current container and item caption mode.
+
+        @param needNullSelectOption:
+        @return: filtered list of options (may be empty) or null if cannot use
+                 the caption index
+        """
+        index = self._captionIndex
+        if ((index is None) or (self.pageLength == 0)
+                or (not index.isApplicable())):
+            return None
+
+        if self._filteringMode == self.FILTERINGMODE_OFF:
+            positions = None
+        else:
+            positions = index.search(self._filterstring,
+                    self._filteringMode == self.FILTERINGMODE_STARTSWITH)
+
+        if positions is None:
+            self._filteredSize = len(index)
+        else:
+            self._filteredSize = len(positions)
+
+        indexToEnsureInView = -1
+
+        # if not an option request (item list when user changes page), go
+        # to page with the selected item after filtering if accepted by
+        # filter
+        selection = self.getValue()
+        if (self.isScrollToSelectedItem() and (not self._optionRequest)
+                and (not self.isMultiSelect()) and (selection is not None)):
+            # ensure proper page
+            indexToEnsureInView = index.getPosition(selection)
+            if (positions is not None) and (indexToEnsureInView != -1):
+                i = bisect_left(positions, indexToEnsureInView)
+                if (i < len(positions)
+                        and positions[i] == indexToEnsureInView):
+                    indexToEnsureInView = i
+                else:
+                    indexToEnsureInView = -1
+
+        self._currentPage = self.adjustCurrentPage(self._currentPage,
+                needNullSelectOption, indexToEnsureInView, self._filteredSize)
+        first = self.getFirstItemIndexOnCurrentPage(needNullSelectOption,
+                self._filteredSize)
+        last = self.getLastItemIndexOnCurrentPage(needNullSelectOption,
+                self._filteredSize, first)
+
+        if positions is None:
+            page = range(first, last + 1)
+        else:
+            page = positions[first:last + 1]
+
+        return [index.getItemId(position) for position in page]
+
+
     def getOptionsWithFilter(self, needNullSelectOption):
         """Returns the filtered options for the current page using a container
         filter.
@@ -342,6 +413,55 @@ class Select(abstract_select.AbstractSelect, abstract_select.IFiltering,
             super(Select, self).containerItemSetChange(event)
 
 
+    def fireItemSetChange(self):
+        if self._captionIndex is not None:
+            self._captionIndex.invalidate()
+        super(Select, self).fireItemSetChange()
+
+
+    def setItemCaption(self, itemId, caption):
+        super(Select, self).setItemCaption(itemId, caption)
+        if self._captionIndex is not None:
+            self._captionIndex.captionChanged(itemId)
+
+
+    def setItemCaptionMode(self, mode):
+        super(Select, self).setItemCaptionMode(mode)
+        if self._captionIndex is not None:
+            self._captionIndex.invalidate()
+
+
+    def setCaptionIndexEnabled(self, enabled):
+        """Sets whether the options are filtered using an index of the
+        item captions.
+
+        The index finds the options matching the filter string without
+        going through all the items on each keystroke, which makes filtering
+        large selects faster at the cost of keeping the captions in memory.
+        It is used in all item caption modes, except when the captions are
+        read from the items of a container that does not notify of property
+        value changes. Disabled by default.
+
+        @param enabled:
+                   true to filter the options using the caption index
+        """
+        if enabled:
+            if self._captionIndex is None:
+                self._captionIndex = CaptionIndex(self)
+        elif self._captionIndex is not None:
+            self._captionIndex.detach()
+            self._captionIndex = None
+
+
+    def isCaptionIndexEnabled(self):
+        """Returns true if the options are filtered using an index of the
+        item captions.
+
+        @see: L{setCaptionIndexEnabled}
+        """
+        return self._captionIndex is not None
+
+
     def sanitetizeList(self, options, needNullSelectOption):
         """Makes correct sublist of given list of options.
 
@@ -510,8 +630,6 @@ class Select(abstract_select.AbstractSelect, abstract_select.IFiltering,
                 if caption.find(self._filterstring) > -1:
                     self._filteredOptions.append(itemId)
             elif test == self.FILTERINGMODE_STARTSWITH:
-                pass
-            else:
                 if caption.startswith(self._filterstring):
                     self._filteredOptions.append(itemId)
 
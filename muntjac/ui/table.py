@@ -54,7 +54,7 @@ logger = logging.getLogger(__name__)
 
 class Table(AbstractSelect, #container.IOrdered, action.IContainer,
             container.ISortable, IItemClickSource, IItemClickNotifier,
-            IDragSource, IDropTarget):
+            IDragSource, IDropTarget, container.IPropertyValueChangeListener):
     """C{Table} is used for representing data or components in a
     pageable and selectable table.
 
@@ -206,10 +206,17 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
         #: Page contents buffer used in buffered mode.
         self._pageBuffer = None
 
+        #: Item id -> row in the page buffer, built when first needed.
+        self._pageBufferRows = None
+
         #: Set of properties listened - the list is kept to release
         #  the listeners later.
         self._listenedProperties = None
 
+        #: Container the table listens to the property value changes of,
+        #  the listener is removed from it when the data source changes.
+        self._valueChangeNotifier = None
+
         #: Set of visible components - the is used for needsRepaint
         #  calculation.
         self._visibleComponents = None
@@ -1162,6 +1169,7 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
             rows = 0
         # Saves the results to internal buffer
         self._pageBuffer = self.getVisibleCellsNoCache(firstIndex, rows, True)
+        self._pageBufferRows = None
         if rows > 0:
             self._pageBufferFirstIndex = firstIndex
         self.setRowCacheInvalidated(True)
@@ -1241,6 +1249,7 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
                 newPageBuffer[i][row] = cells[i][row - firstAppendedRowInPageBuffer]
 
         self._pageBuffer = newPageBuffer
+        self._pageBufferRows = None
 
 
     def getVisibleCellsUpdateCacheRows(self, firstIndex, rows):
@@ -1252,6 +1261,7 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
         for ix in range(cacheIx, end):
             for i in range(len(self._pageBuffer)):
                 self._pageBuffer[i][ix] = cells[i][ix - cacheIx]
+        self._pageBufferRows = None
         return cells
 
 
@@ -1355,6 +1365,7 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
                 newPageBuffer[i][row] = self._pageBuffer[i][row - rows]
 
         self._pageBuffer = newPageBuffer
+        self._pageBufferRows = None
 
         logger.debug('Page Buffer now contains %d rows (%d - %d)' %
                 (len(self._pageBuffer[self.CELL_ITEMID]),
@@ -1391,13 +1402,8 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
                     oldVisibleComponents)
             return cells
 
-        # Gets the first item id
-        if isinstance(self.items, container.IIndexed):
-            idd = self.getIdByIndex(firstIndex)
-        else:
-            idd = self.firstItemId()
-            for i in range(firstIndex):
-                idd = self.nextItemId(idd)
+        # Gets the item ids of the rows
+        itemIds = self.getRowItemIds(firstIndex, rows)
 
         headmode = self.getRowHeaderMode()
         iscomponent = [None] * cols
@@ -1405,6 +1411,12 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
             iscomponent[i] = ((colids[i] in self._columnGenerators)
                     or issubclass(self.getType(colids[i]), IComponent))
 
+        # column index -> position in the rows of values read at once
+        valueIndexes = self.getBulkValueColumns(itemIds, colids, iscomponent)
+        if len(valueIndexes) > 0:
+            values = self.items.getItemValues(itemIds,
+                    [colids[j] for j in sorted(valueIndexes)])
+
         if (self._pageBuffer is not None
                 and len(self._pageBuffer[self.CELL_ITEMID]) > 0):
             firstIndexNotInCache = (self._pageBufferFirstIndex
@@ -1415,7 +1427,8 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
         # Creates the page contents
         filledRows = 0
         i = 0
-        while i < rows and idd is not None:
+        while i < len(itemIds):
+            idd = itemIds[i]
             cells[self.CELL_ITEMID][i] = idd
             cells[self.CELL_KEY][i] = self.itemIdMapper.key(idd)
             if headmode != self.ROW_HEADER_MODE_HIDDEN:
@@ -1443,7 +1456,7 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
                 isGeneratedColumn = colids[j] in self._columnGenerators
                 isGenerated = isGeneratedRow or isGeneratedColumn
 
-                if not isGenerated:
+                if not isGenerated and j not in valueIndexes:
                     p = self.getContainerProperty(idd, colids[j])
 
                 if isGeneratedRow:
@@ -1454,6 +1467,10 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
                         value = generatedRow.getValue()
                     elif len(generatedRow.getText()) > j:
                         value = generatedRow.getText()[j]
+                elif j in valueIndexes:
+                    # formatted as the property would be by default
+                    value = values[i][valueIndexes[j]]
+                    value = '' if value is None else str(value)
                 else:
                     # check in current pageBuffer already has row
                     index = firstIndex + i
@@ -1500,26 +1517,12 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
 
                 cells[self.CELL_FIRSTCOL + j - collapsed][i] = value
 
-            # Gets the next item id
-            if isinstance(self.items, container.IIndexed):
-                index = firstIndex + i + 1
-                if index < self.size():
-                    idd = self.getIdByIndex(index)
-                else:
-                    idd = None
-            else:
-                idd = self.nextItemId(idd)
-
             filledRows += 1
             i += 1
 
         # Assures that all the rows of the cell-buffer are valid
         if filledRows != len(cells[0]):
-            temp = [[None] * filledRows] * len(cells)
-            for i in range(len(cells)):
-                for j in range(filledRows):
-                    temp[i][j] = cells[i][j]
-            cells = temp
+            cells = [column[:filledRows] for column in cells]
 
         self.unregisterPropertiesAndComponents(oldListenedProperties,
                 oldVisibleComponents)
@@ -1527,6 +1530,62 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
         return cells
 
 
+    def getRowItemIds(self, firstIndex, count):
+        """Returns the ids of the rows at indexes C{firstIndex} to
+        C{firstIndex + count - 1}, fewer if the end of the table is
+        reached. The ids are read with one call if the container implements
+        L{IBulkIndexed}.
+        """
+        if isinstance(self.items, container.IBulkIndexed):
+            return self.items.getItemIdsInRange(firstIndex, count)
+
+        itemIds = list()
+        if isinstance(self.items, container.IIndexed):
+            for index in range(firstIndex, min(firstIndex + count,
+                    self.size())):
+                itemIds.append(self.getIdByIndex(index))
+        else:
+            idd = self.firstItemId()
+            for _ in range(firstIndex):
+                idd = self.nextItemId(idd)
+            while idd is not None and len(itemIds) < count:
+                itemIds.append(idd)
+                idd = self.nextItemId(idd)
+        return itemIds
+
+
+    def getBulkValueColumns(self, itemIds, colids, iscomponent):
+        """Returns the columns whose cells can be rendered from values read
+        with L{IBulkIndexed.getItemValues}, as a dictionary from the index
+        of the column to the position of the column in the values.
+
+        The property objects of the cells are needed instead if the table
+        is editable, if L{getPropertyValue} or L{formatPropertyValue} is
+        overridden, or if the properties send value change events that the
+        table listens to because the container does not send
+        L{IPropertyValueChangeEvent}s.
+        """
+        valueIndexes = dict()
+        if (len(itemIds) == 0
+                or not isinstance(self.items, container.IBulkIndexed)
+                or (self.isEditable() and self._fieldFactory is not None)
+                or (type(self).getPropertyValue.im_func
+                        is not Table.getPropertyValue.im_func)
+                or (type(self).formatPropertyValue.im_func
+                        is not Table.formatPropertyValue.im_func)):
+            return valueIndexes
+
+        notifier = isinstance(self.items,
+                container.IPropertyValueChangeNotifier)
+        for j, colId in enumerate(colids):
+            if iscomponent[j] or self.isColumnCollapsed(colId):
+                continue
+            if notifier or not isinstance(self.getContainerProperty(
+                    itemIds[0], colId), IValueChangeNotifier):
+                valueIndexes[j] = len(valueIndexes)
+        return valueIndexes
+
+
     def registerComponent(self, component):
         #logger.debug('Registered %s: %s' % (component.__class__.__name__,
         #        component.getCaption()))
@@ -1536,6 +1595,10 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
 
 
     def listenProperty(self, p, oldListenedProperties):
+        # the changes are received from the container
+        if isinstance(self.items, container.IPropertyValueChangeNotifier):
+            return
+
         if isinstance(p, IValueChangeNotifier):
             if ((oldListenedProperties is None)
                     or (p not in oldListenedProperties)):
@@ -1571,7 +1634,7 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
                                 and cellVal in self._visibleComponents):
                             self._visibleComponents.remove(cellVal)
                             self.unregisterComponent(cellVal)
-                        else:
+                        elif self._listenedProperties:
                             r = self._pageBuffer[self.CELL_ITEMID][i + ix]
                             p = self.getContainerProperty(r, colids[c])
                             if (isinstance(p, IValueChangeNotifier)
@@ -1780,6 +1843,18 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
             #super(Table, self).setContainerDataSource(
             #    ContainerOrderedWrapper(newDataSource) )
 
+        # Listens to the value changes of the data source, which may be
+        # a wrapper of the given container
+        if self._valueChangeNotifier is not self.items:
+            if self._valueChangeNotifier is not None:
+                self._valueChangeNotifier.removeListener(self,
+                        container.IPropertyValueChangeListener)
+                self._valueChangeNotifier = None
+            if isinstance(self.items, container.IPropertyValueChangeNotifier):
+                self.items.addListener(self,
+                        container.IPropertyValueChangeListener)
+                self._valueChangeNotifier = self.items
+
         # Resets page position
         self._currentPageFirstItemId = None
         self._currentPageFirstItemIndex = 0
@@ -2176,7 +2251,7 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
             # This could probably be done for full repaints also to simplify
             # the client side.
             pageBufferLastIndex = (self._pageBufferFirstIndex
-                    + self._pageBuffer[self.CELL_ITEMID].length) - 1
+                    + len(self._pageBuffer[self.CELL_ITEMID])) - 1
             target.addAttribute(VScrollTable.ATTRIBUTE_PAGEBUFFER_FIRST,
                     self._pageBufferFirstIndex)
             target.addAttribute(VScrollTable.ATTRIBUTE_PAGEBUFFER_LAST,
@@ -2929,6 +3004,51 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
         self.requestRepaint()
 
 
+    def containerPropertyValueChange(self, event):
+        """Notifies this listener that a property value of an item in the
+        container has changed.
+
+        Refreshes the content area if the value is rendered.
+
+        @see: L{container.IPropertyValueChangeListener}
+        """
+        if self.isRenderedCell(event.getItemId(), event.getPropertyId()):
+            self.resetPageBuffer()
+            self.refreshRenderedCells()
+            self._containerChangeToBeRendered = True
+            self.requestRepaint()
+
+
+    def isRenderedCell(self, itemId, propertyId):
+        """Tests if the value of the given property of the given item is
+        rendered from the property in the page buffer, so that a change to
+        it needs a refresh. Cells of collapsed or generated columns and
+        fields bound to the property are not refreshed.
+        """
+        if (self._pageBuffer is None
+                or propertyId in self._columnGenerators
+                or self.isColumnCollapsed(propertyId)):
+            return False
+
+        if self._pageBufferRows is None:
+            self._pageBufferRows = dict((idd, row) for row, idd in
+                    enumerate(self._pageBuffer[self.CELL_ITEMID]))
+        row = self._pageBufferRows.get(itemId)
+        if row is None:
+            return False
+
+        col = self.CELL_FIRSTCOL
+        for colId in self.getVisibleColumns():
+            if colId == propertyId:
+                value = self._pageBuffer[col][row]
+                # fields listen to their property
+                return not (isinstance(value, IComponent)
+                        and not issubclass(self.getType(colId), IComponent))
+            if not self.isColumnCollapsed(colId):
+                col += 1
+        return False
+
+
     def resetPageBuffer(self):
         """Clears the current page buffer. Call this before
         L{refreshRenderedCells} to ensure that all content is
@@ -2939,6 +3059,7 @@ class Table(AbstractSelect, #container.IOrdered, action.IContainer,
         self._reqFirstRowToPaint = -1
         self._reqRowsToPaint = -1
         self._pageBuffer = None
+        self._pageBufferRows = None
 
 
     def attach(self):
@@ -0,0 +1,556 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Streaming export of the contents of a table to CSV and XLSX files."""
+
+import re
+import csv
+import time
+import zlib
+import struct
+
+from cStringIO import StringIO
+from xml.sax.saxutils import escape
+
+from muntjac.data import container
+from muntjac.data.property import IProperty
+from muntjac.ui.field import IField
+from muntjac.ui.component import IComponent
+from muntjac.ui.table import Table
+
+from muntjac.terminal.stream_resource import \
+    IStreamSource, IterableStream, StreamResource
+
+
+class TableExport(IStreamSource):
+    """Base class of the exports of the rows of a L{Table}, written as a
+    stream source for a L{StreamResource}.
+
+    The rows are exported as the table shows them: the visible columns
+    that are not collapsed, in the order of the table, with the item order,
+    filters and sorting of the container. Cells are formatted with
+    L{Table.formatPropertyValue} and L{IColumnGenerator}s, and rows of an
+    L{IRowGenerator} are exported with their text. Components are
+    exported with the value of their property, if any. Editable tables are
+    exported with the formatted values instead of fields.
+
+    The container is read a page of rows at a time while the file is
+    streamed, so the memory used does not depend on the number of rows.
+    Subclasses implement L{generate} to produce the file contents.
+    """
+
+    #: Number of rows read from the container at once.
+    DEFAULT_PAGE_LENGTH = 1000
+
+    #: MIME type of the exported files.
+    CONTENT_TYPE = None
+
+    def __init__(self, table, pageLength=None, includeHeaders=True):
+        """Creates an export of a table.
+
+        @param table:
+                   the table to export
+        @param pageLength:
+                   the number of rows read from the container at once
+        @param includeHeaders:
+                   C{True} to start with a row of the column headers
+        """
+        self._table = table
+
+        if pageLength is None:
+            pageLength = self.DEFAULT_PAGE_LENGTH
+        self._pageLength = pageLength
+
+        self._includeHeaders = includeHeaders
+
+
+    def getTable(self):
+        """Returns the exported table."""
+        return self._table
+
+
+    def getPageLength(self):
+        """Returns the number of rows read from the container at once."""
+        return self._pageLength
+
+
+    def isIncludeHeaders(self):
+        """Returns C{True} if the export starts with a header row."""
+        return self._includeHeaders
+
+
+    def getColumns(self):
+        """Returns the ids of the exported columns, the visible columns that
+        are not collapsed."""
+        table = self._table
+        return [colId for colId in table.getVisibleColumns()
+                if not table.isColumnCollapsed(colId)]
+
+
+    def getHeaders(self, columns):
+        """Returns the header texts of the given columns. The column id is
+        used for columns without a header."""
+        headers = list()
+        for colId in columns:
+            header = self._table.getColumnHeader(colId)
+            headers.append(self.toText(colId if header is None else header))
+        return headers
+
+
+    def getItemIdPages(self):
+        """Yields the ids of the rows of the table in lists of at most
+        L{getPageLength} ids."""
+        table = self._table
+        pageLength = self._pageLength
+        if isinstance(table.getContainerDataSource(), container.IIndexed):
+            firstIndex = 0
+            while True:
+                itemIds = table.getRowItemIds(firstIndex, pageLength)
+                if len(itemIds) > 0:
+                    yield itemIds
+                if len(itemIds) < pageLength:
+                    break
+                firstIndex += len(itemIds)
+        else:
+            itemIds = list()
+            itemId = table.firstItemId()
+            while itemId is not None:
+                itemIds.append(itemId)
+                if len(itemIds) == pageLength:
+                    yield itemIds
+                    itemIds = list()
+                itemId = table.nextItemId(itemId)
+            if len(itemIds) > 0:
+                yield itemIds
+
+
+    def getPages(self):
+        """Yields the rows of the table in lists of at most
+        L{getPageLength} rows. A row is a list of the texts of its cells.
+
+        Each page is read holding the lock of the application, which is
+        released between the pages.
+        """
+        columns = self.readLocked(self.getColumns)
+        itemIdPages = self.getItemIdPages()
+        while True:
+            rows = self.readLocked(self.readPage, itemIdPages, columns)
+            if rows is None:
+                break
+            yield rows
+
+
+    def readPage(self, itemIdPages, columns):
+        """Returns the rows of the next page of item ids, or C{None} if
+        there are no more pages."""
+        try:
+            itemIds = itemIdPages.next()
+        except StopIteration:
+            return None
+        return self.getRows(itemIds, columns)
+
+
+    def getLock(self):
+        """Returns the lock of the application of the table, or C{None} if
+        the table is not attached to an application.
+
+        The file is streamed after the request has released the lock, so
+        the lock is acquired again while the table is read.
+        """
+        application = self._table.getApplication()
+        if application is None:
+            return None
+        return application.getLock()
+
+
+    def readLocked(self, function, *args):
+        """Calls the given function holding the lock of the application
+        and returns the result."""
+        lock = self.getLock()
+        if lock is None:
+            return function(*args)
+        with lock:
+            return function(*args)
+
+
+    def getRows(self, itemIds, columns):
+        """Returns the texts of the cells of the given rows.
+
+        The values of the columns formatted by default are read with one
+        L{IBulkIndexed.getItemValues} call if the container supports it.
+        """
+        table = self._table
+        items = table.getContainerDataSource()
+
+        generators = [table.getColumnGenerator(colId) for colId in columns]
+        components = [generators[j] is None and self.isComponentType(colId)
+                for j, colId in enumerate(columns)]
+
+        # column index -> position in the rows of values read at once
+        valueIndexes = dict()
+        if (isinstance(items, container.IBulkIndexed)
+                and (type(table).formatPropertyValue.im_func
+                        is Table.formatPropertyValue.im_func)):
+            for j, colId in enumerate(columns):
+                if generators[j] is None and not components[j]:
+                    valueIndexes[j] = len(valueIndexes)
+        if len(valueIndexes) > 0:
+            values = items.getItemValues(itemIds,
+                    [columns[j] for j in sorted(valueIndexes)])
+
+        rowGenerator = table.getRowGenerator()
+        rows = list()
+        for i, itemId in enumerate(itemIds):
+            if rowGenerator is not None:
+                generatedRow = rowGenerator.generateRow(table, itemId)
+                if generatedRow is not None:
+                    rows.append(self.getGeneratedRowCells(generatedRow,
+                            len(columns)))
+                    continue
+
+            row = list()
+            for j, colId in enumerate(columns):
+                if j in valueIndexes:
+                    value = values[i][valueIndexes[j]]
+                elif generators[j] is not None:
+                    value = generators[j].generateCell(table, itemId, colId)
+                else:
+                    prop = table.getContainerProperty(itemId, colId)
+                    if components[j] and prop is not None:
+                        value = prop.getValue()
+                    else:
+                        value = table.formatPropertyValue(itemId, colId,
+                                prop)
+                row.append(self.toText(value))
+            rows.append(row)
+        return rows
+
+
+    def getGeneratedRowCells(self, generatedRow, columnCount):
+        """Returns the texts of the cells of a row of an
+        L{IRowGenerator}."""
+        texts = list(generatedRow.getText())
+        if len(texts) == 1 and isinstance(texts[0], (list, tuple)):
+            # the constructor sets the texts as a single argument
+            texts = list(texts[0])
+        if generatedRow.isSpanColumns():
+            texts = texts[:1]
+        cells = [self.toText(text) for text in texts[:columnCount]]
+        cells.extend([''] * (columnCount - len(cells)))
+        return cells
+
+
+    def isComponentType(self, colId):
+        typ = self._table.getType(colId)
+        return isinstance(typ, type) and issubclass(typ, IComponent)
+
+
+    def toText(self, value):
+        """Returns the text of a cell value. Fields and other components
+        with a property are represented by their value, other components
+        by an empty text.
+        """
+        if value is None:
+            return ''
+        if isinstance(value, basestring):
+            return value
+        if isinstance(value, IComponent):
+            if isinstance(value, (IProperty, IField)):
+                return self.toText(value.getValue())
+            return ''
+        return str(value)
+
+
+    def encode(self, text):
+        """Returns the UTF-8 encoded bytes of a text."""
+        if isinstance(text, unicode):
+            return text.encode('utf-8')
+        return text
+
+
+    def generate(self):
+        """Yields the contents of the exported file as byte strings."""
+        raise NotImplementedError
+
+
+    def getStream(self):
+        """Returns a new stream of the exported file. The container is read
+        while the stream is read."""
+        return IterableStream(self.generate())
+
+
+    def createResource(self, application, filename):
+        """Creates a resource for downloading the export. The resource is
+        not cached, so the file reflects the table when it is downloaded.
+
+        @param application:
+                   the application to register the resource to
+        @param filename:
+                   the name of the downloaded file
+        @return: the L{StreamResource} of the export
+        """
+        resource = StreamResource(self, filename, application)
+        resource.setMIMEType(self.CONTENT_TYPE)
+        resource.setCacheTime(0)
+        return resource
+
+
+class CSVExport(TableExport):
+    """Exports the rows of a table to a comma separated values file in
+    UTF-8.
+    """
+
+    CONTENT_TYPE = 'text/csv'
+
+    def __init__(self, table, pageLength=None, includeHeaders=True,
+                dialect='excel'):
+        """Creates a CSV export of a table.
+
+        @param dialect:
+                   the C{csv} module dialect of the file
+        """
+        super(CSVExport, self).__init__(table, pageLength, includeHeaders)
+        self._dialect = dialect
+
+
+    def generate(self):
+        out = StringIO()
+        writer = csv.writer(out, self._dialect)
+
+        if self._includeHeaders:
+            headers = self.readLocked(lambda: self.getHeaders(
+                    self.getColumns()))
+            writer.writerow([self.encode(text) for text in headers])
+
+        for rows in self.getPages():
+            for row in rows:
+                writer.writerow([self.encode(text) for text in row])
+            yield out.getvalue()
+            out.reset()
+            out.truncate()
+
+        data = out.getvalue()
+        if len(data) > 0:
+            yield data
+
+
+class XLSXExport(TableExport):
+    """Exports the rows of a table to an Office Open XML workbook with one
+    worksheet.
+
+    Texts are written as inline strings, so the workbook needs no shared
+    string table built before the sheet. Texts that are plain decimal
+    numbers, as the default formatting of numbers produces, are written as
+    numbers.
+    """
+
+    CONTENT_TYPE = ('application/vnd.openxmlformats-officedocument.'
+            'spreadsheetml.sheet')
+
+    _NUMBER = re.compile(r'-?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?$')
+
+    _INVALID_XML = re.compile(u'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+    _CONTENT_TYPES = ('<?xml version="1.0" encoding="UTF-8" '
+        'standalone="yes"?>\n<Types xmlns="http://schemas.openxmlformats.org'
+        '/package/2006/content-types"><Default Extension="rels" ContentType='
+        '"application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType='
+        '"application/vnd.openxmlformats-officedocument.spreadsheetml.'
+        'worksheet+xml"/></Types>')
+
+    _RELATIONSHIPS = ('<?xml version="1.0" encoding="UTF-8" '
+        'standalone="yes"?>\n<Relationships xmlns="http://schemas.'
+        'openxmlformats.org/package/2006/relationships"><Relationship '
+        'Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+        '2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>')
+
+    _WORKBOOK = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+        '2006/main" xmlns:r="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships"><sheets><sheet name="%s" '
+        'sheetId="1" r:id="rId1"/></sheets></workbook>')
+
+    _WORKBOOK_RELATIONSHIPS = ('<?xml version="1.0" encoding="UTF-8" '
+        'standalone="yes"?>\n<Relationships xmlns="http://schemas.'
+        'openxmlformats.org/package/2006/relationships"><Relationship '
+        'Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+        '2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>')
+
+    _SHEET_START = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '\n<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+        '2006/main"><sheetData>')
+
+    _SHEET_END = '</sheetData></worksheet>'
+
+    def __init__(self, table, pageLength=None, includeHeaders=True,
+                sheetName='Sheet1'):
+        """Creates an XLSX export of a table.
+
+        @param sheetName:
+                   the name of the worksheet, at most 31 characters
+        """
+        super(XLSXExport, self).__init__(table, pageLength, includeHeaders)
+        self._sheetName = sheetName
+
+
+    def generate(self):
+        archive = ZipStream()
+        workbook = self._WORKBOOK % self.escape(self._sheetName)
+        for name, content in [
+                ('[Content_Types].xml', self._CONTENT_TYPES),
+                ('_rels/.rels', self._RELATIONSHIPS),
+                ('xl/workbook.xml', workbook),
+                ('xl/_rels/workbook.xml.rels',
+                        self._WORKBOOK_RELATIONSHIPS)]:
+            for data in archive.writeMember(name, [content]):
+                yield data
+
+        for data in archive.writeMember('xl/worksheets/sheet1.xml',
+                self.generateSheet()):
+            yield data
+
+        yield archive.close()
+
+
+    def generateSheet(self):
+        """Yields the XML of the worksheet a page of rows at a time."""
+        columns = self.readLocked(self.getColumns)
+        references = [columnName(j) for j in range(len(columns))]
+        rowNumber = 0
+
+        yield self._SHEET_START
+
+        if self._includeHeaders:
+            rowNumber += 1
+            yield self.getRowXML(rowNumber, references,
+                    self.readLocked(self.getHeaders, columns))
+
+        for rows in self.getPages():
+            chunk = list()
+            for row in rows:
+                rowNumber += 1
+                chunk.append(self.getRowXML(rowNumber, references, row))
+            yield ''.join(chunk)
+
+        yield self._SHEET_END
+
+
+    def getRowXML(self, rowNumber, references, row):
+        cells = ['<row r="%d">' % rowNumber]
+        for reference, text in zip(references, row):
+            if len(text) == 0:
+                continue
+            if len(text) <= 15 and self._NUMBER.match(text):
+                cells.append('<c r="%s%d"><v>%s</v></c>'
+                        % (reference, rowNumber, self.encode(text)))
+            else:
+                if text != text.strip():
+                    element = '<t xml:space="preserve">'
+                else:
+                    element = '<t>'
+                cells.append('<c r="%s%d" t="inlineStr"><is>%s%s</t></is>'
+                        '</c>' % (reference, rowNumber, element,
+                                self.escape(text)))
+        cells.append('</row>')
+        return ''.join(cells)
+
+
+    def escape(self, text):
+        """Escapes a text for XML, removing the control characters that
+        XML does not allow."""
+        if isinstance(text, str):
+            text = text.decode('utf-8', 'replace')
+        return self.encode(escape(self._INVALID_XML.sub(u'', text),
+                {'"': '&quot;'}))
+
+
+def columnName(index):
+    """Returns the spreadsheet name of the column at the given zero based
+    index, such as C{'A'} or C{'AB'}."""
+    name = ''
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord('A') + remainder) + name
+    return name
+
+
+class ZipStream(object):
+    """Writes a ZIP archive as a sequence of byte strings, without seeking
+    back to write the sizes of the members. The members are deflated while
+    they are written, and their sizes and checksums follow their data in
+    data descriptors. The archive cannot exceed 4GB, as ZIP64 extensions
+    are not written.
+    """
+
+    def __init__(self, compressLevel=6):
+        self._compressLevel = compressLevel
+
+        #: Number of bytes written so far.
+        self._offset = 0
+
+        #: Central directory entries of the members written.
+        self._entries = list()
+
+        t = time.localtime()
+        self._time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        self._date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+    def writeMember(self, name, chunks):
+        """Yields the bytes of a member of the archive.
+
+        @param name:
+                   the path of the member in the archive
+        @param chunks:
+                   an iterable of the byte strings of the member contents
+        """
+        offset = self._offset
+        header = struct.pack('<4s5H3L2H', 'PK\x03\x04', 20, 0x08, 8,
+                self._time, self._date, 0, 0, 0, len(name), 0) + name
+        yield self.written(header)
+
+        compressor = zlib.compressobj(self._compressLevel, zlib.DEFLATED,
+                -zlib.MAX_WBITS)
+        crc = 0
+        size = 0
+        compressedSize = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            data = compressor.compress(chunk)
+            if len(data) > 0:
+                compressedSize += len(data)
+                yield self.written(data)
+
+        data = compressor.flush()
+        compressedSize += len(data)
+        crc &= 0xffffffff
+        if max(size, self._offset + len(data)) > 0xffffffff:
+            raise ValueError('archive too large without ZIP64 extensions')
+        yield self.written(data + struct.pack('<4s3L', 'PK\x07\x08', crc,
+                compressedSize, size))
+
+        self._entries.append(struct.pack('<4s6H3L5H2L', 'PK\x01\x02', 20,
+                20, 0x08, 8, self._time, self._date, crc, compressedSize,
+                size, len(name), 0, 0, 0, 0, 0, offset) + name)
+
+
+    def close(self):
+        """Returns the bytes of the central directory ending the
+        archive."""
+        directory = ''.join(self._entries)
+        count = len(self._entries)
+        return directory + struct.pack('<4s4H2LH', 'PK\x05\x06', 0, 0,
+                count, count, len(directory), self._offset, 0)
+
+
+    def written(self, data):
+        self._offset += len(data)
+        return data
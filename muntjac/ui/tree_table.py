@@ -18,6 +18,7 @@ from muntjac.data.util.container_hierarchical_wrapper \
     import ContainerHierarchicalWrapper
 
 from muntjac.ui.treetable.collapsible import ICollapsible
+from muntjac.ui.treetable.visible_order import VisibleOrder
 from muntjac.data.util.hierarchical_container import HierarchicalContainer
 
 
@@ -82,14 +83,16 @@ class TreeTable(Table, IHierarchical):
         return self._cStrategy
 
 
-    def paintRowAttributes(self, target, itemId):
-        super(TreeTable, self).paintRowAttributes(target, itemId)
-        depth = self.getContainerStrategy().getDepth(itemId)
-        target.addAttribute('depth', depth)
-        if self.getContainerDataSource().areChildrenAllowed(itemId):
-            target.addAttribute('ca', True)
-            isOpen = self.getContainerStrategy().isNodeOpen(itemId)
-            target.addAttribute('open', isOpen)
+    def paintRowAttributes(self, *args):
+        super(TreeTable, self).paintRowAttributes(*args)
+        if len(args) == 2:
+            target, itemId = args
+            depth = self.getContainerStrategy().getDepth(itemId)
+            target.addAttribute('depth', depth)
+            if self.getContainerDataSource().areChildrenAllowed(itemId):
+                target.addAttribute('ca', True)
+                isOpen = self.getContainerStrategy().isNodeOpen(itemId)
+                target.addAttribute('open', isOpen)
 
 
     def paintRowIcon(self, target, cells, indexInRowbuffer):
@@ -225,12 +228,12 @@ class TreeTable(Table, IHierarchical):
         return not self.getContainerStrategy().isNodeOpen(self._toggledItemId)
 
 
-    def toggleChildVisibility(self, itemId):
+    def toggleChildVisibility(self, itemId, forceFullRefresh=False):
         self.getContainerStrategy().toggleChildVisibility(itemId)
         # ensure that page still has first item in page, DON'T clear the
-        # caches.
+        # caches unless a full refresh is needed.
         idx = self.getCurrentPageFirstItemIndex()
-        self.setCurrentPageFirstItemIndex(idx, False)
+        self.setCurrentPageFirstItemIndex(idx, forceFullRefresh)
         self.requestRepaint()
         if self.isCollapsed(itemId):
             self.fireCollapseEvent(itemId)
@@ -271,6 +274,10 @@ class TreeTable(Table, IHierarchical):
         return self.getContainerStrategy().getIdByIndex(index)
 
 
+    def getRowItemIds(self, firstIndex, count):
+        return self.getContainerStrategy().getRowItemIds(firstIndex, count)
+
+
     def indexOfId(self, itemId):
         return self.getContainerStrategy().indexOfId(itemId)
 
@@ -307,7 +314,7 @@ class TreeTable(Table, IHierarchical):
         if itemId is not None:
             return self.getContainerDataSource().getParent(itemId)
         else:
-            super(TreeTable, self).getParent()
+            return super(TreeTable, self).getParent()
 
 
     def hasChildren(self, itemId):
@@ -327,8 +334,13 @@ class TreeTable(Table, IHierarchical):
                 areChildrenAllowed)
 
 
-    def setParent(self, itemId, newParentId):
-        return self.getContainerDataSource().setParent(itemId, newParentId)
+    def setParent(self, itemId, newParentId=None):
+        if newParentId is not None:
+            return self.getContainerDataSource().setParent(itemId,
+                    newParentId)
+        else:
+            parent = itemId
+            super(TreeTable, self).setParent(parent)
 
 
     def setCollapsed(self, itemId, collapsed):
@@ -342,7 +354,10 @@ class TreeTable(Table, IHierarchical):
                    true if the Item should be collapsed, false if expanded
         """
         if self.isCollapsed(itemId) != collapsed:
-            self.toggleChildVisibility(itemId)
+            # only the toggles of the client are painted as partial updates,
+            # the cached rows are refreshed otherwise
+            self._toggledItemId = None
+            self.toggleChildVisibility(itemId, True)
 
 
     def isCollapsed(self, itemId):
@@ -494,6 +509,9 @@ class IContainerStrategy(object):
     def getIdByIndex(self, index):
         raise NotImplementedError
 
+    def getRowItemIds(self, firstIndex, count):
+        raise NotImplementedError
+
     def indexOfId(self, idd):
         raise NotImplementedError
 
@@ -558,37 +576,42 @@ class CollapsibleStrategy(AbstractStrategy):
 
 
     def size(self):
-        super(TreeTable, self._treetable).size()
+        return super(TreeTable, self._treetable).size()
 
 
     def getIdByIndex(self, index):
-        super(TreeTable, self._treetable).getIdByIndex(index)
+        return super(TreeTable, self._treetable).getIdByIndex(index)
+
+
+    def getRowItemIds(self, firstIndex, count):
+        return super(TreeTable, self._treetable).getRowItemIds(firstIndex,
+                count)
 
 
     def indexOfId(self, idd):
-        super(TreeTable, self._treetable).indexOfId(idd)
+        return super(TreeTable, self._treetable).indexOfId(idd)
 
 
     def isLastId(self, itemId):
         # using the default impl
-        super(TreeTable, self._treetable).isLastId(itemId)
+        return super(TreeTable, self._treetable).isLastId(itemId)
 
 
     def lastItemId(self):
         # using the default impl
-        super(TreeTable, self._treetable).lastItemId()
+        return super(TreeTable, self._treetable).lastItemId()
 
 
     def nextItemId(self, itemId):
-        super(TreeTable, self._treetable).nextItemId(itemId)
+        return super(TreeTable, self._treetable).nextItemId(itemId)
 
 
     def prevItemId(self, itemId):
-        super(TreeTable, self._treetable).prevItemId(itemId)
+        return super(TreeTable, self._treetable).prevItemId(itemId)
 
 
     def getItemIds(self):
-        super(TreeTable, self._treetable).getItemIds()
+        return super(TreeTable, self._treetable).getItemIds()
 
 
 class HierarchicalStrategy(AbstractStrategy):
@@ -597,12 +620,19 @@ class HierarchicalStrategy(AbstractStrategy):
 
     Store collapsed/open states internally, fool Table to use preorder when
     accessing items from container via Ordered/Indexed methods.
+
+    The preorder is built when first needed and updated on expand and
+    collapse by splicing the visible descendants of the toggled item in or
+    out. The depths of the visible items are kept with it.
     """
 
     def __init__(self, treetable):
         self._openItems = set()
         self._preOrder = None
 
+        # item id -> depth, for the items in the preorder
+        self._depths = dict()
+
         super(HierarchicalStrategy, self).__init__(treetable)
 
 
@@ -610,6 +640,13 @@ class HierarchicalStrategy(AbstractStrategy):
         return itemId in self._openItems
 
 
+    def getDepth(self, itemId):
+        depth = self.getDepths().get(itemId)
+        if depth is None:
+            return super(HierarchicalStrategy, self).getDepth(itemId)
+        return depth
+
+
     def size(self):
         return len(self.getPreOrder())
 
@@ -618,6 +655,21 @@ class HierarchicalStrategy(AbstractStrategy):
         return list(self.getPreOrder())
 
 
+    def getIdByIndex(self, index):
+        return self.getPreOrder().get(index)
+
+
+    def getRowItemIds(self, firstIndex, count):
+        return self.getPreOrder().range(firstIndex, count)
+
+
+    def indexOfId(self, idd):
+        try:
+            return self.getPreOrder().index(idd)
+        except ValueError:
+            return -1
+
+
     def isLastId(self, itemId):
         if itemId is None:
             return False
@@ -658,57 +710,84 @@ class HierarchicalStrategy(AbstractStrategy):
 
 
     def toggleChildVisibility(self, itemId):
+        preOrder = self._preOrder
+        if preOrder is not None and itemId in preOrder:
+            index = preOrder.index(itemId) + 1
+            depth = self._depths[itemId]
+        else:
+            # the preorder doesn't change if the item isn't visible
+            index = None
+
         if itemId in self._openItems:
+            if index is not None:
+                count = len(self.getVisibleChildTree(itemId, depth))
+                for childId in preOrder.remove(index, count):
+                    del self._depths[childId]
             self._openItems.remove(itemId)
-            removed = True
+            logger.debug('Item ' + str(itemId) + ' is now collapsed')
         else:
-            removed = False
-
-        if not removed:
             self._openItems.add(itemId)
-            logger.debug('Item ' + itemId + ' is now expanded')
-        else:
-            logger.debug('Item ' + itemId + ' is now collapsed')
-
-        self.clearPreorderCache()
+            if index is not None:
+                preOrder.insert(index,
+                        self.getVisibleChildTree(itemId, depth))
+            logger.debug('Item ' + str(itemId) + ' is now expanded')
 
 
     def clearPreorderCache(self):
         self._preOrder = None  # clear preorder cache
+        self._depths = dict()
 
 
     def getPreOrder(self):
         """Preorder of ids currently visible.
         """
         if self._preOrder is None:
-            self._preOrder = list()
+            itemIds = list()
             dataSource = self._treetable.getContainerDataSource()
             rootItemIds = dataSource.rootItemIds()
             for idd in rootItemIds:
-                self._preOrder.add(idd)
-                self.addVisibleChildTree(idd)
+                itemIds.append(idd)
+                self._depths[idd] = 0
+                itemIds.extend(self.getVisibleChildTree(idd, 0))
+            self._preOrder = VisibleOrder(itemIds)
         return self._preOrder
 
 
-    def addVisibleChildTree(self, idd):
-        if self.isNodeOpen(idd):
-            dataSource = self._treetable.getContainerDataSource()
-            children = dataSource.getChildren(idd)
-            if children is not None:
-                for childId in children:
-                    self._preOrder.add(childId)
-                    self.addVisibleChildTree(childId)
+    def getDepths(self):
+        """Depths of the ids currently visible."""
+        self.getPreOrder()
+        return self._depths
 
 
-    def indexOfId(self, idd):
-        try:
-            return self.getPreOrder().index(idd)
-        except ValueError:
-            return -1
+    def getVisibleChildTree(self, idd, depth):
+        """Returns the visible descendants of the given item in preorder and
+        records their depths.
 
+        @param depth:
+                   the depth of the given item
+        """
+        itemIds = list()
+        if self.isNodeOpen(idd):
+            dataSource = self._treetable.getContainerDataSource()
+            depths = self._depths
+            openItems = self._openItems
 
-    def getIdByIndex(self, index):
-        return self.getPreOrder().get(index)
+            # iterators over the children of the open items on the path to
+            # the current item, deep trees would exceed the recursion limit
+            children = dataSource.getChildren(idd)
+            stack = [iter(children)] if children is not None else []
+            while len(stack) > 0:
+                for childId in stack[-1]:
+                    itemIds.append(childId)
+                    depths[childId] = depth + len(stack)
+                    if childId in openItems:
+                        children = dataSource.getChildren(childId)
+                        if children is not None:
+                            stack.append(iter(children))
+                            break
+                else:
+                    stack.pop()
+        return itemIds
 
 
     def containerItemSetChange(self, event):
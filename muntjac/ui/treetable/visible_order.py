@@ -0,0 +1,198 @@
+# @MUNTJAC_COPYRIGHT@
+# @MUNTJAC_LICENSE@
+
+"""Helper for TreeTable."""
+
+from bisect import bisect_right
+
+
+class VisibleOrder(object):
+    """Helper for TreeTable. A list of the visible item ids in preorder
+    that supports splicing ranges of ids in and out.
+
+    The ids are stored in blocks of at most C{blockSize} ids. Looking up
+    the index of an id takes a dictionary lookup and a search within its
+    block, looking up the id at an index takes a binary search over the
+    blocks. Inserting or removing C{k} ids takes time proportional to
+    C{k} and the number of blocks.
+    """
+
+    def __init__(self, itemIds=None, blockSize=512):
+        self._blockSize = blockSize
+
+        #: Lists of ids, none of them empty.
+        self._blocks = list()
+
+        #: Item id -> block containing it.
+        self._blockOf = dict()
+
+        #: Index of the first id of each block, None when outdated.
+        self._starts = None
+
+        #: id() of a block -> position of the block in blocks.
+        self._positions = None
+
+        self._size = 0
+
+        if itemIds is not None:
+            self.insert(0, itemIds)
+
+
+    def __len__(self):
+        return self._size
+
+
+    def __contains__(self, itemId):
+        return itemId in self._blockOf
+
+
+    def __iter__(self):
+        for block in self._blocks:
+            for itemId in block:
+                yield itemId
+
+
+    def get(self, index):
+        """Returns the id at the given index.
+
+        @raise IndexError: if the index is out of range
+        """
+        if index < 0 or index >= self._size:
+            raise IndexError('index out of range')
+
+        self.updateStarts()
+        position = bisect_right(self._starts, index) - 1
+        return self._blocks[position][index - self._starts[position]]
+
+
+    def range(self, index, count):
+        """Returns at most C{count} ids starting from the given index."""
+        count = min(count, self._size - index)
+        if index < 0 or count <= 0:
+            return []
+
+        position, offset = self.locate(index)
+        itemIds = list()
+        while len(itemIds) < count:
+            block = self._blocks[position]
+            itemIds.extend(block[offset:offset + count - len(itemIds)])
+            position += 1
+            offset = 0
+        return itemIds
+
+
+    def index(self, itemId):
+        """Returns the index of the given id.
+
+        @raise ValueError: if the id is not in the list
+        """
+        block = self._blockOf.get(itemId)
+        if block is None:
+            raise ValueError('item id not visible')
+
+        self.updateStarts()
+        return (self._starts[self._positions[id(block)]]
+                + block.index(itemId))
+
+
+    def insert(self, index, itemIds):
+        """Inserts the given ids before the id at the given index."""
+        itemIds = list(itemIds)
+        if len(itemIds) == 0:
+            return
+
+        if index >= self._size:
+            position = len(self._blocks)
+            tail = None
+        else:
+            position, offset = self.locate(index)
+            if offset == 0:
+                tail = None
+            else:
+                # split the block at the index
+                block = self._blocks[position]
+                tail = block[offset:]
+                del block[offset:]
+                position += 1
+
+        size = self._blockSize
+        blocks = [itemIds[i:i + size] for i in range(0, len(itemIds), size)]
+        if tail is not None:
+            blocks.append(tail)
+
+        blockOf = self._blockOf
+        for block in blocks:
+            for itemId in block:
+                blockOf[itemId] = block
+
+        self._blocks[position:position] = blocks
+        self._size += len(itemIds)
+        self.invalidate()
+
+
+    def remove(self, index, count):
+        """Removes C{count} ids starting from the given index.
+
+        @return: the removed ids
+        """
+        count = min(count, self._size - index)
+        if count <= 0:
+            return []
+
+        position, offset = self.locate(index)
+        removed = list()
+        remaining = count
+        while remaining > 0:
+            block = self._blocks[position]
+            end = min(offset + remaining, len(block))
+            removed.extend(block[offset:end])
+            del block[offset:end]
+            remaining -= end - offset
+            if len(block) == 0:
+                del self._blocks[position]
+            else:
+                position += 1
+            offset = 0
+
+        blockOf = self._blockOf
+        for itemId in removed:
+            del blockOf[itemId]
+
+        self._size -= count
+        self.invalidate()
+
+        return removed
+
+
+    def locate(self, index):
+        """Returns the position of the block containing the given index and
+        the offset of the index in the block."""
+        self.updateStarts()
+        position = bisect_right(self._starts, index) - 1
+        return position, index - self._starts[position]
+
+
+    def invalidate(self):
+        # splitting blocks leaves small blocks behind, the blocks are
+        # rebuilt when there are many more than needed
+        if len(self._blocks) > 8 + (2 * self._size / self._blockSize):
+            itemIds = list(self)
+            self._blocks = list()
+            self._blockOf.clear()
+            self._size = 0
+            self.insert(0, itemIds)
+        self._starts = None
+        self._positions = None
+
+
+    def updateStarts(self):
+        if self._starts is None:
+            starts = list()
+            positions = dict()
+            start = 0
+            for position, block in enumerate(self._blocks):
+                starts.append(start)
+                positions[id(block)] = position
+                start += len(block)
+            self._starts = starts
+            self._positions = positions
@@ -3,7 +3,10 @@
 
 import os
 import sys
+import time
+import thread
 import locale
+import threading
 import collections
 
 import paste.webkit
@@ -105,6 +108,15 @@ class OrderedSet(collections.MutableSet):
             prev[NEXT] = nxt
             nxt[PREV] = prev
 
+    def addAfter(self, key, previous=None):
+        """Adds a key immediately after another key of the set, or first
+        if C{previous} is C{None}. A key already in the set is moved.
+        """
+        self.discard(key)
+        curr = self.end if previous is None else self.map[previous]
+        nxt = curr[NEXT]
+        curr[NEXT] = nxt[PREV] = self.map[key] = [key, curr, nxt]
+
     def __iter__(self):
         end = self.end
         curr = end[NEXT]
@@ -119,6 +131,14 @@ class OrderedSet(collections.MutableSet):
             yield curr[KEY]
             curr = curr[PREV]
 
+    def clear(self):
+        # unlinks the nodes at once instead of popping them one by one
+        for node in self.map.itervalues():
+            del node[:]
+        self.map.clear()
+        end = self.end
+        end[PREV] = end[NEXT] = end
+
     def pop(self, last=True):
         if not self:
             raise KeyError('set is empty')
@@ -136,5 +156,110 @@ class OrderedSet(collections.MutableSet):
             return len(self) == len(other) and list(self) == list(other)
         return set(self) == set(other)
 
+    def __reduce__(self):
+        # the linked nodes are too deeply nested to be pickled
+        return (self.__class__, (list(self),))
+
     def __del__(self):
         self.clear()                    # remove circular references
+
+
+class ReentrantLock(object):
+    """A re-entrant lock, like C{threading.RLock}, that can be acquired
+    with a timeout. Can be used in a C{with} statement.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._owner = None
+        self._count = 0
+
+
+    def acquire(self, blocking=True, timeout=None):
+        """Acquires the lock, waiting at most C{timeout} seconds for other
+        threads to release it if a timeout is given.
+
+        @return: true if the lock was acquired
+        """
+        me = thread.get_ident()
+        self._condition.acquire()
+        try:
+            if self._owner == me:
+                self._count += 1
+                return True
+
+            if self._owner is not None:
+                if not blocking:
+                    return False
+
+                if timeout is None:
+                    while self._owner is not None:
+                        self._condition.wait()
+                else:
+                    end = time.time() + timeout
+                    while self._owner is not None:
+                        remaining = end - time.time()
+                        if remaining <= 0:
+                            return False
+                        self._condition.wait(remaining)
+
+            self._owner = me
+            self._count = 1
+            return True
+        finally:
+            self._condition.release()
+
+
+    def release(self):
+        self._condition.acquire()
+        try:
+            if self._owner != thread.get_ident():
+                raise RuntimeError, 'cannot release un-acquired lock'
+            self._count -= 1
+            if self._count == 0:
+                self._owner = None
+                self._condition.notify()
+        finally:
+            self._condition.release()
+
+
+    def releaseAll(self):
+        """Releases the lock however many times the current thread has
+        acquired it.
+
+        @return: the number of times the lock was held, to be passed to
+                 L{reacquire}
+        """
+        self._condition.acquire()
+        try:
+            if self._owner != thread.get_ident():
+                return 0
+            count = self._count
+            self._count = 0
+            self._owner = None
+            self._condition.notify()
+            return count
+        finally:
+            self._condition.release()
+
+
+    def reacquire(self, count):
+        """Acquires the lock as many times as it was held before calling
+        L{releaseAll}.
+        """
+        if count > 0:
+            self.acquire()
+            self._count = count
+
+
+    def isHeldByCurrentThread(self):
+        return self._owner == thread.get_ident()
+
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+
+    def __exit__(self, typ, value, tb):
+        self.release()